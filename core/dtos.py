@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import TypedDict
+from typing import Optional, TypedDict
 
 try:
     # Python 3.11+
@@ -28,6 +28,7 @@ class TrackState(TypedDict, total=False):
     track_id: NotRequired[int]
     track_external_id: NotRequired[str]
     scenario_id: NotRequired[int]
+    sample_t: NotRequired[Optional[datetime]]  # newest TrackSample.t used; None = snapshot
 
     # optional precomputed components
     vx_mps: NotRequired[float]
@@ -0,0 +1,83 @@
+# core/middleware.py
+from __future__ import annotations
+
+import hmac
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from core.utils import metrics, profiling
+
+
+class MetricsMiddleware:
+    """
+    Per-endpoint latency and SQL query count (core.utils.metrics, GET /metrics).
+    The endpoint label is the resolved URL name (namespace:name), so label
+    cardinality stays bounded; unresolved paths are reported as "unmatched".
+    Streaming bodies are timed up to the response headers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "TEWA_METRICS_ENABLED", True):
+            return self.get_response(request)
+
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        endpoint = (match.view_name or match.url_name or "unnamed") if match else "unmatched"
+        metrics.HTTP_SECONDS.observe(
+            elapsed, endpoint=endpoint, method=request.method,
+            status=f"{response.status_code // 100}xx")
+        metrics.HTTP_QUERIES.observe(queries[0], endpoint=endpoint)
+        return response
+
+
+def profiling_token_ok(request) -> bool:
+    """True when the request carries TEWA_PROFILE_HEADER with TEWA_PROFILE_TOKEN."""
+    token = getattr(settings, "TEWA_PROFILE_TOKEN", "")
+    value = request.headers.get(getattr(settings, "TEWA_PROFILE_HEADER", "X-Tewa-Profile"))
+    return bool(token and value and hmac.compare_digest(value, token))
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in per-request profiling (core.utils.profiling, GET /profiles/).
+    Triggered by `?_profile=cprofile|sample` (or `=1`) for staff users, or by
+    TEWA_PROFILE_HEADER carrying TEWA_PROFILE_TOKEN for any caller. Untriggered
+    requests pay two dict lookups; the user is only loaded when `_profile` is
+    present. The capture id comes back in the X-Tewa-Profile-Id header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.GET.get("_profile")
+        header = getattr(settings, "TEWA_PROFILE_HEADER", "X-Tewa-Profile")
+        if mode is None and header not in request.headers:
+            return self.get_response(request)
+        if not getattr(settings, "TEWA_PROFILE_ENABLED", True):
+            return self.get_response(request)
+        if not (profiling_token_ok(request)
+                or (mode is not None and getattr(request.user, "is_staff", False))):
+            return self.get_response(request)
+
+        response, capture_id = profiling.capture(
+            request, self.get_response,
+            mode if mode in profiling.MODES else profiling.default_mode())
+        if capture_id:
+            response["X-Tewa-Profile-Id"] = capture_id
+        return response
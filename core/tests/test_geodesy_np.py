@@ -0,0 +1,79 @@
+# core/tests/test_geodesy_np.py
+import random
+
+import pytest
+
+from core.utils import geodesy as g
+
+np = pytest.importorskip("numpy")
+gn = pytest.importorskip("core.utils.geodesy_np")
+
+
+def _points(n=500, seed=3):
+    rng = random.Random(seed)
+    pts = [(rng.uniform(-80, 80), rng.uniform(-180, 180)) for _ in range(n)]
+    pts += [(0.0, 179.9), (0.0, -179.9), (89.0, 0.0), (-89.0, 45.0)]  # antimeridian, near poles
+    lat = np.array([p[0] for p in pts])
+    lon = np.array([p[1] for p in pts])
+    return lat, lon
+
+
+def test_array_functions_match_scalar_geodesy():
+    lat1, lon1 = _points(seed=3)
+    lat2, lon2 = _points(seed=4)
+    lat2 = (lat1 + (lat2 - lat1) * 0.01)  # nearby points for ENU round-trips
+    lon2 = (lon1 + (lon2 - lon1) * 0.01)
+    brg = np.linspace(0.0, 359.0, lat1.size)
+    dist = np.linspace(0.0, 500_000.0, lat1.size)
+
+    hav = gn.haversine_distance_m(lat1, lon1, lat2, lon2)
+    ib = gn.initial_bearing_deg(lat1, lon1, lat2, lon2)
+    dlat, dlon = gn.destination_point(lat1, lon1, brg, dist)
+    east, north = gn.enu_from_latlon(lat2, lon2, lat1, lon1)
+    blat, blon = gn.latlon_from_enu(east, north, lat1, lon1)
+
+    for i in range(lat1.size):
+        a, b = g.LatLon(lat1[i], lon1[i]), g.LatLon(lat2[i], lon2[i])
+        assert hav[i] == pytest.approx(g.haversine_distance_m(a, b), rel=1e-9, abs=1e-6)
+        assert ib[i] == pytest.approx(g.initial_bearing_deg(a, b), abs=1e-9)
+        d = g.destination_point(a, brg[i], dist[i])
+        assert (dlat[i], dlon[i]) == pytest.approx((d.lat, d.lon), abs=1e-9)
+        e, n = g.enu_from_latlon(b, a)
+        assert (east[i], north[i]) == pytest.approx((e, n), rel=1e-9, abs=1e-6)
+        r = g.latlon_from_enu(e, n, a)
+        assert (blat[i], blon[i]) == pytest.approx((r.lat, r.lon), abs=1e-9)
+
+
+def test_broadcasting_and_final_bearing():
+    lat0 = np.array([10.0, 20.0, 30.0])[:, None]
+    lon0 = np.array([0.0, 5.0, 10.0])[:, None]
+    dist = np.array([0.0, 1_000.0, 100_000.0])[None, :]
+
+    lat, lon = gn.destination_point(lat0, lon0, 45.0, dist)
+
+    assert lat.shape == lon.shape == (3, 3)
+    np.testing.assert_allclose(lat[:, 0], lat0[:, 0])
+    np.testing.assert_allclose(gn.haversine_distance_m(lat0, lon0, lat, lon),
+                               np.broadcast_to(dist, (3, 3)), atol=1e-6)
+    # Heading north-east from the northern hemisphere, the course turns east
+    course = gn.final_bearing_deg(lat0, lon0, lat[:, 2:], lon[:, 2:])
+    assert np.all((course > 45.0) & (course < 50.0))
+
+
+def test_vincenty_matches_scalar_and_reference():
+    # Flinders Peak -> Buninyong (Vincenty 1975)
+    p1 = g.LatLon(-(37 + 57 / 60 + 3.72030 / 3600), 144 + 25 / 60 + 29.52440 / 3600)
+    p2 = g.LatLon(-(37 + 39 / 60 + 10.15610 / 3600), 143 + 55 / 60 + 35.38390 / 3600)
+    d, az1, az2 = g.vincenty_inverse(p1, p2)
+    assert d == pytest.approx(54972.271, abs=1e-3)
+    assert az1 == pytest.approx(306.86816, abs=1e-5)
+
+    lat1, lon1 = _points(seed=5)
+    lat2, lon2 = _points(seed=6)
+    lat2 = lat1 + (lat2 - lat1) * 0.1
+    lon2 = lon1 + (lon2 - lon1) * 0.1
+    s, a1, a2 = gn.vincenty_inverse(lat1, lon1, lat2, lon2)
+    for i in range(lat1.size):
+        ref = g.vincenty_inverse(g.LatLon(lat1[i], lon1[i]), g.LatLon(lat2[i], lon2[i]))
+        assert (s[i], a1[i], a2[i]) == pytest.approx(ref, rel=1e-9, abs=1e-6)
+    assert gn.vincenty_inverse(10.0, 20.0, 10.0, 20.0)[0] == 0.0
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+from core.utils import metrics
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry(settings):
+    settings.TEWA_METRICS_DIR = ""
+    metrics.REGISTRY.reset()
+    yield
+    metrics.REGISTRY.reset()
+
+
+def _line(text, prefix):
+    return next(line for line in text.splitlines() if line.startswith(prefix))
+
+
+def test_histogram_buckets_are_cumulative():
+    for v in (0.003, 0.02, 0.02, 7.0):
+        metrics.HTTP_SECONDS.observe(v, endpoint="e", method="GET", status="2xx")
+    text = metrics.render()
+
+    base = 'tewa_http_request_duration_seconds_bucket{endpoint="e",method="GET",status="2xx",'
+    assert _line(text, base + 'le="0.005"}').endswith(" 1")
+    assert _line(text, base + 'le="0.025"}').endswith(" 3")
+    assert _line(text, base + 'le="+Inf"}').endswith(" 4")
+    assert _line(text, "tewa_http_request_duration_seconds_count{").endswith(" 4")
+    assert "# TYPE tewa_http_request_duration_seconds histogram" in text
+
+
+def test_labels_must_match():
+    with pytest.raises(ValueError):
+        metrics.CACHE_REQUESTS.inc(cache="chart")
+
+
+def test_cache_hit_ratio_is_derived_from_counters():
+    for hit in (True, True, True, False):
+        metrics.record_cache("chart", hit)
+    text = metrics.render()
+    assert 'tewa_cache_requests_total{cache="chart",result="hit"} 3' in text
+    assert 'tewa_cache_hit_ratio{cache="chart"} 0.75' in text
+
+
+def test_multiprocess_dir_sums_every_worker(settings, tmp_path):
+    settings.TEWA_METRICS_DIR = str(tmp_path)
+    metrics.record_cache("chart", True)
+    metrics.INGEST_ROWS.inc(10, source="csv")
+    # Another worker's file, as written by Registry.flush()
+    other = {
+        "tewa_cache_requests_total": {json.dumps(["chart", "hit"]): 2.0,
+                                      json.dumps(["chart", "miss"]): 1.0},
+        "tewa_ingest_rows_total": {json.dumps(["csv"]): 5.0},
+    }
+    (tmp_path / "999999.json").write_text(json.dumps(other))
+
+    text = metrics.render()
+
+    assert 'tewa_cache_requests_total{cache="chart",result="hit"} 3' in text
+    assert 'tewa_ingest_rows_total{source="csv"} 15' in text
+    assert 'tewa_cache_hit_ratio{cache="chart"} 0.75' in text
+    assert any(p.name != "999999.json" for p in tmp_path.glob("*.json"))  # ours was flushed
+
+
+def test_disabled_records_nothing(settings):
+    settings.TEWA_METRICS_ENABLED = False
+    metrics.record_cache("chart", True)
+    assert "tewa_cache_requests_total{" not in metrics.render()
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_reports_request_latency_and_queries(client):
+    assert client.get(reverse("core:db_ping")).status_code == 200
+    resp = client.get(reverse("core:metrics"))
+
+    assert resp.status_code == 200
+    assert resp["Content-Type"].startswith("text/plain; version=0.0.4")
+    text = resp.content.decode()
+    assert 'tewa_http_request_duration_seconds_count{endpoint="core:db_ping",method="GET",status="2xx"} 1' in text
+    assert _line(text, 'tewa_http_request_db_queries_sum{endpoint="core:db_ping"}').endswith(" 1")
+
+
+def test_compute_timer_feeds_compute_histograms():
+    from tewa.services.instrumentation import start_timer
+
+    with start_timer("compute_test") as timer:
+        timer.count("pairs", 100)
+    text = metrics.render()
+    assert 'tewa_compute_duration_seconds_count{run="compute_test"} 1' in text
+    assert 'tewa_compute_pairs_per_second_count{run="compute_test"} 1' in text
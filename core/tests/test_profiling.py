@@ -0,0 +1,74 @@
+import marshal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+
+@pytest.fixture(autouse=True)
+def _profile_dir(settings, tmp_path):
+    settings.TEWA_PROFILE_DIR = str(tmp_path)
+    settings.TEWA_PROFILE_TOKEN = "s3cret"
+    return tmp_path
+
+
+@pytest.fixture
+def staff_client(client):
+    user = get_user_model().objects.create_user("ops", password="pw", is_staff=True)
+    client.force_login(user)
+    return client
+
+
+@pytest.mark.django_db
+def test_untriggered_and_unauthorized_requests_are_not_profiled(client, _profile_dir):
+    url = reverse("core:db_ping")
+    assert "X-Tewa-Profile-Id" not in client.get(url)
+    assert "X-Tewa-Profile-Id" not in client.get(url, {"_profile": "cprofile"})  # not staff
+    assert "X-Tewa-Profile-Id" not in client.get(url, HTTP_X_TEWA_PROFILE="wrong")
+    assert not list(_profile_dir.iterdir())
+    assert client.get(reverse("core:profiles")).status_code == 403
+
+
+@pytest.mark.django_db
+def test_staff_cprofile_capture_is_listed_and_downloadable(staff_client):
+    resp = staff_client.get(reverse("core:db_ping"), {"_profile": "cprofile"})
+    pid = resp["X-Tewa-Profile-Id"]
+
+    listed = staff_client.get(reverse("core:profiles")).json()["profiles"]
+    assert [p["id"] for p in listed] == [pid]
+    assert listed[0]["view"] == "core:db_ping" and "sql" not in listed[0]
+
+    detail = staff_client.get(reverse("core:profile_detail", args=[pid])).json()
+    assert detail["mode"] == "cprofile" and detail["status"] == 200
+    assert any("SELECT 1" in q["sql"] for q in detail["sql"])
+    assert detail["queries"] >= 1 and detail["top"]
+
+    dl = staff_client.get(reverse("core:profile_download", args=[pid]))
+    assert dl.status_code == 200
+    assert isinstance(marshal.loads(b"".join(dl.streaming_content)), dict)  # pstats dump
+
+
+@pytest.mark.django_db
+def test_token_header_sampling_capture(client, settings):
+    settings.TEWA_PROFILE_MODE = "sample"
+    settings.TEWA_PROFILE_SAMPLE_INTERVAL_S = 0.001
+    resp = client.get(reverse("core:db_ping"), HTTP_X_TEWA_PROFILE="s3cret")
+    pid = resp["X-Tewa-Profile-Id"]
+
+    detail = client.get(reverse("core:profile_detail", args=[pid]),
+                        HTTP_X_TEWA_PROFILE="s3cret").json()
+    assert detail["mode"] == "sample"
+    dl = client.get(reverse("core:profile_download", args=[pid]), HTTP_X_TEWA_PROFILE="s3cret")
+    assert dl["Content-Disposition"].endswith(f'{pid}.folded"')
+
+
+@pytest.mark.django_db
+def test_ring_keeps_newest_entries(staff_client, settings, _profile_dir):
+    settings.TEWA_PROFILE_MAX_ENTRIES = 2
+    ids = [staff_client.get(reverse("core:health"), {"_profile": "1"})["X-Tewa-Profile-Id"]
+           for _ in range(3)]
+
+    listed = [p["id"] for p in staff_client.get(reverse("core:profiles")).json()["profiles"]]
+    assert listed == ids[:0:-1]
+    assert len(list(_profile_dir.glob("*.prof"))) == 2
+    assert staff_client.get(reverse("core:profile_detail", args=["..etc"])).status_code == 404
@@ -3,7 +3,16 @@ from django.contrib import admin
 from django.urls import path
 from django.views.generic import TemplateView
 
-from .views import api_root, db_ping, health, index
+from .views import (
+    api_root,
+    db_ping,
+    health,
+    index,
+    metrics,
+    profile_detail,
+    profile_download,
+    profiles,
+)
 
 app_name = "core"
 
@@ -11,6 +20,10 @@ urlpatterns = [
     path("", index, name="index"),                               # GET /
     path("health/", health, name="health"),                      # GET /health/
     path("db-ping/", db_ping, name="db_ping"),                   # GET /db-ping/
+    path("metrics", metrics, name="metrics"),                    # GET /metrics
+    path("profiles/", profiles, name="profiles"),                # GET /profiles/
+    path("profiles/<str:profile_id>/", profile_detail, name="profile_detail"),
+    path("profiles/<str:profile_id>/download", profile_download, name="profile_download"),
     path("api/", api_root, name="api_root"),                     # GET /api/
     # GET /api/health/
     path("api/health/", health, name="api_health"),
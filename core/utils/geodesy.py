@@ -93,3 +93,50 @@ def latlon_from_enu(east_m: float, north_m: float, origin: LatLon) -> LatLon:
     lat = lat0 + north_m / WGS84_R_MEAN
     lon = lon0 + east_m / (WGS84_R_MEAN * math.cos((lat + lat0) * 0.5))
     return LatLon(rad2deg(lat), rad2deg(lon))
+
+# ---------------- Ellipsoidal (WGS-84, Vincenty inverse) ----------------
+
+
+def vincenty_inverse(p1: LatLon, p2: LatLon, max_iter: int = 200) -> tuple[float, float, float]:
+    """
+    Geodesic between two points on the WGS-84 ellipsoid (Vincenty 1975).
+    Returns (distance_m, initial_bearing_deg at p1, final_bearing_deg at p2).
+    Sub-millimetre except for nearly antipodal points, where the iteration
+    may stop before converging (error then stays below ~0.1 %).
+    """
+    a, f, b = WGS84_A, WGS84_F, WGS84_B
+    L = deg2rad(p2.lon - p1.lon)
+    U1 = math.atan((1 - f) * math.tan(deg2rad(p1.lat)))
+    U2 = math.atan((1 - f) * math.tan(deg2rad(p2.lat)))
+    sinU1, cosU1, sinU2, cosU2 = math.sin(U1), math.cos(U1), math.sin(U2), math.cos(U2)
+
+    lam = L
+    sin_sigma = cos_sigma = sigma = cos2_alpha = cos_2sm = 0.0
+    sin_lam = cos_lam = 0.0
+    for _ in range(max_iter):
+        sin_lam, cos_lam = math.sin(lam), math.cos(lam)
+        sin_sigma = math.hypot(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+        if sin_sigma == 0.0:
+            return 0.0, 0.0, 0.0  # coincident points
+        cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+        sigma = math.atan2(sin_sigma, cos_sigma)
+        sin_alpha = cosU1 * cosU2 * sin_lam / sin_sigma
+        cos2_alpha = 1 - sin_alpha * sin_alpha
+        cos_2sm = cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha if cos2_alpha else 0.0
+        C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        lam_prev = lam
+        lam = L + (1 - C) * f * sin_alpha * (
+            sigma + C * sin_sigma * (cos_2sm + C * cos_sigma * (-1 + 2 * cos_2sm * cos_2sm)))
+        if abs(lam - lam_prev) < 1e-12:
+            break
+
+    u2 = cos2_alpha * (a * a - b * b) / (b * b)
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    d_sigma = B * sin_sigma * (cos_2sm + B / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sm * cos_2sm)
+        - B / 6 * cos_2sm * (-3 + 4 * sin_sigma * sin_sigma) * (-3 + 4 * cos_2sm * cos_2sm)))
+    s = b * A * (sigma - d_sigma)
+    a1 = math.atan2(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+    a2 = math.atan2(cosU1 * sin_lam, -sinU1 * cosU2 + cosU1 * sinU2 * cos_lam)
+    return s, (rad2deg(a1) + 360.0) % 360.0, (rad2deg(a2) + 360.0) % 360.0
@@ -0,0 +1,127 @@
+# core/utils/geodesy_np.py
+"""
+Array counterparts of core.utils.geodesy (same formulas, same constants).
+
+Inputs are array-likes in degrees / meters that broadcast against each other
+(scalars work too); outputs are float64 ndarrays. No LatLon objects are built,
+so whole batches (ingest, sampling, kinematics, heatmaps) go through in one call:
+
+    lat, lon = destination_point(lat0[:, None], lon0[:, None], hdg[:, None], dist[None, :])
+
+Requires NumPy; callers that must run without it keep using core.utils.geodesy.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+from .geodesy import WGS84_A, WGS84_B, WGS84_F, WGS84_R_MEAN
+
+__all__ = [
+    "haversine_distance_m",
+    "initial_bearing_deg",
+    "final_bearing_deg",
+    "destination_point",
+    "enu_from_latlon",
+    "latlon_from_enu",
+    "vincenty_inverse",
+]
+
+
+def _f(x) -> np.ndarray:
+    return np.asarray(x, dtype=float)
+
+
+def haversine_distance_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance (m) on a sphere of R_mean."""
+    p1, p2 = np.radians(_f(lat1)), np.radians(_f(lat2))
+    dlat = p2 - p1
+    dlon = np.radians(_f(lon2) - _f(lon1))
+    h = np.sin(dlat / 2) ** 2 + np.cos(p1) * np.cos(p2) * np.sin(dlon / 2) ** 2
+    return 2 * WGS84_R_MEAN * np.arcsin(np.minimum(1.0, np.sqrt(h)))
+
+
+def initial_bearing_deg(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Forward azimuth from point 1 to point 2 in degrees [0, 360), 0 = North."""
+    p1, p2 = np.radians(_f(lat1)), np.radians(_f(lat2))
+    dlon = np.radians(_f(lon2) - _f(lon1))
+    x = np.sin(dlon) * np.cos(p2)
+    y = np.cos(p1) * np.sin(p2) - np.sin(p1) * np.cos(p2) * np.cos(dlon)
+    return (np.degrees(np.arctan2(x, y)) + 360.0) % 360.0
+
+
+def final_bearing_deg(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Course on arrival at point 2 when following the great circle from point 1."""
+    return (initial_bearing_deg(lat2, lon2, lat1, lon1) + 180.0) % 360.0
+
+
+def destination_point(lat, lon, bearing_deg, distance_m):
+    """Move distance_m along a great circle at bearing_deg; returns (lat, lon)."""
+    d = _f(distance_m) / WGS84_R_MEAN
+    th = np.radians(_f(bearing_deg))
+    p1, l1 = np.radians(_f(lat)), np.radians(_f(lon))
+    sin_p2 = np.sin(p1) * np.cos(d) + np.cos(p1) * np.sin(d) * np.cos(th)
+    p2 = np.arcsin(np.clip(sin_p2, -1.0, 1.0))
+    y = np.sin(th) * np.sin(d) * np.cos(p1)
+    x = np.cos(d) - np.sin(p1) * sin_p2
+    l2 = l1 + np.arctan2(y, x)
+    return np.degrees(p2), (np.degrees(l2) + 540.0) % 360.0 - 180.0
+
+
+def enu_from_latlon(lat, lon, lat0, lon0):
+    """Equirectangular (east, north) in meters of points around an origin."""
+    la, la0 = np.radians(_f(lat)), np.radians(_f(lat0))
+    dlon = np.radians(_f(lon)) - np.radians(_f(lon0))
+    east = WGS84_R_MEAN * dlon * np.cos((la + la0) * 0.5)
+    north = WGS84_R_MEAN * (la - la0)
+    return east, north
+
+
+def latlon_from_enu(east_m, north_m, lat0, lon0):
+    """Inverse of enu_from_latlon; returns (lat, lon)."""
+    la0, lo0 = np.radians(_f(lat0)), np.radians(_f(lon0))
+    la = la0 + _f(north_m) / WGS84_R_MEAN
+    lo = lo0 + _f(east_m) / (WGS84_R_MEAN * np.cos((la + la0) * 0.5))
+    return np.degrees(la), np.degrees(lo)
+
+
+def vincenty_inverse(lat1, lon1, lat2, lon2, max_iter: int = 200):
+    """
+    WGS-84 geodesic (Vincenty inverse) over arrays; returns (distance_m,
+    initial bearing at point 1, final bearing at point 2) in meters / degrees.
+    Iterates until every element has converged (or max_iter).
+    """
+    a, f, b = WGS84_A, WGS84_F, WGS84_B
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(_f(lat1), _f(lon1), _f(lat2), _f(lon2))
+    L = np.radians(lon2 - lon1)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sinU1, cosU1, sinU2, cosU2 = np.sin(U1), np.cos(U1), np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for _ in range(max_iter):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+            cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(sin_sigma > 0, cosU1 * cosU2 * sin_lam / sin_sigma, 0.0)
+            cos2_alpha = 1 - sin_alpha * sin_alpha
+            cos_2sm = np.where(cos2_alpha != 0,
+                               cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha, 0.0)
+            C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_prev = lam
+            lam = L + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sm + C * cos_sigma * (-1 + 2 * cos_2sm * cos_2sm)))
+            if np.all(np.abs(lam - lam_prev) < 1e-12):
+                break
+
+    u2 = cos2_alpha * (a * a - b * b) / (b * b)
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    d_sigma = B * sin_sigma * (cos_2sm + B / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sm * cos_2sm)
+        - B / 6 * cos_2sm * (-3 + 4 * sin_sigma * sin_sigma) * (-3 + 4 * cos_2sm * cos_2sm)))
+    s = np.where(sin_sigma > 0, b * A * (sigma - d_sigma), 0.0)
+    a1 = np.arctan2(cosU2 * sin_lam, cosU1 * sinU2 - sinU1 * cosU2 * cos_lam)
+    a2 = np.arctan2(cosU1 * sin_lam, -sinU1 * cosU2 + cosU1 * sinU2 * cos_lam)
+    return s, (np.degrees(a1) + 360.0) % 360.0, (np.degrees(a2) + 360.0) % 360.0
@@ -0,0 +1,343 @@
+# core/utils/metrics.py
+"""
+Minimal in-process metrics registry rendered in the Prometheus text
+exposition format (GET /metrics), with no client library or push gateway.
+
+    from core.utils import metrics
+    metrics.HTTP_SECONDS.observe(0.012, endpoint="tewa_api:ranking", method="GET", status="2xx")
+    metrics.CACHE_REQUESTS.inc(cache="chart", result="hit")
+
+Counters and histograms only; each sample is keyed by its label values.
+
+Multiple worker processes (gunicorn): set TEWA_METRICS_DIR to a directory
+shared by the workers and emptied at deploy start. Each process writes its
+own values to <dir>/<pid>.json (atomically, at most every TEWA_METRICS_FLUSH_S
+seconds, from a daemon thread) and /metrics sums every file, so a scrape sees
+all workers whichever one serves it. Files of exited workers are kept, which
+keeps counters monotonic across worker restarts. Without a directory the
+registry is per process.
+"""
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+RATE_BUCKETS = (10.0, 100.0, 1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6)
+QUERY_BUCKETS = (0.0, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0, 1000.0)
+AGE_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {list(self.labelnames)}, got {sorted(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        REGISTRY.update(self, self._key(labels), amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value: float, **labels: object) -> None:
+        if value is None or math.isnan(value):
+            return
+        REGISTRY.update(self, self._key(labels), float(value))
+
+
+class Registry:
+    """
+    Values of every metric in this process. Histogram samples are stored as
+    [per-bucket counts..., +Inf count, sum]; bucket counts are not cumulative
+    until rendered, so samples from several processes add up directly.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._values: Dict[str, Dict[LabelValues, object]] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            self._values[metric.name] = {}
+        return metric
+
+    def update(self, metric: _Metric, key: LabelValues, value: float) -> None:
+        if not getattr(settings, "TEWA_METRICS_ENABLED", True):
+            return
+        with self._lock:
+            if os.getpid() != self._pid:
+                # Forked worker: the parent's values are the parent's to report
+                self._reset_locked()
+            samples = self._values[metric.name]
+            if isinstance(metric, Histogram):
+                row = samples.get(key)
+                if row is None:
+                    row = samples[key] = [0.0] * (len(metric.buckets) + 2)
+                idx = next((i for i, b in enumerate(metric.buckets) if value <= b),
+                           len(metric.buckets))
+                row[idx] += 1  # type: ignore[index]
+                row[-1] += value  # type: ignore[index]
+            else:
+                samples[key] = float(samples.get(key, 0.0)) + value  # type: ignore[arg-type]
+            self._dirty = True
+        self._ensure_flusher()
+
+    def _reset_locked(self) -> None:
+        self._pid = os.getpid()
+        self._values = {name: {} for name in self._metrics}
+        self._flusher = None
+
+    def reset(self) -> None:
+        """Drop this process's values (tests)."""
+        with self._lock:
+            self._reset_locked()
+            self._dirty = False
+
+    # ---------------- multiprocess files ----------------
+
+    def _ensure_flusher(self) -> None:
+        if not metrics_dir() or (self._flusher is not None and self._flusher.is_alive()):
+            return
+        with self._lock:
+            if self._flusher is not None and self._flusher.is_alive():
+                return
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="tewa-metrics-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        pid = os.getpid()
+        while os.getpid() == pid:
+            time.sleep(float(getattr(settings, "TEWA_METRICS_FLUSH_S", 1.0)))
+            self.flush()
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {
+                name: {json.dumps(list(k)): (list(v) if isinstance(v, list) else v)
+                       for k, v in samples.items()}
+                for name, samples in self._values.items()
+                if samples
+            }
+
+    def flush(self) -> None:
+        """Write this process's values to <TEWA_METRICS_DIR>/<pid>.json if anything changed."""
+        directory = metrics_dir()
+        if not directory or not self._dirty:
+            return
+        with self._lock:
+            self._dirty = False
+        data = self.snapshot()
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, directory / f"{os.getpid()}.json")
+        except OSError:
+            self._dirty = True
+            logger.exception("Could not write metrics to %s", directory)
+
+    def collect(self) -> Dict[str, Dict[LabelValues, object]]:
+        """Values summed over every process file (or this process alone)."""
+        directory = metrics_dir()
+        if not directory:
+            with self._lock:
+                return {n: {k: (list(v) if isinstance(v, list) else v) for k, v in s.items()}
+                        for n, s in self._values.items()}
+
+        self._dirty = True  # this process's file must be current for the scrape
+        self.flush()
+        merged: Dict[str, Dict[LabelValues, object]] = {n: {} for n in self._metrics}
+        for path in sorted(directory.glob("*.json")):
+            if path.name.startswith("."):
+                continue
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # being replaced or truncated: next scrape picks it up
+            for name, samples in data.items():
+                if name not in merged:
+                    continue
+                into = merged[name]
+                for raw_key, value in samples.items():
+                    key = tuple(json.loads(raw_key))
+                    have = into.get(key)
+                    if have is None:
+                        into[key] = list(value) if isinstance(value, list) else value
+                    elif isinstance(have, list) and isinstance(value, list) and len(have) == len(value):
+                        into[key] = [a + b for a, b in zip(have, value)]
+                    elif not isinstance(have, list):
+                        into[key] = float(have) + float(value)
+        return merged
+
+    # ---------------- exposition ----------------
+
+    def render(self) -> str:
+        values = self.collect()
+        out: List[str] = []
+        for name, metric in sorted(self._metrics.items()):
+            out.append(f"# HELP {name} {metric.doc}")
+            out.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(values.get(name, {}).items()):
+                labels = dict(zip(metric.labelnames, key))
+                if isinstance(metric, Histogram):
+                    out.extend(_histogram_lines(metric, labels, value))  # type: ignore[arg-type]
+                else:
+                    out.append(f"{name}{_fmt_labels(labels)} {_fmt(value)}")  # type: ignore[arg-type]
+        out.extend(_cache_hit_ratio_lines(values.get(CACHE_REQUESTS.name, {})))
+        return "\n".join(out) + "\n"
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _fmt(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+def _histogram_lines(metric: Histogram, labels: Dict[str, str], row: List[float]) -> Iterable[str]:
+    cumulative = 0.0
+    for bound, n in zip(metric.buckets + (math.inf,), row[:-1]):
+        cumulative += n
+        yield f"{metric.name}_bucket{_fmt_labels({**labels, 'le': _fmt(bound)})} {_fmt(cumulative)}"
+    yield f"{metric.name}_sum{_fmt_labels(labels)} {_fmt(row[-1])}"
+    yield f"{metric.name}_count{_fmt_labels(labels)} {_fmt(cumulative)}"
+
+
+def _cache_hit_ratio_lines(samples: Dict[LabelValues, object]) -> List[str]:
+    totals: Dict[str, Dict[str, float]] = {}
+    for (cache, result), n in samples.items():
+        totals.setdefault(cache, {}).setdefault(result, 0.0)
+        totals[cache][result] += float(n)  # type: ignore[arg-type]
+    lines = [
+        "# HELP tewa_cache_hit_ratio Hits / lookups since start, per cache",
+        "# TYPE tewa_cache_hit_ratio gauge",
+    ]
+    for cache, by in sorted(totals.items()):
+        lookups = by.get("hit", 0.0) + by.get("miss", 0.0)
+        if lookups:
+            lines.append(f"tewa_cache_hit_ratio{_fmt_labels({'cache': cache})} "
+                         f"{_fmt(by.get('hit', 0.0) / lookups)}")
+    return lines
+
+
+def metrics_dir() -> Optional[Path]:
+    raw = getattr(settings, "TEWA_METRICS_DIR", "") or ""
+    return Path(raw) if raw else None
+
+
+REGISTRY = Registry()
+atexit.register(REGISTRY.flush)
+
+
+def counter(name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, doc, labelnames))  # type: ignore[return-value]
+
+
+def histogram(
+    name: str,
+    doc: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = LATENCY_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, doc, labelnames, buckets))  # type: ignore[return-value]
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# ---------------------------------------------------------------------
+# Metrics the project reports
+# ---------------------------------------------------------------------
+
+HTTP_SECONDS = histogram(
+    "tewa_http_request_duration_seconds", "Request latency by endpoint (URL name)",
+    ("endpoint", "method", "status"), LATENCY_BUCKETS)
+HTTP_QUERIES = histogram(
+    "tewa_http_request_db_queries", "SQL queries per request by endpoint",
+    ("endpoint",), QUERY_BUCKETS)
+COMPUTE_SECONDS = histogram(
+    "tewa_compute_duration_seconds", "Wall time of one compute batch, by run type",
+    ("run",), DURATION_BUCKETS)
+COMPUTE_PAIRS_PER_S = histogram(
+    "tewa_compute_pairs_per_second", "Track-DA pairs scored per second of a compute batch",
+    ("run",), RATE_BUCKETS)
+COMPUTE_QUERIES = histogram(
+    "tewa_compute_db_queries", "SQL queries per compute batch, by run type",
+    ("run",), QUERY_BUCKETS)
+INGEST_ROWS = counter(
+    "tewa_ingest_rows_total", "Track rows ingested, by source", ("source",))
+INGEST_ROWS_PER_S = histogram(
+    "tewa_ingest_rows_per_second", "Rows per second of one ingest call, by source",
+    ("source",), RATE_BUCKETS)
+SCORE_FRESHNESS = histogram(
+    "tewa_score_freshness_seconds",
+    "Score computed_at minus the timestamp of its source track sample",
+    (), AGE_BUCKETS)
+CACHE_REQUESTS = counter(
+    "tewa_cache_requests_total", "Cache lookups by cache and result (hit|miss)",
+    ("cache", "result"))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -0,0 +1,306 @@
+# core/utils/profiling.py
+"""
+Opt-in per-request profiling (see core.middleware.ProfilingMiddleware).
+
+A triggered request runs its view under a profiler and leaves one capture in
+TEWA_PROFILE_DIR, a ring of at most TEWA_PROFILE_MAX_ENTRIES captures (oldest
+dropped first). Each capture is two files sharing an id:
+
+    <id>.json     request, status, wall/CPU time, SQL log, stage timings
+                  (tewa_timings log records, logged at INFO) and the top functions
+    <id>.prof     cProfile stats (mode "cprofile"; `python -m pstats`, snakeviz)
+    <id>.folded   collapsed stacks (mode "sample"; flamegraph.pl, speedscope)
+
+Modes:
+- cprofile : deterministic, every call; adds noticeable overhead to hot loops.
+  One cProfile capture at a time per process; a concurrent one is skipped.
+- sample   : a thread reads the request thread's stack every
+  TEWA_PROFILE_SAMPLE_INTERVAL_S; cheap, statistical.
+
+Requests that are not triggered never reach this module.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cprofile", "sample")
+ARTIFACT_EXT = {"cprofile": ".prof", "sample": ".folded"}
+_ID_RE = re.compile(r"^[0-9]{8}T[0-9]{12}-[0-9a-f]{8}$")  # sortable: UTC time to the µs
+_SQL_MAX_CHARS = 2000
+_TOP_FUNCTIONS = 30
+
+_cprofile_lock = threading.Lock()
+
+
+def profile_dir() -> Path:
+    return Path(getattr(settings, "TEWA_PROFILE_DIR", "") or
+                Path(settings.BASE_DIR) / "var" / "profiles")
+
+
+def default_mode() -> str:
+    mode = getattr(settings, "TEWA_PROFILE_MODE", "cprofile")
+    return mode if mode in MODES else "cprofile"
+
+
+# ---------------------------------------------------------------------
+# Collectors
+# ---------------------------------------------------------------------
+
+class _SqlLog:
+    """connection.execute_wrapper hook: every statement with its duration."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.count = 0
+        self.total_s = 0.0
+        self.entries: List[Dict[str, Any]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.total_s += elapsed
+            if len(self.entries) < self.limit:
+                self.entries.append({
+                    "sql": sql[:_SQL_MAX_CHARS],
+                    "ms": round(elapsed * 1000.0, 3),
+                    "many": bool(many),
+                })
+
+
+class _TimingsHandler(logging.Handler):
+    """Collects StageTimer summaries (tewa_timings) logged by this thread."""
+
+    def __init__(self) -> None:
+        super().__init__(logging.DEBUG)
+        self.thread = threading.get_ident()
+        self.summaries: List[Dict[str, Any]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        summary = getattr(record, "tewa_timings", None)
+        if summary is not None and record.thread == self.thread:
+            self.summaries.append(summary)
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's Python stack at a fixed interval (folded stacks)."""
+
+    def __init__(self, thread_id: int, interval_s: float) -> None:
+        super().__init__(name="tewa-profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self._stop_evt = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_evt.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                             f"{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+        self.join()
+
+    def folded(self) -> bytes:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common()).encode()
+
+    def top(self) -> List[Dict[str, Any]]:
+        """Leaf frames by sample count (self time)."""
+        leaves: Counter = Counter()
+        for stack, n in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        total = sum(leaves.values()) or 1
+        return [{"function": f, "samples": n, "pct": round(100.0 * n / total, 1)}
+                for f, n in leaves.most_common(_TOP_FUNCTIONS)]
+
+
+def _cprofile_top(prof: cProfile.Profile) -> List[Dict[str, Any]]:
+    stats = pstats.Stats(prof, stream=io.StringIO()).sort_stats("cumulative")
+    rows = []
+    for func in stats.fcn_list[:_TOP_FUNCTIONS]:  # type: ignore[attr-defined]
+        cc, nc, tt, ct, _ = stats.stats[func]  # type: ignore[attr-defined]
+        filename, line, name = func
+        rows.append({
+            "function": f"{name} ({os.path.basename(filename)}:{line})",
+            "calls": nc,
+            "tottime_ms": round(tt * 1000.0, 3),
+            "cumtime_ms": round(ct * 1000.0, 3),
+        })
+    return rows
+
+
+# ---------------------------------------------------------------------
+# Capture
+# ---------------------------------------------------------------------
+
+def capture(request, get_response: Callable, mode: str) -> Tuple[Any, Optional[str]]:
+    """
+    Run get_response(request) under the profiler, store the capture and
+    return (response, capture id). The id is None when the capture was
+    skipped (another cProfile run in progress) or could not be written.
+    """
+    if mode == "cprofile" and not _cprofile_lock.acquire(blocking=False):
+        return get_response(request), None
+
+    sql = _SqlLog(int(getattr(settings, "TEWA_PROFILE_MAX_QUERIES", 500)))
+    timings = _TimingsHandler()
+    root = logging.getLogger()
+    root.addHandler(timings)
+    prof: Optional[cProfile.Profile] = None
+    sampler: Optional[_StackSampler] = None
+    try:
+        if mode == "cprofile":
+            prof = cProfile.Profile()
+        else:
+            sampler = _StackSampler(threading.get_ident(), float(
+                getattr(settings, "TEWA_PROFILE_SAMPLE_INTERVAL_S", 0.005)))
+            sampler.start()
+        wall0, cpu0 = time.perf_counter(), time.thread_time()
+        with connection.execute_wrapper(sql):
+            if prof is not None:
+                response = prof.runcall(get_response, request)
+            else:
+                response = get_response(request)
+        wall, cpu = time.perf_counter() - wall0, time.thread_time() - cpu0
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        root.removeHandler(timings)
+        if mode == "cprofile":
+            _cprofile_lock.release()
+
+    match = getattr(request, "resolver_match", None)
+    meta: Dict[str, Any] = {
+        "mode": mode,
+        "method": request.method,
+        "path": request.get_full_path(),
+        "view": (match.view_name if match else None),
+        "user": getattr(getattr(request, "user", None), "username", None) or None,
+        "status": response.status_code,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - wall)),
+        "wall_ms": round(wall * 1000.0, 3),
+        "cpu_ms": round(cpu * 1000.0, 3),
+        "queries": sql.count,
+        "sql_ms": round(sql.total_s * 1000.0, 3),
+        "stage_timings": timings.summaries,
+        "top": _cprofile_top(prof) if prof is not None else sampler.top(),  # type: ignore[union-attr]
+        "sql": sql.entries,
+        "sql_truncated": sql.count > len(sql.entries),
+    }
+    if prof is not None:
+        artifact = _dump_cprofile(prof)
+    else:
+        meta["samples"] = sum(sampler.stacks.values())  # type: ignore[union-attr]
+        artifact = sampler.folded()  # type: ignore[union-attr]
+    try:
+        return response, save(meta, artifact)
+    except OSError:
+        logger.warning("could not store profile in %s", profile_dir(), exc_info=True)
+        return response, None
+
+
+def _dump_cprofile(prof: cProfile.Profile) -> bytes:
+    fd, tmp = tempfile.mkstemp(suffix=".prof")
+    os.close(fd)
+    try:
+        prof.dump_stats(tmp)
+        return Path(tmp).read_bytes()
+    finally:
+        os.unlink(tmp)
+
+
+# ---------------------------------------------------------------------
+# Ring store
+# ---------------------------------------------------------------------
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def save(meta: Dict[str, Any], artifact: bytes) -> str:
+    """Store one capture, drop the oldest beyond the ring size, return its id."""
+    root = profile_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    pid = (f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}{int(now * 1e6) % 1_000_000:06d}"
+           f"-{uuid.uuid4().hex[:8]}")
+    meta = {"id": pid, **meta}
+    # Artifact first: a listed capture always has its download
+    _write_atomic(root / f"{pid}{ARTIFACT_EXT[meta['mode']]}", artifact)
+    _write_atomic(root / f"{pid}.json", json.dumps(meta, default=str).encode())
+    _prune(root, int(getattr(settings, "TEWA_PROFILE_MAX_ENTRIES", 50)))
+    return pid
+
+
+def _prune(root: Path, keep: int) -> None:
+    ids = sorted(p.stem for p in root.glob("*.json") if _ID_RE.match(p.stem))
+    for pid in ids[:max(0, len(ids) - keep)]:
+        for ext in (".json", *ARTIFACT_EXT.values()):
+            try:
+                (root / f"{pid}{ext}").unlink()
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Newest first, without the SQL log and function tables."""
+    root = profile_dir()
+    out = []
+    for p in sorted(root.glob("*.json"), reverse=True) if root.is_dir() else ():
+        if not _ID_RE.match(p.stem):
+            continue
+        try:
+            meta = json.loads(p.read_text())
+        except (OSError, ValueError):
+            continue  # pruned or half-written by another worker
+        out.append({k: v for k, v in meta.items() if k not in ("sql", "top", "stage_timings")})
+    return out
+
+
+def load(pid: str) -> Optional[Dict[str, Any]]:
+    if not _ID_RE.match(pid):
+        return None
+    try:
+        return json.loads((profile_dir() / f"{pid}.json").read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def artifact_path(pid: str) -> Optional[Path]:
+    meta = load(pid)
+    if meta is None:
+        return None
+    path = profile_dir() / f"{pid}{ARTIFACT_EXT.get(meta.get('mode'), '.prof')}"
+    return path if path.exists() else None
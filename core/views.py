@@ -1,7 +1,11 @@
 # core/views.py
 
 from django.db import connection
-from django.http import JsonResponse
+from django.http import FileResponse, HttpResponse, JsonResponse
+
+from core.middleware import profiling_token_ok
+from core.utils import metrics as metrics_registry
+from core.utils import profiling
 
 
 def index(request):
@@ -37,3 +41,41 @@ def db_ping(request):
         cur.execute("SELECT 1;")
         row = cur.fetchone()
     return JsonResponse({"db": "ok" if row == (1,) else "fail"})
+
+
+def metrics(request):
+    # Prometheus text exposition format (all workers when TEWA_METRICS_DIR is set)
+    return HttpResponse(metrics_registry.render(),
+                        content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _may_read_profiles(request) -> bool:
+    return getattr(request.user, "is_staff", False) or profiling_token_ok(request)
+
+
+def profiles(request):
+    # Stored request profiles, newest first (see core.utils.profiling)
+    if not _may_read_profiles(request):
+        return JsonResponse({"detail": "Staff only"}, status=403)
+    return JsonResponse({"profiles": profiling.list_profiles()})
+
+
+def profile_detail(request, profile_id):
+    # One capture: timings, SQL log, stage timings and top functions
+    if not _may_read_profiles(request):
+        return JsonResponse({"detail": "Staff only"}, status=403)
+    meta = profiling.load(profile_id)
+    if meta is None:
+        return JsonResponse({"detail": "Profile not found"}, status=404)
+    return JsonResponse(meta)
+
+
+def profile_download(request, profile_id):
+    # Raw profiler output: .prof (pstats) or .folded (collapsed stacks)
+    if not _may_read_profiles(request):
+        return JsonResponse({"detail": "Staff only"}, status=403)
+    path = profiling.artifact_path(profile_id)
+    if path is None:
+        return JsonResponse({"detail": "Profile not found"}, status=404)
+    return FileResponse(path.open("rb"), as_attachment=True, filename=path.name,
+                        content_type="application/octet-stream")
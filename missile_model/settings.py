@@ -65,6 +65,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.MetricsMiddleware",
+    "core.middleware.ProfilingMiddleware",
 ]
 
 # ---------------------------------------------------------------------
@@ -253,6 +255,89 @@ LOGGING = {
     },
 }
 
+# ---------------------------------------------------------------------
+# TEWA tuning
+# ---------------------------------------------------------------------
+# Rendered score-history PNG cache (per process, LRU)
+TEWA_CHART_CACHE_MAX_BYTES = int(
+    os.getenv("TEWA_CHART_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+TEWA_CHART_CACHE_MAX_ENTRIES = int(
+    os.getenv("TEWA_CHART_CACHE_MAX_ENTRIES", "512"))
+# Per-stage compute timings (logged by tewa.services.instrumentation and
+# returned with compute results); cheap enough to leave on
+TEWA_INSTRUMENTATION = os.getenv("TEWA_INSTRUMENTATION", "True").strip().lower() == "true"
+# Score breakdown read path: shaped payloads memoized per (scenario, DA, track)
+TEWA_BREAKDOWN_MEMO_SIZE = int(os.getenv("TEWA_BREAKDOWN_MEMO_SIZE", "1024"))
+# Per-DA kinematics frames (origin radians, scales, radius), per process
+TEWA_FRAME_CACHE_SIZE = int(os.getenv("TEWA_FRAME_CACHE_SIZE", "4096"))
+
+# Idempotency store for compute_now (see tewa/services/idempotency.py).
+# Defaults to the DatabaseCache table tewa_idempotency_cache, shared by every
+# worker on the same database; set TEWA_CACHE_URL (e.g. redis://localhost:6379/1)
+# to use a cache server instead.
+TEWA_IDEMPOTENCY_TTL_S = int(os.getenv("TEWA_IDEMPOTENCY_TTL_S", "3600"))
+TEWA_IDEMPOTENCY_WAIT_S = float(os.getenv("TEWA_IDEMPOTENCY_WAIT_S", "30"))
+TEWA_IDEMPOTENCY_LOCK_TTL_S = int(os.getenv("TEWA_IDEMPOTENCY_LOCK_TTL_S", "300"))
+_TEWA_CACHE_URL = os.getenv("TEWA_CACHE_URL", "").strip()
+
+# Identical concurrent compute_at / calculate_scores requests share one compute;
+# the result is reused for this many seconds (0 disables reuse, keeps coalescing)
+TEWA_SINGLEFLIGHT_TTL_S = float(os.getenv("TEWA_SINGLEFLIGHT_TTL_S", "2"))
+
+# Async compute jobs (async=true on compute_now / compute_at / HTML compute):
+# "thread" (in-process pool), "celery" (tewa.tasks.run_compute_job) or "eager"
+TEWA_COMPUTE_JOBS_BACKEND = os.getenv("TEWA_COMPUTE_JOBS_BACKEND", "thread")
+TEWA_COMPUTE_JOB_WORKERS = int(os.getenv("TEWA_COMPUTE_JOB_WORKERS", "2"))
+# Unfinished jobs with no heartbeat for this long are failed (their worker is
+# gone); keep it above TEWA_SCENARIO_LOCK_TIMEOUT_S, which a job may spend waiting
+TEWA_COMPUTE_JOB_STALE_S = float(os.getenv("TEWA_COMPUTE_JOB_STALE_S", "1800"))
+# Per-scenario run lock (PostgreSQL advisory lock; no-op on SQLite).
+# Policy for beat runs when the previous run still holds it: skip | queue | preempt
+TEWA_SCENARIO_LOCK_POLICY = os.getenv("TEWA_SCENARIO_LOCK_POLICY", "skip")
+TEWA_SCENARIO_LOCK_TIMEOUT_S = float(os.getenv("TEWA_SCENARIO_LOCK_TIMEOUT_S", "600"))
+# Runtime metrics at GET /metrics (core/utils/metrics.py). With several worker
+# processes, point TEWA_METRICS_DIR at a directory shared by them (emptied at
+# deploy start); each worker writes its values there every TEWA_METRICS_FLUSH_S.
+TEWA_METRICS_ENABLED = os.getenv("TEWA_METRICS_ENABLED", "True").strip().lower() == "true"
+TEWA_METRICS_DIR = os.getenv("TEWA_METRICS_DIR", os.getenv("PROMETHEUS_MULTIPROC_DIR", ""))
+TEWA_METRICS_FLUSH_S = float(os.getenv("TEWA_METRICS_FLUSH_S", "1"))
+# Opt-in request profiling (core/utils/profiling.py): staff add ?_profile=cprofile|sample,
+# other callers send TEWA_PROFILE_HEADER: <TEWA_PROFILE_TOKEN> (header trigger off while
+# the token is empty). Captures go to a ring of TEWA_PROFILE_MAX_ENTRIES in TEWA_PROFILE_DIR.
+TEWA_PROFILE_ENABLED = os.getenv("TEWA_PROFILE_ENABLED", "True").strip().lower() == "true"
+TEWA_PROFILE_HEADER = os.getenv("TEWA_PROFILE_HEADER", "X-Tewa-Profile")
+TEWA_PROFILE_TOKEN = os.getenv("TEWA_PROFILE_TOKEN", "")
+TEWA_PROFILE_MODE = os.getenv("TEWA_PROFILE_MODE", "cprofile")
+TEWA_PROFILE_DIR = os.getenv("TEWA_PROFILE_DIR", str(BASE_DIR / "var" / "profiles"))
+TEWA_PROFILE_MAX_ENTRIES = int(os.getenv("TEWA_PROFILE_MAX_ENTRIES", "50"))
+TEWA_PROFILE_MAX_QUERIES = int(os.getenv("TEWA_PROFILE_MAX_QUERIES", "500"))
+TEWA_PROFILE_SAMPLE_INTERVAL_S = float(os.getenv("TEWA_PROFILE_SAMPLE_INTERVAL_S", "0.005"))
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "default",
+    },
+    "idempotency": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": _TEWA_CACHE_URL,
+            "KEY_PREFIX": "tewa-idem",
+            "TIMEOUT": TEWA_IDEMPOTENCY_TTL_S,
+        }
+        if _TEWA_CACHE_URL
+        # Shared by every worker on the same database (table made by migration 0018)
+        else {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "tewa_idempotency_cache",
+            "TIMEOUT": TEWA_IDEMPOTENCY_TTL_S,
+            "OPTIONS": {
+                "MAX_ENTRIES": int(os.getenv("TEWA_IDEMPOTENCY_MAX_ENTRIES", "10000")),
+            },
+        }
+    ),
+}
+
 # ---------------------------------------------------------------------
 # Celery
 # ---------------------------------------------------------------------
@@ -266,4 +351,8 @@ CELERY_BEAT_SCHEDULE = {
         "schedule": crontab(minute="*/5"),
         "args": (1,),
     },
+    "sweep-stale-compute-jobs": {
+        "task": "tewa.tasks.sweep_stale_compute_jobs",
+        "schedule": crontab(minute="*/5"),
+    },
 }
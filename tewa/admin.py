@@ -9,10 +9,12 @@ from django.contrib import admin
 from django.core.exceptions import FieldDoesNotExist, ValidationError
 
 from .models import (
+    ComputeJob,
     DefendedAsset,
     ModelParams,
     Scenario,
     ThreatScore,
+    ThreatScoreRollup,
     Track,
     TrackSample,
 )
@@ -87,6 +89,43 @@ class ThreatScoreAdmin(admin.ModelAdmin):
     ordering = ("-computed_at",)
 
 
+# ---------------------------------------------------------------------
+# ThreatScoreRollup (maintained by compute; read-only in admin)
+# ---------------------------------------------------------------------
+@admin.register(ThreatScoreRollup)
+class ThreatScoreRollupAdmin(admin.ModelAdmin):
+    list_display = ("scenario", "track", "da", "resolution_s", "bucket_start",
+                    "count", "score_min", "score_max", "score_last")
+    list_filter = ("scenario", "resolution_s")
+    list_select_related = ("scenario", "track", "da")
+    ordering = ("-bucket_start",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# ---------------------------------------------------------------------
+# ComputeJob (written by compute_jobs; read-only in admin)
+# ---------------------------------------------------------------------
+@admin.register(ComputeJob)
+class ComputeJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "scenario", "status", "progress_done",
+                    "progress_total", "rows_written", "lock_wait_s", "skipped",
+                    "created_at", "finished_at")
+    list_filter = ("kind", "status", "skipped", "scenario")
+    list_select_related = ("scenario",)
+    ordering = ("-created_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 # ---------------------------------------------------------------------
 # DefendedAsset
 # ---------------------------------------------------------------------
@@ -176,7 +215,8 @@ class ModelParamsAdmin(admin.ModelAdmin):
         base = ["scenario", "w_cpa", "w_tcpa", "w_tdb", "w_twrp"]
 
         # New Task-23 fields
-        new_fields = ["R_W_m", "R_DA_m", "tick_s", "sigma_cpa",
+        new_fields = ["R_W_m", "R_DA_m", "tick_s", "freshness_alert_s", "geodesy_precision",
+                      "sigma_cpa",
                       "sigma_tcpa", "sigma_tdb", "sigma_twrp"]
         # Legacy scale fields (keep if your model still has them)
         legacy_fields = ["cpa_scale_km", "tcpa_scale_s",
@@ -205,7 +245,8 @@ class ModelParamsAdmin(admin.ModelAdmin):
             "w_cpa", "w_tcpa", "w_tdb", "w_twrp")}))
 
         # Group 3: Ranges / Tick (Task-23)
-        rng = tuple([f for f in ("R_W_m", "R_DA_m", "tick_s")
+        rng = tuple([f for f in ("R_W_m", "R_DA_m", "tick_s", "freshness_alert_s",
+                                 "geodesy_precision")
                     if model_has_field(ModelParams, f)])
         if rng:
             fs.append(("Ranges & Timing", {"fields": rng}))
@@ -1,6 +1,8 @@
 # tewa/api/query_schemas.py
 from rest_framework import serializers
 
+from tewa.services.kinematics import PRECISIONS
+
 
 class RankingQuerySerializer(serializers.Serializer):
     scenario_id = serializers.IntegerField(required=True)
@@ -23,3 +25,17 @@ class ScoreBreakdownQuerySerializer(serializers.Serializer):
     da_id = serializers.IntegerField()
     track_id = serializers.CharField(
         required=False, allow_null=True, allow_blank=True)
+
+
+class LookaheadQuerySerializer(serializers.Serializer):
+    scenario_id = serializers.IntegerField()
+    at = serializers.DateTimeField(required=False)
+    horizon_s = serializers.FloatField(required=False, default=600.0, min_value=0.0,
+                                       max_value=6 * 3600.0)
+    step_s = serializers.FloatField(required=False, default=10.0, min_value=0.1)
+    da_id = serializers.IntegerField(required=False)
+    method = serializers.ChoiceField(required=False, default="linear",
+                                     choices=("linear", "latest"))
+    weapon_range_km = serializers.FloatField(required=False, min_value=0.0)
+    series = serializers.BooleanField(required=False, default=False)
+    precision = serializers.ChoiceField(required=False, choices=PRECISIONS)
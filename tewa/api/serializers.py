@@ -2,11 +2,14 @@
 from __future__ import annotations
 
 
+from django.urls import reverse
 from rest_framework import serializers
 
+from core.enums import OrderStatusEnum
 from tewa.models import ModelParams
 
 from ..models import (
+    ComputeJob,
     DefendedAsset,
     Scenario,
     ThreatScore,
@@ -94,6 +97,8 @@ class ScoreBreakdownSerializer(serializers.Serializer):
     score = serializers.FloatField()
     params = ParamsSerializer()
     explain = serializers.ListField(child=serializers.CharField())
+    # stored | rescored | recomputed (read path), absent for the write path
+    source = serializers.CharField(required=False)
 
     # legacy passthroughs for backward-compat tests/UI
     cpa_km = serializers.FloatField(required=False, allow_null=True)
@@ -110,7 +115,7 @@ class ScenarioParamsSerializer(serializers.ModelSerializer):
         model = ModelParams
         fields = [
             "scenario",
-            "R_W_m", "R_DA_m", "tick_s",
+            "R_W_m", "R_DA_m", "tick_s", "freshness_alert_s", "geodesy_precision",
             "w_cpa", "w_tcpa", "w_tdb", "w_twrp",
             "sigma_cpa", "sigma_tcpa", "sigma_tdb", "sigma_twrp",
             "updated_at",
@@ -148,3 +153,38 @@ def validate(self, data):
     if abs(sum(weights) - 1.0) > 0.01:
         raise serializers.ValidationError("Sum of weights must equal 1.0")
     return data
+
+
+# ---------- Async compute jobs ----------
+
+class ComputeJobSerializer(serializers.ModelSerializer):
+    progress_pct = serializers.SerializerMethodField()
+    duration_s = serializers.FloatField(read_only=True)
+    throughput_rows_s = serializers.FloatField(read_only=True)
+    status_url = serializers.SerializerMethodField()
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ComputeJob
+        fields = [
+            "id", "kind", "scenario", "status", "params",
+            "progress_done", "progress_total", "progress_pct",
+            "rows_written", "duration_s", "throughput_rows_s", "lock_wait_s", "skipped",
+            "result", "result_url", "error", "cancel_requested",
+            "created_at", "started_at", "finished_at", "heartbeat_at", "status_url",
+        ]
+        read_only_fields = fields
+
+    def get_progress_pct(self, obj: ComputeJob):
+        if not obj.progress_total:
+            return 100.0 if obj.status == OrderStatusEnum.SUCCESS.value else 0.0
+        return round(100.0 * obj.progress_done / obj.progress_total, 1)
+
+    def get_status_url(self, obj: ComputeJob) -> str:
+        return reverse("tewa_api:compute_job_status", args=[obj.pk])
+
+    def get_result_url(self, obj: ComputeJob):
+        # Scores land in ThreatScore; the ranking endpoint reads the latest per pair
+        if obj.status != OrderStatusEnum.SUCCESS.value:
+            return None
+        return f"{reverse('tewa_api:ranking')}?scenario_id={obj.scenario_id}"  # type: ignore[attr-defined]
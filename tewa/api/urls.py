@@ -9,7 +9,10 @@ from tewa.api import views_assets_tracks
 from . import views, views_misc
 from .views import (
     ScenarioParamsView,
+    chart_stats_view,
     score_breakdown,  # <- function view
+    score_history_json_view,
+    score_history_multi_png_view,
     score_history_png_view,  # <- function view
 )
 from .views_assets_tracks import (
@@ -53,12 +56,18 @@ urlpatterns = [
     path("compute_at", views.compute_at, name="compute-at"),
     path("compute_now/", views.compute_now, name="compute_now"),
     path("ranking/", views.ranking, name="ranking"),
+    path("lookahead", views.lookahead, name="lookahead"),
     path("calculate_scores/", views.calculate_scores, name="calculate_scores"),
     path("upload_tracks/", views.upload_tracks, name="upload_tracks"),
+    path("jobs/<uuid:job_id>/", views.compute_job_status, name="compute_job_status"),
+    path("jobs/<uuid:job_id>/cancel", views.compute_job_cancel, name="compute_job_cancel"),
+    path("compute/stats", views.compute_stats, name="compute_stats"),
 
     # Task 21 — Score breakdown (both spellings)
     path("score-breakdown",  score_breakdown, name="score-breakdown"),
     path("score_breakdown/", score_breakdown, name="score_breakdown_alias"),
+    path("score_breakdown/batch", views.score_breakdown_batch,
+         name="score_breakdown_batch"),
 
     # Task 22 — CSV export
     path("export/threat_board.csv", views.export_threat_board_csv,
@@ -67,10 +76,17 @@ urlpatterns = [
     # Task 23 — Scenario params
     path("scenarios/<int:scenario_id>/params/",
          ScenarioParamsView.as_view(), name="scenario_params"),
+    path("scenarios/<int:scenario_id>/freshness",
+         views.scenario_freshness, name="scenario_freshness"),
 
     # Task 24 — PNG chart
     path("charts/score_history.png",
          score_history_png_view, name="score_history_png"),
+    path("charts/score_history.json",
+         score_history_json_view, name="score_history_json"),
+    path("charts/score_history_multi.png",
+         score_history_multi_png_view, name="score_history_multi_png"),
+    path("charts/stats", chart_stats_view, name="chart_stats"),
     path("score_breakdown",  score_breakdown, name="score_breakdown"),
     path("score_history.png", score_history_png_view, name="score_history_png"),
     # Add alias for v1 API
@@ -3,6 +3,7 @@ from datetime import timezone as dt_timezone
 
 from django.utils import timezone
 from rest_framework import status
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.response import Response
 
 
@@ -26,3 +27,16 @@ def ok(endpoint: str, **extra):
     payload = {"ok": True, "endpoint": endpoint}
     payload.update(extra)
     return Response(payload)
+
+
+class ImageFormatNegotiation(DefaultContentNegotiation):
+    """
+    Chart views read ?format=png|svg themselves (400 on anything else) and
+    return raw image bytes; keep DRF from treating it as a renderer override
+    (which would 404).
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if request.query_params.get(self.settings.URL_FORMAT_OVERRIDE):
+            return (renderers[0], renderers[0].media_type)
+        return super().select_renderer(request, renderers, format_suffix)
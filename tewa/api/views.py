@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 
 import csv
 import datetime as dt
+import json
 from typing import List, Optional, cast
 
 from django.http import (
@@ -16,24 +17,45 @@ from django.http import (
 )
 from django.shortcuts import render
 from rest_framework import permissions, status  # single import is enough
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    content_negotiation_class,
+    permission_classes,
+)
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.views import APIView
 
 from tewa.models import ModelParams, Scenario, ThreatScore
-from tewa.services.charting import render_score_history_png
+from tewa.services.charting import (
+    MULTI_LAYOUTS,
+    chart_cache_stats,
+    grid_shape,
+    render_score_history_multi_png,
+    render_score_history_png,
+    sprite_tiles,
+)
+from tewa.services.charting_svg import render_score_history_svg
 from tewa.services.export_csv import iter_rows_for_threat_board
 from tewa.services.score_breakdown_service import (
     get_score_breakdown,  # your existing service
+    get_score_breakdowns,
+)
+from tewa.services.score_history import (
+    downsample_lttb,
+    get_score_series,
+    get_score_series_many,
 )
-from tewa.services.score_history import get_score_series
 
 from .serializers import ScenarioParamsSerializer, ScoreBreakdownSerializer
-from .view_utils import ok
+from .view_utils import ImageFormatNegotiation, iso_utc, ok
 from .views_compute import (
     calculate_scores,
     compute_at,
+    compute_job_cancel,
+    compute_job_status,
     compute_now,
+    compute_stats,
+    lookahead,
     ranking,
     upload_tracks,  # noqa: F401
 )
@@ -47,6 +69,7 @@ from .views_read import (
     TrackViewSet,
     da_list_api,
     root,
+    scenario_freshness,
     scenarios,
     score,
     track_detail,
@@ -55,9 +78,11 @@ from .views_read import (
 __all__ = [
     # compute/analytics
     "compute_now", "compute_at", "ranking", "calculate_scores", "upload_tracks", "score_breakdown",
+    "compute_job_status", "compute_job_cancel", "compute_stats", "lookahead",
     # read/viewsets
     "root", "ScenarioViewSet", "TrackViewSet", "TrackSampleViewSet", "ThreatScoreViewSet",
-    "DefendedAssetViewSet", "scenarios", "score", "da_list_api", "track_detail",
+    "DefendedAssetViewSet", "scenarios", "scenario_freshness", "score", "da_list_api",
+    "track_detail",
 ]
 
 from typing import Any, Dict
@@ -67,11 +92,13 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 
 
-@api_view(["GET"])
+@api_view(["GET", "POST"])
 def score_breakdown(request: Request) -> Response:
     """
     GET /api/tewa/score_breakdown?scenario_id=1&track_id=TGT001&da_id=3[&at=2025-10-14T10:02:00Z]
     Returns the Task 21 score_breakdown JSON (with legacy flat fields preserved).
+    GET is read-only (served from stored rows); POST with the same query
+    recomputes and appends a ThreatScore row.
     """
     qp = request.query_params
     scenario_id = qp.get("scenario_id")
@@ -104,6 +131,7 @@ def score_breakdown(request: Request) -> Response:
             track_id=str(track_id),
             da_id=da_id_int,
             at_iso=at,
+            persist=request.method == "POST",
         )
     except ValueError as ve:
         # 400 — bad 'at' format
@@ -126,6 +154,47 @@ def score_breakdown(request: Request) -> Response:
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def score_breakdown_batch(request: Request) -> Response:
+    """
+    GET /api/tewa/score_breakdown/batch?scenario_id=1&da_id=3[&track_ids=T1,T2|all][&at=...]
+    Breakdowns for many tracks of one (scenario, DA) from stored rows, in a
+    fixed number of queries; best score first.
+    """
+    qp = request.query_params
+    try:
+        scenario_id = int(qp["scenario_id"])
+        da_id = int(qp["da_id"])
+    except KeyError:
+        return Response({"detail": "Missing required params: scenario_id, da_id"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    except ValueError:
+        return Response({"detail": "scenario_id and da_id must be integers"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    raw_ids = (qp.get("track_ids") or "").strip()
+    track_ids = (
+        None if raw_ids in ("", "all")
+        else [x.strip() for x in raw_ids.split(",") if x.strip()]
+    )
+
+    try:
+        items = get_score_breakdowns(
+            scenario_id=scenario_id, da_id=da_id, track_ids=track_ids, at_iso=qp.get("at"))
+    except ValueError as ve:
+        return Response({"detail": str(ve)}, status=status.HTTP_400_BAD_REQUEST)
+    except ObjectDoesNotExist as dne:
+        return Response({"detail": str(dne)}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        "scenario_id": scenario_id,
+        "da_id": da_id,
+        "count": len(items),
+        "items": ScoreBreakdownSerializer(instance=items, many=True).data,
+    })
+
+
 # --- DEBUG PAGE (read-only UI) ---
 
 
@@ -242,9 +311,38 @@ class ScenarioParamsView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-@api_view(["GET"])
-@permission_classes([IsAuthenticatedOrReadOnly])
-def score_history_png_view(request):
+CHART_FORMATS = ("png", "svg")
+CHART_MAX_PX = 4000  # longest edge of one chart image or sprite tile
+MULTI_MAX_PIXELS = 16_000_000  # whole grid/sprite sheet (e.g. 4000 × 4000)
+
+
+def _parse_chart_opts(
+    request, sizes: Dict[str, int], plot_key: str = "width"
+) -> Dict[str, Any] | HttpResponseBadRequest:
+    """
+    Pixel sizes (`sizes`: name → default, each 1..CHART_MAX_PX), smooth and
+    max_points for the score-history views. max_points defaults to ~2 points
+    per pixel of `plot_key`; 0 disables downsampling.
+    """
+    try:
+        opts: Dict[str, Any] = {k: int(request.GET.get(k, d)) for k, d in sizes.items()}
+        smooth_q = request.GET.get("smooth")
+        opts["smooth"] = int(smooth_q) if smooth_q else None
+        max_points_q = request.GET.get("max_points")
+        opts["max_points"] = int(max_points_q) if max_points_q not in (
+            None, "") else 2 * opts[plot_key]
+    except ValueError:
+        return HttpResponseBadRequest(f"{'/'.join(sizes)}/smooth/max_points must be integers")
+    for k in sizes:
+        if not 1 <= opts[k] <= CHART_MAX_PX:
+            return HttpResponseBadRequest(f"{k} must be between 1 and {CHART_MAX_PX}")
+    if opts["max_points"] < 0:
+        return HttpResponseBadRequest("max_points must be >= 0 (0 disables downsampling)")
+    return opts
+
+
+def _parse_series_query(request) -> Dict[str, Any] | HttpResponseBadRequest:
+    """Shared query parsing for the score-history PNG/JSON endpoints."""
     try:
         scenario_id = int(request.GET["scenario_id"])
         da_id = int(request.GET["da_id"])
@@ -254,20 +352,52 @@ def score_history_png_view(request):
     except ValueError:
         return HttpResponseBadRequest("IDs must be integers")
 
-    dt_from = request.GET.get("from")
-    dt_to = request.GET.get("to")
-    width = int(request.GET.get("width", 800))
-    height = int(request.GET.get("height", 300))
-    smooth = request.GET.get("smooth")
-    smooth = int(smooth) if smooth else None
+    opts = _parse_chart_opts(request, {"width": 800, "height": 300})
+    if isinstance(opts, HttpResponseBadRequest):
+        return opts
+
+    return {
+        "scenario_id": scenario_id,
+        "da_id": da_id,
+        "track_id": track_id,
+        "dt_from": request.GET.get("from"),
+        "dt_to": request.GET.get("to"),
+        **opts,
+    }
+
 
-    series = get_score_series(scenario_id, da_id, track_id, dt_from, dt_to)
+def _load_series(q: Dict[str, Any]) -> list:
+    series = get_score_series(
+        q["scenario_id"], q["da_id"], q["track_id"], q["dt_from"], q["dt_to"],
+        width=q["width"])
+    return downsample_lttb(series, q["max_points"])
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedOrReadOnly])
+@content_negotiation_class(ImageFormatNegotiation)
+def score_history_png_view(request):
+    q = _parse_series_query(request)
+    if isinstance(q, HttpResponseBadRequest):
+        return q
+    # Only here: on the JSON view, ?format= is DRF's renderer override (json/api)
+    fmt = request.GET.get("format", "png")
+    if fmt not in CHART_FORMATS:
+        return HttpResponseBadRequest(f"format must be one of {list(CHART_FORMATS)}")
+
+    series = _load_series(q)
     if not series:
         raise Http404("No score history found")
 
-    png = render_score_history_png(
-        series, width=width, height=height, smooth=smooth)
-    resp = HttpResponse(png, content_type="image/png")
+    # format=svg never touches matplotlib (see charting_svg)
+    if fmt == "svg":
+        resp = HttpResponse(render_score_history_svg(
+            series, width=q["width"], height=q["height"], smooth=q["smooth"]),
+            content_type="image/svg+xml")
+    else:
+        resp = HttpResponse(render_score_history_png(
+            series, width=q["width"], height=q["height"], smooth=q["smooth"]),
+            content_type="image/png")
     resp["Cache-Control"] = "private, max-age=60"
     # optional: Last-Modified
     try:
@@ -278,6 +408,150 @@ def score_history_png_view(request):
     return resp
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def score_history_json_view(request):
+    """
+    GET /api/tewa/charts/score_history.json?scenario_id=1&da_id=1&track_id=T1
+        [&from=..&to=..&width=800&max_points=1600]
+    Same series as the PNG (rollups + LTTB), as JSON points for client-side charts.
+    """
+    q = _parse_series_query(request)
+    if isinstance(q, HttpResponseBadRequest):
+        return q
+
+    series = _load_series(q)
+    if not series:
+        raise Http404("No score history found")
+
+    return Response({
+        "scenario_id": q["scenario_id"],
+        "da_id": q["da_id"],
+        "track_id": q["track_id"],
+        "max_points": q["max_points"],
+        "count": len(series),
+        "points": [
+            {"t": iso_utc(t), "score": float(s)} for t, s in series
+        ],
+    })
+
+
+MULTI_MAX_TRACKS = 100  # hard cap on tiles/lines per image
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def score_history_multi_png_view(request):
+    """
+    GET /api/tewa/charts/score_history_multi.png?scenario_id=1&da_id=1
+        [&track_ids=T1,T2,5|all][&layout=overlay|grid|sprite][&from=..&to=..]
+        [&width=800&height=300][&tile_width=240&tile_height=120][&columns=N]
+        [&smooth=K][&max_points=N][&manifest=1]
+    Many tracks of one DA in ONE image (one points query, one render) so a
+    threat board can show N charts without N requests. For layout=sprite the
+    tile offsets are returned in the X-Sprite-Tiles header (JSON), or as the
+    whole response body with manifest=1. Sizes are 1..CHART_MAX_PX px and a
+    grid/sprite sheet at most MULTI_MAX_PIXELS.
+    """
+    try:
+        scenario_id = int(request.GET["scenario_id"])
+        da_id = int(request.GET["da_id"])
+    except KeyError:
+        return HttpResponseBadRequest("scenario_id and da_id are required")
+    except ValueError:
+        return HttpResponseBadRequest("IDs must be integers")
+
+    layout = request.GET.get("layout", "overlay")
+    if layout not in MULTI_LAYOUTS:
+        return HttpResponseBadRequest(f"layout must be one of {list(MULTI_LAYOUTS)}")
+
+    raw_ids = (request.GET.get("track_ids") or "").strip()
+    track_ids = (
+        None if raw_ids in ("", "all")
+        else [x.strip() for x in raw_ids.split(",") if x.strip()]
+    )
+    if track_ids is not None and len(track_ids) > MULTI_MAX_TRACKS:
+        return HttpResponseBadRequest(f"at most {MULTI_MAX_TRACKS} track_ids per image")
+
+    # Per track: ~2 points per pixel of the line's own plot width
+    opts = _parse_chart_opts(
+        request, {"width": 800, "height": 300, "tile_width": 240, "tile_height": 120},
+        plot_key="width" if layout == "overlay" else "tile_width")
+    if isinstance(opts, HttpResponseBadRequest):
+        return opts
+    width, height = opts["width"], opts["height"]
+    tile_width, tile_height = opts["tile_width"], opts["tile_height"]
+    smooth, max_points = opts["smooth"], opts["max_points"]
+    plot_w = width if layout == "overlay" else tile_width
+    try:
+        columns_q = request.GET.get("columns")
+        columns = int(columns_q) if columns_q else None
+    except ValueError:
+        return HttpResponseBadRequest("columns must be an integer")
+    if columns is not None and not 1 <= columns <= MULTI_MAX_TRACKS:
+        return HttpResponseBadRequest(f"columns must be between 1 and {MULTI_MAX_TRACKS}")
+
+    # Without track_ids the cap is applied in the query, not after loading history
+    by_track = get_score_series_many(
+        scenario_id, da_id, track_ids,
+        request.GET.get("from"), request.GET.get("to"), width=plot_w,
+        limit=MULTI_MAX_TRACKS)
+    if not by_track:
+        raise Http404("No score history found")
+
+    # Keep the caller's order when ids were given, else public id order
+    if track_ids is not None:
+        rank = {tid: i for i, tid in enumerate(track_ids)}
+        ordered = sorted(
+            by_track.items(),
+            key=lambda kv: rank.get(str(kv[0]), rank.get(kv[1][0], len(rank))))
+    else:
+        ordered = sorted(by_track.items(), key=lambda kv: str(kv[1][0]))
+
+    if layout != "overlay":
+        cols, rows = grid_shape(len(ordered), columns)
+        if cols * tile_width * rows * tile_height > MULTI_MAX_PIXELS:
+            return HttpResponseBadRequest(
+                f"{cols}×{rows} tiles of {tile_width}×{tile_height} px exceed "
+                f"{MULTI_MAX_PIXELS} pixels per image")
+
+    items = [
+        (str(label), downsample_lttb(series, max_points))
+        for _pk, (label, series) in ordered
+    ]
+
+    tiles = (
+        sprite_tiles([lbl for lbl, _ in items], tile_width=tile_width,
+                     tile_height=tile_height, columns=columns)
+        if layout == "sprite" else []
+    )
+    if request.GET.get("manifest") in ("1", "true"):
+        return Response({
+            "scenario_id": scenario_id,
+            "da_id": da_id,
+            "layout": layout,
+            "tracks": [lbl for lbl, _ in items],
+            "tiles": tiles,
+        })
+
+    png = render_score_history_multi_png(
+        items, layout=layout, width=width, height=height,
+        tile_width=tile_width, tile_height=tile_height,
+        columns=columns, smooth=smooth)
+    resp = HttpResponse(png, content_type="image/png")
+    resp["Cache-Control"] = "private, max-age=60"
+    if tiles:
+        resp["X-Sprite-Tiles"] = json.dumps(tiles, separators=(",", ":"))
+    return resp
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def chart_stats_view(request):
+    """GET /api/tewa/charts/stats — PNG cache hit rate and render-time percentiles (this worker)."""
+    return Response(chart_cache_stats())
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedOrReadOnly])
 def score_breakdown_view(request):
@@ -3,16 +3,12 @@ from __future__ import annotations
 from rest_framework.permissions import AllowAny
 
 import uuid
-from datetime import timedelta
 from datetime import timezone as dt_timezone
-from inspect import signature
-from typing import Any, Dict, List, Mapping, Optional, cast
+from typing import Any, Callable, Dict, List, Mapping, Optional, cast
 
 from django.db.models import F, OuterRef, Subquery
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
-from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
 from rest_framework.decorators import (
     api_view,
     authentication_classes,
@@ -20,14 +16,27 @@ from rest_framework.decorators import (
 )
 from rest_framework.permissions import (
     IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
 )
 from rest_framework.response import Response
 
-from tewa.api.query_schemas import RankingQuerySerializer
+from tewa.api.query_schemas import LookaheadQuerySerializer, RankingQuerySerializer
 from tewa.api.view_utils import iso_utc, iso_utc_now
-from tewa.models import DefendedAsset, Scenario, ThreatScore, Track
+from tewa.api.serializers import ComputeJobSerializer
+from tewa.models import (
+    ComputeJob,
+    DefendedAsset,
+    ModelParams,
+    Scenario,
+    ThreatScore,
+    Track,
+)
+from tewa.services import compute_jobs, idempotency, singleflight
 from tewa.services.csv_import import import_csv
+from tewa.services.lookahead import lookahead as lookahead_scores
 from tewa.services.engine import compute_scores_at_timestamp
+from tewa.services.instrumentation import start_timer
+from tewa.services.kinematics import PRECISIONS
 from tewa.services.ranking import rank_threats
 from tewa.services.threat_compute import calculate_scores_for_when
 
@@ -57,18 +66,38 @@ def _get_int(m: Mapping[str, Any], key: str) -> Optional[int]:
         return None
 
 
-def _supports_batch_id() -> bool:
-    try:
-        return "batch_id" in signature(compute_scores_at_timestamp).parameters
-    except Exception:
-        return False
+def _da_set_key(da_ids: Optional[List[int]]) -> str:
+    return "all" if da_ids is None else ",".join(str(i) for i in sorted(set(da_ids)))
 
 
-# ------------------------------ endpoints ------------------------------
+def _params_version(scenario_id: int) -> Optional[str]:
+    # Editing the scenario's weights/scales must not reuse results scored with the old ones
+    updated = (ModelParams.objects.filter(scenario_id=scenario_id)
+               .values_list("updated_at", flat=True).first())
+    return updated.isoformat() if updated else None
+
+
+def _lock_policy(body: Mapping[str, Any]) -> Optional[str]:
+    """Validated body["lock_policy"]; None means the default ("queue")."""
+    policy = _get_str(body, "lock_policy").strip() or None
+    if policy is not None and policy not in compute_jobs.LOCK_POLICIES:
+        raise ValueError(f"lock_policy must be one of {list(compute_jobs.LOCK_POLICIES)}")
+    return policy
 
 
-# Optional: in-memory cache or DB check
-_idempotent_cache = {}
+def _locked_response(e: compute_jobs.ScenarioLocked) -> Response:
+    return Response({"detail": str(e), "skipped": True, "lock_wait_s": e.lock_wait_s},
+                    status=409)
+
+
+def _wants_async(request) -> bool:
+    raw = _as_mapping(getattr(request, "data", {})).get("async")
+    if raw is None:
+        raw = request.query_params.get("async")
+    return str(raw).strip().lower() in ("1", "true", "yes", "on")
+
+
+# ------------------------------ endpoints ------------------------------
 
 
 @api_view(["POST"])
@@ -81,35 +110,61 @@ def compute_now(request):
             {"detail": "Missing required field 'scenario_id'"},
             status=400
         )
+    try:
+        lock_policy = _lock_policy(_as_mapping(request.data))
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=400)
 
-    key = request.data.get("idempotency_key")
+    def _compute() -> Dict[str, Any]:
+        scenario = Scenario.objects.get(id=scenario_id)
+        with compute_jobs.scenario_lock(scenario.id, lock_policy) as lock_wait_s, \
+                start_timer("compute_now", scenario_id=scenario.id) as timer:
+            scores = compute_scores_at_timestamp(
+                scenario_id=scenario.id, when_iso=timezone.now().isoformat(), timer=timer)
+
+        return {
+            "scenario_id": scenario.id,
+            "lock_wait_s": lock_wait_s,
+            "timings": timer.summary(),
+            "count": len(scores),
+            "computed_at": timezone.now().isoformat(),
+            "top3": [
+                {"track": s.track_id, "score": s.score}
+                for s in sorted(scores, key=lambda s: float(s.score or float("-inf")), reverse=True)[:3]
+            ],
+        }
 
-    # Idempotency cache key
-    if key:
-        cache_key = f"{scenario_id}:{key}"
-        if cache_key in _idempotent_cache:
-            return Response(_idempotent_cache[cache_key])
-
-    # --- actual computation ---
-    scenario = Scenario.objects.get(id=scenario_id)
-    scores = compute_scores_at_timestamp(
-        scenario_id=scenario.id, when_iso=timezone.now().isoformat())
-
-    data = {
-        "scenario_id": scenario.id,
-        "count": len(scores),
-        "computed_at": timezone.now().isoformat(),
-        "top3": [
-            {"track": s.track.track_id, "score": s.score}
-            for s in sorted(scores, key=lambda s: float(s.score or float("-inf")), reverse=True)[:3]
-        ],
-    }
-
-    # Cache for idempotency reuse
-    if key:
-        _idempotent_cache[cache_key] = data
+    run: Callable[[], Any] = _compute
+    ok_status, scope = 200, "compute_now"
+    if _wants_async(request):
+        if not Scenario.objects.filter(pk=scenario_id).exists():
+            return Response({"detail": f"Scenario {scenario_id} not found"}, status=404)
 
-    return Response(data)
+        def _submit() -> Dict[str, Any]:
+            job = compute_jobs.submit_job(
+                ComputeJob.KIND_COMPUTE_NOW, int(scenario_id),
+                params={"lock_policy": lock_policy} if lock_policy else None,
+                user=request.user)
+            return dict(ComputeJobSerializer(job).data)
+
+        run, ok_status, scope = _submit, 202, "compute_now_async"
+
+    key = request.data.get("idempotency_key")
+    try:
+        if not key:
+            return Response(run(), status=ok_status)
+
+        # Shared, bounded store: retries from any worker replay the first result;
+        # concurrent duplicates wait for it instead of computing in parallel.
+        data, _replayed = idempotency.run_idempotent(
+            f"{scope}:{scenario_id}:{key}", run)
+    except compute_jobs.ScenarioLocked as e:
+        return _locked_response(e)
+    except idempotency.IdempotencyInProgress as e:
+        resp = Response({"detail": str(e)}, status=409)
+        resp["Retry-After"] = str(int(e.retry_after_s))
+        return resp
+    return Response(data, status=ok_status)
 
 
 @api_view(["POST"])
@@ -154,61 +209,81 @@ def compute_at(request):
         except (TypeError, ValueError):
             return Response({"detail": "weapon_range_km must be a number"}, status=400)
 
-    when_iso_str: str = iso_utc(when) or when.isoformat()
+    # horizon_s: prune pairs that cannot reach weapon range within it (tewa.services.prefilter)
+    hz_raw = body.get("horizon_s", None)
+    if hz_raw in (None, ""):
+        horizon_s: Optional[float] = None
+    else:
+        try:
+            horizon_s = float(hz_raw)  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            return Response({"detail": "horizon_s must be a number"}, status=400)
+        if horizon_s < 0:
+            return Response({"detail": "horizon_s must be >= 0"}, status=400)
 
-    kwargs: Dict[str, Any] = {
-        "scenario_id": scenario_id,
-        "when_iso": when_iso_str,
-        "method": method,
-        "da_ids": da_ids,
-        "weapon_range_km": weapon_range_km,
-    }
-    batch_id: Optional[str] = None
-    if _supports_batch_id():
-        batch_id = str(uuid.uuid4())
-        kwargs["batch_id"] = batch_id
-
-    call_started = timezone.now()
-    try:
-        cast(Any, compute_scores_at_timestamp)(**kwargs)
-    except Exception as e:
-        return Response({"detail": f"Compute failed: {e}"}, status=500)
+    precision = _get_str(body, "precision") or None
+    if precision is not None and precision not in PRECISIONS:
+        return Response(
+            {"detail": f"precision must be one of {list(PRECISIONS)}"}, status=400)
 
-    # Collect rows written by this call
-    has_batch_field = any(getattr(f, "name", "") ==
-                          "batch_id" for f in ThreatScore._meta.get_fields())
-    if batch_id and has_batch_field:
-        qs = (
-            ThreatScore.objects.filter(
-                scenario_id=scenario_id, batch_id=batch_id)
-            .select_related("track", "da")
-            .order_by("-score")
-        )
-    else:
-        window_start = call_started - timedelta(seconds=2)
-        qs = (
-            ThreatScore.objects.filter(
-                scenario_id=scenario_id, computed_at__gte=window_start)
-            .select_related("track", "da")
-            .order_by("-score")
-        )
-        if da_ids:
-            qs = qs.filter(da_id__in=da_ids)  # type: ignore[attr-defined]
+    try:
+        lock_policy = _lock_policy(body)
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=400)
 
-    scores_simple = [
-        {
-            "track_id": getattr(ts.track, "track_id", None),
-            # keep checker happy; Django model has da_id DB field even if stubs don't
-            "da_id": cast(Any, ts).da_id if hasattr(ts, "da_id") else (ts.da.pk if getattr(ts, "da", None) else None),
-            "da_name": getattr(ts.da, "name", None),
-            "score": float(ts.score) if ts.score is not None else None,
-            "computed_at": iso_utc(ts.computed_at),
-        }
-        for ts in qs
-    ]
+    when_iso_str: str = iso_utc(when) or when.isoformat()
 
-    return Response(
-        {
+    if _wants_async(request):
+        if not Scenario.objects.filter(pk=scenario_id).exists():
+            return Response({"detail": f"Scenario {scenario_id} not found"}, status=404)
+        job = compute_jobs.submit_job(
+            ComputeJob.KIND_COMPUTE_AT,
+            scenario_id,
+            params={
+                "when_iso": when_iso_str,
+                "method": method,
+                "da_ids": da_ids,
+                "weapon_range_km": weapon_range_km,
+                "precision": precision,
+                "horizon_s": horizon_s,
+                **({"lock_policy": lock_policy} if lock_policy else {}),
+            },
+            user=request.user,
+        )
+        return Response(ComputeJobSerializer(job).data, status=202)
+
+    def _compute() -> Dict[str, Any]:
+        batch_id = uuid.uuid4()
+        report: Dict[str, Any] = {}
+        with compute_jobs.scenario_lock(scenario_id, lock_policy) as lock_wait_s, \
+                start_timer("compute_at", scenario_id=scenario_id) as timer:
+            records = compute_scores_at_timestamp(
+                scenario_id=scenario_id,
+                when_iso=when_iso_str,
+                method=method,
+                da_ids=da_ids,
+                weapon_range_km=weapon_range_km,
+                batch_id=batch_id,
+                timer=timer,
+                precision=precision,
+                horizon_s=horizon_s,
+                prefilter_report=report,
+            )
+
+            # Exactly this call's rows (stamped with batch_id), highest score first
+            with timer.stage("serialize"):
+                records.sort(key=lambda r: (r.score is None, -(r.score or 0.0)))
+                scores_simple = [
+                    {
+                        "track_id": r.track_id,
+                        "da_id": r.da_id,
+                        "da_name": r.da_name,
+                        "score": float(r.score) if r.score is not None else None,
+                        "computed_at": iso_utc(r.computed_at),
+                    }
+                    for r in records
+                ]
+        data = {
             "status": "ok",
             "scenario_id": scenario_id,
             "when": when_iso_str,
@@ -216,10 +291,26 @@ def compute_at(request):
             "count": len(scores_simple),
             "scores": scores_simple,
             "threats": scores_simple,
-            "batch_id": batch_id,
-        },
-        status=200,
-    )
+            "batch_id": str(batch_id),
+            "lock_wait_s": lock_wait_s,
+            "timings": timer.summary(),
+        }
+        if horizon_s is not None:
+            data["prefilter"] = report
+        return data
+
+    # Identical concurrent requests share one compute (and one batch)
+    key = singleflight.make_key(
+        "compute_at", scenario_id, when_iso_str, method,
+        _da_set_key(da_ids), weapon_range_km, precision, horizon_s,
+        _params_version(scenario_id))
+    try:
+        data, _shared = singleflight.do(key, _compute)
+    except compute_jobs.ScenarioLocked as e:
+        return _locked_response(e)
+    except Exception as e:
+        return Response({"detail": f"Compute failed: {e}"}, status=500)
+    return Response(data, status=200)
 
 
 @api_view(["GET"])
@@ -242,8 +333,42 @@ def ranking(request):
     return Response({"scenario_id": sid, "threats": results})
 
 
-@require_POST
-@csrf_exempt  # prefer proper auth/CSRF in prod
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def lookahead(request):
+    """
+    GET /api/tewa/lookahead?scenario_id=1[&at=...&horizon_s=600&step_s=10&da_id=&series=1&precision=]
+    Constant-velocity projection of every track: peak score and time-to-peak
+    over the horizon, per DA and overall. Nothing is persisted.
+    """
+    q = LookaheadQuerySerializer(data=_as_mapping(getattr(request, "query_params", {})))
+    q.is_valid(raise_exception=True)
+    vd = cast(Dict[str, Any], q.validated_data)
+
+    if not Scenario.objects.filter(pk=vd["scenario_id"]).exists():
+        return Response({"detail": f"Scenario {vd['scenario_id']} not found"}, status=404)
+    when = vd.get("at") or timezone.now()
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when, dt_timezone.utc)
+    try:
+        data = lookahead_scores(
+            scenario_id=vd["scenario_id"],
+            when=when.astimezone(dt_timezone.utc),
+            horizon_s=vd["horizon_s"],
+            step_s=vd["step_s"],
+            da_ids=[vd["da_id"]] if vd.get("da_id") is not None else None,
+            method=vd["method"],
+            weapon_range_km=vd.get("weapon_range_km"),
+            series=vd["series"],
+            precision=vd.get("precision"),
+        )
+    except ValueError as e:
+        return Response({"detail": str(e)}, status=400)
+    return Response(data)
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
 def calculate_scores(request):
     # DRF already parses JSON; avoid dict(bytes) footguns
     body = _as_mapping(getattr(request, "data", {}))
@@ -280,21 +405,40 @@ def calculate_scores(request):
     except Exception:
         weapon_range_km = 20.0
 
-    try:
+    # top_n: only the best N per DA, found by branch-and-bound (same rows as a full compute)
+    top_n = _get_int(body, "top_n")
+    if body.get("top_n") not in (None, "") and (top_n is None or top_n < 1):
+        return Response({"detail": "top_n must be a positive integer"}, status=400)
+
+    def _compute() -> Dict[str, Any]:
+        report: Dict[str, Any] = {}
         threats = calculate_scores_for_when(
-            scenario=scenario, when=when, das=das, method=method, weapon_range_km=weapon_range_km
+            scenario=scenario, when=when, das=das, method=method,
+            weapon_range_km=weapon_range_km, top_k=top_n, report=report,
         )
+        return {"threats": threats, "pairs": report}
+
+    key = singleflight.make_key(
+        "calculate_scores", scenario.pk, iso_utc(when), method,
+        _da_set_key([da.pk for da in das]), weapon_range_km, top_n,
+        _params_version(scenario.pk))
+    try:
+        data, _shared = singleflight.do(key, _compute)
+    except compute_jobs.ScenarioLocked as e:
+        return _locked_response(e)
     except Exception as e:
         return Response({"detail": f"Failed to compute: {e}"}, status=500)
 
-    return Response(
-        {"scenario_id": scenario.pk, "computed_at": (
-            iso_utc_now() or timezone.now().isoformat()), "threats": threats}
-    )
+    out = {"scenario_id": scenario.pk, "computed_at": (
+        iso_utc_now() or timezone.now().isoformat()), "threats": data["threats"]}
+    if top_n is not None:
+        out["top_n"] = top_n
+        out["pairs"] = data["pairs"]
+    return Response(out)
 
 
-@require_POST
-@csrf_exempt  # prefer proper auth/CSRF in prod
+@api_view(["POST"])
+@permission_classes([AllowAny])
 def upload_tracks(request):
     files_map = _as_mapping(getattr(request, "FILES", {}))
     upfile = files_map.get("file")
@@ -406,3 +550,35 @@ def score_breakdown(request):
     ]
 
     return Response({"results": results, "count": len(results)}, status=200)
+
+
+# ------------------------------ async jobs ------------------------------
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def compute_job_status(request, job_id):
+    """GET /api/tewa/jobs/<uuid>/ — status, progress, throughput and result location."""
+    try:
+        job = ComputeJob.objects.get(pk=job_id)
+    except ComputeJob.DoesNotExist:
+        return Response({"detail": "Job not found"}, status=404)
+    return Response(ComputeJobSerializer(job).data)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def compute_job_cancel(request, job_id):
+    """POST /api/tewa/jobs/<uuid>/cancel — queued jobs stop at once, running ones at the next tick."""
+    try:
+        job = ComputeJob.objects.get(pk=job_id)
+    except ComputeJob.DoesNotExist:
+        return Response({"detail": "Job not found"}, status=404)
+    job = compute_jobs.cancel_job(job)
+    return Response(ComputeJobSerializer(job).data, status=202)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def compute_stats(request):
+    """GET /api/tewa/compute/stats — single-flight coalescing counters (this worker)."""
+    return Response({"singleflight": singleflight.stats()})
@@ -5,7 +5,8 @@ from typing import Any, Dict
 
 from django.utils import timezone
 from rest_framework import viewsets
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 
 from tewa.api.query_schemas import ScoreListQuerySerializer
@@ -18,6 +19,7 @@ from tewa.api.serializers import (
 )
 from tewa.api.view_utils import iso_utc
 from tewa.models import DefendedAsset, Scenario, ThreatScore, Track, TrackSample
+from tewa.services import freshness
 
 
 @api_view(["GET"])
@@ -67,8 +69,6 @@ class ThreatScoreViewSet(viewsets.ReadOnlyModelViewSet):
         if vd.get("da_id"):
             qs = qs.filter(da_id=vd["da_id"])
         qs = qs.order_by(vd["ordering"])
-        qs = qs.only("id", "scenario_id", "da_id",
-                     "track_id", "score", "computed_at")
         serializer = self.get_serializer(qs, many=True)
         return Response(serializer.data)
 
@@ -80,11 +80,23 @@ class DefendedAssetViewSet(viewsets.ModelViewSet):
 
 @api_view(["GET"])
 def scenarios(_request):
-    qs = Scenario.objects.all().order_by("id").only(
-        "id", "name", "start_time", "end_time")
+    qs = Scenario.objects.all().order_by("id")
     return Response(ScenarioSerializer(qs, many=True).data)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticatedOrReadOnly])
+def scenario_freshness(_request, scenario_id: int):
+    """
+    GET /api/tewa/scenarios/<id>/freshness — sample-age histograms over the
+    latest score per track (computed_at - sample t, now - sample t) and the
+    tracks past ModelParams.freshness_alert_s.
+    """
+    if not Scenario.objects.filter(pk=scenario_id).exists():
+        return Response({"detail": "Scenario not found"}, status=404)
+    return Response(freshness.scenario_freshness(scenario_id))
+
+
 # tewa/api/views_read.py (or wherever your score alias lives)
 
 
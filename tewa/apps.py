@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TewaConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tewa"
+
+    def ready(self):
+        from tewa import signals  # noqa: F401  (connects the receivers)
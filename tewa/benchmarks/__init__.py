@@ -0,0 +1,16 @@
+# tewa/benchmarks/__init__.py
+from .suite import (
+    BASELINE_PATH,
+    CASES,
+    DEFAULT_TOLERANCE,
+    SIZES,
+    compare,
+    load_baseline,
+    run_suite,
+    update_baseline,
+)
+
+__all__ = [
+    "BASELINE_PATH", "CASES", "DEFAULT_TOLERANCE", "SIZES",
+    "compare", "load_baseline", "run_suite", "update_baseline",
+]
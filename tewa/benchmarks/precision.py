@@ -0,0 +1,121 @@
+# tewa/benchmarks/precision.py
+"""
+Cost versus error of the kinematics precision tiers (kinematics.PRECISIONS).
+
+precision_table() draws random DA/track pairs at a few fixed ranges, computes
+the four components with every tier (kinematics_np.components, plus the scalar
+kernels on a subset) and reports, per tier, the cost per pair and, per range
+band, how far the DA→track range, bearing and CPA drift from the ellipsoidal
+(WGS-84 Vincenty) tier, which serves as the reference.
+
+No database access; used by `manage.py run_benchmarks --precision`.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Sequence
+
+from tewa.services.kinematics import PRECISIONS, compute_cpa_tcpa_tdb_twrp
+
+DEFAULT_RANGES_KM = (10.0, 50.0, 200.0, 500.0, 1000.0)
+_SCALAR_PAIRS = 500
+
+
+def _pairs(n: int, ranges_km: Sequence[float], seed: int):
+    """n random (DA, track) pairs per range band; arrays of shape (bands, n)."""
+    import numpy as np
+
+    from core.utils import geodesy_np
+
+    rng = np.random.default_rng(seed)
+    shape = (len(ranges_km), n)
+    # Away from the antimeridian: the enu tier does not wrap longitude differences
+    da_lat, da_lon = rng.uniform(-60.0, 60.0, shape), rng.uniform(-150.0, 150.0, shape)
+    brg, hdg, spd = (rng.uniform(0.0, 360.0, shape), rng.uniform(0.0, 360.0, shape),
+                     rng.uniform(50.0, 400.0, shape))
+    dist = np.broadcast_to(np.asarray(ranges_km, dtype=float)[:, None] * 1000.0, shape)
+    lat, lon = geodesy_np.destination_point(da_lat, da_lon, brg, dist)
+    return dict(lat=lat, lon=lon, spd=spd, hdg=hdg, da_lat=da_lat, da_lon=da_lon)
+
+
+def _best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def precision_table(
+    n: int = 20_000,
+    ranges_km: Sequence[float] = DEFAULT_RANGES_KM,
+    *,
+    seed: int = 42,
+    repeats: int = 3,
+) -> Dict[str, Any]:
+    """
+    {"pairs", "ranges_km", "tiers": {tier: {"np_us_per_pair", "scalar_us_per_pair",
+    "bands": {range_km: {"range_err_m_max", "bearing_err_deg_max", "cpa_err_m_max"}}}}}.
+    Errors are against the ellipsoidal tier, maxima over the band's pairs.
+    """
+    import numpy as np
+
+    from tewa.services import kinematics_np
+
+    p = _pairs(n, ranges_km, seed)
+    radius_km, weapon_km = 5.0, 25.0
+
+    def run(tier):
+        return kinematics_np.components(p["lat"], p["lon"], p["spd"], p["hdg"],
+                                        p["da_lat"], p["da_lon"], radius_km, weapon_km,
+                                        precision=tier)
+
+    def scalar(tier):
+        for b in range(len(ranges_km)):
+            for i in range(min(n, _SCALAR_PAIRS)):
+                compute_cpa_tcpa_tdb_twrp(
+                    da_lat=p["da_lat"][b, i], da_lon=p["da_lon"][b, i], da_radius_km=radius_km,
+                    trk_lat=p["lat"][b, i], trk_lon=p["lon"][b, i], speed_mps=p["spd"][b, i],
+                    heading_deg=p["hdg"][b, i], weapon_range_km=weapon_km, precision=tier)
+
+    frames = {t: kinematics_np.frame(p["lat"], p["lon"], p["hdg"], p["da_lat"], p["da_lon"], t)
+              for t in PRECISIONS}
+    cpa = {t: run(t)[0] for t in PRECISIONS}
+    e_ref, n_ref, _ = frames["ellipsoidal"]
+    d_ref, b_ref = np.hypot(e_ref, n_ref), np.degrees(np.arctan2(e_ref, n_ref))
+
+    pairs = n * len(ranges_km)
+    scalar_pairs = min(n, _SCALAR_PAIRS) * len(ranges_km)
+    tiers: Dict[str, Any] = {}
+    for t in PRECISIONS:
+        e, nn, _ = frames[t]
+        d_err = np.abs(np.hypot(e, nn) - d_ref)
+        b_err = np.abs((np.degrees(np.arctan2(e, nn)) - b_ref + 180.0) % 360.0 - 180.0)
+        c_err = np.abs(cpa[t] - cpa["ellipsoidal"]) * 1000.0
+        bands: Dict[str, Dict[str, float]] = {}
+        for k, r in enumerate(ranges_km):
+            bands[f"{r:g}"] = {
+                "range_err_m_max": round(float(d_err[k].max()), 3),
+                "bearing_err_deg_max": round(float(b_err[k].max()), 5),
+                "cpa_err_m_max": round(float(c_err[k].max()), 3),
+            }
+        tiers[t] = {
+            "np_us_per_pair": round(_best_of(lambda t=t: run(t), repeats) / pairs * 1e6, 4),
+            "scalar_us_per_pair": round(_best_of(lambda t=t: scalar(t), 1) / scalar_pairs * 1e6, 2),
+            "bands": bands,
+        }
+    return {"pairs": pairs, "ranges_km": list(ranges_km), "tiers": tiers}
+
+
+def format_precision_table(table: Dict[str, Any]) -> List[str]:
+    """Markdown rows: one per (tier, range band)."""
+    rows = ["| tier | NumPy µs/pair | scalar µs/pair | range km | range err m | "
+            "bearing err ° | CPA err m |",
+            "|---|---|---|---|---|---|---|"]
+    for tier, r in table["tiers"].items():
+        for band, e in r["bands"].items():
+            rows.append(f"| {tier} | {r['np_us_per_pair']} | {r['scalar_us_per_pair']} | "
+                        f"{band} | {e['range_err_m_max']} | {e['bearing_err_deg_max']} | "
+                        f"{e['cpa_err_m_max']} |")
+    return rows
@@ -0,0 +1,393 @@
+# tewa/benchmarks/suite.py
+"""
+End-to-end benchmark suite over synthetic scenarios (see services/synthetic.py).
+
+run_suite(size) seeds a scenario of the given size, times each case
+`repeats` times after one warm-up and returns latency percentiles and
+throughput per case. compare() checks a run against the committed baseline
+(baseline.json, keyed by size) with a relative tolerance; a size or case the
+baseline does not cover is reported too, never passed.
+
+Used by `manage.py run_benchmarks` and the pytest `benchmark` marker.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import math
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.db import connection
+from django.utils import timezone
+
+from tewa.models import DefendedAsset, Scenario, Track
+from tewa.services.synthetic import SyntheticSpec, generate_scenario
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_TOLERANCE = 0.5  # 50 %: shared CI runners are noisy
+
+
+@dataclass(frozen=True)
+class Size:
+    das: int
+    tracks: int
+    samples: int
+    repeats: int
+
+
+SIZES: Dict[str, Size] = {
+    "small": Size(das=3, tracks=50, samples=20, repeats=5),
+    "medium": Size(das=10, tracks=500, samples=60, repeats=3),
+    "large": Size(das=50, tracks=5000, samples=100, repeats=1),
+}
+
+
+class _Ctx:
+    """Scenario rows loaded once and shared by the cases."""
+
+    def __init__(self, scenario: Scenario, start) -> None:
+        self.scenario = scenario
+        self.when = start + timedelta(seconds=30)
+        self.das = list(DefendedAsset.objects.filter(scenario=scenario))
+        self.tracks = list(Track.objects.filter(scenario=scenario))
+        self.bundles: List[Any] = []
+        self.geo_points: Optional[List[Tuple[float, float, float, float]]] = None
+        self.extra: Dict[str, Dict[str, Any]] = {}  # per case, merged into its result
+
+
+# ---------------------------------------------------------------------
+# Cases: each runs one unit of work and returns the number of operations
+# ---------------------------------------------------------------------
+
+def _kinematics(ctx: _Ctx) -> int:
+    from tewa.services.kinematics import compute_cpa_tcpa_tdb_twrp
+
+    out = []
+    for t in ctx.tracks:
+        for da in ctx.das:
+            out.append(compute_cpa_tcpa_tdb_twrp(
+                da_lat=da.lat, da_lon=da.lon, da_radius_km=da.radius_km,
+                trk_lat=t.lat, trk_lon=t.lon, speed_mps=t.speed_mps,
+                heading_deg=t.heading_deg, weapon_range_km=da.radius_km))
+    ctx.bundles = out
+    return len(out)
+
+
+def _scoring(ctx: _Ctx) -> int:
+    from tewa.services.scoring import score_components_to_threat
+
+    if not ctx.bundles:
+        _kinematics(ctx)
+    params = {"w_cpa": 0.25, "w_tcpa": 0.25, "w_tdb": 0.25, "w_twrp": 0.25}
+    for b in ctx.bundles:
+        score_components_to_threat(cpa_km=b.cpa_km, tcpa_s=b.tcpa_s, tdb_km=b.tdb_s,
+                                   twrp_s=b.twrp_s, params=params)
+    return len(ctx.bundles)
+
+
+def _sampling(ctx: _Ctx) -> int:
+    from tewa.services.sampling import sample_track_state_at
+
+    for t in ctx.tracks:
+        sample_track_state_at(t, ctx.when, method="linear")
+    return len(ctx.tracks)
+
+
+def _compute_at(ctx: _Ctx) -> int:
+    from tewa.services.engine import compute_scores_at_timestamp
+
+    return len(compute_scores_at_timestamp(
+        scenario_id=ctx.scenario.pk, when_iso=ctx.when.isoformat(),
+        da_ids=[d.pk for d in ctx.das]))
+
+
+def _ranking(ctx: _Ctx) -> int:
+    from tewa.services.ranking import rank_threats
+
+    boards = rank_threats(scenario_id=ctx.scenario.pk, top_n=50)
+    return max(1, sum(len(b["threats"]) for b in boards))
+
+
+TOP_K_VALUES = (5, 10, 50)  # threat-board sizes; the ranking API defaults to 50
+
+
+def _top_k(ctx: _Ctx) -> int:
+    """Branch-and-bound top-k per DA; records the share of pairs it skipped per k."""
+    from tewa.services.threat_compute import calculate_scores_for_when
+
+    scored = 0
+    ratios = {}
+    for k in TOP_K_VALUES:
+        report: Dict[str, Any] = {}
+        calculate_scores_for_when(scenario=ctx.scenario, when=ctx.when, das=ctx.das,
+                                  top_k=k, report=report)
+        scored += report["scored"]
+        ratios[str(k)] = round(report["skipped"] / report["pairs"], 4) if report["pairs"] else 0.0
+    ctx.extra["top_k"] = {"skip_ratio": ratios}
+    return max(1, scored)
+
+
+def _board_export(ctx: _Ctx) -> int:
+    from tewa.services.export_csv import iter_rows_for_threat_board
+
+    return max(1, sum(1 for _ in iter_rows_for_threat_board(ctx.scenario.pk)) - 1)
+
+
+def _csv_import(ctx: _Ctx) -> int:
+    from tewa.services.csv_import import import_csv
+
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(["track_id", "lat", "lon", "alt_m", "speed_mps", "heading_deg", "timestamp"])
+    stamp = timezone.now()
+    rows = 0
+    for i, t in enumerate(ctx.tracks[:200]):
+        for k in range(5):
+            w.writerow([f"CSV-{i}", t.lat, t.lon, t.alt_m, t.speed_mps, t.heading_deg,
+                        (stamp + timedelta(seconds=k)).isoformat()])
+            rows += 1
+    sc, _ = Scenario.objects.get_or_create(name=f"{ctx.scenario.name}-csv")
+    sc.tracks.all().delete()
+    import_csv(buf.getvalue(), scenario_id=sc.pk)
+    return rows
+
+
+_GEO_MIN_POINTS = 10_000
+
+
+def _geo_points(ctx: _Ctx) -> List[Tuple[float, float, float, float]]:
+    """(track lat, lon, DA lat, lon) for every pair, repeated up to _GEO_MIN_POINTS."""
+    if ctx.geo_points is None:
+        pairs = [(t.lat, t.lon, d.lat, d.lon) for t in ctx.tracks for d in ctx.das]
+        ctx.geo_points = pairs * max(1, -(-_GEO_MIN_POINTS // max(1, len(pairs))))
+    return ctx.geo_points
+
+
+def _geodesy_scalar(ctx: _Ctx) -> int:
+    from core.utils.geodesy import (
+        LatLon,
+        destination_point,
+        enu_from_latlon,
+        haversine_distance_m,
+        initial_bearing_deg,
+    )
+
+    pts = _geo_points(ctx)
+    for lat, lon, lat0, lon0 in pts:
+        p, o = LatLon(lat, lon), LatLon(lat0, lon0)
+        haversine_distance_m(o, p)
+        destination_point(p, initial_bearing_deg(o, p), 1000.0)
+        enu_from_latlon(p, o)
+    return len(pts)
+
+
+def _geodesy_np(ctx: _Ctx) -> int:
+    import numpy as np
+
+    from core.utils import geodesy_np as gn
+
+    lat, lon, lat0, lon0 = np.array(_geo_points(ctx)).T
+    gn.haversine_distance_m(lat0, lon0, lat, lon)
+    gn.destination_point(lat, lon, gn.initial_bearing_deg(lat0, lon0, lat, lon), 1000.0)
+    gn.enu_from_latlon(lat, lon, lat0, lon0)
+    return lat.size
+
+
+def _chart_svg(ctx: _Ctx) -> int:
+    from tewa.services.charting_svg import render_score_history_svg
+
+    series = _chart_series(ctx)
+    render_score_history_svg(series, smooth=5, use_cache=False)
+    return len(series)
+
+
+def _chart_png(ctx: _Ctx) -> int:
+    from tewa.services.charting import render_score_history_png
+
+    series = _chart_series(ctx)
+    render_score_history_png(series, smooth=5, use_cache=False)
+    return len(series)
+
+
+def _chart_series(ctx: _Ctx):
+    base = ctx.when
+    return [(base + timedelta(seconds=i), 0.5 + 0.4 * math.sin(i / 25.0)) for i in range(2000)]
+
+
+CASES: Dict[str, Callable[[_Ctx], int]] = {
+    "kinematics": _kinematics,
+    "geodesy_scalar": _geodesy_scalar,
+    "geodesy_np": _geodesy_np,
+    "scoring": _scoring,
+    "sampling": _sampling,
+    "compute_at": _compute_at,
+    "ranking": _ranking,
+    "top_k": _top_k,
+    "board_export": _board_export,
+    "csv_import": _csv_import,
+    "chart_svg": _chart_svg,
+    "chart_png": _chart_png,
+}
+
+
+# ---------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------
+
+def _percentile(sorted_s: Sequence[float], q: float) -> float:
+    i = min(len(sorted_s) - 1, max(0, math.ceil(q * len(sorted_s)) - 1))
+    return sorted_s[i]
+
+
+def _measure(fn: Callable[[_Ctx], int], ctx: _Ctx, repeats: int) -> Dict[str, Any]:
+    fn(ctx)  # warm-up: imports, caches, first-query planning
+    samples: List[float] = []
+    ops = 0
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        ops = fn(ctx)
+        samples.append(time.perf_counter() - t0)
+    s = sorted(samples)
+    p50 = _percentile(s, 0.50)
+    return {
+        "ops": ops,
+        "repeats": repeats,
+        "p50_ms": round(p50 * 1000.0, 3),
+        "p95_ms": round(_percentile(s, 0.95) * 1000.0, 3),
+        "mean_ms": round(statistics.fmean(s) * 1000.0, 3),
+        "ops_per_s": round(ops / p50, 1) if p50 > 0 else None,
+    }
+
+
+def _skip_reason(name: str) -> Optional[str]:
+    if name == "chart_png":
+        try:
+            import matplotlib  # noqa: F401
+        except ImportError:
+            return "matplotlib not installed"
+    if name == "geodesy_np":
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            return "numpy not installed"
+    return None
+
+
+def run_suite(
+    size: str = "small",
+    *,
+    cases: Optional[Sequence[str]] = None,
+    repeats: Optional[int] = None,
+    seed: int = 42,
+    keep: bool = False,
+) -> Dict[str, Any]:
+    """Seed a synthetic scenario of `size`, run the cases and return the report."""
+    if size not in SIZES:
+        raise ValueError(f"Unknown size '{size}' (choose from {', '.join(SIZES)})")
+    unknown = set(cases or ()) - set(CASES)
+    if unknown:
+        raise ValueError(f"Unknown case(s): {', '.join(sorted(unknown))}")
+
+    sz = SIZES[size]
+    name = f"bench-{size}-{seed}"
+    start = timezone.now().replace(microsecond=0)
+    seeded = generate_scenario(SyntheticSpec(
+        name=name, n_das=sz.das, n_tracks=sz.tracks, samples_per_track=sz.samples,
+        seed=seed, start=start), replace=True)
+    scenario = Scenario.objects.get(pk=seeded["scenario_id"])
+    ctx = _Ctx(scenario, start)
+    _compute_at(ctx)  # untimed: ranking / export need a board to read
+
+    results: Dict[str, Any] = {}
+    try:
+        for case in cases or CASES:
+            reason = _skip_reason(case)
+            if reason:
+                results[case] = {"skipped": reason}
+                continue
+            results[case] = _measure(CASES[case], ctx, repeats or sz.repeats)
+            results[case].update(ctx.extra.pop(case, {}))
+    finally:
+        if not keep:
+            Scenario.objects.filter(name__startswith=name).delete()
+
+    return {
+        "meta": {
+            "size": size,
+            "seed": seed,
+            "das": sz.das,
+            "tracks": sz.tracks,
+            "samples_per_track": sz.samples,
+            "db": connection.vendor,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "finished_at": timezone.now().isoformat(),
+        },
+        "results": results,
+    }
+
+
+# ---------------------------------------------------------------------
+# Baselines
+# ---------------------------------------------------------------------
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def update_baseline(report: Dict[str, Any], path: Path = BASELINE_PATH) -> None:
+    """Store this run's p50/throughput as the baseline for its size (cases not run are kept)."""
+    data = load_baseline(path)
+    data.setdefault(report["meta"]["size"], {}).update({
+        case: {"p50_ms": r["p50_ms"], "ops_per_s": r["ops_per_s"]}
+        for case, r in report["results"].items()
+        if "p50_ms" in r
+    })
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def compare(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[Dict[str, Any]]:
+    """
+    Cases whose p50 latency is more than `tolerance` (relative) above the
+    baseline for the same size, plus every measured case the baseline has no
+    entry for (missing="size" or "case", ratio None) so an unrecorded size or
+    a new case cannot pass silently. Skipped cases are ignored.
+    """
+    size = report["meta"]["size"]
+    base = baseline.get(size)
+    regressions = []
+    for case, r in report["results"].items():
+        if "p50_ms" not in r:
+            continue
+        b = (base or {}).get(case)
+        if not b or not b.get("p50_ms"):
+            regressions.append({
+                "case": case,
+                "p50_ms": r["p50_ms"],
+                "baseline_p50_ms": None,
+                "ratio": None,
+                "missing": "size" if base is None else "case",
+            })
+            continue
+        ratio = r["p50_ms"] / b["p50_ms"]
+        if ratio > 1.0 + tolerance:
+            regressions.append({
+                "case": case,
+                "p50_ms": r["p50_ms"],
+                "baseline_p50_ms": b["p50_ms"],
+                "ratio": round(ratio, 3),
+            })
+    return regressions
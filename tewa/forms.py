@@ -63,7 +63,7 @@ class ScenarioParamsForm(forms.ModelForm):
     class Meta:
         model = ModelParams
         fields = [
-            "R_W_m", "R_DA_m", "tick_s",
+            "R_W_m", "R_DA_m", "tick_s", "freshness_alert_s", "geodesy_precision",
             "w_cpa", "w_tcpa", "w_tdb", "w_twrp",
             "sigma_cpa", "sigma_tcpa", "sigma_tdb", "sigma_twrp",
         ]
@@ -71,6 +71,7 @@ class ScenarioParamsForm(forms.ModelForm):
             "R_W_m": forms.NumberInput(attrs={"min": 1, "step": 1}),
             "R_DA_m": forms.NumberInput(attrs={"min": 0, "step": 1}),
             "tick_s": forms.NumberInput(attrs={"min": 0.000001, "step": "any"}),
+            "freshness_alert_s": forms.NumberInput(attrs={"min": 0, "step": "any"}),
             "w_cpa": forms.NumberInput(attrs={"min": 0, "max": 1, "step": 0.01}),
             "w_tcpa": forms.NumberInput(attrs={"min": 0, "max": 1, "step": 0.01}),
             "w_tdb": forms.NumberInput(attrs={"min": 0, "max": 1, "step": 0.01}),
@@ -81,6 +82,11 @@ class ScenarioParamsForm(forms.ModelForm):
             "sigma_twrp": forms.NumberInput(attrs={"min": 0, "step": "any"}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["freshness_alert_s"].required = False
+        self.fields["geodesy_precision"].required = False
+
     def clean(self):
         data = super().clean()
 
@@ -96,6 +102,12 @@ class ScenarioParamsForm(forms.ModelForm):
         if tick is None or tick <= 0:
             self.add_error("tick_s", "Tick rate must be greater than 0")
 
+        # --- Freshness alert / geodesy tier (optional; keep the stored values) ---
+        if data.get("freshness_alert_s") is None:
+            data["freshness_alert_s"] = self.instance.freshness_alert_s
+        if not data.get("geodesy_precision"):
+            data["geodesy_precision"] = self.instance.geodesy_precision
+
         # --- Range consistency ---
         R_W, R_DA = data.get("R_W_m"), data.get("R_DA_m")
         if R_W is not None and R_DA is not None and R_DA >= R_W:
@@ -1,9 +1,9 @@
 # tewa/management/commands/compute_threats.py
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
-from tewa.models import DefendedAsset, Scenario
-from tewa.services.threat_compute import batch_compute_for_scenario
+from tewa.models import ComputeJob, DefendedAsset, Scenario
+from tewa.services.compute_jobs import LOCK_POLICIES, run_inline
 
 
 class Command(BaseCommand):
@@ -20,28 +20,42 @@ class Command(BaseCommand):
             type=int,
             help='ID of the defended asset to compute threat scores for'
         )
+        parser.add_argument(
+            '--lock-policy',
+            dest='lock_policy',
+            choices=LOCK_POLICIES,
+            default='queue',
+            help='What to do if another run holds the scenario lock (default: queue)'
+        )
 
     def handle(self, *args, **options):
-        scenario_id = options['scenario_id']
-        da_id = options['da_id']
-
-        if scenario_id and da_id:
-            # Compute for a specific scenario and defended asset
-            scenario = Scenario.objects.get(id=scenario_id)
-            da = DefendedAsset.objects.get(id=da_id)
-            self.stdout.write(
-                f"Computing threat scores for scenario {scenario.name} and DA {da.name}...")
-            batch_compute_for_scenario(scenario_id, da_id)
-            self.stdout.write(self.style.SUCCESS(
-                f"Threat scores computed for scenario {scenario.name} and DA {da.name}"))
-        else:
-            # Compute for all scenarios and defended assets
-            scenarios = Scenario.objects.all()
-            das = DefendedAsset.objects.all()
-            for scenario in scenarios:
-                for da in das:
-                    self.stdout.write(
-                        f"Computing threat scores for scenario {scenario.name} and DA {da.name}...")
-                    batch_compute_for_scenario(scenario.id, da.id)
-                    self.stdout.write(self.style.SUCCESS(
-                        f"Threat scores computed for scenario {scenario.name} and DA {da.name}"))
+        scenario_id = options.get('scenario_id')
+        da_id = options.get('da_id')
+        policy = options.get('lock_policy') or 'queue'
+
+        scenarios = Scenario.objects.all().order_by('id')
+        if scenario_id:
+            scenarios = scenarios.filter(id=scenario_id)
+            if not scenarios.exists():
+                raise CommandError(f"Scenario {scenario_id} not found")
+        da = DefendedAsset.objects.get(id=da_id) if da_id else None
+
+        # One recorded run per scenario, under its lock, so a manual run never
+        # interleaves its batch with a beat or API run on the same scenario.
+        for scenario in scenarios:
+            target = f"scenario {scenario.name}" + (f" and DA {da.name}" if da else "")
+            self.stdout.write(f"Computing threat scores for {target}...")
+            job = run_inline(
+                ComputeJob.KIND_COMPUTE_SCENARIO, scenario.id,
+                params={"lock_policy": policy, "trigger": "command",
+                        **({"da_ids": [da.id]} if da else {})},
+            )
+            if job.skipped:
+                self.stdout.write(self.style.WARNING(
+                    f"Skipped {target}: {job.error} (waited {job.lock_wait_s}s)"))
+            elif job.status != "success":
+                raise CommandError(f"Compute for {target} {job.status}: {job.error}")
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Threat scores computed for {target} "
+                    f"({job.rows_written} rows, lock wait {job.lock_wait_s}s)"))
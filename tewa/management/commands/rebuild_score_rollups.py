@@ -0,0 +1,40 @@
+# tewa/management/commands/rebuild_score_rollups.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tewa.models import Scenario
+from tewa.services.score_rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild 1 min / 10 min / 1 h score rollups from raw ThreatScore history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario_id',
+            type=int,
+            help='Only rebuild this scenario (default: all scenarios)'
+        )
+        parser.add_argument(
+            '--da_id',
+            type=int,
+            help='Only rebuild this defended asset (requires --scenario_id)'
+        )
+
+    def handle(self, *args, **options):
+        scenario_id = options['scenario_id']
+        da_id = options['da_id']
+
+        if da_id and not scenario_id:
+            raise CommandError('--da_id requires --scenario_id')
+
+        scenarios = Scenario.objects.all().order_by('id')
+        if scenario_id:
+            scenarios = scenarios.filter(id=scenario_id)
+            if not scenarios.exists():
+                raise CommandError(f'Scenario {scenario_id} not found')
+
+        for scenario in scenarios:
+            n = rebuild_rollups(scenario.id, da_id=da_id)
+            self.stdout.write(self.style.SUCCESS(
+                f"Rebuilt rollups for scenario {scenario.name} from {n} score rows"))
@@ -0,0 +1,94 @@
+# tewa/management/commands/run_benchmarks.py
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tewa.benchmarks import (
+    BASELINE_PATH,
+    CASES,
+    DEFAULT_TOLERANCE,
+    SIZES,
+    compare,
+    load_baseline,
+    run_suite,
+    update_baseline,
+)
+from tewa.benchmarks.precision import format_precision_table, precision_table
+
+
+class Command(BaseCommand):
+    help = 'Run the end-to-end benchmark suite on a synthetic scenario and compare to the baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', choices=list(SIZES), default='small',
+                            help='Synthetic scenario size')
+        parser.add_argument('--only', nargs='+', choices=list(CASES),
+                            help='Run only these cases')
+        parser.add_argument('--repeats', type=int, help='Timed runs per case (default per size)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the JSON report here')
+        parser.add_argument('--baseline', default=str(BASELINE_PATH),
+                            help='Baseline JSON to compare against')
+        parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                            help='Allowed relative p50 slowdown before failing (0.5 = +50%%)')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Store this run as the baseline for its size')
+        parser.add_argument('--keep', action='store_true',
+                            help='Keep the synthetic scenario afterwards')
+        parser.add_argument('--precision', action='store_true',
+                            help='Print the cost-versus-error table of the kinematics '
+                                 'precision tiers instead (no scenario, no baseline)')
+
+    def handle(self, *args, **options):
+        if options['precision']:
+            table = precision_table(seed=options['seed'])
+            for row in format_precision_table(table):
+                self.stdout.write(row)
+            if options['output']:
+                Path(options['output']).write_text(json.dumps(table, indent=2) + '\n')
+            return
+
+        try:
+            report = run_suite(options['size'], cases=options['only'],
+                               repeats=options['repeats'], seed=options['seed'],
+                               keep=options['keep'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for case, r in report['results'].items():
+            if 'skipped' in r:
+                self.stdout.write(f"{case:<14} skipped ({r['skipped']})")
+            else:
+                self.stdout.write(
+                    f"{case:<14} p50 {r['p50_ms']:>10.2f} ms  p95 {r['p95_ms']:>10.2f} ms  "
+                    f"{r['ops_per_s']} ops/s ({r['ops']} ops)")
+                if 'skip_ratio' in r:
+                    self.stdout.write(" " * 15 + "skipped pairs by top_k: " + ", ".join(
+                        f"{k}: {v:.1%}" for k, v in r['skip_ratio'].items()))
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2) + '\n')
+
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline']:
+            update_baseline(report, baseline_path)
+            self.stdout.write(self.style.SUCCESS(f"Baseline updated: {baseline_path}"))
+            return
+
+        regressions = compare(report, load_baseline(baseline_path), options['tolerance'])
+        if regressions:
+            for r in regressions:
+                if r.get('missing'):
+                    what = (f"size '{options['size']}'" if r['missing'] == 'size'
+                            else f"case '{r['case']}' for size '{options['size']}'")
+                    self.stderr.write(
+                        f"NO BASELINE {r['case']}: {what} not in {baseline_path} "
+                        f"(record it with --update-baseline)")
+                    continue
+                self.stderr.write(
+                    f"REGRESSION {r['case']}: p50 {r['p50_ms']} ms vs baseline "
+                    f"{r['baseline_p50_ms']} ms (x{r['ratio']})")
+            raise CommandError(f"{len(regressions)} benchmark regression(s) or missing baseline(s)")
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
@@ -0,0 +1,69 @@
+# tewa/management/commands/seed_synthetic.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tewa.models import Scenario
+from tewa.services.synthetic import PATTERNS, SyntheticSpec, generate_scenario
+
+
+def _parse_mix(raw: str) -> dict:
+    mix = {}
+    for part in raw.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in PATTERNS:
+            raise CommandError(f"Unknown pattern '{name}' (choose from {', '.join(PATTERNS)})")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Bad weight for '{name}': {weight!r}")
+    if not any(w > 0 for w in mix.values()):
+        raise CommandError('--mix needs at least one positive weight')
+    return mix
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic scenario (DAs, tracks, samples) for load and scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', default='Synthetic', help='Scenario name')
+        parser.add_argument('--das', type=int, default=10, help='Number of defended assets')
+        parser.add_argument('--tracks', type=int, default=1000, help='Number of tracks')
+        parser.add_argument('--samples', type=int, default=60, help='Samples per track')
+        parser.add_argument('--dt', type=float, default=5.0, help='Seconds between samples')
+        parser.add_argument('--seed', type=int, default=42, help='RNG seed (same seed, same data)')
+        parser.add_argument('--center', type=float, nargs=2, default=(26.9, 72.0),
+                            metavar=('LAT', 'LON'), help='Centre of the area')
+        parser.add_argument('--extent-km', type=float, default=300.0,
+                            help='Radius of the area tracks start in')
+        parser.add_argument('--mix', default='straight=0.4,turning=0.3,inbound=0.3',
+                            help='Motion pattern weights, e.g. straight=1,inbound=3')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per bulk INSERT')
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete an existing scenario with the same name first')
+
+    def handle(self, *args, **options):
+        if min(options['das'], options['tracks'], options['samples']) < 0:
+            raise CommandError('--das, --tracks and --samples must be >= 0')
+        if not options['replace'] and Scenario.objects.filter(name=options['name']).exists():
+            raise CommandError(f"Scenario '{options['name']}' exists (use --replace or --name)")
+
+        spec = SyntheticSpec(
+            name=options['name'],
+            n_das=options['das'],
+            n_tracks=options['tracks'],
+            samples_per_track=options['samples'],
+            dt_s=options['dt'],
+            seed=options['seed'],
+            center=tuple(options['center']),
+            extent_km=options['extent_km'],
+            mix=_parse_mix(options['mix']),
+            batch_size=max(1, options['batch_size']),
+        )
+        stats = generate_scenario(spec, replace=options['replace'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded scenario {spec.name} (id={stats['scenario_id']}): "
+            f"{stats['das']} DAs, {stats['tracks']} tracks {stats['patterns']}, "
+            f"{stats['samples']} samples in {stats['elapsed_s']}s "
+            f"({stats['samples_per_s']} samples/s)"))
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tewa", "0012_modelparams_r_da_m_modelparams_r_w_m_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ThreatScoreRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution_s",
+                    models.PositiveIntegerField(
+                        choices=[(60, "1 min"), (600, "10 min"), (3600, "1 h")]
+                    ),
+                ),
+                ("bucket_start", models.DateTimeField()),
+                ("count", models.PositiveIntegerField(default=0)),
+                ("score_sum", models.FloatField(default=0.0)),
+                ("score_min", models.FloatField(blank=True, null=True)),
+                ("score_max", models.FloatField(blank=True, null=True)),
+                ("score_last", models.FloatField(blank=True, null=True)),
+                ("last_computed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "da",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_rollups",
+                        to="tewa.defendedasset",
+                    ),
+                ),
+                (
+                    "scenario",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_rollups",
+                        to="tewa.scenario",
+                    ),
+                ),
+                (
+                    "track",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_rollups",
+                        to="tewa.track",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {
+                    ("scenario", "da", "track", "resolution_s", "bucket_start")
+                },
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tewa", "0014_computejob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="computejob",
+            name="lock_wait_s",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="computejob",
+            name="skipped",
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:49
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tewa", "0015_computejob_lock"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="modelparams",
+            name="freshness_alert_s",
+            field=models.FloatField(
+                default=30.0,
+                help_text="Alert when a score's source sample is older than this (s)",
+                validators=[django.core.validators.MinValueValidator(0.0)],
+            ),
+        ),
+        migrations.AddField(
+            model_name="threatscore",
+            name="sample_t",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
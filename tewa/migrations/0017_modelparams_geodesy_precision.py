@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tewa", "0016_threatscore_sample_t"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="modelparams",
+            name="geodesy_precision",
+            field=models.CharField(
+                choices=[
+                    ("enu", "Fast ENU (small-angle)"),
+                    ("spherical", "Spherical great-circle"),
+                    ("ellipsoidal", "Ellipsoidal WGS-84"),
+                ],
+                default="enu",
+                help_text="Accuracy tier of the kinematics projection",
+                max_length=16,
+            ),
+        ),
+    ]
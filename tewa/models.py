@@ -12,6 +12,8 @@ from django.db import models
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 
+from core.enums import OrderStatusEnum
+
 
 # ---------- Base ----------
 class TimeStamped(models.Model):
@@ -192,6 +194,9 @@ class ThreatScore(TimeStamped):
     # When the compute considered the state
     computed_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    # Newest TrackSample.t the state was derived from (None: Track snapshot)
+    sample_t = models.DateTimeField(null=True, blank=True)
+
     def __str__(self) -> str:
         return f"ThreatScore[{self.scenario.name} | {self.track.track_id} → {self.da.name}]"
 
@@ -205,6 +210,138 @@ class ThreatScore(TimeStamped):
         ]
         # No unique_together on computed_at to avoid collisions
 
+
+# ---------- ThreatScoreRollup ----------
+class ThreatScoreRollup(models.Model):
+    """
+    Pre-aggregated ThreatScore history for a (Scenario, DA, Track) at a fixed
+    bucket resolution (1 min / 10 min / 1 h). Maintained incrementally after
+    each compute batch (see tewa.services.score_rollups).
+    """
+    RESOLUTION_CHOICES = [
+        (60, "1 min"),
+        (600, "10 min"),
+        (3600, "1 h"),
+    ]
+
+    scenario = models.ForeignKey(
+        Scenario, on_delete=models.CASCADE, related_name="score_rollups"
+    )
+    da = models.ForeignKey(
+        DefendedAsset, on_delete=models.CASCADE, related_name="score_rollups"
+    )
+    track = models.ForeignKey(
+        Track, on_delete=models.CASCADE, related_name="score_rollups"
+    )
+
+    resolution_s = models.PositiveIntegerField(choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+
+    count = models.PositiveIntegerField(default=0)
+    score_sum = models.FloatField(default=0.0)
+    score_min = models.FloatField(null=True, blank=True)
+    score_max = models.FloatField(null=True, blank=True)
+    score_last = models.FloatField(null=True, blank=True)
+    last_computed_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def score_avg(self) -> Optional[float]:
+        return (self.score_sum / self.count) if self.count else None
+
+    def __str__(self) -> str:
+        return (
+            f"Rollup[{self.resolution_s}s | s{self.scenario_id} "  # type: ignore[attr-defined]
+            f"da{self.da_id} trk{self.track_id} @ {self.bucket_start.isoformat()}]"  # type: ignore[attr-defined]
+        )
+
+    class Meta:
+        # The unique index doubles as the (key, resolution, time) range index
+        unique_together = [
+            ("scenario", "da", "track", "resolution_s", "bucket_start")]
+
+
+# ---------- ComputeJob ----------
+class ComputeJob(models.Model):
+    """
+    Asynchronous compute request (compute_now / compute_at / HTML compute button)
+    run on the worker pool or Celery; polled via /api/tewa/jobs/<id>/.
+    """
+    KIND_COMPUTE_NOW = "compute_now"
+    KIND_COMPUTE_AT = "compute_at"
+    KIND_COMPUTE_SCENARIO = "compute_scenario"
+    KIND_CHOICES = [
+        (KIND_COMPUTE_NOW, "compute_now"),
+        (KIND_COMPUTE_AT, "compute_at"),
+        (KIND_COMPUTE_SCENARIO, "compute_scenario"),
+    ]
+    STATUS_CHOICES = [(s.value, s.name) for s in OrderStatusEnum]
+    TERMINAL = (
+        OrderStatusEnum.SUCCESS.value,
+        OrderStatusEnum.FAILURE.value,
+        OrderStatusEnum.CANCELED.value,
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    scenario = models.ForeignKey(
+        Scenario, on_delete=models.CASCADE, related_name="compute_jobs"
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES,
+        default=OrderStatusEnum.PENDING.value, db_index=True,
+    )
+    # Request arguments (when_iso, method, da_ids, weapon_range_km, lock_policy)
+    params = models.JSONField(default=dict, blank=True)
+
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    cancel_requested = models.BooleanField(default=False)
+    # Per-scenario run lock: time spent waiting for it, and runs skipped because
+    # another run held it (status canceled, see compute_jobs.run_job)
+    lock_wait_s = models.FloatField(null=True, blank=True)
+    skipped = models.BooleanField(default=False)
+
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    created_by = models.ForeignKey(
+        getattr(settings, "AUTH_USER_MODEL", "auth.User"),
+        null=True, blank=True, on_delete=models.SET_NULL, related_name="compute_jobs"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Last sign of life from the worker (claim, lock taken, progress ticks);
+    # compute_jobs.fail_stale_jobs() fails unfinished jobs that went quiet
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in self.TERMINAL
+
+    @property
+    def duration_s(self) -> Optional[float]:
+        if not self.started_at:
+            return None
+        end = self.finished_at or timezone.now()
+        return (end - self.started_at).total_seconds()
+
+    @property
+    def throughput_rows_s(self) -> Optional[float]:
+        d = self.duration_s
+        return (self.rows_written / d) if d else None
+
+    def __str__(self) -> str:
+        return f"ComputeJob[{self.kind} s{self.scenario_id} {self.status}]"  # type: ignore[attr-defined]
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["scenario", "-created_at"], name="idx_job_scn_created"),
+        ]
+
+
 # ---------- ModelParams ----------
 
 
@@ -213,6 +350,13 @@ class ModelParams(models.Model):
     Parameter set (weights, normalizers) used by deterministic threat models.
     Scope: per Scenario (default one-to-one).
     """
+    # Geodesy tier of the kinematics (tewa.services.kinematics.PRECISIONS)
+    PRECISION_CHOICES = [
+        ("enu", "Fast ENU (small-angle)"),
+        ("spherical", "Spherical great-circle"),
+        ("ellipsoidal", "Ellipsoidal WGS-84"),
+    ]
+
     scenario = models.OneToOneField(
         Scenario, on_delete=models.CASCADE, related_name='params'
     )
@@ -237,6 +381,12 @@ class ModelParams(models.Model):
         default=8000, help_text="DA radius (m)")
     tick_s = models.FloatField(default=1.0, validators=[
                                MinValueValidator(1e-6)], help_text="Tick rate (s)")
+    freshness_alert_s = models.FloatField(
+        default=30.0, validators=[MinValueValidator(0.0)],
+        help_text="Alert when a score's source sample is older than this (s)")
+    geodesy_precision = models.CharField(
+        max_length=16, choices=PRECISION_CHOICES, default="enu",
+        help_text="Accuracy tier of the kinematics projection")
 
     # Weights (UI enforces sum=1)
     w_cpa = models.FloatField(default=0.35, validators=[
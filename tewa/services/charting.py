@@ -1,9 +1,16 @@
 # tewa/services/charting.py
 from __future__ import annotations
 
+import hashlib
 import io
+import math
+import threading
+import time
+from collections import OrderedDict, deque
 from datetime import date, datetime
 from typing import (
+    Deque,
+    Dict,
     Iterable,
     List,
     Optional,
@@ -11,11 +18,18 @@ from typing import (
     Tuple,
 )
 
-import matplotlib
-import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
+from django.conf import settings
 
-matplotlib.use("Agg")  # headless must be set before importing pyplot
+from core.utils import metrics
+
+# matplotlib is imported inside the PNG renderers only: web workers that never
+# serve a PNG (or only serve SVG, see charting_svg) don't pay its import cost.
+# Object-oriented API only (Figure/FigureCanvasAgg, no pyplot global state), so
+# renders are safe to run concurrently from threaded workers / a thread pool.
+
+_DEFAULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+_DEFAULT_CACHE_MAX_ENTRIES = 512
+_RENDER_SAMPLES = 1000  # render durations kept for percentile reporting
 
 
 def _moving_avg(values: Sequence[float], k: Optional[int]) -> List[float]:
@@ -46,13 +60,140 @@ def _to_datetime_list(xs: Iterable[object]) -> List[datetime]:
     return out
 
 
-def render_score_history_png(
-    series: Iterable[Tuple[object, float]],
+# ---------------------------------------------------------------------
+# Rendered PNG cache (size-bounded LRU) + render stats
+# ---------------------------------------------------------------------
+
+class _PngCache:
+    """Thread-safe LRU of rendered PNG bytes, bounded by entry count and total bytes."""
+
+    def __init__(self, max_bytes: int, max_entries: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._render_s: Deque[float] = deque(maxlen=_RENDER_SAMPLES)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            png = self._data.get(key)
+            if png is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        metrics.record_cache("chart", png is not None)
+        return png
+
+    def put(self, key: str, png: bytes) -> None:
+        if len(png) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._data[key] = png
+            self._bytes += len(png)
+            while self._data and (
+                self._bytes > self.max_bytes or len(self._data) > self.max_entries
+            ):
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def record_render(self, seconds: float) -> None:
+        with self._lock:
+            self._render_s.append(seconds)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+            self._render_s.clear()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            samples = sorted(self._render_s)
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else None,
+                "renders": len(samples),
+                "render_ms": {
+                    "p50": _percentile_ms(samples, 0.50),
+                    "p95": _percentile_ms(samples, 0.95),
+                    "p99": _percentile_ms(samples, 0.99),
+                    "max": _percentile_ms(samples, 1.0),
+                },
+            }
+
+
+def _percentile_ms(sorted_s: Sequence[float], q: float) -> Optional[float]:
+    if not sorted_s:
+        return None
+    idx = min(len(sorted_s) - 1, max(0, int(round(q * (len(sorted_s) - 1)))))
+    return round(sorted_s[idx] * 1000.0, 3)
+
+
+_cache: Optional[_PngCache] = None
+_cache_lock = threading.Lock()
+
+
+def _get_cache() -> _PngCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = _PngCache(
+                    max_bytes=int(getattr(settings, "TEWA_CHART_CACHE_MAX_BYTES",
+                                          _DEFAULT_CACHE_MAX_BYTES)),
+                    max_entries=int(getattr(settings, "TEWA_CHART_CACHE_MAX_ENTRIES",
+                                            _DEFAULT_CACHE_MAX_ENTRIES)),
+                )
+    return _cache
+
+
+def chart_cache_stats() -> Dict[str, object]:
+    """Hit rate, size and render-time percentiles of the PNG cache (this process)."""
+    return _get_cache().stats()
+
+
+def clear_chart_cache() -> None:
+    _get_cache().clear()
+
+
+def _series_key(series: Sequence[Tuple[object, float]], *parts: object) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    for t, s in series:
+        x = t.timestamp() if isinstance(t, datetime) else t
+        h.update(f"{x!r},{s!r};".encode())
+    h.update(repr(parts).encode())
+    return h.hexdigest()
+
+
+# ---------------------------------------------------------------------
+# Renderers
+# ---------------------------------------------------------------------
+
+def _render_png(
+    series: Sequence[Tuple[object, float]],
     *,
-    width: int = 800,
-    height: int = 300,
-    smooth: Optional[int] = None,
+    width: int,
+    height: int,
+    smooth: Optional[int],
 ) -> bytes:
+    import matplotlib.dates as mdates
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
     dpi = 100
     fig_w, fig_h = width / dpi, height / dpi
 
@@ -68,7 +209,8 @@ def render_score_history_png(
     # Optional smoothing
     ys_s: List[float] = _moving_avg(ys, smooth) if smooth else ys
 
-    fig = plt.figure(figsize=(fig_w, fig_h), dpi=dpi)
+    fig = Figure(figsize=(fig_w, fig_h), dpi=dpi)
+    FigureCanvasAgg(fig)
     ax = fig.add_subplot(111)
 
     if xs_num and ys:
@@ -81,6 +223,7 @@ def render_score_history_png(
         formatter = mdates.AutoDateFormatter(locator)
         ax.xaxis.set_major_locator(locator)
         ax.xaxis.set_major_formatter(formatter)
+        ax.legend(loc="best")
     else:
         ax.text(0.5, 0.5, "No data", ha="center",
                 va="center", transform=ax.transAxes)
@@ -90,10 +233,226 @@ def render_score_history_png(
     ax.set_ylabel("Score (0..1)")
     ax.set_ylim(0, 1)
     ax.grid(True, alpha=0.25)
-    ax.legend(loc="best")
 
     buf = io.BytesIO()
-    plt.tight_layout()
+    fig.tight_layout()
     fig.savefig(buf, format="png")
-    plt.close(fig)
     return buf.getvalue()
+
+
+def render_score_history_png(
+    series: Iterable[Tuple[object, float]],
+    *,
+    width: int = 800,
+    height: int = 300,
+    smooth: Optional[int] = None,
+    use_cache: bool = True,
+) -> bytes:
+    """
+    Render a score-history line chart to PNG bytes.
+    Identical (series, width, height, smooth) requests are served from an
+    in-process LRU instead of re-rendering (polling clients hit this constantly).
+    """
+    pts = list(series)
+    cache = _get_cache()
+    key = _series_key(pts, width, height, smooth) if use_cache else ""
+
+    if use_cache:
+        png = cache.get(key)
+        if png is not None:
+            return png
+
+    started = time.perf_counter()
+    png = _render_png(pts, width=width, height=height, smooth=smooth)
+    cache.record_render(time.perf_counter() - started)
+
+    if use_cache:
+        cache.put(key, png)
+    return png
+
+
+# ---------------------------------------------------------------------
+# Many tracks in one image (overlay / small-multiples grid / sprite sheet)
+# ---------------------------------------------------------------------
+
+MULTI_LAYOUTS = ("overlay", "grid", "sprite")
+
+
+def grid_shape(n: int, columns: Optional[int] = None) -> Tuple[int, int]:
+    """(columns, rows) for n tiles; near-square when columns is not given."""
+    if n <= 0:
+        return (1, 1)
+    cols = columns if columns and columns > 0 else int(math.ceil(math.sqrt(n)))
+    cols = min(cols, n)
+    return cols, int(math.ceil(n / cols))
+
+
+def sprite_tiles(
+    labels: Sequence[str],
+    *,
+    tile_width: int,
+    tile_height: int,
+    columns: Optional[int] = None,
+) -> List[Dict[str, object]]:
+    """Pixel offsets of each tile in a sprite sheet, row-major (CSS background-position)."""
+    cols, _ = grid_shape(len(labels), columns)
+    return [
+        {
+            "track_id": label,
+            "x": (i % cols) * tile_width,
+            "y": (i // cols) * tile_height,
+            "w": tile_width,
+            "h": tile_height,
+        }
+        for i, label in enumerate(labels)
+    ]
+
+
+def _plot_series(ax, series: Sequence[Tuple[object, float]], *, label: Optional[str],
+                 linewidth: float, smooth: Optional[int]) -> None:
+    import matplotlib.dates as mdates
+
+    xs = list(mdates.date2num(_to_datetime_list([t for t, _ in series])))
+    ys = [float(s) for _, s in series]
+    ax.plot(xs, ys, linewidth=linewidth, label=label)
+    if smooth and smooth > 1:
+        ax.plot(xs, _moving_avg(ys, smooth), linestyle="--", linewidth=linewidth * 0.7)
+
+
+def _style_mini_axes(ax, title: str) -> None:
+    import matplotlib.dates as mdates
+
+    ax.set_ylim(0, 1)
+    ax.set_title(title, fontsize=7, pad=2)
+    ax.tick_params(labelsize=5, length=2, pad=1)
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator(maxticks=3))
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+    ax.grid(True, alpha=0.25)
+
+
+def _render_multi_png(
+    items: Sequence[Tuple[str, Sequence[Tuple[object, float]]]],
+    *,
+    layout: str,
+    width: int,
+    height: int,
+    tile_width: int,
+    tile_height: int,
+    columns: Optional[int],
+    smooth: Optional[int],
+) -> bytes:
+    import matplotlib.dates as mdates
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    dpi = 100
+    n = len(items)
+
+    if layout == "overlay" or n == 0:
+        fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        for label, series in items:
+            if series:
+                _plot_series(ax, series, label=label, linewidth=1.2, smooth=smooth)
+        if n == 0:
+            ax.text(0.5, 0.5, "No data", ha="center",
+                    va="center", transform=ax.transAxes)
+        else:
+            locator = mdates.AutoDateLocator()
+            ax.xaxis.set_major_locator(locator)
+            ax.xaxis.set_major_formatter(mdates.AutoDateFormatter(locator))
+            if n <= 12:
+                ax.legend(loc="best", fontsize=7)
+        ax.set_title("Threat Score Over Time")
+        ax.set_xlabel("Computed At")
+        ax.set_ylabel("Score (0..1)")
+        ax.set_ylim(0, 1)
+        ax.grid(True, alpha=0.25)
+        fig.tight_layout()
+    else:
+        cols, rows = grid_shape(n, columns)
+        W, H = cols * tile_width, rows * tile_height
+        fig = Figure(figsize=(W / dpi, H / dpi), dpi=dpi)
+        FigureCanvasAgg(fig)
+
+        if layout == "grid":
+            # Small multiples sharing both axes → directly comparable shapes
+            axes = fig.subplots(rows, cols, sharex=True, sharey=True, squeeze=False)
+            for i, (label, series) in enumerate(items):
+                ax = axes[i // cols][i % cols]
+                if series:
+                    _plot_series(ax, series, label=None, linewidth=0.9, smooth=smooth)
+                _style_mini_axes(ax, label)
+            for j in range(n, rows * cols):
+                axes[j // cols][j % cols].set_visible(False)
+            fig.tight_layout(pad=0.4)
+        else:
+            # Sprite: every tile is a self-contained chart at an exact pixel rect
+            pad_l, pad_r, pad_t, pad_b = 26, 6, 14, 14
+            for tile, (label, series) in zip(
+                sprite_tiles([lbl for lbl, _ in items], tile_width=tile_width,
+                             tile_height=tile_height, columns=cols),
+                items,
+            ):
+                x, y = int(tile["x"]), int(tile["y"])  # type: ignore[call-overload]
+                rect = [
+                    (x + pad_l) / W,
+                    1.0 - (y + tile_height - pad_b) / H,
+                    max(1, tile_width - pad_l - pad_r) / W,
+                    max(1, tile_height - pad_t - pad_b) / H,
+                ]
+                ax = fig.add_axes(rect)
+                if series:
+                    _plot_series(ax, series, label=None, linewidth=0.9, smooth=smooth)
+                _style_mini_axes(ax, label)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def render_score_history_multi_png(
+    items: Sequence[Tuple[str, Sequence[Tuple[object, float]]]],
+    *,
+    layout: str = "overlay",
+    width: int = 800,
+    height: int = 300,
+    tile_width: int = 240,
+    tile_height: int = 120,
+    columns: Optional[int] = None,
+    smooth: Optional[int] = None,
+    use_cache: bool = True,
+) -> bytes:
+    """
+    Render many tracks' score histories into ONE PNG:
+      - overlay: one chart, one line per track (width × height)
+      - grid:    small multiples sharing axes (tile_width × tile_height each)
+      - sprite:  independent tiles at exact offsets, see sprite_tiles()
+    Shares the PNG LRU and render stats with render_score_history_png().
+    """
+    if layout not in MULTI_LAYOUTS:
+        raise ValueError(f"Unsupported layout '{layout}'. Allowed: {list(MULTI_LAYOUTS)}")
+
+    cache = _get_cache()
+    key = ""
+    if use_cache:
+        h = hashlib.blake2b(digest_size=20)
+        for label, series in items:
+            h.update(f"{label}|{_series_key(series)}".encode())
+        h.update(repr((layout, width, height, tile_width, tile_height, columns, smooth)).encode())
+        key = "multi:" + h.hexdigest()
+        png = cache.get(key)
+        if png is not None:
+            return png
+
+    started = time.perf_counter()
+    png = _render_multi_png(
+        items, layout=layout, width=width, height=height,
+        tile_width=tile_width, tile_height=tile_height, columns=columns, smooth=smooth,
+    )
+    cache.record_render(time.perf_counter() - started)
+
+    if use_cache:
+        cache.put(key, png)
+    return png
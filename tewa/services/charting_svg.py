@@ -0,0 +1,157 @@
+# tewa/services/charting_svg.py
+"""
+Dependency-free SVG renderer for score history.
+
+Emits polylines straight from the (t, score) series, so serving a chart never
+imports matplotlib. Same look as the PNG: score line, optional dashed moving
+average, 0..1 y-axis with grid, time ticks and a "No data" state.
+"""
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+from tewa.services.charting import (
+    _get_cache,
+    _moving_avg,
+    _series_key,
+    _to_datetime_list,
+)
+
+# Plot-area margins (px): left leaves room for y labels, bottom for time labels
+_M_LEFT, _M_RIGHT, _M_TOP, _M_BOTTOM = 44, 12, 26, 34
+_Y_TICKS = (0.0, 0.25, 0.5, 0.75, 1.0)
+_X_TICKS = 5
+
+_LINE = "#1f77b4"
+_MA = "#ff7f0e"
+_GRID = "#d9d9d9"
+_TEXT = "#333"
+
+
+def _fmt(v: float) -> str:
+    # One decimal is sub-pixel; keeps documents small for long series
+    return f"{v:.1f}".rstrip("0").rstrip(".")
+
+
+def _points_attr(xs: Sequence[float], ys: Sequence[float]) -> str:
+    return " ".join(f"{_fmt(x)},{_fmt(y)}" for x, y in zip(xs, ys))
+
+
+def _tick_label(t: datetime, span: timedelta) -> str:
+    if span >= timedelta(days=1):
+        return t.strftime("%m-%d %H:%M")
+    if span >= timedelta(minutes=5):
+        return t.strftime("%H:%M")
+    return t.strftime("%H:%M:%S")
+
+
+def _render_svg(
+    series: Sequence[Tuple[object, float]],
+    *,
+    width: int,
+    height: int,
+    smooth: Optional[int],
+) -> str:
+    x0, x1 = _M_LEFT, max(_M_LEFT + 1, width - _M_RIGHT)
+    y0, y1 = _M_TOP, max(_M_TOP + 1, height - _M_BOTTOM)
+    pw, ph = x1 - x0, y1 - y0
+
+    def py(score: float) -> float:
+        return y1 - max(0.0, min(1.0, score)) * ph
+
+    out: List[str] = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="sans-serif" font-size="10">',
+        f'<rect width="{width}" height="{height}" fill="#fff"/>',
+        f'<text x="{width / 2:.0f}" y="16" text-anchor="middle" font-size="12" '
+        f'fill="{_TEXT}">Threat Score Over Time</text>',
+    ]
+
+    # Y grid + labels (fixed 0..1 scale)
+    for v in _Y_TICKS:
+        y = _fmt(py(v))
+        out.append(f'<line x1="{x0}" y1="{y}" x2="{x1}" y2="{y}" stroke="{_GRID}"/>')
+        out.append(f'<text x="{x0 - 4}" y="{y}" dy="3" text-anchor="end" '
+                   f'fill="{_TEXT}">{v:g}</text>')
+    out.append(f'<rect x="{x0}" y="{y0}" width="{pw}" height="{ph}" '
+               f'fill="none" stroke="#999"/>')
+
+    pts = [(t, float(s)) for t, s in series if s is not None]
+    if not pts:
+        out.append(f'<text x="{x0 + pw / 2:.0f}" y="{y0 + ph / 2:.0f}" text-anchor="middle" '
+                   f'fill="{_TEXT}">No data</text>')
+        out.append("</svg>")
+        return "\n".join(out)
+
+    ts = _to_datetime_list([t for t, _ in pts])
+    ys = [s for _, s in pts]
+    t_lo, t_hi = ts[0], ts[-1]
+    span = t_hi - t_lo
+    span_s = span.total_seconds()
+
+    def px(t: datetime) -> float:
+        if span_s <= 0:
+            return x0 + pw / 2
+        return x0 + (t - t_lo).total_seconds() / span_s * pw
+
+    xs = [px(t) for t in ts]
+
+    # X ticks: evenly spaced in time, labelled at the resolution the span needs
+    n_ticks = _X_TICKS if span_s > 0 else 1
+    for i in range(n_ticks):
+        t = t_lo + span * (i / (n_ticks - 1)) if n_ticks > 1 else t_lo
+        x = _fmt(px(t))
+        out.append(f'<line x1="{x}" y1="{y1}" x2="{x}" y2="{y1 + 4}" stroke="#999"/>')
+        out.append(f'<text x="{x}" y="{y1 + 15}" text-anchor="middle" '
+                   f'fill="{_TEXT}">{escape(_tick_label(t, span))}</text>')
+
+    out.append(f'<polyline fill="none" stroke="{_LINE}" stroke-width="1.5" '
+               f'points="{_points_attr(xs, [py(v) for v in ys])}"/>')
+    legend = [("Score", _LINE, "")]
+    if smooth and smooth > 1:
+        ma = _moving_avg(ys, smooth)
+        out.append(f'<polyline fill="none" stroke="{_MA}" stroke-width="1" '
+                   f'stroke-dasharray="4 3" points="{_points_attr(xs, [py(v) for v in ma])}"/>')
+        legend.append((f"MA({smooth})", _MA, ' stroke-dasharray="4 3"'))
+
+    for i, (label, color, dash) in enumerate(legend):
+        ly = y0 + 10 + i * 13
+        out.append(f'<line x1="{x1 - 70}" y1="{ly}" x2="{x1 - 52}" y2="{ly}" '
+                   f'stroke="{color}" stroke-width="1.5"{dash}/>')
+        out.append(f'<text x="{x1 - 48}" y="{ly}" dy="3" fill="{_TEXT}">{escape(label)}</text>')
+
+    out.append("</svg>")
+    return "\n".join(out)
+
+
+def render_score_history_svg(
+    series: Iterable[Tuple[object, float]],
+    *,
+    width: int = 800,
+    height: int = 300,
+    smooth: Optional[int] = None,
+    use_cache: bool = True,
+) -> bytes:
+    """
+    Render a score-history line chart to SVG bytes (UTF-8), without matplotlib.
+    Shares the rendered-chart LRU and render stats with the PNG renderer.
+    """
+    pts = list(series)
+    cache = _get_cache()
+    key = "svg:" + _series_key(pts, width, height, smooth) if use_cache else ""
+
+    if use_cache:
+        svg = cache.get(key)
+        if svg is not None:
+            return svg
+
+    started = time.perf_counter()
+    svg = _render_svg(pts, width=width, height=height, smooth=smooth).encode("utf-8")
+    cache.record_render(time.perf_counter() - started)
+
+    if use_cache:
+        cache.put(key, svg)
+    return svg
@@ -0,0 +1,347 @@
+# tewa/services/compute_jobs.py
+"""
+Asynchronous compute jobs (ComputeJob) for compute_now / compute_at and the
+HTML compute button.
+
+submit_job() records the job and hands it to the configured backend
+(settings.TEWA_COMPUTE_JOBS_BACKEND):
+  - "thread": bounded in-process ThreadPoolExecutor (default; no broker needed)
+  - "celery": tewa.tasks.run_compute_job on the Celery workers
+  - "eager":  run inline before returning (tests / debugging)
+run_job() executes it, reporting progress and honouring cancel requests.
+
+Every run holds the scenario's advisory lock (locks.scenario_lock_name) so two
+runs never write interleaved batches. params["lock_policy"] decides what a run
+does when the lock is taken:
+  - "queue":   wait up to TEWA_SCENARIO_LOCK_TIMEOUT_S (default for API jobs)
+  - "skip":    give up at once; recorded as skipped (beat default)
+  - "preempt": ask the running job to cancel, then wait like "queue"
+The wait is recorded on the job as lock_wait_s. Synchronous API computes take
+the same lock through scenario_lock() and report the wait in their response.
+
+Workers stamp heartbeat_at as a job runs. fail_stale_jobs() fails unfinished
+jobs that have been quiet for TEWA_COMPUTE_JOB_STALE_S (e.g. thread-pool jobs
+of a process that exited); it runs when a process starts its pool and from the
+beat task tewa.tasks.sweep_stale_compute_jobs.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from core.enums import OrderStatusEnum
+from tewa.models import ComputeJob
+from tewa.services import locks
+from tewa.services.engine import compute_scores_at_timestamp, resolve_das
+from tewa.services.instrumentation import start_timer
+from tewa.services.threat_compute import batch_compute_for_scenario
+
+logger = logging.getLogger(__name__)
+
+_PROGRESS_FLUSH_S = 0.5  # at most ~2 progress writes / cancel checks per second
+LOCK_POLICIES = ("queue", "skip", "preempt")
+_UNFINISHED = (
+    OrderStatusEnum.PENDING.value,
+    OrderStatusEnum.QUEUED.value,
+    OrderStatusEnum.RUNNING.value,
+)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+class JobCanceled(Exception):
+    """Raised from the progress hook once a cancel was requested."""
+
+
+class ScenarioLocked(Exception):
+    """The scenario lock was still held elsewhere when the lock policy gave up."""
+
+    def __init__(self, scenario_id: int, lock_wait_s: float):
+        super().__init__(f"Scenario {scenario_id} is locked by another compute run")
+        self.scenario_id = scenario_id
+        self.lock_wait_s = lock_wait_s
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # A fresh pool: jobs an exited process left behind never finish
+                fail_stale_jobs()
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(getattr(settings, "TEWA_COMPUTE_JOB_WORKERS", 2)),
+                    thread_name_prefix="tewa-job",
+                )
+    return _executor
+
+
+# ---------------------------------------------------------------------
+# Submission / cancellation
+# ---------------------------------------------------------------------
+
+def submit_job(
+    kind: str,
+    scenario_id: int,
+    params: Optional[Dict[str, Any]] = None,
+    user: Any = None,
+) -> ComputeJob:
+    job = ComputeJob.objects.create(
+        kind=kind,
+        scenario_id=scenario_id,
+        params=params or {},
+        created_by=user if getattr(user, "is_authenticated", False) else None,
+    )
+    _dispatch(job)
+    job.refresh_from_db()
+    return job
+
+
+def _dispatch(job: ComputeJob) -> None:
+    backend = getattr(settings, "TEWA_COMPUTE_JOBS_BACKEND", "thread")
+    ComputeJob.objects.filter(pk=job.pk, status=OrderStatusEnum.PENDING.value).update(
+        status=OrderStatusEnum.QUEUED.value)
+
+    if backend == "eager":
+        run_job(str(job.pk))
+    elif backend == "celery":
+        from tewa.tasks import run_compute_job
+
+        run_compute_job.delay(str(job.pk))
+    else:
+        _get_executor().submit(_run_in_thread, str(job.pk))
+
+
+def _run_in_thread(job_id: str) -> None:
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def cancel_job(job: ComputeJob) -> ComputeJob:
+    """Queued jobs are canceled at once; running ones stop at the next progress tick."""
+    not_started = (OrderStatusEnum.PENDING.value, OrderStatusEnum.QUEUED.value)
+    canceled = ComputeJob.objects.filter(pk=job.pk, status__in=not_started).update(
+        status=OrderStatusEnum.CANCELED.value, cancel_requested=True,
+        finished_at=timezone.now())
+    if not canceled and not job.is_terminal:
+        ComputeJob.objects.filter(pk=job.pk).update(cancel_requested=True)
+    job.refresh_from_db()
+    return job
+
+
+def fail_stale_jobs(stale_s: Optional[float] = None) -> int:
+    """
+    Fail unfinished jobs with no heartbeat (or, never claimed, no creation)
+    in the last `stale_s` seconds (default TEWA_COMPUTE_JOB_STALE_S): no
+    worker will finish them. Returns how many were failed.
+    """
+    if stale_s is None:
+        stale_s = float(settings.TEWA_COMPUTE_JOB_STALE_S)
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=stale_s)
+    failed = (
+        ComputeJob.objects
+        .filter(status__in=_UNFINISHED)
+        .filter(Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, created_at__lt=cutoff))
+        .update(status=OrderStatusEnum.FAILURE.value, finished_at=now,
+                error=f"No heartbeat for {stale_s:g} s; the worker is gone")
+    )
+    if failed:
+        logger.warning("Failed %d stale compute job(s)", failed)
+    return failed
+
+
+# ---------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------
+
+def _progress_hook(job_id: str) -> Callable[[int, int], None]:
+    last = [0.0]
+
+    def hook(done: int, total: int) -> None:
+        now = time.monotonic()
+        if done < total and now - last[0] < _PROGRESS_FLUSH_S:
+            return
+        last[0] = now
+        ComputeJob.objects.filter(pk=job_id).update(
+            progress_done=done, progress_total=total, heartbeat_at=timezone.now())
+        if ComputeJob.objects.filter(pk=job_id, cancel_requested=True).exists():
+            raise JobCanceled()
+
+    return hook
+
+
+def _top(scores, n: int = 3):
+    ranked = sorted(scores, key=lambda s: float(
+        s.score if s.score is not None else float("-inf")), reverse=True)
+    return [{"track": s.track_id, "score": s.score} for s in ranked[:n]]
+
+
+def _run_compute_now(job: ComputeJob, hook) -> Dict[str, Any]:
+    with start_timer("compute_job", kind=job.kind, scenario_id=job.scenario_id) as timer:  # type: ignore[attr-defined]
+        scores = compute_scores_at_timestamp(
+            scenario_id=job.scenario_id,  # type: ignore[attr-defined]
+            when_iso=timezone.now().isoformat(),
+            progress=hook,
+            batch_id=job.pk,
+            timer=timer,
+        )
+    return {"count": len(scores), "computed_at": timezone.now().isoformat(),
+            "batch_id": str(job.pk), "top3": _top(scores), "timings": timer.summary()}
+
+
+def _run_compute_at(job: ComputeJob, hook) -> Dict[str, Any]:
+    p = job.params
+    report: Dict[str, Any] = {}
+    with start_timer("compute_job", kind=job.kind, scenario_id=job.scenario_id) as timer:  # type: ignore[attr-defined]
+        scores = compute_scores_at_timestamp(
+            scenario_id=job.scenario_id,  # type: ignore[attr-defined]
+            when_iso=p["when_iso"],
+            method=p.get("method") or "linear",
+            da_ids=p.get("da_ids"),
+            weapon_range_km=p.get("weapon_range_km"),
+            precision=p.get("precision"),
+            horizon_s=p.get("horizon_s"),
+            prefilter_report=report,
+            progress=hook,
+            batch_id=job.pk,
+            timer=timer,
+        )
+    out = {"count": len(scores), "when": p["when_iso"],
+           "method": p.get("method") or "linear", "batch_id": str(job.pk),
+           "top3": _top(scores), "timings": timer.summary()}
+    if p.get("horizon_s") is not None:
+        out["prefilter"] = report
+    return out
+
+
+def _run_compute_scenario(job: ComputeJob, hook) -> Dict[str, Any]:
+    # Same DA set as compute_scores_at_timestamp: every DA unless da_ids is given
+    das = [da.pk for da in resolve_das(job.params.get("da_ids"))]
+    if not das:
+        raise ValueError("No defended assets to compute against")
+    count = 0
+    with start_timer("compute_job", kind=job.kind, scenario_id=job.scenario_id) as timer:  # type: ignore[attr-defined]
+        for i, da_id in enumerate(das):
+            hook(i, len(das))
+            count += len(batch_compute_for_scenario(
+                job.scenario_id, da_id, timer=timer) or [])  # type: ignore[attr-defined]
+        hook(len(das), len(das))
+    return {"count": count, "da_count": len(das), "timings": timer.summary()}
+
+
+_RUNNERS = {
+    ComputeJob.KIND_COMPUTE_NOW: _run_compute_now,
+    ComputeJob.KIND_COMPUTE_AT: _run_compute_at,
+    ComputeJob.KIND_COMPUTE_SCENARIO: _run_compute_scenario,
+}
+
+
+def run_inline(kind: str, scenario_id: int, params: Optional[Dict[str, Any]] = None) -> ComputeJob:
+    """Record and run a job in the calling process (Celery beat, management commands)."""
+    job = ComputeJob.objects.create(
+        kind=kind, scenario_id=scenario_id, params=params or {},
+        status=OrderStatusEnum.QUEUED.value,
+    )
+    run_job(str(job.pk))
+    job.refresh_from_db()
+    return job
+
+
+def _preempt_others(scenario_id: int, exclude_pk: Any = None) -> int:
+    return (
+        ComputeJob.objects
+        .filter(scenario_id=scenario_id, status=OrderStatusEnum.RUNNING.value)
+        .exclude(pk=exclude_pk)
+        .update(cancel_requested=True)
+    )
+
+
+@contextmanager
+def scenario_lock(scenario_id: int, policy: Optional[str] = None, *,
+                  job_pk: Any = None) -> Iterator[float]:
+    """
+    Hold the scenario's compute lock under `policy` (LOCK_POLICIES; unknown or
+    missing means "queue") and yield the seconds spent waiting for it.
+    Raises ScenarioLocked if the policy gives up before the lock is free.
+    """
+    if policy not in LOCK_POLICIES:
+        policy = "queue"
+    if policy == "preempt" and _preempt_others(scenario_id, exclude_pk=job_pk):
+        logger.info("Compute run on scenario %s preempting running jobs", scenario_id)
+
+    lock_name = locks.scenario_lock_name(scenario_id)
+    waited = time.monotonic()
+    acquired = locks.acquire(
+        lock_name,
+        timeout_s=0 if policy == "skip" else float(settings.TEWA_SCENARIO_LOCK_TIMEOUT_S),
+    )
+    lock_wait_s = round(time.monotonic() - waited, 3)
+    if not acquired:
+        raise ScenarioLocked(scenario_id, lock_wait_s)
+    try:
+        yield lock_wait_s
+    finally:
+        locks.release(lock_name)
+
+
+def _execute(job: ComputeJob, lock_wait_s: float) -> Dict[str, Any]:
+    job_id = str(job.pk)
+    try:
+        started = timezone.now()
+        ComputeJob.objects.filter(pk=job_id).update(
+            started_at=started, heartbeat_at=started, lock_wait_s=lock_wait_s)
+        result = _RUNNERS[job.kind](job, _progress_hook(job_id))
+        return {
+            "status": OrderStatusEnum.SUCCESS.value,
+            "result": result,
+            "rows_written": int(result["count"]),
+        }
+    except JobCanceled:
+        return {"status": OrderStatusEnum.CANCELED.value}
+    except Exception as e:  # reported on the job, never raised to the pool
+        logger.exception("Compute job %s failed", job_id)
+        return {"status": OrderStatusEnum.FAILURE.value, "error": str(e)}
+
+
+def run_job(job_id: str) -> None:
+    # Claim: only a queued job moves to running (cancel may have won the race)
+    claimed = ComputeJob.objects.filter(
+        pk=job_id, status=OrderStatusEnum.QUEUED.value, cancel_requested=False,
+    ).update(status=OrderStatusEnum.RUNNING.value, heartbeat_at=timezone.now())
+    if not claimed:
+        return
+
+    job = ComputeJob.objects.get(pk=job_id)
+    fields: Optional[Dict[str, Any]] = None
+    try:
+        with scenario_lock(job.scenario_id, job.params.get("lock_policy"),  # type: ignore[attr-defined]
+                           job_pk=job.pk) as lock_wait_s:
+            fields = _execute(job, lock_wait_s)
+    except ScenarioLocked as e:
+        logger.info("Compute job %s skipped: scenario %s is locked by another run",
+                    job_id, e.scenario_id)
+        ComputeJob.objects.filter(pk=job_id).update(
+            status=OrderStatusEnum.CANCELED.value, skipped=True,
+            lock_wait_s=e.lock_wait_s, error=str(e), finished_at=timezone.now())
+        return
+    except Exception as e:  # taking/releasing the lock failed (e.g. a DB error)
+        logger.exception("Compute job %s: scenario lock failed", job_id)
+        if fields is None:  # a failed release keeps the finished run's outcome
+            fields = {"status": OrderStatusEnum.FAILURE.value, "error": str(e)}
+
+    ComputeJob.objects.filter(pk=job_id).update(finished_at=timezone.now(), **fields)
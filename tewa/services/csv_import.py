@@ -1,6 +1,7 @@
 # tewa/services/csv_import.py
 
 import csv
+import time
 from io import StringIO
 from typing import Any, Dict, List, Optional
 
@@ -8,6 +9,7 @@ from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.utils import timezone
 
+from core.utils import metrics
 from tewa.models import Scenario, Track, TrackSample
 
 
@@ -50,6 +52,7 @@ def import_csv(file_content: str, *, scenario_id: Optional[int] = None) -> Dict[
             defaults={"start_time": timezone.now()},
         )
 
+    started = time.perf_counter()
     # Be tolerant of spaces after commas in CSV
     reader = csv.DictReader(StringIO(file_content), skipinitialspace=True)
 
@@ -138,6 +141,11 @@ def import_csv(file_content: str, *, scenario_id: Optional[int] = None) -> Dict[
         except Exception as e:
             errors.append(f"Row {rows_processed} error: {e}")
 
+    elapsed = time.perf_counter() - started
+    metrics.INGEST_ROWS.inc(rows_processed, source="csv")
+    if rows_processed and elapsed > 0:
+        metrics.INGEST_ROWS_PER_S.observe(rows_processed / elapsed, source="csv")
+
     return {
         "message": "Upload ok",
         "tracks_created": created_tracks,
@@ -1,8 +1,12 @@
 # tewa/services/engine.py
 from __future__ import annotations
 
+import uuid
+from contextlib import nullcontext
+from dataclasses import dataclass
+from datetime import datetime
 from datetime import timezone as dt_timezone
-from typing import Iterable, List, Optional, cast
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union, cast
 
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
@@ -15,10 +19,14 @@ from tewa.models import (
     Track,
     TrackSample,
 )
-from tewa.services.sampling import sample_track_state_at
+from tewa.services import frames, freshness, prefilter
+from tewa.services.instrumentation import Timer, start_timer
+from tewa.services.kinematics import check_precision
+from tewa.services.sampling import sample_track_states_at
+from tewa.services.score_rollups import update_rollups
 from tewa.services.threat_compute import (
+    build_scores,
     calculate_scores_for_when,
-    compute_score_for_track,
 )
 from tewa.types import ParamsLike
 
@@ -26,6 +34,43 @@ from tewa.types import ParamsLike
 # internal constants & utils
 # ------------------------
 _VALID_METHODS = {"linear", "latest"}
+_BULK_CHUNK = 1000  # rows per INSERT
+
+
+@dataclass(frozen=True)
+class ScoreRecord:
+    """One persisted ThreatScore, flattened for callers (no lazy FK loads)."""
+    id: int
+    batch_id: uuid.UUID
+    track_pk: int
+    track_id: str
+    da_id: int
+    da_name: str
+    cpa_km: Optional[float]
+    tcpa_s: Optional[float]
+    tdb_km: Optional[float]
+    twrp_s: Optional[float]
+    score: Optional[float]
+    computed_at: datetime
+    sample_t: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row: ThreatScore) -> "ScoreRecord":
+        return cls(
+            id=row.pk,
+            batch_id=row.batch_id,
+            track_pk=row.track.pk,
+            track_id=row.track.track_id,
+            da_id=row.da.pk,
+            da_name=row.da.name,
+            cpa_km=row.cpa_km,
+            tcpa_s=row.tcpa_s,
+            tdb_km=row.tdb_km,
+            twrp_s=row.twrp_s,
+            score=row.score,
+            computed_at=row.computed_at,
+            sample_t=row.sample_t,
+        )
 
 
 def _parse_when_utc(when_iso: str):
@@ -40,6 +85,17 @@ def _parse_when_utc(when_iso: str):
     return when
 
 
+def resolve_das(da_ids: Optional[Iterable[int]] = None) -> List[DefendedAsset]:
+    """
+    DAs a compute run scores: every DA when da_ids is None (a DA's scenario
+    is optional and seed_demo leaves it unset), else only the listed ones.
+    """
+    if da_ids is None:
+        return list(DefendedAsset.objects.order_by("id"))
+    ids = list(da_ids)
+    return list(DefendedAsset.objects.filter(id__in=ids).order_by("id")) if ids else []
+
+
 # ------------------------
 # main TEWA compute path
 # ------------------------
@@ -50,7 +106,13 @@ def compute_scores_at_timestamp(
     da_ids: Optional[Iterable[int]] = None,
     method: str = "linear",
     weapon_range_km: Optional[float] = None,
-) -> List[ThreatScore]:
+    progress: Optional[Callable[[int, int], None]] = None,
+    batch_id: Union[uuid.UUID, str, None] = None,
+    timer: Optional[Timer] = None,
+    precision: Optional[str] = None,
+    horizon_s: Optional[float] = None,
+    prefilter_report: Optional[Dict[str, Any]] = None,
+) -> List[ScoreRecord]:
     """
     Compute threat scores for all (Track, DA) pairs at a given timestamp.
 
@@ -58,57 +120,142 @@ def compute_scores_at_timestamp(
     - If da_ids is []   → return empty.
     - If da_ids is [..] → compute only for selected DAs.
 
-    Returns: list[ThreatScore]
+    Every row written is stamped with `batch_id` (a fresh UUID if omitted) and
+    inserted in bulk; the returned records are exactly this call's rows.
+
+    `progress(done_tracks, total_tracks)` is called after each track (async
+    jobs); an exception raised from it aborts the run.
+
+    Stage timings (load, fetch_tracks, sample, kinematics, scoring, persist)
+    go to `timer`, or to a timer of its own that is logged on return.
+
+    `precision` picks the kinematics geodesy tier for this call (default: the
+    scenario's ModelParams.geodesy_precision).
+
+    With `horizon_s`, pairs whose track cannot reach the DA's weapon range
+    within that many seconds are pruned before kinematics (tewa.services.prefilter)
+    and get no row. The plan's report (pruning ratio, the score range of the
+    pruned pairs) is written into `prefilter_report`.
+
+    Returns: list[ScoreRecord]
     """
     when = _parse_when_utc(when_iso)
 
     if method not in _VALID_METHODS:
         raise ValueError(
             f"Unsupported method '{method}'. Allowed: {sorted(_VALID_METHODS)}")
+    if precision is not None:
+        check_precision(precision)
+    if horizon_s is not None and horizon_s < 0:
+        raise ValueError("horizon_s must be >= 0")
 
-    try:
-        scenario = Scenario.objects.get(id=scenario_id)
-    except Scenario.DoesNotExist as e:
-        raise ValueError(f"Scenario {scenario_id} not found") from e
+    with nullcontext(timer) if timer is not None else start_timer(
+            "compute_scores_at_timestamp", scenario_id=scenario_id) as t:
+        return _compute_at(
+            scenario_id=scenario_id, when=when, da_ids=da_ids, method=method,
+            weapon_range_km=weapon_range_km, progress=progress,
+            batch=uuid.UUID(str(batch_id)) if batch_id else uuid.uuid4(), timer=t,
+            precision=precision, horizon_s=horizon_s, prefilter_report=prefilter_report,
+        )
 
-    params, _ = ModelParams.objects.get_or_create(scenario=scenario)
 
-    # Resolve DAs
-    if da_ids is None:
-        das = list(DefendedAsset.objects.all())
-    else:
-        ids = list(da_ids)
-        if not ids:
-            return []
-        das = list(DefendedAsset.objects.filter(id__in=ids))
+def _compute_at(
+    *,
+    scenario_id: int,
+    when: datetime,
+    da_ids: Optional[Iterable[int]],
+    method: str,
+    weapon_range_km: Optional[float],
+    progress: Optional[Callable[[int, int], None]],
+    batch: uuid.UUID,
+    timer: Timer,
+    precision: Optional[str],
+    horizon_s: Optional[float],
+    prefilter_report: Optional[Dict[str, Any]],
+) -> List[ScoreRecord]:
+    with timer.stage("load"):
+        try:
+            scenario = Scenario.objects.get(id=scenario_id)
+        except Scenario.DoesNotExist as e:
+            raise ValueError(f"Scenario {scenario_id} not found") from e
+
+        params, _ = ModelParams.objects.get_or_create(scenario=scenario)
+
+        das = resolve_das(da_ids)
 
     if not das:
         return []
+    da_frames = {da.pk: frames.frame_for(da) for da in das}
 
-    tracks_qs = (
-        Track.objects
-        .filter(scenario=scenario)
-        .only("id", "track_id", "lat", "lon", "alt_m", "speed_mps", "heading_deg")
-    )
+    with timer.stage("fetch_tracks"):
+        tracks = list(
+            Track.objects
+            .filter(scenario=scenario)
+            .only("id", "track_id", "lat", "lon", "alt_m", "speed_mps", "heading_deg")
+        )
+
+    with timer.stage("sample"):
+        states = sample_track_states_at(tracks, when, method=method)
 
-    results: List[ThreatScore] = []
+    plan = None
+    if horizon_s is not None:
+        # Same positions as build_scores scores from (the track row)
+        with timer.stage("prefilter"):
+            plan = prefilter.plan_pairs(
+                ((t.pk, t.lat, t.lon, t.speed_mps) for t in tracks if states.get(t.pk)),
+                [da_frames[da.pk] for da in das], params,
+                horizon_s=horizon_s, weapon_range_km=weapon_range_km)
+        timer.count("pruned", plan.pruned)
+        if prefilter_report is not None:
+            prefilter_report.update(plan.report())
 
-    for track in tracks_qs.iterator():
-        state = sample_track_state_at(track, when, method=method)
-        if not state:
-            continue
+    written: List[ThreatScore] = []
+    pending: List[Tuple[Track, DefendedAsset, Optional[datetime]]] = []
+    total = len(tracks)
 
-        for da in das:
-            ts = compute_score_for_track(
-                scenario=scenario,
-                da=da,
-                track=track,
-                params=cast(ParamsLike, params),
-                weapon_range_km=weapon_range_km or da.radius_km,
+    def flush() -> None:
+        # Score and insert the pending pairs as one batch (timer stages per batch)
+        if pending:
+            pairs = pending[:]
+            pending.clear()
+            rows = build_scores(
+                scenario, pairs, cast(ParamsLike, params),
+                weapon_range_km=weapon_range_km, batch_id=batch, timer=timer,
+                precision=precision, da_frames=da_frames,
             )
-            results.append(ts)
+            with timer.stage("persist"):
+                written.extend(ThreatScore.objects.bulk_create(rows))
+
+    try:
+        for i, track in enumerate(tracks, start=1):
+            if progress:
+                progress(i - 1, total)
+            state = states.get(track.pk)
+            if not state:
+                continue
+
+            scored = 0
+            for j, da in enumerate(das):
+                # Pruned pairs are not written: a floor row would read as a real score
+                if plan is not None and not plan.kept(track.pk, j):
+                    continue
+                scored += 1
+                pending.append((track, da, state.get("sample_t")))
+            timer.count("pairs", scored)
+            if len(pending) >= _BULK_CHUNK:
+                flush()
 
-    return results
+        if progress:
+            progress(total, total)
+    finally:
+        # Also on cancel/failure: keep what was scored and the rollups in step with it
+        flush()
+        with timer.stage("persist"):
+            update_rollups(written)
+        freshness.observe(written)
+        timer.count("tracks", total)
+        timer.count("rows", len(written))
+    return [ScoreRecord.from_row(r) for r in written]
 
 
 # ------------------------
@@ -120,10 +267,12 @@ def run_scenario_engine(
     das: Optional[Iterable[DefendedAsset]] = None,
     method: str = "linear",
     weapon_range_km: float = 20.0,
+    top_k: Optional[int] = None,
 ):
     """
     Simulation mode — computes threat scores without persisting them.
     Useful for analytics, playback, or visualization layers.
+    `top_k` keeps the k best rows per DA (see calculate_scores_for_when).
     """
     if method not in _VALID_METHODS:
         raise ValueError(
@@ -138,6 +287,7 @@ def run_scenario_engine(
         das=list(das),
         method=method,
         weapon_range_km=weapon_range_km,
+        top_k=top_k,
     )
 
 
@@ -1,6 +1,5 @@
 # tewa/services/export_csv.py
 from __future__ import annotations
-from django.db.models import F, Max, OuterRef, Subquery
 
 from typing import Any, Dict, Iterable, List, Optional, cast  # add cast
 
@@ -12,7 +11,7 @@ except Exception:
     get_ranked_threats = None  # Fallback below
 
 
-from ..models import ThreatScore
+from .score_breakdown_service import breakdown_rows
 
 DEFAULT_FIELDS: List[str] = [
     "scenario_id", "da_id", "track_id", "computed_at", "score",
@@ -36,68 +35,16 @@ def _fallback_board_rows(
 ) -> List[Dict[str, Any]]:
     """
     Fallback when ranking service is unavailable.
-    Returns one row per (da_id, track_id): the latest ThreatScore (<= at if given).
-    Norms/weights/contribs are zeros (can’t reconstruct without compute).
+    Returns one row per (da_id, track_id): the latest ThreatScore (<= at if given),
+    with norms/weights/contribs rebuilt from the stored components and current
+    params (batch breakdown read path: fixed query count, array scoring).
     """
-    # Base set restricted by scenario (+ optional DA)
-    base = ThreatScore.objects.filter(scenario_id=scenario_id)
-    if da_id is not None:
-        base = base.filter(da_id=da_id)
-
-    # Subquery: latest row id per (da, track) ≤ at (if provided)
-    latest_row_sq = ThreatScore.objects.filter(
-        scenario_id=scenario_id,
-        da_id=OuterRef("da_id"),
-        track_id=OuterRef("track_id"),
-    )
-    if da_id is not None:
-        latest_row_sq = latest_row_sq.filter(da_id=da_id)
-    if at_iso:
-        latest_row_sq = latest_row_sq.filter(computed_at__lte=at_iso)
-
-    latest_row_sq = latest_row_sq.order_by(
-        "-computed_at", "-id").values("id")[:1]
-
-    # Collect those latest ids for each pair present in `base`
-    pair_latest = (
-        base.values("da_id", "track_id")
-            .annotate(latest_id=Subquery(latest_row_sq))
-            .values_list("latest_id", flat=True)
-    )
-
-    rows_qs = ThreatScore.objects.filter(id__in=pair_latest).order_by(
-        F("score").desc(nulls_last=True), "-computed_at", "-id"
-    )
-    if top_n:
-        rows_qs = rows_qs[:top_n]
-
-    qs_vals = rows_qs.values(
-        "scenario_id", "da_id", "track_id", "computed_at", "score",
-        "cpa_km", "tcpa_s", "tdb_km", "twrp_s",
-    )
-
-    rows: List[Dict[str, Any]] = []
-    for r in qs_vals:
-        cpa_m = float(r.get("cpa_km") or 0.0) * 1000.0
-        tcpa_s = float(r.get("tcpa_s") or 0.0)
-        # Keep the TDB proxy (km → s) consistent with Task 21:
-        tdb_s = (float(r.get("tdb_km") or 0.0) * 1000.0) / 250.0
-        twrp_s = r.get("twrp_s")  # may be None; leave blank in CSV
-
-        rows.append({
-            "scenario_id": r["scenario_id"],
-            "da_id": r["da_id"],
-            "track_id": str(r["track_id"]),
-            "computed_at": r["computed_at"],
-            "score": float(r.get("score") or 0.0),
-            "cpa_m": cpa_m,
-            "tcpa_s": tcpa_s,
-            "tdb_s": tdb_s,
-            "twrp_s": twrp_s if twrp_s is not None else None,
-            "normalized": {"cpa": 0.0, "tcpa": 0.0, "tdb": 0.0, "twrp": 0.0},
-            "weights": {"cpa": 0.0, "tcpa": 0.0, "tdb": 0.0, "twrp": 0.0},
-            "contributions": {"cpa": 0.0, "tcpa": 0.0, "tdb": 0.0, "twrp": 0.0},
-        })
+    rows = breakdown_rows(scenario_id, da_id=da_id, at_iso=at_iso, top_n=top_n)
+    for r in rows:
+        # CSV keeps its historical track column: the Track PK
+        r["track_id"] = str(r["track_pk"])
+        # TWRP may be None; leave blank in CSV
+        r["metrics"]["twrp_s"] = r["twrp_s"]
     return rows
 
 
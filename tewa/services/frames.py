@@ -0,0 +1,83 @@
+# tewa/services/frames.py
+"""
+Per-process cache of kinematics.LocalFrame per DefendedAsset.
+
+DAs almost never move, so the origin radians, metres-per-degree scales and
+radius are built once per DA and reused by every compute. Entries are keyed
+by DA id and stamped with the DA's `updated_at` (plus the lat/lon/radius it
+was built from, so a QuerySet.update() that skips auto_now is still seen): a
+changed stamp is a miss and rebuilds. post_save / post_delete on
+DefendedAsset (tewa.signals) drop the entry as soon as the row changes.
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from django.conf import settings
+
+from core.utils import metrics
+from tewa.models import DefendedAsset
+from tewa.services.kinematics import LocalFrame
+
+_DEFAULT_SIZE = 4096
+
+
+class _FrameCache:
+    """Bounded LRU of (version, LocalFrame) per DA id."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._data: "OrderedDict[int, Tuple[Hashable, LocalFrame]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, da_id: int, version: Hashable) -> Optional[LocalFrame]:
+        with self._lock:
+            hit = self._data.get(da_id)
+            if hit is None or hit[0] != version:
+                return None
+            self._data.move_to_end(da_id)
+            return hit[1]
+
+    def put(self, da_id: int, version: Hashable, frame: LocalFrame) -> None:
+        with self._lock:
+            self._data[da_id] = (version, frame)
+            self._data.move_to_end(da_id)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def discard(self, da_id: int) -> None:
+        with self._lock:
+            self._data.pop(da_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_cache = _FrameCache(int(getattr(settings, "TEWA_FRAME_CACHE_SIZE", _DEFAULT_SIZE)))
+
+
+def frame_for(da: DefendedAsset) -> LocalFrame:
+    """Cached LocalFrame of `da` (built from the instance on a miss)."""
+    version: Any = (getattr(da, "updated_at", None), da.lat, da.lon, da.radius_km)
+    if da.pk is None:
+        return LocalFrame.build(da.lat, da.lon, da.radius_km)
+    frame = _cache.get(da.pk, version)
+    metrics.record_cache("frames", frame is not None)
+    if frame is None:
+        frame = LocalFrame.build(da.lat, da.lon, da.radius_km)
+        _cache.put(da.pk, version, frame)
+    return frame
+
+
+def invalidate(da_id: int) -> None:
+    _cache.discard(da_id)
+
+
+def clear_frame_cache() -> None:
+    _cache.clear()
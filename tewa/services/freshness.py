@@ -0,0 +1,111 @@
+# tewa/services/freshness.py
+"""
+Score freshness: how old the track sample behind a score was.
+
+Each ThreatScore written by the engine carries `sample_t`, the newest
+TrackSample.t its state was derived from (see sampling.sample_track_state_at).
+Two ages matter:
+- lag : computed_at - sample_t (how stale the input was when scored)
+- age : now - sample_t         (how stale the board is right now)
+
+observe() feeds lag into the tewa_score_freshness_seconds histogram at persist
+time (unlabelled, so its cardinality stays fixed); scenario_freshness() builds
+both histograms over the latest score per track and flags tracks older than
+ModelParams.freshness_alert_s.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from core.utils import metrics
+from tewa.models import ModelParams, ThreatScore
+
+DEFAULT_ALERT_S = 30.0
+MAX_STALE_LISTED = 100
+
+
+def observe(rows: Iterable[ThreatScore]) -> None:
+    """Record computed_at - sample_t for freshly written rows (one per track)."""
+    seen = set()
+    for r in rows:
+        if r.sample_t is None or (r.scenario_id, r.track_id) in seen:
+            continue
+        seen.add((r.scenario_id, r.track_id))
+        metrics.SCORE_FRESHNESS.observe(
+            max(0.0, (r.computed_at - r.sample_t).total_seconds()))
+
+
+def _histogram(values: Sequence[float], buckets: Sequence[float]) -> Dict[str, Any]:
+    """Cumulative (Prometheus-style) buckets plus count / max / p50."""
+    s = sorted(values)
+    return {
+        "buckets": [{"le": b, "count": sum(1 for v in s if v <= b)} for b in buckets]
+        + [{"le": "+Inf", "count": len(s)}],
+        "count": len(s),
+        "p50_s": round(s[(len(s) - 1) // 2], 3) if s else None,
+        "max_s": round(s[-1], 3) if s else None,
+    }
+
+
+def scenario_freshness(
+    scenario_id: int,
+    *,
+    now: Optional[datetime] = None,
+    buckets: Sequence[float] = metrics.AGE_BUCKETS,
+) -> Dict[str, Any]:
+    """
+    Freshness report over the latest ThreatScore of each track in a scenario.
+    Tracks scored from the Track snapshot (no sample) are counted as `unknown`.
+    Two queries whatever the number of tracks.
+    """
+    now = now or timezone.now()
+    params = ModelParams.objects.filter(scenario_id=scenario_id).only("freshness_alert_s").first()
+    alert_s = params.freshness_alert_s if params else DEFAULT_ALERT_S
+
+    latest = (
+        ThreatScore.objects
+        .filter(scenario_id=scenario_id)
+        .annotate(rn=Window(
+            RowNumber(), partition_by=[F("track_id")],
+            order_by=[F("computed_at").desc(), F("id").desc()]))
+        .filter(rn=1)
+        .values("track__track_id", "computed_at", "sample_t")
+    )
+
+    lag: List[float] = []
+    age: List[float] = []
+    stale: List[Dict[str, Any]] = []
+    unknown = 0
+    for row in latest:
+        sample_t = row["sample_t"]
+        if sample_t is None:
+            unknown += 1
+            continue
+        lag.append(max(0.0, (row["computed_at"] - sample_t).total_seconds()))
+        a = max(0.0, (now - sample_t).total_seconds())
+        age.append(a)
+        if a > alert_s:
+            stale.append({
+                "track_id": row["track__track_id"],
+                "sample_t": sample_t.isoformat(),
+                "computed_at": row["computed_at"].isoformat(),
+                "age_s": round(a, 3),
+            })
+
+    stale.sort(key=lambda r: r["age_s"], reverse=True)
+    return {
+        "scenario_id": scenario_id,
+        "now": now.isoformat(),
+        "alert_threshold_s": alert_s,
+        "tracks": len(lag) + unknown,
+        "unknown": unknown,
+        "lag": _histogram(lag, buckets),
+        "age": _histogram(age, buckets),
+        "stale_count": len(stale),
+        "stale": stale[:MAX_STALE_LISTED],
+    }
@@ -0,0 +1,109 @@
+# tewa/services/idempotency.py
+"""
+Idempotency store on the Django cache (alias "idempotency", see settings.CACHES).
+
+run_idempotent(key, fn) runs fn once per key within the TTL:
+  - a stored result is replayed;
+  - the first caller claims the key with cache.add() (atomic on every backend)
+    and computes;
+  - concurrent duplicates poll for the first caller's result instead of
+    starting a parallel compute, up to TEWA_IDEMPOTENCY_WAIT_S.
+Failures are not stored, so a retry after an error computes again.
+"""
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Any, Callable, Optional, Tuple, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.utils import metrics
+
+T = TypeVar("T")
+
+CACHE_ALIAS = "idempotency"
+_POLL_S = 0.05
+
+
+class IdempotencyInProgress(Exception):
+    """A duplicate request is still being computed by another caller."""
+
+    def __init__(self, key: str, retry_after_s: float) -> None:
+        super().__init__(f"Request '{key}' is still in progress")
+        self.key = key
+        self.retry_after_s = retry_after_s
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _result_key(key: str) -> str:
+    return f"res:{key}"
+
+
+def _lock_key(key: str) -> str:
+    return f"lock:{key}"
+
+
+def get_result(key: str) -> Optional[Any]:
+    """Stored result for key, or None."""
+    return _cache().get(_result_key(key))
+
+
+def run_idempotent(
+    key: str,
+    fn: Callable[[], T],
+    *,
+    ttl_s: Optional[int] = None,
+    wait_s: Optional[float] = None,
+) -> Tuple[T, bool]:
+    """
+    Return (result, replayed). replayed=True when the result came from an
+    earlier (or concurrent) call with the same key.
+    Raises IdempotencyInProgress if a duplicate is still running after wait_s.
+    """
+    cache = _cache()
+    ttl = int(ttl_s if ttl_s is not None else settings.TEWA_IDEMPOTENCY_TTL_S)
+    wait = float(wait_s if wait_s is not None else settings.TEWA_IDEMPOTENCY_WAIT_S)
+    lock_ttl = int(getattr(settings, "TEWA_IDEMPOTENCY_LOCK_TTL_S", 300))
+    rkey, lkey = _result_key(key), _lock_key(key)
+    deadline = time.monotonic() + wait
+
+    while True:
+        hit = cache.get(rkey)
+        if hit is not None:
+            metrics.record_cache("idempotency", True)
+            return hit, True
+
+        token = uuid.uuid4().hex
+        if cache.add(lkey, token, timeout=lock_ttl):
+            try:
+                metrics.record_cache("idempotency", False)
+                result = fn()
+                cache.set(rkey, result, timeout=ttl)
+                return result, False
+            finally:
+                # Only release our own claim (it may have expired and been re-taken)
+                if cache.get(lkey) == token:
+                    cache.delete(lkey)
+
+        # Someone else owns the key: wait for their result, or for the claim to
+        # disappear without one (their compute failed) and try to take it over.
+        while time.monotonic() < deadline:
+            time.sleep(_POLL_S)
+            hit = cache.get(rkey)
+            if hit is not None:
+                metrics.record_cache("idempotency", True)
+                return hit, True
+            if cache.get(lkey) is None:
+                break
+        else:
+            raise IdempotencyInProgress(key, retry_after_s=max(1.0, wait))
+
+
+def clear() -> None:
+    """Drop every stored result and claim (tests / ops)."""
+    _cache().clear()
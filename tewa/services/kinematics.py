@@ -9,9 +9,24 @@ from typing import (
     Tuple,
 )
 
-from core.utils.geodesy import LatLon, enu_from_latlon
+from core.utils.geodesy import (
+    WGS84_R_MEAN,
+    LatLon,
+    enu_from_latlon,
+    haversine_distance_m,
+    initial_bearing_deg,
+    vincenty_inverse,
+)
 from core.utils.units import deg2rad, m_to_km
 
+# Accuracy tiers of the track position around the DA (ModelParams.geodesy_precision):
+#   enu         : equirectangular small-angle ENU (TWRP: its own degree-scaled frame);
+#                 fastest, drifts beyond ~200 km
+#   spherical   : great-circle range and bearing from the DA (azimuthal equidistant)
+#   ellipsoidal : WGS-84 geodesic range and bearing (Vincenty)
+PRECISIONS = ("enu", "spherical", "ellipsoidal")
+DEFAULT_PRECISION = "enu"
+
 # -------------------------
 # Helpers
 # -------------------------
@@ -27,6 +42,46 @@ def heading_unit_vector(heading_deg: float) -> Tuple[float, float]:
     return math.sin(h), math.cos(h)
 
 
+def check_precision(precision: Optional[str]) -> str:
+    """Validated precision tier (None → DEFAULT_PRECISION)."""
+    if precision is None:
+        return DEFAULT_PRECISION
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}'. Allowed: {list(PRECISIONS)}")
+    return precision
+
+
+def local_frame(
+    *,
+    da_lat: float, da_lon: float,
+    trk_lat: float, trk_lon: float,
+    heading_deg: float,
+    precision: str = DEFAULT_PRECISION,
+) -> Tuple[float, float, float]:
+    """
+    Track position (east_m, north_m) in a plane centred on the DA, and its
+    heading in that plane. For the geodesic tiers the range and bearing from
+    the DA are exact and the heading is turned by the meridian convergence
+    between DA and track (initial minus final bearing of the DA→track geodesic).
+    """
+    if precision == "enu":
+        e, n = enu_from_latlon(LatLon(trk_lat, trk_lon), LatLon(da_lat, da_lon))
+        return e, n, heading_deg
+    da, trk = LatLon(da_lat, da_lon), LatLon(trk_lat, trk_lon)
+    if precision == "spherical":
+        d = haversine_distance_m(da, trk)
+        az1 = initial_bearing_deg(da, trk)
+        az2 = (initial_bearing_deg(trk, da) + 180.0) % 360.0
+    elif precision == "ellipsoidal":
+        d, az1, az2 = vincenty_inverse(da, trk)
+    else:
+        check_precision(precision)  # raises
+    if d == 0.0:
+        return 0.0, 0.0, heading_deg
+    a = deg2rad(az1)
+    return d * math.sin(a), d * math.cos(a), heading_deg + (az1 - az2)
+
+
 @dataclass(frozen=True)
 class CPAResult:
     """Closest-Point-of-Approach and time until it occurs (seconds)."""
@@ -43,6 +98,7 @@ def cpa_tcpa_km_s(
     da_lat: float, da_lon: float,
     trk_lat: float, trk_lon: float,
     speed_mps: float, heading_deg: float,
+    precision: str = DEFAULT_PRECISION,
 ) -> CPAResult:
     """
     CPA/TCPA using straight-line motion in a local ENU frame centered at the DA.
@@ -50,9 +106,13 @@ def cpa_tcpa_km_s(
       - TCPA is the argmin time t* (can be negative if closest point was in the past)
     """
     # Track position relative to DA (meters)
-    p0_e, p0_n = enu_from_latlon(
-        LatLon(trk_lat, trk_lon), LatLon(da_lat, da_lon))
+    p0_e, p0_n, heading_deg = local_frame(
+        da_lat=da_lat, da_lon=da_lon, trk_lat=trk_lat, trk_lon=trk_lon,
+        heading_deg=heading_deg, precision=precision)
+    return _cpa_en(p0_e, p0_n, speed_mps, heading_deg)
 
+
+def _cpa_en(p0_e: float, p0_n: float, speed_mps: float, heading_deg: float) -> CPAResult:
     # Velocity vector (m/s) in ENU
     u_e, u_n = heading_unit_vector(heading_deg)
     v_e, v_n = u_e * speed_mps, u_n * speed_mps
@@ -77,6 +137,7 @@ def tdb_s(
     da_lat: float, da_lon: float, da_radius_km: float,
     trk_lat: float, trk_lon: float,
     speed_mps: float, heading_deg: float,
+    precision: str = DEFAULT_PRECISION,
 ) -> float:
     """
     Time (seconds) until the trajectory first intersects the DA boundary circle.
@@ -90,8 +151,13 @@ def tdb_s(
     Solves |p0 + v t|^2 = R^2 for t ≥ 0 (quadratic) in local ENU.
     """
     R = max(0.0, da_radius_km) * 1000.0
-    p0_e, p0_n = enu_from_latlon(
-        LatLon(trk_lat, trk_lon), LatLon(da_lat, da_lon))
+    p0_e, p0_n, heading_deg = local_frame(
+        da_lat=da_lat, da_lon=da_lon, trk_lat=trk_lat, trk_lon=trk_lon,
+        heading_deg=heading_deg, precision=precision)
+    return _tdb_en(p0_e, p0_n, speed_mps, heading_deg, R)
+
+
+def _tdb_en(p0_e: float, p0_n: float, speed_mps: float, heading_deg: float, R: float) -> float:
     u_e, u_n = heading_unit_vector(heading_deg)
     v_e, v_n = u_e * speed_mps, u_n * speed_mps
 
@@ -126,17 +192,6 @@ EARTH_RADIUS_KM = 6371.0
 def _deg2rad(x): return x * math.pi / 180.0
 
 
-def _bearing_to_unit_vec(lat_deg, lon_deg, heading_deg):
-    """Local ENU unit vector of heading at (lat, lon). Returns (ex, ey) in km basis."""
-    lat = _deg2rad(lat_deg)
-    # East and North basis scale (km) at latitude
-    k_east = math.cos(lat) * (math.pi/180.0) * EARTH_RADIUS_KM
-    k_north = (math.pi/180.0) * EARTH_RADIUS_KM
-    hdg = _deg2rad(heading_deg)
-    # Unit vector in EN (km-normalized axes)
-    return (math.sin(hdg), math.cos(hdg), k_east, k_north)
-
-
 def _da_to_track_vector_km(da_lat, da_lon, trk_lat, trk_lon):
     """Approx local EN vector from DA to track, expressed in km on EN axes."""
     latm = _deg2rad((da_lat + trk_lat)/2.0)
@@ -150,10 +205,21 @@ def _da_to_track_vector_km(da_lat, da_lon, trk_lat, trk_lon):
 def twrp_s(
     da_lat, da_lon, weapon_range_km,
     trk_lat, trk_lon,
-    speed_mps, heading_deg
+    speed_mps, heading_deg,
+    precision=DEFAULT_PRECISION,
 ):
     # Vector DA -> Track in km
-    dx_km, dy_km = _da_to_track_vector_km(da_lat, da_lon, trk_lat, trk_lon)
+    if precision == "enu":
+        dx_km, dy_km = _da_to_track_vector_km(da_lat, da_lon, trk_lat, trk_lon)
+    else:
+        dx_m, dy_m, heading_deg = local_frame(
+            da_lat=da_lat, da_lon=da_lon, trk_lat=trk_lat, trk_lon=trk_lon,
+            heading_deg=heading_deg, precision=precision)
+        dx_km, dy_km = dx_m / 1000.0, dy_m / 1000.0
+    return _twrp_vec(dx_km, dy_km, speed_mps, heading_deg, weapon_range_km)
+
+
+def _twrp_vec(dx_km, dy_km, speed_mps, heading_deg, weapon_range_km):
     d_km = math.hypot(dx_km, dy_km)
 
     # Already inside: time is 0 by definition (NOT the failing case)
@@ -161,8 +227,8 @@ def twrp_s(
         return 0.0
 
     # Track ground velocity vector (km/s) in local EN frame
-    ex, ey, k_east, k_north = _bearing_to_unit_vec(
-        trk_lat, trk_lon, heading_deg)
+    hdg = _deg2rad(heading_deg)
+    ex, ey = math.sin(hdg), math.cos(hdg)
     v_e_kmps = (speed_mps / 1000.0) * ex
     v_n_kmps = (speed_mps / 1000.0) * ey
 
@@ -242,7 +308,8 @@ def compute_cpa_tcpa_tdb_twrp(
     *,
     da_lat: float, da_lon: float, da_radius_km: float,
     trk_lat: float, trk_lon: float, speed_mps: float, heading_deg: float,
-    weapon_range_km: float
+    weapon_range_km: float,
+    precision: str = DEFAULT_PRECISION,
 ) -> KinematicsBundle:
     """
     Convenience wrapper that returns all 4 components in consistent units.
@@ -250,31 +317,80 @@ def compute_cpa_tcpa_tdb_twrp(
       - tcpa_s: seconds (can be negative if closest point was in the past)
       - tdb_s: seconds (0 if already inside / no intersection / zero speed)
       - twrp_s: seconds (None if never closes to the weapon range boundary)
+    `precision` picks the geodesy tier (PRECISIONS) for all four.
     """
-    # CPA/TCPA
-    _cpa = cpa_tcpa_km_s(
-        da_lat=da_lat, da_lon=da_lon,
-        trk_lat=trk_lat, trk_lon=trk_lon,
-        speed_mps=speed_mps, heading_deg=heading_deg,
+    return frame_kinematics(
+        LocalFrame.build(da_lat, da_lon, da_radius_km),
+        trk_lat=trk_lat, trk_lon=trk_lon, speed_mps=speed_mps, heading_deg=heading_deg,
+        weapon_range_km=weapon_range_km, precision=precision,
     )
 
-    # Time to DA boundary (s)
-    _tdb_s = tdb_s(
-        da_lat=da_lat, da_lon=da_lon, da_radius_km=da_radius_km,
-        trk_lat=trk_lat, trk_lon=trk_lon,
-        speed_mps=speed_mps, heading_deg=heading_deg,
-    )
 
-    # Time to weapon range penetration (s or None)
-    _twrp_s = twrp_s(
-        da_lat=da_lat, da_lon=da_lon, weapon_range_km=weapon_range_km,
-        trk_lat=trk_lat, trk_lon=trk_lon,
-        speed_mps=speed_mps, heading_deg=heading_deg,
-    )
+# -------------------------
+# Per-DA frames
+# -------------------------
 
+@dataclass(frozen=True)
+class LocalFrame:
+    """
+    DA-side constants of the kinematics, computed once per DA (cached per
+    DefendedAsset by tewa.services.frames): origin in degrees and radians,
+    metres per degree east/north at the origin, DA radius and weapon range
+    in metres (the weapon range defaults to the DA radius, as in the engine).
+    """
+    lat: float
+    lon: float
+    lat_rad: float
+    lon_rad: float
+    m_per_deg_east: float
+    m_per_deg_north: float
+    radius_m: float
+    weapon_range_m: float
+
+    @classmethod
+    def build(cls, lat: float, lon: float, radius_km: float,
+              weapon_range_km: Optional[float] = None) -> "LocalFrame":
+        lat_rad = deg2rad(lat)
+        m_per_deg = WGS84_R_MEAN * math.pi / 180.0
+        radius_m = max(0.0, radius_km) * 1000.0
+        return cls(
+            lat=lat, lon=lon, lat_rad=lat_rad, lon_rad=deg2rad(lon),
+            m_per_deg_east=m_per_deg * math.cos(lat_rad), m_per_deg_north=m_per_deg,
+            radius_m=radius_m,
+            weapon_range_m=radius_m if weapon_range_km is None else weapon_range_km * 1000.0,
+        )
+
+
+def frame_kinematics(
+    frame: LocalFrame,
+    *,
+    trk_lat: float, trk_lon: float, speed_mps: float, heading_deg: float,
+    weapon_range_km: Optional[float] = None,
+    precision: str = DEFAULT_PRECISION,
+) -> KinematicsBundle:
+    """
+    compute_cpa_tcpa_tdb_twrp against a prebuilt frame: the track is placed in
+    the DA plane once and all four components are taken from that position.
+    `weapon_range_km` overrides frame.weapon_range_m.
+    """
+    if precision == "enu":
+        # enu_from_latlon with the origin's radians taken from the frame
+        lat, lon = deg2rad(trk_lat), deg2rad(trk_lon)
+        p0_e = WGS84_R_MEAN * (lon - frame.lon_rad) * math.cos((lat + frame.lat_rad) * 0.5)
+        p0_n = WGS84_R_MEAN * (lat - frame.lat_rad)
+        hdg = heading_deg
+        dx_km, dy_km = _da_to_track_vector_km(frame.lat, frame.lon, trk_lat, trk_lon)
+    else:
+        p0_e, p0_n, hdg = local_frame(
+            da_lat=frame.lat, da_lon=frame.lon, trk_lat=trk_lat, trk_lon=trk_lon,
+            heading_deg=heading_deg, precision=precision)
+        dx_km, dy_km = p0_e / 1000.0, p0_n / 1000.0
+
+    cpa = _cpa_en(p0_e, p0_n, speed_mps, hdg)
+    wr_km = frame.weapon_range_m / 1000.0 if weapon_range_km is None else weapon_range_km
     return KinematicsBundle(
-        cpa_km=_cpa.cpa_km,
-        tcpa_s=_cpa.tcpa_s,
-        tdb_s=_tdb_s,
-        twrp_s=_twrp_s
+        cpa_km=cpa.cpa_km,
+        tcpa_s=cpa.tcpa_s,
+        tdb_s=_tdb_en(p0_e, p0_n, speed_mps, hdg, frame.radius_m),
+        twrp_s=_twrp_vec(dx_km, dy_km, speed_mps, hdg, wr_km),
     )
@@ -0,0 +1,94 @@
+# tewa/services/kinematics_np.py
+"""
+Array counterparts of tewa.services.kinematics: the four threat components
+(CPA, TCPA, TDB, TWRP) for whole batches of track/DA pairs in one call, at any
+of the kinematics.PRECISIONS tiers. Inputs broadcast against each other;
+TWRP "never" (None in the scalar kernel) is +inf here.
+
+Requires NumPy; callers that must run without it use the scalar kernels.
+"""
+from __future__ import annotations
+
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+
+from core.utils import geodesy_np
+from tewa.services.kinematics import (
+    DEFAULT_PRECISION,
+    EARTH_RADIUS_KM,
+    LocalFrame,
+    check_precision,
+)
+
+__all__ = ["frame", "components", "components_for_frames"]
+
+
+def frame(lat, lon, hdg, da_lat, da_lon, precision: str = DEFAULT_PRECISION):
+    """kinematics.local_frame over arrays; returns (east_m, north_m, heading_deg)."""
+    precision = check_precision(precision)
+    if precision == "enu":
+        e, n = geodesy_np.enu_from_latlon(lat, lon, da_lat, da_lon)
+        return e, n, np.asarray(hdg, dtype=float) + 0.0 * e
+    if precision == "spherical":
+        d = geodesy_np.haversine_distance_m(da_lat, da_lon, lat, lon)
+        az1 = geodesy_np.initial_bearing_deg(da_lat, da_lon, lat, lon)
+        az2 = geodesy_np.final_bearing_deg(da_lat, da_lon, lat, lon)
+    else:
+        d, az1, az2 = geodesy_np.vincenty_inverse(da_lat, da_lon, lat, lon)
+    a = np.radians(az1)
+    turn = np.where(d > 0.0, az1 - az2, 0.0)
+    return d * np.sin(a), d * np.cos(a), hdg + turn
+
+
+def components(lat, lon, speed, hdg, da_lat, da_lon, da_radius_km, weapon_range_km,
+               precision: str = DEFAULT_PRECISION):
+    """kinematics.compute_cpa_tcpa_tdb_twrp over arrays: (cpa_km, tcpa_s, tdb_s, twrp_s)."""
+    e, n, hdg_f = frame(lat, lon, hdg, da_lat, da_lon, precision)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # CPA / TCPA and TDB in the plane around the DA
+        h = np.radians(hdg_f)
+        ve, vn = np.sin(h) * speed, np.cos(h) * speed
+        v2 = ve * ve + vn * vn
+        moving = v2 > 1e-9
+        t_star = np.where(moving, -(e * ve + n * vn) / np.where(moving, v2, 1.0), np.inf)
+        cpa_m = np.where(moving, np.hypot(e + ve * np.where(moving, t_star, 0.0),
+                                          n + vn * np.where(moving, t_star, 0.0)),
+                         np.hypot(e, n))
+
+        R = np.maximum(0.0, da_radius_km) * 1000.0
+        c = e * e + n * n - R * R
+        b = 2.0 * (e * ve + n * vn)
+        disc = b * b - 4.0 * v2 * c
+        sq = np.sqrt(np.maximum(disc, 0.0))
+        a2 = 2.0 * np.where(moving, v2, 1.0)
+        t1, t2 = (-b - sq) / a2, (-b + sq) / a2
+        first = np.where(t1 >= 0.0, t1, np.where(t2 >= 0.0, t2, 0.0))
+        tdb = np.where((c <= 0.0) | ~moving | (disc < 0.0), 0.0, first)
+
+        if precision == "enu":
+            # TWRP: degree-scaled EN frame of kinematics.twrp_s
+            k_north = (math.pi / 180.0) * EARTH_RADIUS_KM
+            dx = (lon - da_lon) * np.cos(np.radians((da_lat + lat) / 2.0)) * k_north
+            dy = (lat - da_lat) * k_north
+            h_w = np.radians(hdg)
+        else:
+            dx, dy, h_w = e / 1000.0, n / 1000.0, h
+        d_km = np.hypot(dx, dy)
+        closing = (speed / 1000.0) * (np.sin(h_w) * -dx + np.cos(h_w) * -dy) / d_km
+        twrp = np.where(d_km <= weapon_range_km, 0.0,
+                        np.where(closing > 0.0, (d_km - weapon_range_km) / closing, np.inf))
+    return cpa_m / 1000.0, t_star, tdb, twrp
+
+
+def components_for_frames(lat, lon, speed, hdg, frames: Sequence[LocalFrame],
+                          weapon_range_km: Optional[float] = None,
+                          precision: str = DEFAULT_PRECISION):
+    """components() against DA frames laid along the last axis (see frames.frame_for)."""
+    da_lat = np.array([f.lat for f in frames])
+    da_lon = np.array([f.lon for f in frames])
+    radius_km = np.array([f.radius_m for f in frames]) / 1000.0
+    wr = (np.array([f.weapon_range_m for f in frames]) / 1000.0
+          if weapon_range_km is None else weapon_range_km)
+    return components(lat, lon, speed, hdg, da_lat, da_lon, radius_km, wr, precision)
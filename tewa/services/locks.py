@@ -0,0 +1,83 @@
+# tewa/services/locks.py
+"""
+Cross-worker mutual exclusion on the database.
+
+PostgreSQL: session-level advisory locks (pg_advisory_lock / pg_advisory_unlock)
+keyed by a 64-bit hash of a name. Other backends (SQLite in dev/tests) have a
+single writer anyway, so the lock degrades to a no-op that always succeeds.
+
+scenario_lock_name() is the per-scenario lock that compute runs take through
+compute_jobs.scenario_lock(): recorded jobs (run_job / run_inline, which the
+compute_threats command, beat and the HTML compute button use) and the
+synchronous compute_now / compute_at API paths. Direct engine calls
+(compute_scores_at_timestamp, batch_compute_for_scenario) do not take it.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from django.db import connection
+
+
+def lock_id(name: str) -> int:
+    """Stable signed 64-bit id for an advisory lock name."""
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def scenario_lock_name(scenario_id: int) -> str:
+    return f"tewa:scenario:{scenario_id}"
+
+
+def _supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def _try_lock(key: int) -> bool:
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_try_advisory_lock(%s)", [key])
+        return bool(cur.fetchone()[0])
+
+
+def acquire(name: str, *, timeout_s: Optional[float] = None, poll_s: float = 0.25) -> bool:
+    """
+    Take the named lock. timeout_s=0 tries once, None waits indefinitely.
+    Returns False if the lock is still held elsewhere when the timeout expires.
+    """
+    if not _supported():
+        return True
+    key = lock_id(name)
+    deadline = None if timeout_s is None else time.monotonic() + timeout_s
+    while True:
+        if _try_lock(key):
+            return True
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        time.sleep(poll_s)
+
+
+def release(name: str) -> None:
+    if not _supported():
+        return
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_advisory_unlock(%s)", [lock_id(name)])
+
+
+@contextmanager
+def advisory_lock(name: str) -> Iterator[None]:
+    """Block until the named lock is held; release it on exit."""
+    if not _supported():
+        yield
+        return
+    key = lock_id(name)
+    with connection.cursor() as cur:
+        cur.execute("SELECT pg_advisory_lock(%s)", [key])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cur:
+            cur.execute("SELECT pg_advisory_unlock(%s)", [key])
+
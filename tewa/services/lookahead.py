@@ -0,0 +1,298 @@
+# tewa/services/lookahead.py
+"""
+Predictive threat curve: how each track's score evolves over the next
+`horizon_s` seconds if it keeps its current speed and course.
+
+Each track's state at `when` (sampling.sample_track_states_at) is moved along
+its great circle with destination_point at offsets 0, step_s, 2*step_s, ...
+up to the horizon; the heading at each step is the great-circle course there.
+The four components (CPA, TCPA, TDB, TWRP) and the score are then computed for
+every (track, step, DA) in one pass, with the same kernels and conventions as
+build_score_for_track (kinematics_np.components_for_frames, the array form
+of kinematics.frame_kinematics, against each DA's cached frame, + scoring) at the scenario's geodesy
+precision tier, and reduced to each track's peak score and time-to-peak.
+
+Vectorized with NumPy (tracks x steps x DAs arrays, over chunks of tracks of
+at most CHUNK_CELLS cells); falls back to the scalar kernels when NumPy is
+absent. Nothing is persisted.
+"""
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core.utils.geodesy import LatLon, destination_point, initial_bearing_deg
+from tewa.models import DefendedAsset, ModelParams, Scenario, Track
+from tewa.services import frames
+from tewa.services.engine import resolve_das
+from tewa.services.kinematics import (
+    DEFAULT_PRECISION,
+    check_precision,
+    frame_kinematics,
+)
+from tewa.services.sampling import sample_track_states_at
+from tewa.services.scoring import _coerce_params, score_components_to_threat
+
+try:
+    import numpy as np
+
+    from core.utils import geodesy_np
+    from tewa.services import kinematics_np
+except ImportError:  # pragma: no cover - scalar loop still works
+    np = None  # type: ignore[assignment]
+
+DEFAULT_HORIZON_S = 600.0
+DEFAULT_STEP_S = 10.0
+MAX_STEPS = 1000
+CHUNK_CELLS = 250_000  # (track, step, DA) cells per vectorized pass
+MAX_SERIES_VALUES = 1_000_000  # per-step scores returned with series=True
+_TIE_DECIMALS = 9
+
+COMPONENTS = ("cpa_km", "tcpa_s", "tdb_km", "twrp_s")
+
+
+def _params(scenario: Scenario) -> Tuple[Dict[str, Any], str]:
+    """Scoring params (zero-weight rule applied) and the scenario's geodesy tier."""
+    obj = ModelParams.objects.filter(scenario=scenario).first()
+    p = dict(_coerce_params(obj if obj is not None else {}))
+    # Same zero-weight rule as build_score_for_track
+    if sum(p[f"w_{k}"] for k in ("cpa", "tcpa", "tdb", "twrp")) == 0.0:
+        for k in ("cpa", "tcpa", "tdb", "twrp"):
+            p[f"w_{k}"] = 0.25
+    return p, getattr(obj, "geodesy_precision", DEFAULT_PRECISION)
+
+
+# ---------------------------------------------------------------------
+# Vectorized scoring (arrays broadcast against each other)
+# ---------------------------------------------------------------------
+
+def _inv1(x, scale: float):
+    out = 1.0 / (1.0 + x / max(scale, 1e-9))
+    return np.where(np.isfinite(x) & (x >= 0.0), out, 0.0)
+
+
+def _scores(cpa_km, tcpa_s, tdb_km, twrp_s, p: Dict[str, Any]):
+    """scoring.score_components_to_threat over arrays."""
+    with np.errstate(invalid="ignore"):
+        s = (p["w_cpa"] * _inv1(cpa_km, p["cpa_scale_km"])
+             + p["w_tcpa"] * _inv1(tcpa_s, p["tcpa_scale_s"])
+             + p["w_tdb"] * _inv1(tdb_km, p["tdb_scale_km"])
+             + p["w_twrp"] * _inv1(twrp_s, p["twrp_scale_s"]))
+    return np.clip(s, 0.0, 1.0) if p["clamp_0_1"] else s
+
+
+def _curves_np(states, das, offsets, p, weapon_range_km, precision):
+    """(tracks, steps, DAs) arrays of the four components and the score."""
+    lat0 = np.array([s["lat"] for s in states])[:, None]
+    lon0 = np.array([s["lon"] for s in states])[:, None]
+    spd = np.array([s["speed_mps"] for s in states])[:, None]
+    hdg0 = np.array([s["heading_deg"] for s in states])[:, None]
+    dist = spd * np.asarray(offsets)[None, :]
+    lat, lon = geodesy_np.destination_point(lat0, lon0, hdg0, dist)
+    hdg = np.where(dist > 0.0, geodesy_np.final_bearing_deg(lat0, lon0, lat, lon), hdg0 % 360.0)
+
+    cpa, tcpa, tdb, twrp = kinematics_np.components_for_frames(
+        lat[..., None], lon[..., None], spd[..., None], hdg[..., None],
+        [frames.frame_for(d) for d in das], weapon_range_km or None, precision=precision)
+    # tdb_km carries the TDB seconds, as persisted by build_score_for_track
+    return {"cpa_km": cpa, "tcpa_s": tcpa, "tdb_km": tdb, "twrp_s": twrp,
+            "score": _scores(cpa, tcpa, tdb, twrp, p)}
+
+
+def _curves_scalar(states, das, offsets, p, weapon_range_km, precision):
+    """Reference loop over the scalar kernels; nested lists [track][step][da]."""
+    out: Dict[str, List] = {k: [] for k in (*COMPONENTS, "score")}
+    da_frames = [frames.frame_for(d) for d in das]
+    for s in states:
+        rows: Dict[str, List] = {k: [] for k in out}
+        start = LatLon(s["lat"], s["lon"])
+        for off in offsets:
+            dist = s["speed_mps"] * off
+            pos = destination_point(start, s["heading_deg"], dist)
+            hdg = ((initial_bearing_deg(pos, start) + 180.0) % 360.0
+                   if dist > 0 else s["heading_deg"] % 360.0)
+            cells: Dict[str, List] = {k: [] for k in out}
+            for frame in da_frames:
+                b = frame_kinematics(
+                    frame, trk_lat=pos.lat, trk_lon=pos.lon, speed_mps=s["speed_mps"],
+                    heading_deg=hdg, weapon_range_km=weapon_range_km or None,
+                    precision=precision)
+                twrp = math.inf if b.twrp_s is None else b.twrp_s
+                cells["cpa_km"].append(b.cpa_km)
+                cells["tcpa_s"].append(b.tcpa_s)
+                cells["tdb_km"].append(b.tdb_s)
+                cells["twrp_s"].append(twrp)
+                cells["score"].append(score_components_to_threat(
+                    cpa_km=b.cpa_km, tcpa_s=b.tcpa_s, tdb_km=b.tdb_s, twrp_s=b.twrp_s,
+                    params=p))  # type: ignore[arg-type]
+            for k in out:
+                rows[k].append(cells[k])
+        for k in out:
+            out[k].append(rows[k])
+    return out
+
+
+def threat_curves(
+    states: Sequence[Dict[str, Any]],
+    das: Sequence[DefendedAsset],
+    offsets: Sequence[float],
+    params: Dict[str, Any],
+    weapon_range_km: Optional[float] = None,
+    *,
+    vectorized: bool = True,
+    precision: str = DEFAULT_PRECISION,
+):
+    """
+    Components and scores for every (state, offset, DA). Returns a dict of
+    {cpa_km, tcpa_s, tdb_km, twrp_s, score}, each indexable [track][step][da]
+    (NumPy arrays when vectorized, nested lists otherwise). `precision` is
+    the kinematics geodesy tier.
+    """
+    precision = check_precision(precision)
+    if vectorized and np is not None:
+        return _curves_np(states, das, offsets, params, weapon_range_km, precision)
+    return _curves_scalar(states, das, offsets, params, weapon_range_km, precision)
+
+
+def _num(v) -> Optional[float]:
+    v = float(v)
+    return round(v, 6) if math.isfinite(v) else None
+
+
+def _peaks(curves, series: bool) -> Dict[str, List]:
+    """
+    Per (track, DA): step of the peak score (earliest on ties), the score and
+    components there, and the score at step 0; as nested lists [track][da].
+    """
+    keys = (*COMPONENTS, "score")
+    if np is not None and isinstance(curves["score"], np.ndarray):
+        # First maximum = earliest step; rounding keeps float noise from breaking ties
+        k = np.argmax(np.round(curves["score"], _TIE_DECIMALS), axis=1)
+        idx = k[:, None, :]
+        out = {c: np.take_along_axis(curves[c], idx, axis=1)[:, 0, :].tolist() for c in keys}
+        out["step"] = k.tolist()
+        out["now"] = curves["score"][:, 0, :].tolist()
+        if series:
+            out["series"] = np.swapaxes(curves["score"], 1, 2).tolist()
+        return out
+
+    out = {c: [] for c in (*keys, "step", "now", "series")}
+    for i, rows in enumerate(curves["score"]):
+        cols = [list(col) for col in zip(*rows)]  # [da][step]
+        steps = [max(range(len(col)), key=lambda s, col=col: (round(col[s], _TIE_DECIMALS), -s))
+                 for col in cols]
+        out["step"].append(steps)
+        out["now"].append([col[0] for col in cols])
+        out["series"].append(cols)
+        for c in keys:
+            out[c].append([curves[c][i][s][j] for j, s in enumerate(steps)])
+    return out
+
+
+def _track_rows(
+    tracks: Sequence[Track],
+    states: Sequence[Dict[str, Any]],
+    das: Sequence[DefendedAsset],
+    offsets: Sequence[float],
+    peaks: Dict[str, List],
+    series: bool,
+    when: datetime,
+) -> List[Dict[str, Any]]:
+    """One result row per track from _peaks() of its chunk."""
+    rows = []
+    for i, (track, state) in enumerate(zip(tracks, states)):
+        per_da = []
+        for j, da in enumerate(das):
+            entry = {
+                "da_id": da.pk,
+                "da_name": da.name,
+                "score_now": _num(peaks["now"][i][j]),
+                "peak_score": _num(peaks["score"][i][j]),
+                "time_to_peak_s": offsets[peaks["step"][i][j]],
+                "at_peak": {c: _num(peaks[c][i][j]) for c in COMPONENTS},
+            }
+            if series:
+                entry["scores"] = [_num(v) for v in peaks["series"][i][j]]
+            per_da.append(entry)
+        best = max(per_da, key=lambda e: (e["peak_score"] or 0.0, -e["time_to_peak_s"]))
+        rows.append({
+            "track_pk": track.pk,
+            "track_id": track.track_id,
+            "state_t": state["t"].isoformat(),
+            "peak_score": best["peak_score"],
+            "time_to_peak_s": best["time_to_peak_s"],
+            "peak_at": (when + timedelta(seconds=best["time_to_peak_s"])).isoformat(),
+            "peak_da_id": best["da_id"],
+            "peak_da_name": best["da_name"],
+            "das": per_da,
+        })
+    return rows
+
+
+def lookahead(
+    *,
+    scenario_id: int,
+    when: datetime,
+    horizon_s: float = DEFAULT_HORIZON_S,
+    step_s: float = DEFAULT_STEP_S,
+    da_ids: Optional[Iterable[int]] = None,
+    method: str = "linear",
+    weapon_range_km: Optional[float] = None,
+    series: bool = False,
+    precision: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Peak score and time-to-peak per track over [when, when + horizon_s],
+    sampled every step_s, against the DAs the engine scores (every DA, or
+    `da_ids`). Tracks are ordered by peak score, highest first. With `series`, each
+    DA entry also carries its score per step. `precision` defaults to the
+    scenario's ModelParams.geodesy_precision.
+    """
+    if step_s <= 0 or horizon_s < 0:
+        raise ValueError("step_s must be > 0 and horizon_s >= 0")
+    n_steps = int(math.floor(horizon_s / step_s + 1e-9)) + 1
+    if n_steps > MAX_STEPS:
+        raise ValueError(f"horizon_s / step_s gives {n_steps} steps (max {MAX_STEPS})")
+    try:
+        scenario = Scenario.objects.get(pk=scenario_id)
+    except Scenario.DoesNotExist as e:
+        raise ValueError(f"Scenario {scenario_id} not found") from e
+
+    das = resolve_das(da_ids)
+    tracks = list(Track.objects.filter(scenario=scenario).order_by("id"))
+    if series and len(tracks) * n_steps * len(das) > MAX_SERIES_VALUES:
+        raise ValueError(
+            f"series would return more than {MAX_SERIES_VALUES} scores "
+            "(tracks × steps × DAs); narrow da_id, horizon_s or step_s")
+    sampled = sample_track_states_at(tracks, when, method=method)
+    tracks = [t for t in tracks if sampled.get(t.pk)]
+    states = [sampled[t.pk] for t in tracks]
+
+    params, scenario_precision = _params(scenario)
+    precision = check_precision(precision or scenario_precision)
+    offsets = [float(i * step_s) for i in range(n_steps)]
+    result: Dict[str, Any] = {
+        "scenario_id": scenario.pk,
+        "when": when.isoformat(),
+        "horizon_s": horizon_s,
+        "step_s": step_s,
+        "steps": n_steps,
+        "precision": precision,
+        "das": [{"id": d.pk, "name": d.name} for d in das],
+        "tracks": [],
+    }
+    if not das or not tracks:
+        return result
+
+    # Tracks in chunks so the (tracks × steps × DAs) arrays stay bounded
+    chunk = max(1, CHUNK_CELLS // (n_steps * len(das)))
+    rows: List[Dict[str, Any]] = []
+    for lo in range(0, len(tracks), chunk):
+        part = states[lo:lo + chunk]
+        curves = threat_curves(part, das, offsets, params, weapon_range_km, precision=precision)
+        rows.extend(_track_rows(tracks[lo:lo + chunk], part, das, offsets,
+                                _peaks(curves, series), series, when))
+    rows.sort(key=lambda r: (-(r["peak_score"] or 0.0), r["time_to_peak_s"], r["track_pk"]))
+    result["tracks"] = rows
+    return result
@@ -0,0 +1,305 @@
+# tewa/services/prefilter.py
+"""
+Spatial prefilter for the track × DA product.
+
+A track flying at v m/s cannot come within a DA's weapon range (or radius) in
+the next H seconds unless it is already within v·H + range of it. DA
+positions go into a uniform grid over Earth-centred x/y/z (chord distance
+≤ great-circle distance, so the grid needs no antimeridian or pole special
+cases). Each track queries it once with that reach. Pairs outside the reach
+are pruned before any kinematics run.
+
+Pruned pairs are not scored (the engine writes no row for them). The plan
+reports the range their scores could fall in, [floor, upper]. The bound is
+worst-case over every heading and every distance beyond the reach:
+
+- twrp ≥ H and, when the track would enter the DA, tdb ≥ H;
+- otherwise tdb = 0, which scores fully (kernel convention);
+- cpa = d·|sin φ| and tcpa = d·cos φ / v, so their joint worst case is taken
+  over φ on a grid, made exact by monotonicity between grid points.
+
+Floor: the score is at least min(w_tdb, w_cpa / (1 + R/cpa_scale)). Either
+the track never enters the DA (tdb = 0), or it does and then cpa ≤ R.
+
+CPA has no horizon. A far track flying straight away from a DA has cpa = 0,
+so far pairs do not score near zero and pruning does not give near-zero
+error for this scoring model. The bound is wide, but it is guaranteed: no
+pruned pair can score above `upper`, so every pair scoring above it is
+still scored exactly.
+
+score_bounder() gives a bound per pair, from range, speed and the track's
+heading relative to the DA (heading_offset), for the top-k ranking in
+threat_compute.calculate_scores_for_when.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from core.utils.geodesy import WGS84_R_MEAN
+from tewa.services.kinematics import LocalFrame
+from tewa.services.scoring import _coerce_params
+
+# Plane distance of every precision tier ≥ this × great-circle distance
+# (enu ≥ 1, spherical = 1, ellipsoidal ≥ 0.9944 on R_mean): reaches are
+# divided by it so that pruned pairs are beyond the reach in the kernel's plane
+_PLANE_TO_ARC_MIN = 0.99
+_PHI_STEPS = 90
+_MIN_CELL_M = 1_000.0
+# Heading slack on top of meridian convergence: covers the ellipsoidal tier's
+# bearings (≤ 0.2° off the sphere's)
+_HEADING_SLACK_RAD = math.radians(0.5)
+_REPORT_NOTE = (
+    "Pruned pairs are not written. Their true score lies in [floor_score, upper_bound]; "
+    "CPA has no horizon, so error_bound is not near zero for this scoring model."
+)
+
+
+def xyz(lat: float, lon: float) -> Tuple[float, float, float]:
+    """Earth-centred position (m) on the mean sphere."""
+    la, lo = math.radians(lat), math.radians(lon)
+    c = math.cos(la)
+    return (WGS84_R_MEAN * c * math.cos(lo), WGS84_R_MEAN * c * math.sin(lo),
+            WGS84_R_MEAN * math.sin(la))
+
+
+def _chord(arc_m: float) -> float:
+    return 2.0 * WGS84_R_MEAN * math.sin(min(arc_m / (2.0 * WGS84_R_MEAN), math.pi / 2))
+
+
+class DAIndex:
+    """Uniform grid of DA positions (Earth-centred x/y/z, cell edge `cell_m`)."""
+
+    def __init__(self, frames: Sequence[LocalFrame], cell_m: float) -> None:
+        self.cell_m = max(cell_m, _MIN_CELL_M)
+        self.points = [xyz(f.lat, f.lon) for f in frames]
+        self.buckets: Dict[Tuple[int, int, int], List[int]] = {}
+        for i, p in enumerate(self.points):
+            self.buckets.setdefault(self._cell(p), []).append(i)
+
+    def _cell(self, p: Tuple[float, float, float]) -> Tuple[int, int, int]:
+        c = self.cell_m
+        return (math.floor(p[0] / c), math.floor(p[1] / c), math.floor(p[2] / c))
+
+    def query(self, lat: float, lon: float, arc_m: float) -> List[int]:
+        """Indices of the DAs within great-circle distance `arc_m` (or a little beyond)."""
+        q = xyz(lat, lon)
+        r = _chord(arc_m)
+        k = math.ceil(r / self.cell_m)
+        cx, cy, cz = self._cell(q)
+        if (2 * k + 1) ** 3 <= len(self.buckets):
+            cells: Iterable = (
+                (cx + i, cy + j, cz + m)
+                for i in range(-k, k + 1) for j in range(-k, k + 1) for m in range(-k, k + 1))
+        else:
+            cells = [c for c in self.buckets
+                     if abs(c[0] - cx) <= k and abs(c[1] - cy) <= k and abs(c[2] - cz) <= k]
+        r2 = r * r
+        out = []
+        for cell in cells:
+            for i in self.buckets.get(cell, ()):
+                p = self.points[i]
+                if (p[0] - q[0]) ** 2 + (p[1] - q[1]) ** 2 + (p[2] - q[2]) ** 2 <= r2:
+                    out.append(i)
+        return out
+
+
+def _weights(params: Any) -> Dict[str, Any]:
+    """Coerced params with the zero-weight rule of build_score_for_track."""
+    p: Dict[str, Any] = dict(_coerce_params(params))
+    if sum(float(p[f"w_{k}"]) for k in ("cpa", "tcpa", "tdb", "twrp")) == 0.0:
+        for k in ("cpa", "tcpa", "tdb", "twrp"):
+            p[f"w_{k}"] = 0.25
+    return p
+
+
+def _clamp(p: Mapping[str, Any], v: float) -> float:
+    return min(1.0, max(0.0, v)) if p["clamp_0_1"] else v
+
+
+def floor_score(params: Any, max_radius_km: float) -> float:
+    """Lowest score any pair beyond the reach can get (see module docstring)."""
+    p = _weights(params)
+    cpa_part = p["w_cpa"] / (1.0 + max_radius_km / max(p["cpa_scale_km"], 1e-9))
+    return _clamp(p, min(p["w_tdb"], cpa_part))
+
+
+@lru_cache(maxsize=8)
+def _phi_grid(steps: int) -> Tuple[Tuple[float, float], ...]:
+    return tuple((math.sin(i * (math.pi / 2) / steps), math.cos(i * (math.pi / 2) / steps))
+                 for i in range(steps + 1))
+
+
+def _cpa_tcpa_bound(p: Mapping[str, Any], d_m: float, v: float, steps: int) -> float:
+    """Max over headings of the CPA + TCPA parts for a track d_m away at speed v."""
+    sc, st = max(p["cpa_scale_km"], 1e-9), max(p["tcpa_scale_s"], 1e-9)
+    w_cpa, w_tcpa = max(0.0, p["w_cpa"]), max(0.0, p["w_tcpa"])
+    d_km, v = d_m / 1000.0, max(v, 1e-6)
+    # Heading off the line of sight φ: cpa = d·sin φ falls and tcpa = d·cos φ / v
+    # grows as φ goes 0 → 90°, so on each grid step a(φ_i) + b(φ_i+1) bounds it.
+    # Receding (φ > 90°): TCPA scores 0 and the CPA part ≤ w_cpa, already covered
+    g = _phi_grid(steps)
+    return max(w_cpa / (1.0 + d_km * g[i][0] / sc) + w_tcpa / (1.0 + d_m * g[i + 1][1] / v / st)
+               for i in range(steps))
+
+
+def heading_offset(lat: float, lon: float, heading_deg: float,
+                   da_lat: float, da_lon: float) -> Tuple[float, float]:
+    """
+    (φ, slack) in radians: φ ∈ [0, π] is the angle between the track's heading
+    and its great-circle bearing to the DA; every precision tier's plane angle
+    is within `slack` of it (meridian convergence |Δλ|·max|sin lat| for enu,
+    plus _HEADING_SLACK_RAD for the ellipsoid).
+    """
+    p1, p2 = math.radians(lat), math.radians(da_lat)
+    dl = math.radians(da_lon - lon)
+    brg = math.atan2(math.sin(dl) * math.cos(p2),
+                     math.cos(p1) * math.sin(p2) - math.sin(p1) * math.cos(p2) * math.cos(dl))
+    phi = abs((math.radians(heading_deg) - brg + math.pi) % (2.0 * math.pi) - math.pi)
+    slack = abs(dl) * max(abs(math.sin(p1)), abs(math.sin(p2))) + _HEADING_SLACK_RAD
+    return phi, min(slack, math.pi)
+
+
+def score_bounder(
+    p: Mapping[str, Any], steps: int = 2
+) -> Callable[..., float]:
+    """
+    bound(dist_m, speed_mps, weapon_range_m, off=None): upper bound on the
+    score of a track at ≥ dist_m (kernel plane distance) from a DA, moving at
+    speed_mps. `p` is a coerced params dict, used as given (no zero-weight
+    rule).
+
+    With off = heading_offset(...), the heading is known to within the slack,
+    so cpa ≥ d·min|sin φ|, tcpa ≥ d·min cos φ / v and the closing speed is at
+    most v·max cos φ (TWRP). TDB keeps its full weight: a track that misses
+    the DA has tdb = 0, which scores fully (kernel convention).
+
+    Without `off` the bound holds for any heading: same as upper_score on a
+    coarser φ grid, with TWRP ≥ (dist_m − weapon_range_m) / speed_mps.
+    """
+    w_cpa, w_tcpa = max(0.0, p["w_cpa"]), max(0.0, p["w_tcpa"])
+    w_tdb, w_twrp = max(0.0, p["w_tdb"]), max(0.0, p["w_twrp"])
+    sc_m, st = max(p["cpa_scale_km"], 1e-9) * 1000.0, max(p["tcpa_scale_s"], 1e-9)
+    sw = max(p["twrp_scale_s"], 1e-9)
+    clamp = bool(p["clamp_0_1"])
+    g = _phi_grid(steps)
+    segs = [(g[i][0] / sc_m, g[i + 1][1] / st) for i in range(steps)]
+    half_pi = math.pi / 2
+
+    def bound(dist_m: float, speed_mps: float, weapon_range_m: float,
+              off: Optional[Tuple[float, float]] = None) -> float:
+        v = speed_mps if speed_mps and speed_mps > 0.0 else 0.0
+        gap = dist_m - weapon_range_m
+        if off is None:
+            vv = max(v, 1e-6)
+            ab = max(w_cpa / (1.0 + dist_m * ka) + w_tcpa / (1.0 + dist_m * kb / vv)
+                     for ka, kb in segs)
+            cos_max = 1.0
+        elif v == 0.0:
+            # Stationary: cpa is the range, tcpa is +inf
+            ab = w_cpa / (1.0 + dist_m / sc_m)
+            cos_max = 0.0
+        else:
+            lo, hi = max(0.0, off[0] - off[1]), min(math.pi, off[0] + off[1])
+            sin_min = 0.0 if lo == 0.0 or hi == math.pi else min(math.sin(lo), math.sin(hi))
+            if lo > half_pi:
+                tcpa = 0.0  # receding: tcpa < 0
+            elif hi >= half_pi:
+                tcpa = w_tcpa  # may cross abeam: tcpa → 0
+            else:
+                tcpa = w_tcpa / (1.0 + dist_m * math.cos(hi) / v / st)
+            ab = w_cpa / (1.0 + dist_m * sin_min / sc_m) + tcpa
+            cos_max = math.cos(lo)
+        if gap <= 0.0:
+            twrp = w_twrp
+        elif v == 0.0 or cos_max <= 0.0:
+            twrp = 0.0
+        else:
+            twrp = w_twrp / (1.0 + gap / (v * cos_max) / sw)
+        s = ab + w_tdb + twrp
+        return min(1.0, max(0.0, s)) if clamp else s
+
+    return bound
+
+
+def plane_dist_lb(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> float:
+    """Lower bound on the kernel plane distance between two xyz() points (all tiers)."""
+    return _PLANE_TO_ARC_MIN * math.sqrt(
+        (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2)
+
+
+def upper_score(params: Any, *, speed_mps: float, horizon_s: float, min_dist_m: float) -> float:
+    """Highest score a track at ≥ min_dist_m and speed_mps can get with twrp ≥ horizon_s."""
+    p = _weights(params)
+    twrp = p["w_twrp"] / (1.0 + horizon_s / max(p["twrp_scale_s"], 1e-9))
+    return _clamp(p, _cpa_tcpa_bound(p, min_dist_m, speed_mps, _PHI_STEPS) + p["w_tdb"] + twrp)
+
+
+@dataclass
+class PrunePlan:
+    """Pairs to score (keep[track_key] = DA indices) and the prune report."""
+
+    horizon_s: float
+    floor: float
+    keep: Dict[Any, Set[int]] = field(default_factory=dict)
+    pairs: int = 0
+    pruned: int = 0
+    upper: Optional[float] = None
+
+    def kept(self, track_key: Any, da_index: int) -> bool:
+        return da_index in self.keep.get(track_key, ())
+
+    def report(self) -> Dict[str, Any]:
+        bound = 0.0 if self.upper is None else max(0.0, self.upper - self.floor)
+        return {
+            "horizon_s": self.horizon_s,
+            "pairs": self.pairs,
+            "scored": self.pairs - self.pruned,
+            "pruned": self.pruned,
+            "pruning_ratio": round(self.pruned / self.pairs, 6) if self.pairs else 0.0,
+            "floor_score": round(self.floor, 6),
+            "upper_bound": None if self.upper is None else round(self.upper, 6),
+            "error_bound": round(bound, 6),
+            "note": _REPORT_NOTE,
+        }
+
+
+def plan_pairs(
+    tracks: Iterable[Tuple[Any, float, float, float]],
+    frames: Sequence[LocalFrame],
+    params: Any,
+    *,
+    horizon_s: float,
+    weapon_range_km: Optional[float] = None,
+) -> PrunePlan:
+    """
+    Prefilter (key, lat, lon, speed_mps) tracks against DA frames: the pairs
+    that can get within weapon range / DA radius within `horizon_s` are kept.
+    `weapon_range_km` overrides each frame's own range, as in the kernels.
+    """
+    if horizon_s < 0:
+        raise ValueError("horizon_s must be >= 0")
+    tracks = list(tracks)
+    if not frames:
+        return PrunePlan(horizon_s=horizon_s, floor=0.0)
+
+    ranges = [max(f.radius_m, f.weapon_range_m if weapon_range_km is None
+                  else weapon_range_km * 1000.0) for f in frames]
+    reach0 = max(ranges)
+    plan = PrunePlan(horizon_s=horizon_s,
+                     floor=floor_score(params, max(f.radius_m for f in frames) / 1000.0))
+    reach = {key: max(0.0, spd or 0.0) * horizon_s + reach0 for key, _, _, spd in tracks}
+    index = DAIndex(frames, cell_m=max(reach.values(), default=reach0) / _PLANE_TO_ARC_MIN)
+
+    for key, lat, lon, spd in tracks:
+        keep = set(index.query(lat, lon, reach[key] / _PLANE_TO_ARC_MIN))
+        plan.keep[key] = keep
+        plan.pairs += len(frames)
+        if len(keep) < len(frames):
+            plan.pruned += len(frames) - len(keep)
+            u = upper_score(params, speed_mps=max(0.0, spd or 0.0), horizon_s=horizon_s,
+                            min_dist_m=reach[key])
+            plan.upper = u if plan.upper is None else max(plan.upper, u)
+    return plan
@@ -3,9 +3,20 @@
 from tewa.models import ThreatScore
 from typing import Dict, List, Optional
 
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
 from tewa.models import DefendedAsset
 
 
+def _threat_row(ts: ThreatScore) -> Dict:
+    return {
+        'track_id': ts.track.track_id,
+        'score': ts.score,
+        'computed_at': ts.computed_at.isoformat()
+    }
+
+
 def rank_threats(
     scenario_id: int,
     da_id: Optional[int] = None,
@@ -15,51 +26,46 @@ def rank_threats(
     Returns threat rankings for a given scenario.
     - da_id: if provided, rank threats for this DA only; otherwise global ranking.
     - top_n: limit the number of threats returned
+    Query count is fixed (two queries) whatever the number of DAs or scores.
     """
     threat_rankings = []
 
     # If da_id is provided, rank threats for the specific DA
     if da_id:
         # Fetch the ThreatScores specific to the DA and scenario
-        qs = ThreatScore.objects.filter(scenario_id=scenario_id, da_id=da_id)
+        qs = (ThreatScore.objects
+              .filter(scenario_id=scenario_id, da_id=da_id)
+              .select_related('track'))
         # Sort by threat score in descending order and by computed_at to ensure proper ranking
         sorted_threats = qs.order_by('-score', 'computed_at')[:top_n]
         threat_rankings.append({
             # Get the DA name
             'da_name': DefendedAsset.objects.get(id=da_id).name,
-            'threats': [
-                {
-                    'track_id': ts.track.track_id,
-                    'score': ts.score,
-                    'computed_at': ts.computed_at.isoformat()
-                }
-                for ts in sorted_threats
-            ]
+            'threats': [_threat_row(ts) for ts in sorted_threats]
         })
     else:
         # If no da_id is provided, rank threats globally (across all DAs)
-        # Get all DAs associated with the scenario
-        dAs = DefendedAsset.objects.all()
+        dAs = list(DefendedAsset.objects.all())
 
-        # Loop through each DA and compute rankings
-        for da in dAs:
-            threat_scores = ThreatScore.objects.filter(
-                scenario_id=scenario_id, da=da)
-            # Sort threats based on score (highest to lowest)
-            sorted_threats = threat_scores.order_by(
-                '-score', 'computed_at')[:top_n]
+        # Top-N per DA in one query: number the rows within each DA by rank
+        qs = (ThreatScore.objects
+              .filter(scenario_id=scenario_id)
+              .select_related('track')
+              .annotate(rank=Window(
+                  RowNumber(),
+                  partition_by=[F('da_id')],
+                  order_by=[F('score').desc(), F('computed_at').asc()],
+              )))
+        if top_n is not None:
+            qs = qs.filter(rank__lte=top_n)
+        by_da: Dict[int, List[ThreatScore]] = {}
+        for ts in qs.order_by('da_id', 'rank'):
+            by_da.setdefault(ts.da_id, []).append(ts)
 
-            # Add to rankings
+        for da in dAs:
             threat_rankings.append({
                 'da_name': da.name,
-                'threats': [
-                    {
-                        'track_id': ts.track.track_id,
-                        'score': ts.score,
-                        'computed_at': ts.computed_at.isoformat()
-                    }
-                    for ts in sorted_threats
-                ]
+                'threats': [_threat_row(ts) for ts in by_da.get(da.pk, [])]
             })
 
     return threat_rankings
@@ -2,8 +2,10 @@
 from __future__ import annotations
 
 from datetime import timezone as dt_timezone
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone as djtz
 
 from core.dtos import TrackState
@@ -52,6 +54,7 @@ def sample_track_state_at(
     Return the track state at timestamp 'when'.
     - latest : last sample at/before 'when'; fallback to Track snapshot if none
     - linear : linear interpolation between bracketing samples in local ENU
+    state["sample_t"] is the newest sample timestamp used (None for the snapshot).
     Returns None if no usable data exists at all.
     """
     # Fetch bracketing samples
@@ -67,7 +70,16 @@ def sample_track_state_at(
         .order_by("t")
         .first()
     )
+    return _state_from_samples(track, when, method, s1, s2)
 
+
+def _state_from_samples(
+    track: Track,
+    when,
+    method: str,
+    s1: Optional[TrackSample],
+    s2: Optional[TrackSample],
+) -> Optional[TrackState]:
     if method == "linear" and s1 and s2 and s1.t != s2.t:
         # Interpolate in ENU around s1 as origin
         origin = LatLon(s1.lat, s1.lon)
@@ -83,19 +95,77 @@ def sample_track_state_at(
         alt = _lerp(s1.alt_m, s2.alt_m, frac)
         spd = _lerp(s1.speed_mps, s2.speed_mps, frac)
         hdg = _lerp_heading(s1.heading_deg, s2.heading_deg, frac)
-        return _mk_state(p.lat, p.lon, alt, spd, hdg, when)
+        state = _mk_state(p.lat, p.lon, alt, spd, hdg, when)
+        state["sample_t"] = max(s1.t, s2.t)
+        return state
 
     # latest: prefer s1 (<= when)
     if s1:
-        return _mk_state(s1.lat, s1.lon, s1.alt_m, s1.speed_mps, s1.heading_deg, s1.t)
+        state = _mk_state(s1.lat, s1.lon, s1.alt_m, s1.speed_mps, s1.heading_deg, s1.t)
+        state["sample_t"] = s1.t
+        return state
 
     # fallback to live snapshot on Track model
     if getattr(track, "lat", None) is not None:
-        return _mk_state(track.lat, track.lon, track.alt_m, track.speed_mps, track.heading_deg, when)
+        state = _mk_state(track.lat, track.lon, track.alt_m, track.speed_mps, track.heading_deg, when)
+        state["sample_t"] = None
+        return state
 
     return None
 
 
+# ------------------------
+# batched variants (fixed query count per call)
+# ------------------------
+_IN_CHUNK = 500  # track ids per IN (...) list; keeps SQLite under its variable limit
+
+
+def _bracketing_samples(
+    track_ids: List[int],
+    when,
+    *,
+    before: bool,
+) -> Dict[int, TrackSample]:
+    """
+    Nearest sample per track at/before `when` (before=True) or at/after it,
+    one windowed query per _IN_CHUNK tracks instead of one query per track.
+    """
+    if before:
+        flt, order = {"t__lte": when}, [F("t").desc(), F("id").desc()]
+    else:
+        flt, order = {"t__gte": when}, [F("t").asc(), F("id").asc()]
+    out: Dict[int, TrackSample] = {}
+    for i in range(0, len(track_ids), _IN_CHUNK):
+        qs = (
+            TrackSample.objects
+            .filter(track_id__in=track_ids[i:i + _IN_CHUNK], **flt)
+            .annotate(rn=Window(RowNumber(), partition_by=[F("track_id")], order_by=order))
+            .filter(rn=1)
+        )
+        for s in qs:
+            out[s.track_id] = s
+    return out
+
+
+def sample_track_states_at(
+    tracks: Iterable[Track],
+    when,
+    method: str = "latest",
+) -> Dict[int, Optional[TrackState]]:
+    """
+    sample_track_state_at for many tracks at once, keyed by track pk.
+    Same semantics; two queries per _IN_CHUNK tracks.
+    """
+    tracks = list(tracks)
+    ids = [t.pk for t in tracks]
+    before = _bracketing_samples(ids, when, before=True)
+    after = _bracketing_samples(ids, when, before=False) if method == "linear" else {}
+    return {
+        t.pk: _state_from_samples(t, when, method, before.get(t.pk), after.get(t.pk))
+        for t in tracks
+    }
+
+
 def get_state(track, when, method: str = "latest"):
     """
     Lightweight state fetcher (dict) for templates/diagnostics.
@@ -107,6 +177,10 @@ def get_state(track, when, method: str = "latest"):
         .order_by("-t")
         .first()
     )
+    return _get_state_from_sample(track, latest)
+
+
+def _get_state_from_sample(track, latest: Optional[TrackSample]):
     if latest:
         return {
             "lat": latest.lat,
@@ -128,3 +202,10 @@ def get_state(track, when, method: str = "latest"):
             "sampled_at": djtz.now(),
         }
     return None
+
+
+def get_states(tracks: Iterable[Track], when) -> Dict[int, Optional[dict]]:
+    """get_state for many tracks at once, keyed by track pk."""
+    tracks = list(tracks)
+    latest = _bracketing_samples([t.pk for t in tracks], when, before=True)
+    return {t.pk: _get_state_from_sample(t, latest.get(t.pk)) for t in tracks}
@@ -2,12 +2,15 @@
 from __future__ import annotations
 
 import math
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from django.utils.timezone import now
 
 from tewa.models import DefendedAsset, ModelParams, Scenario, ThreatScore, Track
-from tewa.services.kinematics import compute_cpa_tcpa_tdb_twrp
+from tewa.services import frames
+from tewa.services.kinematics import DEFAULT_PRECISION, frame_kinematics
+from tewa.services.normalize import clamp01, inv1
+from tewa.services.score_rollups import update_rollups
 from tewa.services.scoring import _coerce_params, score_components_to_threat
 
 
@@ -31,7 +34,8 @@ def _norm_positive(x: Optional[float], sigma: Optional[float]) -> Optional[float
     return math.exp(-float(x) / float(sigma))
 
 
-def _load_params_or_defaults(scenario: Scenario) -> Dict[str, float | bool]:
+def _load_params_or_defaults(scenario: Scenario) -> Tuple[Dict[str, float | bool], str]:
+    """Scoring params and the scenario's geodesy tier (defaults when unset)."""
     defaults: Dict[str, float | bool] = dict(
         w_cpa=0.25, w_tcpa=0.25, w_tdb=0.25, w_twrp=0.25,
         sigma_cpa=1.0, sigma_tcpa=1.0, sigma_tdb=1.0, sigma_twrp=1.0,
@@ -39,34 +43,82 @@ def _load_params_or_defaults(scenario: Scenario) -> Dict[str, float | bool]:
     try:
         mp = ModelParams.objects.filter(scenario=scenario).order_by(
             "-updated_at", "-id").first()
-        return _coerce_params(mp) if mp else defaults  # type: ignore
     except Exception:
-        return defaults
+        return defaults, DEFAULT_PRECISION
+    if mp is None:
+        return defaults, DEFAULT_PRECISION
+    return _coerce_params(mp), mp.geodesy_precision  # type: ignore
+
+
+_KEYS = ("cpa", "tcpa", "tdb", "twrp")
+
+
+def explain_components(
+    cpa_km: Optional[float],
+    tcpa_s: Optional[float],
+    tdb_km: Optional[float],
+    twrp_s: Optional[float],
+    params: Any,
+) -> Dict[str, Any]:
+    """
+    Per-metric normalized values, weights and weighted contributions for stored
+    (or freshly computed) components, using the same inv1 scales and weight
+    handling as score_components_to_threat(). `score` is their clamped sum.
+    """
+    p = dict(_coerce_params(params))
+    if sum(p[f"w_{k}"] for k in _KEYS) == 0.0:
+        for k in _KEYS:
+            p[f"w_{k}"] = 0.25
+
+    def _timed(v: Optional[float], scale: float) -> float:
+        # Negative TCPA/TWRP = already past → no urgency (as in the scorer)
+        return 0.0 if (v is not None and v < 0) else inv1(v, scale)
+
+    normalized = {
+        "cpa": inv1(cpa_km, p["cpa_scale_km"]),
+        "tcpa": _timed(tcpa_s, p["tcpa_scale_s"]),
+        "tdb": inv1(tdb_km, p["tdb_scale_km"]),
+        "twrp": _timed(twrp_s, p["twrp_scale_s"]),
+    }
+    weights = {k: float(p[f"w_{k}"]) for k in _KEYS}
+    contributions = {k: weights[k] * normalized[k] for k in _KEYS}
+    total = sum(contributions.values())
+    return {
+        "normalized": normalized,
+        "weights": weights,
+        "contributions": contributions,
+        "score": clamp01(total) if p["clamp_0_1"] else float(total),
+    }
 
 
 def get_score_breakdown(
     scenario_id: int,
     track_id: str,
     da_id: int,
-    persist: bool = True,
+    persist: bool = False,
     weapon_range_km: float = 10.0,
 ) -> Dict[str, object]:
-
+    """
+    Recompute kinematics + score for one (track, DA) pair from the track's
+    current state. Read-only unless persist=True, which appends a new
+    ThreatScore row (history is never overwritten).
+    """
     scenario = Scenario.objects.get(pk=scenario_id)
     track = Track.objects.get(scenario=scenario, track_id=track_id)
     da = DefendedAsset.objects.get(pk=da_id)
 
-    params = _load_params_or_defaults(scenario)
+    params, precision = _load_params_or_defaults(scenario)
 
-    bundle = compute_cpa_tcpa_tdb_twrp(
-        da_lat=da.lat,
-        da_lon=da.lon,
-        da_radius_km=da.radius_km,
+    # Same frame and tier as the other write paths, so a persisted row matches
+    # what the read path would recompute for this scenario
+    bundle = frame_kinematics(
+        frames.frame_for(da),
         trk_lat=track.lat,
         trk_lon=track.lon,
         speed_mps=track.speed_mps,
         heading_deg=track.heading_deg,
         weapon_range_km=weapon_range_km,
+        precision=precision,
     )
 
     # --- robust attribute access (some builds use tdb_s) ---
@@ -98,19 +150,18 @@ def get_score_breakdown(
 
     computed_at = now()
     if persist:
-        ThreatScore.objects.update_or_create(
+        row = ThreatScore.objects.create(
             scenario=scenario,
             track=track,
             da=da,
-            defaults={
-                "cpa_km": cpa_km,
-                "tcpa_s": tcpa_s,
-                "tdb_km": tdb_km,
-                "twrp_s": twrp_s,
-                "score": final_score,
-                "computed_at": computed_at,
-            },
+            cpa_km=cpa_km,
+            tcpa_s=tcpa_s,
+            tdb_km=tdb_km,
+            twrp_s=twrp_s,
+            score=final_score,
+            computed_at=computed_at,
         )
+        update_rollups([row])
 
     return {
         "scenario_id": scenario.id,
@@ -2,18 +2,39 @@
 
 from __future__ import annotations
 
+import copy
+import threading
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, cast
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
 
-from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone as dj_timezone
 from django.utils.dateparse import parse_datetime
 
-# Existing domain compute (unchanged)
+from core.utils import metrics
+from tewa.services import frames
+from tewa.services.kinematics import DEFAULT_PRECISION, frame_kinematics
 from tewa.services.score_breakdown import (
+    explain_components,
     get_score_breakdown as compute_breakdown_raw,
 )
+from tewa.services.score_history import tracks_filter
+from tewa.services.scoring_np import explain_components_many
 
-from ..models import DefendedAsset, Scenario, ThreatScore, Track
+from ..models import DefendedAsset, ModelParams, Scenario, ThreatScore, Track
+
+_DEFAULT_MEMO_SIZE = 1024
+_NOMINAL_CLOSURE_MPS = 250.0  # ≈ 900 km/h; tdb seconds proxy when only km is stored
+_WEAPON_RANGE_KM = 10.0  # what breakdown writes have always scored TWRP against
+_EXPLAIN = [
+    "Lower CPA → higher normalized threat (inverted scale).",
+    "Shorter TCPA → higher immediacy risk.",
+    "TDB gauges time to DA boundary penetration (proxy used if seconds not available).",
+    "TWRP indicates time to weapon release window.",
+]
 
 # ---------------------------
 # Utilities
@@ -48,57 +69,187 @@ def _latest_threatscore(
     return qs.order_by("-computed_at", "-id").first()
 
 
-def _resolve_track_pk(track_identifier: str) -> Optional[int]:
+# ---------------------------
+# Per-pair memo (read path)
+# ---------------------------
+
+class _BreakdownMemo:
     """
-    Accept DB pk or public track_id string (latest row wins if duplicates).
+    Bounded LRU of shaped breakdown payloads per (scenario, DA, track, at).
+    Each entry carries a version stamp (latest row id, params.updated_at,
+    track.updated_at); a changed stamp is a miss, so no explicit invalidation.
     """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Tuple[Hashable, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is None or hit[0] != version:
+                return None
+            self._data.move_to_end(key)
+            return hit[1]
+
+    def put(self, key: Hashable, version: Hashable, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = (version, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_memo = _BreakdownMemo(
+    int(getattr(settings, "TEWA_BREAKDOWN_MEMO_SIZE", _DEFAULT_MEMO_SIZE)))
+
+
+def clear_breakdown_memo() -> None:
+    _memo.clear()
+
+
+def _parse_at(at_iso: Optional[str]) -> Optional[datetime]:
+    if not at_iso:
+        return None
+    at = parse_datetime(at_iso)
+    if at is None:
+        raise ValueError(f"Invalid 'at' timestamp: {at_iso}")
+    if dj_timezone.is_naive(at):
+        at = dj_timezone.make_aware(at, timezone.utc)
+    return at
+
+
+def _resolve_track(scenario_id: int, track_identifier: str) -> Track:
+    """Track by DB pk or public track_id, scoped to the scenario."""
+    qs = Track.objects.filter(scenario_id=scenario_id).only(
+        "id", "track_id", "lat", "lon", "speed_mps", "heading_deg", "updated_at")
     try:
-        return int(str(track_identifier))
-    except Exception:
+        return qs.get(pk=int(str(track_identifier)))
+    except (TypeError, ValueError, Track.DoesNotExist):
         pass
+    tr = qs.filter(track_id=str(track_identifier)).first()
+    if tr is None:
+        raise ObjectDoesNotExist(f"Track '{track_identifier}' not found")
+    return tr
 
-    tr = (
-        Track.objects.filter(track_id=str(track_identifier))
-        .order_by("-id")
-        .first()
-    )
-    if not tr:
-        return None
-    return cast(Optional[int], getattr(tr, "pk", None))
 
+def _shape(
+    *,
+    scenario_id: int,
+    da_id: int,
+    track_id: str,
+    computed_at: datetime,
+    components: Tuple[Optional[float], ...],
+    params: Any,
+    stored_score: Optional[float],
+    source: str,
+) -> Dict[str, Any]:
+    cpa_km, tcpa_s, tdb_km, twrp_s = (_f(c) if c is not None else None for c in components)
+    ex = explain_components(cpa_km, tcpa_s, tdb_km, twrp_s, params)
+    score = ex["score"] if stored_score is None else float(stored_score)
+
+    resp: Dict[str, Any] = {
+        "scenario_id": scenario_id,
+        "track_id": track_id,
+        "da_id": da_id,
+        "computed_at": _to_utc_iso(computed_at),
+        "metrics": {
+            "cpa_m": _f(cpa_km) * 1000.0,
+            "tcpa_s": _f(tcpa_s),
+            "tdb_s": _f(tdb_km) * 1000.0 / _NOMINAL_CLOSURE_MPS,
+            "twrp_s": _f(twrp_s),
+        },
+        "normalized": ex["normalized"],
+        "weights": ex["weights"],
+        "contributions": ex["contributions"],
+        "score": score,
+        "total_score": score,
+        "params": {},
+        "explain": list(_EXPLAIN),
+        "source": source,
+        # legacy flat fields
+        "cpa_km": cpa_km,
+        "tcpa_s": tcpa_s,
+        "tdb_km": tdb_km,
+        "twrp_s": twrp_s,
+    }
+    return resp
 
-def _ensure_legacy_flat_fields(payload: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Add legacy top-level fields expected by older tests/UI:
-      cpa_km, tcpa_s, tdb_km, twrp_s
 
-    Source preference:
-      1) payload["components"] (compute path)
-      2) payload["metrics"] (new shape) — derive cpa_km from cpa_m, pass through times
+def _read_breakdown(
+    *, scenario_id: int, da: DefendedAsset, track_id: str, at_iso: Optional[str]
+) -> Dict[str, Any]:
     """
-    # From components
-    comps = payload.get("components") or {}
-    if isinstance(comps, dict):
-        if "cpa_km" in comps and payload.get("cpa_km") is None:
-            payload["cpa_km"] = float(comps.get("cpa_km", 0.0))
-        if "tdb_km" in comps and payload.get("tdb_km") is None:
-            payload["tdb_km"] = float(comps.get("tdb_km", 0.0))
-        if "tcpa_s" in comps and payload.get("tcpa_s") is None:
-            payload["tcpa_s"] = float(comps.get("tcpa_s", 0.0))
-        if "twrp_s" in comps and payload.get("twrp_s") is None:
-            payload["twrp_s"] = float(comps.get("twrp_s", 0.0))
-
-    # From metrics
-    mets = payload.get("metrics") or {}
-    if isinstance(mets, dict):
-        if payload.get("cpa_km") is None and "cpa_m" in mets:
-            payload["cpa_km"] = float(mets["cpa_m"]) / 1000.0
-        if payload.get("tcpa_s") is None and "tcpa_s" in mets:
-            payload["tcpa_s"] = float(mets["tcpa_s"])
-        if payload.get("twrp_s") is None and "twrp_s" in mets:
-            payload["twrp_s"] = float(mets["twrp_s"])
-        # We intentionally do NOT synthesize tdb_km from tdb_s (unknown closure)
-    return payload
+    Breakdown from the latest stored components + current params, no writes.
+      - stored:     row is current → its components and score as persisted
+      - rescored:   params changed after the row → same components, current weights/scales
+      - recomputed: no row yet, or the track moved after it → kinematics from the
+                    track's current state (live requests only; `at` never recomputes)
+    """
+    at = _parse_at(at_iso)
+    track = _resolve_track(scenario_id, track_id)
+    row = _latest_threatscore(scenario_id, da.pk, track.pk, at_iso)
+    mp = (
+        ModelParams.objects.filter(scenario_id=scenario_id)
+        .order_by("-updated_at", "-id").first()
+    )
+    params: Any = mp if mp is not None else {}
+    params_at = mp.updated_at if mp is not None else None
+
+    stale = row is None or (at is None and track.updated_at > row.computed_at)
+    if stale and at is not None:
+        raise ObjectDoesNotExist(
+            f"No ThreatScore found for scenario={scenario_id}, da={da.pk}, track={track_id} at {at_iso}"
+        )
+
+    key = (scenario_id, da.pk, track.pk, at_iso or "")
+    version = (
+        row.pk if row else None,
+        params_at,
+        track.updated_at if stale else None,
+        da.updated_at if stale else None,
+    )
+    cached = _memo.get(key, version)
+    metrics.record_cache("breakdown", cached is not None)
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    if stale:
+        bundle = frame_kinematics(
+            frames.frame_for(da),
+            trk_lat=track.lat,
+            trk_lon=track.lon,
+            speed_mps=track.speed_mps,
+            heading_deg=track.heading_deg,
+            weapon_range_km=_WEAPON_RANGE_KM,
+            precision=getattr(mp, "geodesy_precision", DEFAULT_PRECISION),
+        )
+        # Same column mapping as threat_compute.compute_score_for_track
+        payload = _shape(
+            scenario_id=scenario_id, da_id=da.pk, track_id=track.track_id,
+            computed_at=dj_timezone.now(),
+            components=(bundle.cpa_km, bundle.tcpa_s, bundle.tdb_s, bundle.twrp_s),
+            params=params, stored_score=None, source="recomputed",
+        )
+    else:
+        assert row is not None
+        rescore = params_at is not None and params_at > row.computed_at
+        payload = _shape(
+            scenario_id=scenario_id, da_id=da.pk, track_id=track.track_id,
+            computed_at=row.computed_at,
+            components=(row.cpa_km, row.tcpa_s, row.tdb_km, row.twrp_s),
+            params=params,
+            stored_score=None if rescore else row.score,
+            source="rescored" if rescore else "stored",
+        )
+
+    _memo.put(key, version, payload)
+    return copy.deepcopy(payload)
 
 
 # ---------------------------
@@ -111,13 +262,15 @@ def get_score_breakdown(
     track_id: str,
     da_id: int,
     at_iso: Optional[str] = None,
+    persist: bool = False,
 ) -> Dict[str, Any]:
     """
-    Non-breaking wrapper:
+    Score breakdown for one (scenario, DA, track):
       1) Validate Scenario/DA exist (404 semantics).
-      2) Try existing compute (compute_breakdown_raw).
-      3) On MultipleObjectsReturned or any compute hiccup, fall back to the latest ThreatScore row
-         and shape the API (always including legacy flat fields).
+      2) Default (persist=False): pure read — latest stored components + current
+         params, recomputed only when stale, memoized per pair (_read_breakdown).
+      3) persist=True: recompute from the track's state, append a ThreatScore
+         row (compute_breakdown_raw), then serve that row through the read path.
     """
     # Validate existence
     try:
@@ -126,123 +279,158 @@ def get_score_breakdown(
         raise ObjectDoesNotExist(f"Scenario {scenario_id} not found") from e
 
     try:
-        DefendedAsset.objects.only("id").get(pk=da_id)
+        da = DefendedAsset.objects.only(
+            "id", "lat", "lon", "radius_km", "updated_at").get(pk=da_id)
     except DefendedAsset.DoesNotExist as e:
         raise ObjectDoesNotExist(f"Defended Asset {da_id} not found") from e
 
-    # --- Compute path (preferred; leaves old code untouched) ---
-    try:
-        raw = compute_breakdown_raw(
-            scenario_id=scenario_id,
-            track_id=track_id,
-            da_id=da_id,
-            persist=True,
-            weapon_range_km=10.0,
-        )
-        raw = cast(Dict[str, Any], raw)
-
-        # Normalize timestamp to ISO UTC if a datetime leaked through
-        # Normalize timestamp to ISO UTC if a datetime leaked through
-        comp_at = raw.get("computed_at")
-        if isinstance(comp_at, datetime):
-            raw["computed_at"] = _to_utc_iso(comp_at)
-
-        # Ensure legacy fields are present for backward-compat tests/UI
-        raw.setdefault("cpa_km", None)
-        raw.setdefault("tcpa_s", None)
-        raw.setdefault("tdb_km", None)
-        raw.setdefault("twrp_s", None)
-        raw = _ensure_legacy_flat_fields(raw)
-
-        # >>> NEW: set total_score (and score if missing) from best available source <<<
-        score_val = raw.get("score")
-        if score_val is None:
-            score_val = raw.get("final_score")
-
-        if score_val is None:
-            # Last resort: read latest ThreatScore row for this key and use its .score
-            track_pk = _resolve_track_pk(track_id)
-            if track_pk is not None:
-                ts_latest = _latest_threatscore(
-                    scenario_id, da_id, track_pk, at_iso)
-                if ts_latest and ts_latest.score is not None:
-                    score_val = float(ts_latest.score)
-
-        if score_val is not None:
-            # ensure both fields are present for compatibility
-            raw["score"] = float(score_val)
-            raw["total_score"] = float(score_val)
-        else:
-            # keep a None value explicitly to satisfy serializer shape
-            raw.setdefault("total_score", None)
-
-        return raw
-
-    except MultipleObjectsReturned:
-        # duplicate TS rows in old compute; fall back to deterministic latest TS row
-        pass
-    except Exception:
-        # any compute hiccup: still try to produce a valid response from stored rows
-        pass
+    if not persist:
+        return _read_breakdown(
+            scenario_id=scenario_id, da=da, track_id=track_id, at_iso=at_iso)
+
+    # --- Explicit write path: recompute, append a history row, serve it ---
+    track = _resolve_track(scenario_id, track_id)
+    compute_breakdown_raw(
+        scenario_id=scenario_id,
+        track_id=track.track_id,
+        da_id=da_id,
+        persist=True,
+        weapon_range_km=_WEAPON_RANGE_KM,
+    )
+    return _read_breakdown(
+        scenario_id=scenario_id, da=da, track_id=str(track.pk), at_iso=None)
 
-    # --- Fallback: latest ThreatScore timeseries row ---
-    track_pk = _resolve_track_pk(track_id)
-    if track_pk is None:
-        raise ObjectDoesNotExist(f"Track '{track_id}' not found")
 
-    ts = _latest_threatscore(scenario_id, da_id, track_pk, at_iso)
-    if not ts:
-        raise ObjectDoesNotExist(
-            f"No ThreatScore found for scenario={scenario_id}, da={da_id}, track={track_id}"
+# ---------------------------
+# Batch (many tracks, fixed query count)
+# ---------------------------
+
+def _latest_rows(
+    scenario_id: int,
+    da_id: Optional[int],
+    track_ids: Optional[Sequence[str]],
+    at: Optional[datetime],
+    top_n: Optional[int],
+) -> List[Dict[str, Any]]:
+    """
+    Latest ThreatScore (<= at) per (DA, track) in ONE query, best score first.
+    With a DA the correlated subquery runs once per track (served by
+    idx_ts_scn_trk_cmp); without one it runs per distinct (DA, track) pair.
+    """
+    hist = ThreatScore.objects.filter(scenario_id=scenario_id)
+    if at is not None:
+        hist = hist.filter(computed_at__lte=at)
+
+    if da_id is not None:
+        tracks = Track.objects.filter(scenario_id=scenario_id)
+        if track_ids:
+            pks = [int(t) for t in track_ids if str(t).isdigit()]
+            public = [str(t) for t in track_ids if not str(t).isdigit()]
+            tracks = tracks.filter(Q(pk__in=pks) | Q(track_id__in=public))
+        latest = (
+            hist.filter(da_id=da_id, track_id=OuterRef("pk"))
+            .order_by("-computed_at", "-id").values("id")[:1]
+        )
+        ids = tracks.annotate(latest_id=Subquery(latest)).values("latest_id")
+    else:
+        base = hist
+        if track_ids:
+            base = base.filter(tracks_filter(scenario_id, track_ids))
+        latest = (
+            hist.filter(da_id=OuterRef("da_id"), track_id=OuterRef("track_id"))
+            .order_by("-computed_at", "-id").values("id")[:1]
         )
+        ids = base.values("da_id", "track_id").distinct().annotate(
+            latest_id=Subquery(latest)).values("latest_id")
 
-    # Build response (units from your model: cpa_km, tdb_km, tcpa_s, twrp_s)
-    cpa_km = _f(ts.cpa_km)
-    tcpa_s = _f(ts.tcpa_s)
-    tdb_km = _f(ts.tdb_km)
-    twrp_s = _f(ts.twrp_s)
-    score = _f(ts.score)
+    qs = ThreatScore.objects.filter(id__in=ids).order_by(
+        F("score").desc(nulls_last=True), "-computed_at", "-id")
+    if top_n:
+        qs = qs[:top_n]
+    return list(qs.values(
+        "scenario_id", "da_id", "track_id", "track__track_id", "computed_at",
+        "score", "cpa_km", "tcpa_s", "tdb_km", "twrp_s",
+    ))
 
-    # Also provide new metrics block (meters/seconds), keeping UI contract
-    cpa_m = cpa_km * 1000.0
-    # Provide a conservative proxy for tdb_s if seconds are not stored
-    nominal_closure_mps = 250.0  # ≈ 900 km/h
-    tdb_s = (tdb_km * 1000.0) / \
-        nominal_closure_mps if nominal_closure_mps > 0 else 0.0
 
-    computed_at_iso = _to_utc_iso(ts.computed_at or datetime.now(timezone.utc))
+def breakdown_rows(
+    scenario_id: int,
+    da_id: Optional[int] = None,
+    track_ids: Optional[Sequence[str]] = None,
+    at_iso: Optional[str] = None,
+    top_n: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Breakdown payloads (same shape as get_score_breakdown, computed_at left as a
+    datetime) for the latest stored row of every matching (DA, track): two queries
+    (params + rows) whatever the number of tracks, with array-based scoring.
+    Read-only; stored scores are kept unless params changed after the row.
+    """
+    at = _parse_at(at_iso)
+    mp = (
+        ModelParams.objects.filter(scenario_id=scenario_id)
+        .order_by("-updated_at", "-id").first()
+    )
+    params: Any = mp if mp is not None else {}
+    params_at = mp.updated_at if mp is not None else None
+
+    rows = _latest_rows(scenario_id, da_id, track_ids, at, top_n)
+    explained = explain_components_many(
+        [r["cpa_km"] for r in rows],
+        [r["tcpa_s"] for r in rows],
+        [r["tdb_km"] for r in rows],
+        [r["twrp_s"] for r in rows],
+        params,
+    )
 
-    resp: Dict[str, Any] = {
-        "scenario_id": scenario_id,
-        "track_id": track_id,
-        "da_id": da_id,
-        "computed_at": computed_at_iso,
-        "metrics": {
-            "cpa_m": cpa_m,
+    out: List[Dict[str, Any]] = []
+    for r, ex in zip(rows, explained):
+        rescore = r["score"] is None or (
+            params_at is not None and params_at > r["computed_at"])
+        score = ex["score"] if rescore else float(r["score"])
+        cpa_km, tcpa_s, tdb_km, twrp_s = (
+            r["cpa_km"], r["tcpa_s"], r["tdb_km"], r["twrp_s"])
+        out.append({
+            "scenario_id": r["scenario_id"],
+            "da_id": r["da_id"],
+            "track_id": r["track__track_id"],
+            "track_pk": r["track_id"],
+            "computed_at": r["computed_at"],
+            "metrics": {
+                "cpa_m": _f(cpa_km) * 1000.0,
+                "tcpa_s": _f(tcpa_s),
+                "tdb_s": _f(tdb_km) * 1000.0 / _NOMINAL_CLOSURE_MPS,
+                "twrp_s": _f(twrp_s),
+            },
+            "normalized": ex["normalized"],
+            "weights": ex["weights"],
+            "contributions": ex["contributions"],
+            "score": score,
+            "total_score": score,
+            "params": {},
+            "explain": list(_EXPLAIN),
+            "source": "rescored" if rescore else "stored",
+            "cpa_km": cpa_km,
             "tcpa_s": tcpa_s,
-            "tdb_s": tdb_s,
+            "tdb_km": tdb_km,
             "twrp_s": twrp_s,
-        },
-        "normalized": {"cpa": 0.0, "tcpa": 0.0, "tdb": 0.0, "twrp": 0.0},
-        "weights": {"cpa": 0.0, "tcpa": 0.0, "tdb": 0.0, "twrp": 0.0},
-        "contributions": {"cpa": 0.0, "tcpa": 0.0, "tdb": 0.0, "twrp": 0.0},
-        "score": score,
-        "params": {},
-        "explain": [
-            "Lower CPA → higher normalized threat (inverted scale).",
-            "Shorter TCPA → higher immediacy risk.",
-            "TDB gauges time to DA boundary penetration (proxy used if seconds not available).",
-            "TWRP indicates time to weapon release window.",
-        ],
-    }
-
-    # Explicitly provide legacy flat fields for backward compatibility
-    resp["cpa_km"] = cpa_km
-    resp["tcpa_s"] = tcpa_s
-    resp["tdb_km"] = tdb_km
-    resp["twrp_s"] = twrp_s
+        })
+    return out
 
-    # (Optional) run the helper too, in case future compute adds components/metrics variants
-    resp = _ensure_legacy_flat_fields(resp)
 
-    return resp
+def get_score_breakdowns(
+    *,
+    scenario_id: int,
+    da_id: int,
+    track_ids: Optional[Sequence[str]] = None,
+    at_iso: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Batch read path for a (scenario, DA): every track (track_ids None) or the
+    given PKs / public ids. Four queries total: Scenario, DA, params, rows.
+    """
+    if not Scenario.objects.filter(pk=scenario_id).exists():
+        raise ObjectDoesNotExist(f"Scenario {scenario_id} not found")
+    if not DefendedAsset.objects.filter(pk=da_id).exists():
+        raise ObjectDoesNotExist(f"Defended Asset {da_id} not found")
+    return breakdown_rows(scenario_id, da_id, track_ids, at_iso)
@@ -1,12 +1,33 @@
 # tewa/services/score_history.py
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
-from django.db.models import Q
+from django.db.models import Exists, Max, Min, OuterRef, Q
 from django.utils.dateparse import parse_datetime
 
-from tewa.models import ThreatScore
+from tewa.models import ThreatScore, ThreatScoreRollup, Track
+from tewa.services.score_rollups import (
+    ROLLUP_RESOLUTIONS_S,
+    bucket_start,
+    pick_resolution,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - pure-Python LTTB still works
+    np = None  # type: ignore[assignment]
+
+# Below this many points the pure-Python loop beats NumPy call overhead
+_LTTB_NUMPY_MIN_POINTS = 2000
+
+_ROLLUP_AGGS = {
+    "avg": None,  # derived from score_sum / count
+    "min": "score_min",
+    "max": "score_max",
+    "last": "score_last",
+}
 
 
 def _resolve_track_filter(scenario_id: int, track_id_param: str):
@@ -24,30 +45,273 @@ def _resolve_track_filter(scenario_id: int, track_id_param: str):
     return Q(track__scenario_id=scenario_id, track__track_id=str(track_id_param))
 
 
+def _rollup_span_s(base, f: Optional[datetime], t: Optional[datetime]) -> float:
+    """
+    Time span covered by the pair's history, read from the (tiny) 1 h rollups.
+    0.0 when no rollups exist yet → caller falls back to raw rows.
+    """
+    coarsest = max(ROLLUP_RESOLUTIONS_S)
+    qs = base.filter(resolution_s=coarsest)
+    if f:
+        qs = qs.filter(bucket_start__gte=bucket_start(f, coarsest))
+    if t:
+        qs = qs.filter(bucket_start__lte=t)
+    agg = qs.aggregate(lo=Min("bucket_start"), hi=Max("last_computed_at"))
+    if agg["lo"] is None or agg["hi"] is None:
+        return 0.0
+    lo = max(agg["lo"], f) if f else agg["lo"]
+    hi = min(agg["hi"], t) if t else agg["hi"]
+    return max(0.0, (hi - lo).total_seconds())
+
+
 def get_score_series(
     scenario_id: int,
     da_id: int,
     track_id: str,
     dt_from: Optional[str],
     dt_to: Optional[str],
+    width: Optional[int] = None,
+    agg: str = "avg",
 ) -> List[Tuple]:
     """
     Returns [(computed_at, score), ...] ordered by time.
+
+    When `width` (pixels) is given, the coarsest rollup resolution that still
+    provides >= 1 bucket per pixel is used instead of raw rows; points are then
+    (bucket_start, <agg>) with agg in {"avg", "min", "max", "last"}.
     """
+    if agg not in _ROLLUP_AGGS:
+        raise ValueError(
+            f"Unsupported agg '{agg}'. Allowed: {sorted(_ROLLUP_AGGS)}")
+
     q_track = _resolve_track_filter(scenario_id, track_id)
+    f = parse_datetime(dt_from) if dt_from else None
+    t = parse_datetime(dt_to) if dt_to else None
+
+    if width:
+        rollups = ThreatScoreRollup.objects.filter(
+            Q(scenario_id=scenario_id), Q(da_id=da_id), q_track)
+        res = pick_resolution(_rollup_span_s(rollups, f, t), width)
+        if res is not None:
+            rqs = rollups.filter(resolution_s=res).order_by("bucket_start")
+            if f:
+                rqs = rqs.filter(bucket_start__gte=bucket_start(f, res))
+            if t:
+                rqs = rqs.filter(bucket_start__lte=t)
+            col = _ROLLUP_AGGS[agg]
+            if col is None:
+                return [
+                    (b, s / n)
+                    for b, s, n in rqs.values_list("bucket_start", "score_sum", "count")
+                    if n
+                ]
+            return list(rqs.exclude(**{f"{col}__isnull": True})
+                        .values_list("bucket_start", col))
+
     qs = ThreatScore.objects.filter(
         Q(scenario_id=scenario_id),
         Q(da_id=da_id),
         q_track,
     ).order_by("computed_at").values_list("computed_at", "score")
 
-    if dt_from:
-        f = parse_datetime(dt_from)
+    if f:
+        qs = qs.filter(computed_at__gte=f)
+    if t:
+        qs = qs.filter(computed_at__lte=t)
+
+    return list(qs)
+
+
+# ---------------------------------------------------------------------
+# Largest-Triangle-Three-Buckets downsampling
+# ---------------------------------------------------------------------
+
+def _x_value(x: object) -> float:
+    if isinstance(x, datetime):
+        return x.timestamp()
+    return float(x)  # type: ignore[arg-type]
+
+
+def _lttb_indices_py(xs: Sequence[float], ys: Sequence[float], n_out: int) -> List[int]:
+    n = len(xs)
+    every = (n - 2) / (n_out - 2)
+    out = [0]
+    a = 0
+    for i in range(n_out - 2):
+        # Average point of the *next* bucket is the third triangle vertex
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        span = nxt_end - nxt_start
+        avg_x = sum(xs[nxt_start:nxt_end]) / span
+        avg_y = sum(ys[nxt_start:nxt_end]) / span
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        out.append(best)
+        a = best
+    out.append(n - 1)
+    return out
+
+
+def _lttb_indices_np(xs: Sequence[float], ys: Sequence[float], n_out: int) -> List[int]:
+    x = np.asarray(xs, dtype=float)
+    y = np.asarray(ys, dtype=float)
+    n = x.size
+
+    # Bucket edges and per-bucket means computed in one shot via cumulative sums
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(int) + 1
+    edges[-1] = n - 1
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    nxt_lo = edges[1:]
+    nxt_hi = np.append(edges[2:], n)
+    cnt = nxt_hi - nxt_lo
+    avg_x = (cx[nxt_hi] - cx[nxt_lo]) / cnt
+    avg_y = (cy[nxt_hi] - cy[nxt_lo]) / cnt
+
+    out = np.empty(n_out, dtype=int)
+    out[0] = 0
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i]) * (y[lo:hi] - ay)
+                      - (ax - x[lo:hi]) * (avg_y[i] - ay))
+        a = lo + int(area.argmax())
+        out[i + 1] = a
+    out[-1] = n - 1
+    return out.tolist()
+
+
+def downsample_lttb(series: Sequence[Tuple], max_points: Optional[int]) -> List[Tuple]:
+    """
+    Reduce [(t, score), ...] to at most `max_points` points with
+    Largest-Triangle-Three-Buckets, which keeps first/last points and the
+    visually dominant peaks/troughs. Returns the original tuples (no resampling).
+    None/0 or a short series → returned unchanged.
+    """
+    pts = [p for p in series if p[1] is not None]
+    if not max_points or len(pts) <= max_points:
+        return pts
+    if max_points < 3:
+        return [pts[0], pts[-1]][:max(max_points, 1)]
+
+    xs = [_x_value(t) for t, _ in pts]
+    ys = [float(s) for _, s in pts]
+    if np is not None and len(pts) >= _LTTB_NUMPY_MIN_POINTS:
+        idx = _lttb_indices_np(xs, ys, max_points)
+    else:
+        idx = _lttb_indices_py(xs, ys, max_points)
+    return [pts[i] for i in idx]
+
+
+# ---------------------------------------------------------------------
+# Many tracks of one DA in a single query (threat board / sprite charts)
+# ---------------------------------------------------------------------
+
+def tracks_filter(scenario_id: int, track_ids: Optional[Sequence[str]]) -> Q:
+    """Q over ThreatScore/ThreatScoreRollup for a list of Track PKs and/or public ids."""
+    if not track_ids:
+        return Q(track__scenario_id=scenario_id)
+    pks: List[int] = []
+    public: List[str] = []
+    for raw in track_ids:
+        try:
+            pks.append(int(str(raw)))
+        except (TypeError, ValueError):
+            public.append(str(raw))
+    q_pk = Q(track_id__in=pks)
+    q_public = Q(track__scenario_id=scenario_id, track__track_id__in=public)
+    if pks and public:
+        return q_pk | q_public
+    return q_pk if pks else q_public
+
+
+def _first_tracks_with_history(
+    scenario_id: int,
+    da_id: int,
+    f: Optional[datetime],
+    t: Optional[datetime],
+    limit: int,
+) -> List[int]:
+    """PKs of the first `limit` tracks (by public track_id) scored against the DA in [f, t]."""
+    scores = ThreatScore.objects.filter(
+        scenario_id=scenario_id, da_id=da_id, track_id=OuterRef("pk"))
+    if f:
+        scores = scores.filter(computed_at__gte=f)
+    if t:
+        scores = scores.filter(computed_at__lte=t)
+    return list(
+        Track.objects.filter(Exists(scores), scenario_id=scenario_id)
+        .order_by("track_id", "pk").values_list("pk", flat=True)[:limit])
+
+
+def get_score_series_many(
+    scenario_id: int,
+    da_id: int,
+    track_ids: Optional[Sequence[str]],
+    dt_from: Optional[str],
+    dt_to: Optional[str],
+    width: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> Dict[int, Tuple[str, List[Tuple]]]:
+    """
+    Series for many tracks of one DA: {track_pk: (public_track_id, [(t, score), ...])}.
+    track_ids None/empty → every track of the scenario with history for the DA, or
+    only the first `limit` of them by public track_id (picked in one extra query,
+    so points are never loaded for the tracks past the cap).
+    One query for the points (+ one tiny span query when rollups are eligible),
+    instead of one get_score_series() call per track.
+    """
+    f = parse_datetime(dt_from) if dt_from else None
+    t = parse_datetime(dt_to) if dt_to else None
+    if not track_ids and limit is not None:
+        pks = _first_tracks_with_history(scenario_id, da_id, f, t, limit)
+        if not pks:
+            return {}
+        q_tracks = Q(track_id__in=pks)
+    else:
+        q_tracks = tracks_filter(scenario_id, track_ids)
+
+    rows: Iterable[Tuple] = []
+    res: Optional[int] = None
+    if width:
+        rollups = ThreatScoreRollup.objects.filter(
+            Q(scenario_id=scenario_id), Q(da_id=da_id), q_tracks)
+        res = pick_resolution(_rollup_span_s(rollups, f, t), width)
+        if res is not None:
+            rqs = rollups.filter(resolution_s=res)
+            if f:
+                rqs = rqs.filter(bucket_start__gte=bucket_start(f, res))
+            if t:
+                rqs = rqs.filter(bucket_start__lte=t)
+            rows = [
+                (trk, label, b, s / n)
+                for trk, label, b, s, n in rqs.order_by("track_id", "bucket_start").values_list(
+                    "track_id", "track__track_id", "bucket_start", "score_sum", "count")
+                if n
+            ]
+
+    if res is None:
+        qs = ThreatScore.objects.filter(
+            Q(scenario_id=scenario_id), Q(da_id=da_id), q_tracks)
         if f:
             qs = qs.filter(computed_at__gte=f)
-    if dt_to:
-        t = parse_datetime(dt_to)
         if t:
             qs = qs.filter(computed_at__lte=t)
+        rows = qs.order_by("track_id", "computed_at").values_list(
+            "track_id", "track__track_id", "computed_at", "score")
 
-    return list(qs)
+    out: Dict[int, Tuple[str, List[Tuple]]] = {}
+    for trk, label, ts, score in rows:
+        entry = out.get(trk)
+        if entry is None:
+            entry = out[trk] = (label, [])
+        entry[1].append((ts, score))
+    return out
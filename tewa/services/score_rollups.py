@@ -0,0 +1,211 @@
+# tewa/services/score_rollups.py
+from __future__ import annotations
+
+from datetime import datetime
+from datetime import timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.db import IntegrityError, transaction
+
+from tewa.models import ThreatScore, ThreatScoreRollup
+
+# Coarsest last; get_score_series walks this in reverse
+ROLLUP_RESOLUTIONS_S: Tuple[int, ...] = (60, 600, 3600)
+
+# (scenario_id, da_id, track_id, resolution_s, bucket_start)
+RollupKey = Tuple[int, int, int, int, datetime]
+
+_IN_CHUNK = 500  # keep IN (...) lists well under backend parameter limits
+_MERGE_ATTEMPTS = 3
+
+
+def bucket_start(ts: datetime, resolution_s: int) -> datetime:
+    """Floor a timestamp to its UTC bucket boundary."""
+    epoch = int(ts.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % resolution_s, tz=dt_timezone.utc)
+
+
+class _Acc:
+    """In-memory aggregate for one rollup bucket."""
+    __slots__ = ("count", "total", "lo", "hi", "last", "last_at")
+
+    def __init__(self, score: float, at: datetime) -> None:
+        self.count = 1
+        self.total = score
+        self.lo = score
+        self.hi = score
+        self.last = score
+        self.last_at = at
+
+    def add(self, score: float, at: datetime) -> None:
+        self.count += 1
+        self.total += score
+        self.lo = min(self.lo, score)
+        self.hi = max(self.hi, score)
+        if at >= self.last_at:
+            self.last = score
+            self.last_at = at
+
+
+def _aggregate(rows: Iterable[ThreatScore]) -> Dict[RollupKey, _Acc]:
+    agg: Dict[RollupKey, _Acc] = {}
+    for r in rows:
+        if r.score is None or r.computed_at is None:
+            continue
+        s = float(r.score)
+        for res in ROLLUP_RESOLUTIONS_S:
+            key = (
+                r.scenario_id,  # type: ignore[attr-defined]
+                r.da_id,  # type: ignore[attr-defined]
+                r.track_id,  # type: ignore[attr-defined]
+                res,
+                bucket_start(r.computed_at, res),
+            )
+            acc = agg.get(key)
+            if acc is None:
+                agg[key] = _Acc(s, r.computed_at)
+            else:
+                acc.add(s, r.computed_at)
+    return agg
+
+
+def _existing_rollups(keys: Sequence[RollupKey]) -> Dict[RollupKey, ThreatScoreRollup]:
+    scenario_ids = {k[0] for k in keys}
+    da_ids = {k[1] for k in keys}
+    track_ids = sorted({k[2] for k in keys})
+    buckets = {k[4] for k in keys}
+
+    found: Dict[RollupKey, ThreatScoreRollup] = {}
+    for i in range(0, len(track_ids), _IN_CHUNK):
+        qs = (
+            ThreatScoreRollup.objects
+            .select_for_update()
+            .filter(
+                scenario_id__in=scenario_ids,
+                da_id__in=da_ids,
+                track_id__in=track_ids[i:i + _IN_CHUNK],
+                bucket_start__in=buckets,
+            )
+        )
+        for r in qs:
+            key = (r.scenario_id, r.da_id, r.track_id,  # type: ignore[attr-defined]
+                   r.resolution_s, r.bucket_start)
+            found[key] = r
+    return found
+
+
+def update_rollups(rows: Iterable[ThreatScore]) -> int:
+    """
+    Fold freshly persisted ThreatScore rows into the 1 min / 10 min / 1 h rollups.
+    The batch is aggregated in memory first, then merged into existing buckets
+    with one read, one bulk insert and one bulk update.
+    select_for_update() cannot lock a bucket that does not exist yet: when a
+    concurrent batch inserts the same new bucket first, the insert hits the
+    unique key and the merge is retried, now finding (and locking) that row.
+    Returns the number of rollup buckets touched.
+    """
+    agg = _aggregate(rows)
+    if not agg:
+        return 0
+
+    for attempt in range(_MERGE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                _merge(agg)
+            break
+        except IntegrityError:
+            if attempt == _MERGE_ATTEMPTS - 1:
+                raise
+    return len(agg)
+
+
+def _merge(agg: Dict[RollupKey, _Acc]) -> None:
+    existing = _existing_rollups(list(agg.keys()))
+
+    to_create: List[ThreatScoreRollup] = []
+    to_update: List[ThreatScoreRollup] = []
+    for key, acc in agg.items():
+        cur = existing.get(key)
+        if cur is None:
+            sid, da_id, trk_id, res, start = key
+            to_create.append(ThreatScoreRollup(
+                scenario_id=sid,
+                da_id=da_id,
+                track_id=trk_id,
+                resolution_s=res,
+                bucket_start=start,
+                count=acc.count,
+                score_sum=acc.total,
+                score_min=acc.lo,
+                score_max=acc.hi,
+                score_last=acc.last,
+                last_computed_at=acc.last_at,
+            ))
+            continue
+
+        cur.count += acc.count
+        cur.score_sum += acc.total
+        cur.score_min = acc.lo if cur.score_min is None else min(
+            cur.score_min, acc.lo)
+        cur.score_max = acc.hi if cur.score_max is None else max(
+            cur.score_max, acc.hi)
+        if cur.last_computed_at is None or acc.last_at >= cur.last_computed_at:
+            cur.score_last = acc.last
+            cur.last_computed_at = acc.last_at
+        to_update.append(cur)
+
+    if to_create:
+        ThreatScoreRollup.objects.bulk_create(to_create, batch_size=1000)
+    if to_update:
+        ThreatScoreRollup.objects.bulk_update(
+            to_update,
+            ["count", "score_sum", "score_min", "score_max",
+             "score_last", "last_computed_at"],
+            batch_size=1000,
+        )
+
+
+def rebuild_rollups(scenario_id: int, da_id: Optional[int] = None, chunk_size: int = 5000) -> int:
+    """
+    Drop and recompute rollups from raw ThreatScore history (backfill / repair).
+    Returns the number of raw rows folded in.
+    """
+    raw = ThreatScore.objects.filter(scenario_id=scenario_id)
+    old = ThreatScoreRollup.objects.filter(scenario_id=scenario_id)
+    if da_id is not None:
+        raw = raw.filter(da_id=da_id)
+        old = old.filter(da_id=da_id)
+
+    old.delete()
+
+    qs = (
+        raw.exclude(score__isnull=True)
+        .only("id", "scenario_id", "da_id", "track_id", "score", "computed_at")
+        .order_by("computed_at", "id")
+    )
+
+    n = 0
+    chunk: List[ThreatScore] = []
+    for row in qs.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            update_rollups(chunk)
+            n += len(chunk)
+            chunk = []
+    if chunk:
+        update_rollups(chunk)
+        n += len(chunk)
+    return n
+
+
+def pick_resolution(span_s: float, width_px: Optional[int]) -> Optional[int]:
+    """
+    Coarsest rollup resolution that still yields at least one bucket per pixel.
+    None → raw points are needed (span too short or no width requested).
+    """
+    if not width_px or width_px <= 0 or span_s <= 0:
+        return None
+    for res in sorted(ROLLUP_RESOLUTIONS_S, reverse=True):
+        if span_s / res >= width_px:
+            return res
+    return None
@@ -0,0 +1,82 @@
+# tewa/services/scoring_np.py
+"""
+Array versions of the scoring kernels for many (track, DA) rows at once.
+
+Same semantics as scoring.score_components_to_threat / score_breakdown.explain_components:
+inv1(x, scale) per metric (None, +inf or negative → 0), zero weights → 0.25 each,
+optional clamp to [0, 1]. Falls back to the scalar kernel when NumPy is absent.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from tewa.services.score_breakdown import explain_components
+from tewa.services.scoring import _coerce_params
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - scalar loop still works
+    np = None  # type: ignore[assignment]
+
+METRICS = ("cpa", "tcpa", "tdb", "twrp")
+_SCALES = {
+    "cpa": "cpa_scale_km",
+    "tcpa": "tcpa_scale_s",
+    "tdb": "tdb_scale_km",
+    "twrp": "twrp_scale_s",
+}
+
+
+def _inv1_many(xs: Sequence[Optional[float]], scale: float):
+    x = np.array([np.nan if v is None else v for v in xs], dtype=float)
+    out = 1.0 / (1.0 + x / max(scale, 1e-9))
+    out[~np.isfinite(x) | (x < 0)] = 0.0
+    return out
+
+
+def explain_components_many(
+    cpa_km: Sequence[Optional[float]],
+    tcpa_s: Sequence[Optional[float]],
+    tdb_km: Sequence[Optional[float]],
+    twrp_s: Sequence[Optional[float]],
+    params: Any,
+) -> List[Dict[str, Any]]:
+    """
+    Vectorized explain_components(): one {"normalized", "weights",
+    "contributions", "score"} dict per input row, in input order.
+    """
+    n = len(cpa_km)
+    if n == 0:
+        return []
+    if np is None:
+        return [
+            explain_components(cpa_km[i], tcpa_s[i], tdb_km[i], twrp_s[i], params)
+            for i in range(n)
+        ]
+
+    p = dict(_coerce_params(params))
+    if sum(p[f"w_{k}"] for k in METRICS) == 0.0:
+        for k in METRICS:
+            p[f"w_{k}"] = 0.25
+    weights = {k: float(p[f"w_{k}"]) for k in METRICS}
+
+    cols = dict(zip(METRICS, (cpa_km, tcpa_s, tdb_km, twrp_s)))
+    norm = {k: _inv1_many(cols[k], p[_SCALES[k]]) for k in METRICS}
+    contrib = {k: weights[k] * norm[k] for k in METRICS}
+    total = contrib["cpa"] + contrib["tcpa"] + contrib["tdb"] + contrib["twrp"]
+    if p["clamp_0_1"]:
+        total = np.clip(total, 0.0, 1.0)
+
+    # Back to plain floats so payloads serialize without NumPy scalars
+    norm_l = {k: norm[k].tolist() for k in METRICS}
+    contrib_l = {k: contrib[k].tolist() for k in METRICS}
+    total_l = total.tolist()
+    return [
+        {
+            "normalized": {k: norm_l[k][i] for k in METRICS},
+            "weights": dict(weights),
+            "contributions": {k: contrib_l[k][i] for k in METRICS},
+            "score": total_l[i],
+        }
+        for i in range(n)
+    ]
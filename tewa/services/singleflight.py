@@ -0,0 +1,124 @@
+# tewa/services/singleflight.py
+"""
+Single-flight coalescing for identical compute requests.
+
+do(key, fn) guarantees at most one fn() per key at a time:
+  - within a process, concurrent callers with the same key wait on the
+    leader's in-flight call and share its result (or its exception);
+  - across workers, the leader holds a DB advisory lock on the key
+    (locks.advisory_lock) and publishes the result to the shared cache for
+    TEWA_SINGLEFLIGHT_TTL_S, so a worker that queued on the lock reuses it;
+  - within that short TTL, a repeat of the same request is served from cache.
+
+Counters (this worker) are exposed by stats() / GET /api/tewa/compute/stats.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.utils import metrics
+from tewa.services.locks import advisory_lock
+
+T = TypeVar("T")
+
+# Same shared, bounded store as idempotency (Redis when TEWA_CACHE_URL is set)
+CACHE_ALIAS = "idempotency"
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_lock = threading.Lock()
+_inflight: Dict[str, _Call] = {}
+_stats = {"calls": 0, "computed": 0, "coalesced": 0, "cached": 0}
+
+
+def make_key(*parts: Hashable) -> str:
+    """Compact, stable key for a request tuple (safe for cache/lock names)."""
+    raw = "|".join("" if p is None else str(p) for p in parts)
+    return "sf:" + hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _count(name: str) -> None:
+    with _lock:
+        _stats[name] += 1
+    if name != "calls":
+        metrics.record_cache("singleflight", name != "computed")
+
+
+def do(key: str, fn: Callable[[], T], *, ttl_s: Optional[float] = None) -> Tuple[T, bool]:
+    """
+    Return (result, shared). shared=True when the result came from another
+    caller's computation (in flight here, on another worker, or cached).
+    """
+    ttl = float(ttl_s if ttl_s is not None else settings.TEWA_SINGLEFLIGHT_TTL_S)
+    cache = caches[CACHE_ALIAS]
+    _count("calls")
+
+    if ttl > 0:
+        hit = cache.get(key)
+        if hit is not None:
+            _count("cached")
+            return hit, True
+
+    with _lock:
+        call = _inflight.get(key)
+        leader = call is None
+        if leader:
+            call = _inflight[key] = _Call()
+    assert call is not None
+
+    if not leader:
+        call.event.wait()
+        _count("coalesced")
+        if call.error is not None:
+            raise call.error
+        return call.result, True
+
+    shared = False
+    try:
+        with advisory_lock(key):
+            # Another worker may have finished the same request while we queued
+            hit = cache.get(key) if ttl > 0 else None
+            if hit is not None:
+                _count("coalesced")
+                call.result, shared = hit, True
+            else:
+                call.result = fn()
+                _count("computed")
+                if ttl > 0:
+                    cache.set(key, call.result, timeout=ttl)
+        return call.result, shared
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        call.event.set()
+
+
+def stats() -> Dict[str, Any]:
+    with _lock:
+        out: Dict[str, Any] = dict(_stats)
+        out["inflight"] = len(_inflight)
+    shared = out["coalesced"] + out["cached"]
+    out["coalesced_hit_rate"] = (shared / out["calls"]) if out["calls"] else None
+    return out
+
+
+def reset_stats() -> None:
+    with _lock:
+        for k in _stats:
+            _stats[k] = 0
@@ -0,0 +1,202 @@
+# tewa/services/synthetic.py
+"""
+Synthetic large-scenario generator for load and scale testing.
+
+generate_scenario(spec) writes one Scenario with N DAs, M tracks and K samples
+per track. Tracks follow one of three motion patterns:
+  - "straight": constant speed and heading
+  - "turning":  constant speed, constant turn rate (left or right)
+  - "inbound":  raid starting 80–250 km out, steering toward a DA each step
+Everything is drawn from random.Random(spec.seed), so the same spec always
+produces the same rows. Rows go through bulk_create in batches of
+spec.batch_size and samples are generated lazily, so memory stays flat.
+"""
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.utils.geodesy import LatLon, destination_point, initial_bearing_deg
+from tewa.models import DefendedAsset, ModelParams, Scenario, Track, TrackSample
+
+PATTERNS = ("straight", "turning", "inbound")
+
+
+@dataclass
+class SyntheticSpec:
+    name: str = "Synthetic"
+    n_das: int = 10
+    n_tracks: int = 1000
+    samples_per_track: int = 60
+    dt_s: float = 5.0
+    seed: int = 42
+    center: Tuple[float, float] = (26.9, 72.0)
+    extent_km: float = 300.0
+    mix: Dict[str, float] = field(
+        default_factory=lambda: {"straight": 0.4, "turning": 0.3, "inbound": 0.3})
+    start: Optional[datetime] = None
+    batch_size: int = 5000
+
+
+@dataclass
+class _Kin:
+    lat: float
+    lon: float
+    alt_m: float
+    speed_mps: float
+    heading_deg: float
+
+
+def _pick_pattern(rng: random.Random, mix: Dict[str, float]) -> str:
+    names = [p for p in PATTERNS if mix.get(p, 0.0) > 0.0]
+    return rng.choices(names, weights=[mix[p] for p in names])[0]
+
+
+def _random_point(rng: random.Random, center: LatLon, radius_km: float) -> LatLon:
+    # Uniform over the disc: sqrt on the radius
+    return destination_point(center, rng.uniform(0.0, 360.0),
+                             radius_km * 1000.0 * rng.random() ** 0.5)
+
+
+def _das(rng: random.Random, spec: SyntheticSpec) -> List[Dict[str, float]]:
+    center = LatLon(*spec.center)
+    out = []
+    for _ in range(spec.n_das):
+        p = _random_point(rng, center, spec.extent_km * 0.5)
+        out.append({"lat": p.lat, "lon": p.lon, "radius_km": rng.uniform(5.0, 40.0)})
+    return out
+
+
+def _initial_state(
+    rng: random.Random, pattern: str, spec: SyntheticSpec, das: Sequence[Dict[str, float]],
+) -> Tuple[_Kin, Optional[LatLon], float]:
+    """Start kinematics, inbound target (if any) and turn rate (deg/s)."""
+    center = LatLon(*spec.center)
+    target: Optional[LatLon] = None
+    turn_rate = 0.0
+
+    if pattern == "inbound" and das:
+        da = rng.choice(das)
+        target = LatLon(da["lat"], da["lon"])
+        start = destination_point(target, rng.uniform(0.0, 360.0),
+                                  rng.uniform(80.0, 250.0) * 1000.0)
+        kin = _Kin(start.lat, start.lon, rng.uniform(50.0, 12000.0),
+                   rng.uniform(200.0, 320.0), initial_bearing_deg(start, target))
+    else:
+        p = _random_point(rng, center, spec.extent_km)
+        kin = _Kin(p.lat, p.lon, rng.uniform(500.0, 12000.0),
+                   rng.uniform(120.0, 300.0), rng.uniform(0.0, 360.0))
+        if pattern == "turning":
+            turn_rate = rng.choice((-1.0, 1.0)) * rng.uniform(0.5, 3.0)
+    return kin, target, turn_rate
+
+
+def _propagate(
+    kin: _Kin, dt_s: float, target: Optional[LatLon], turn_rate: float,
+) -> _Kin:
+    heading = kin.heading_deg
+    if target is not None:
+        heading = initial_bearing_deg(LatLon(kin.lat, kin.lon), target)
+    elif turn_rate:
+        heading = (heading + turn_rate * dt_s) % 360.0
+    p = destination_point(LatLon(kin.lat, kin.lon), heading, kin.speed_mps * dt_s)
+    return _Kin(p.lat, p.lon, kin.alt_m, kin.speed_mps, heading % 360.0)
+
+
+def iter_track_states(
+    rng: random.Random, spec: SyntheticSpec, das: Sequence[Dict[str, float]],
+) -> Iterator[Tuple[str, List[_Kin]]]:
+    """Yield (pattern, per-sample kinematics) for each track, in track order."""
+    for _ in range(spec.n_tracks):
+        pattern = _pick_pattern(rng, spec.mix)
+        kin, target, turn_rate = _initial_state(rng, pattern, spec, das)
+        states = [kin]
+        for _ in range(spec.samples_per_track - 1):
+            kin = _propagate(kin, spec.dt_s, target, turn_rate)
+            states.append(kin)
+        yield pattern, states
+
+
+def generate_scenario(spec: SyntheticSpec, *, replace: bool = False) -> Dict[str, object]:
+    """
+    Write the synthetic scenario and return counts and load throughput.
+    With replace=True an existing scenario of the same name is deleted first.
+    """
+    rng = random.Random(spec.seed)
+    start = spec.start or timezone.now().replace(microsecond=0)
+    started = time.perf_counter()
+
+    with transaction.atomic():
+        if replace:
+            Scenario.objects.filter(name=spec.name).delete()
+        scenario = Scenario.objects.create(
+            name=spec.name, start_time=start,
+            end_time=start + timedelta(seconds=spec.dt_s * max(0, spec.samples_per_track - 1)),
+            notes=f"seed_synthetic seed={spec.seed} das={spec.n_das} "
+                  f"tracks={spec.n_tracks} samples={spec.samples_per_track}",
+        )
+        ModelParams.objects.create(scenario=scenario)
+        da_specs = _das(rng, spec)
+        DefendedAsset.objects.bulk_create(
+            [DefendedAsset(scenario=scenario, name=f"SYN-DA-{i + 1:04d}", **d)
+             for i, d in enumerate(da_specs)],
+            batch_size=spec.batch_size,
+        )
+
+    n_samples = 0
+    patterns: Dict[str, int] = {p: 0 for p in PATTERNS}
+    tracks: List[Track] = []
+    pending_states: List[List[_Kin]] = []
+    samples: List[TrackSample] = []
+    idx = 0
+
+    def flush_tracks() -> None:
+        nonlocal n_samples
+        # Tracks first (the snapshot is the last sample), then their samples
+        Track.objects.bulk_create(tracks, batch_size=spec.batch_size)
+        for trk, states in zip(tracks, pending_states):
+            for k, s in enumerate(states[:spec.samples_per_track]):
+                samples.append(TrackSample(
+                    track=trk, t=start + timedelta(seconds=k * spec.dt_s),
+                    lat=s.lat, lon=s.lon, alt_m=s.alt_m,
+                    speed_mps=s.speed_mps, heading_deg=s.heading_deg))
+                if len(samples) >= spec.batch_size:
+                    TrackSample.objects.bulk_create(samples)
+                    n_samples += len(samples)
+                    samples.clear()
+        tracks.clear()
+        pending_states.clear()
+
+    for pattern, states in iter_track_states(rng, spec, da_specs):
+        idx += 1
+        patterns[pattern] += 1
+        last = states[-1]
+        tracks.append(Track(
+            scenario=scenario, track_id=f"SYN-{idx:07d}",
+            lat=last.lat, lon=last.lon, alt_m=last.alt_m,
+            speed_mps=last.speed_mps, heading_deg=last.heading_deg))
+        pending_states.append(states)
+        if len(tracks) * max(1, spec.samples_per_track) >= spec.batch_size:
+            flush_tracks()
+    if tracks:
+        flush_tracks()
+    if samples:
+        TrackSample.objects.bulk_create(samples)
+        n_samples += len(samples)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "scenario_id": scenario.pk,
+        "das": len(da_specs),
+        "tracks": idx,
+        "samples": n_samples,
+        "patterns": patterns,
+        "elapsed_s": round(elapsed, 3),
+        "samples_per_s": round(n_samples / elapsed, 1) if elapsed > 0 else None,
+    }
@@ -2,23 +2,36 @@
 
 from __future__ import annotations
 
+import heapq
+import uuid
+from contextlib import nullcontext
+from datetime import datetime
 from datetime import timezone as dt_timezone
-from time import time
-from typing import Any, Dict, List, Mapping, Optional, Union, cast
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union, cast
 
 from django.utils import timezone
 
 from core.utils.geodesy import LatLon, enu_from_latlon
 from tewa.models import DefendedAsset, ModelParams, Scenario, ThreatScore, Track
-from tewa.services import sampling
-from tewa.services.kinematics import compute_cpa_tcpa_tdb_twrp
+from tewa.services import frames, freshness, prefilter, sampling
+from tewa.services.instrumentation import NULL_TIMER, Timer, start_timer
+from tewa.services.kinematics import (
+    LocalFrame,
+    check_precision,
+    compute_cpa_tcpa_tdb_twrp,
+    frame_kinematics,
+)
 from tewa.services.normalize import clamp01, inv1
+from tewa.services.score_rollups import update_rollups
 from tewa.services.scoring import _coerce_params
 from tewa.services.scoring import (
     score_components_to_threat as _score_components_to_threat,
 )
 from tewa.types import ParamLike, ParamsLike
 
+# Float headroom on top-k bounds (a bound is never below the exact score by more)
+_BOUND_SLACK = 1e-9
+
 
 # ------------------------
 # small helpers
@@ -116,17 +129,33 @@ def score_components_to_threat(
     )
 
 
-def compute_score_for_track(
+def build_scores(
     scenario: Scenario,
-    da: DefendedAsset,
-    track: Track,
+    pairs: Sequence[Tuple[Track, DefendedAsset, Optional[datetime]]],
     params: ParamLike | Mapping[str, Any] | ModelParams | ParamsLike,
     weapon_range_km: Optional[float] = None,
-) -> ThreatScore:
+    batch_id: Optional[uuid.UUID] = None,
+    timer: Timer = NULL_TIMER,
+    precision: Optional[str] = None,
+    da_frames: Optional[Mapping[int, LocalFrame]] = None,
+) -> List[ThreatScore]:
     """
-    Compute and persist the threat score for one track–DA pair.
-    Uses normalized weights and scales, safe defaults, and full kinematic bundle.
+    Score (track, DA, sample_t) pairs into unsaved ThreatScores, in order
+    (callers bulk-insert). Uses normalized weights and scales, safe defaults,
+    and full kinematic bundle. `sample_t` is the source sample timestamp
+    recorded on the row (freshness). `precision` is the kinematics geodesy
+    tier (default: the params' own). `da_frames` maps DA pk to its LocalFrame
+    (default: the cached one, frames.frame_for).
+
+    Kinematics for the whole batch run in one "kinematics" stage and the
+    scores in one "scoring" stage, so timing costs a few clock reads per
+    batch, not per pair.
     """
+    if precision is None:
+        precision = (params.get("geodesy_precision") if isinstance(params, Mapping)
+                     else getattr(params, "geodesy_precision", None))
+    precision = check_precision(precision)
+
     # Coerce params (dict or ORM)
     p = _coerce_params(cast(ParamsLike, params))
 
@@ -142,83 +171,147 @@ def compute_score_for_track(
             p[k] = 0.25
 
     # Compute all kinematic components
-    bundle = compute_cpa_tcpa_tdb_twrp(
-        da_lat=da.lat,
-        da_lon=da.lon,
-        da_radius_km=da.radius_km,
-        trk_lat=track.lat,
-        trk_lon=track.lon,
-        speed_mps=track.speed_mps,
-        heading_deg=track.heading_deg,
-        weapon_range_km=weapon_range_km or da.radius_km,
-    )
+    with timer.stage("kinematics"):
+        bundles = [
+            frame_kinematics(
+                da_frames[da.pk] if da_frames is not None else frames.frame_for(da),
+                trk_lat=track.lat,
+                trk_lon=track.lon,
+                speed_mps=track.speed_mps,
+                heading_deg=track.heading_deg,
+                weapon_range_km=weapon_range_km or da.radius_km,
+                precision=precision,
+            )
+            for track, da, _ in pairs
+        ]
+
+    # Compute final scores
+    with timer.stage("scoring"):
+        scores = [
+            score_components_to_threat(
+                cpa_km=b.cpa_km,
+                tcpa_s=b.tcpa_s,
+                tdb_km=b.tdb_s,
+                twrp_s=b.twrp_s,
+                params=cast(ParamsLike, p),
+            )
+            for b in bundles
+        ]
+
+    rows = []
+    for (track, da, sample_t), bundle, score in zip(pairs, bundles, scores):
+        row = ThreatScore(
+            scenario=scenario,
+            track=track,
+            da=da,
+            cpa_km=bundle.cpa_km,
+            tcpa_s=bundle.tcpa_s,
+            tdb_km=bundle.tdb_s,
+            twrp_s=bundle.twrp_s,
+            score=score,
+            computed_at=timezone.now(),
+            sample_t=sample_t,
+        )
+        if batch_id is not None:
+            row.batch_id = batch_id
+        rows.append(row)
+    return rows
 
-    # Compute final score
-    score = score_components_to_threat(
-        cpa_km=bundle.cpa_km,
-        tcpa_s=bundle.tcpa_s,
-        tdb_km=bundle.tdb_s,
-        twrp_s=bundle.twrp_s,
-        params=cast(ParamsLike, p),
-    )
 
-    # Persist ThreatScore row
-    return ThreatScore.objects.create(
-        scenario=scenario,
-        track=track,
-        da=da,
-        cpa_km=bundle.cpa_km,
-        tcpa_s=bundle.tcpa_s,
-        tdb_km=bundle.tdb_s,
-        twrp_s=bundle.twrp_s,
-        score=score,
-        computed_at=timezone.now(),
-    )
+def build_score_for_track(
+    scenario: Scenario,
+    da: DefendedAsset,
+    track: Track,
+    params: ParamLike | Mapping[str, Any] | ModelParams | ParamsLike,
+    weapon_range_km: Optional[float] = None,
+    batch_id: Optional[uuid.UUID] = None,
+    timer: Timer = NULL_TIMER,
+    sample_t: Optional[datetime] = None,
+    precision: Optional[str] = None,
+    frame: Optional[LocalFrame] = None,
+) -> ThreatScore:
+    """
+    Score one track–DA pair into an unsaved ThreatScore: build_scores() for a
+    single pair. Loops should batch through build_scores() instead.
+    """
+    return build_scores(
+        scenario, [(track, da, sample_t)], params, weapon_range_km=weapon_range_km,
+        batch_id=batch_id, timer=timer, precision=precision,
+        da_frames={da.pk: frame} if frame is not None else None,
+    )[0]
+
+
+def compute_score_for_track(
+    scenario: Scenario,
+    da: DefendedAsset,
+    track: Track,
+    params: ParamLike | Mapping[str, Any] | ModelParams | ParamsLike,
+    weapon_range_km: Optional[float] = None,
+) -> ThreatScore:
+    """
+    Compute and persist the threat score for one track–DA pair, folding it
+    into the history rollups like the batch paths do.
+    Uses normalized weights and scales, safe defaults, and full kinematic bundle.
+    """
+    row = build_score_for_track(scenario, da, track, params, weapon_range_km)
+    row.save()
+    update_rollups([row])
+    return row
 
 
 def batch_compute_for_scenario(
     scenario_id: int,
     da_id: int,
     weapon_range_km: float | None = None,
+    timer: Optional[Timer] = None,
 ) -> list[ThreatScore]:
     """
     Compute threat scores for all tracks in a given scenario/DA pair.
-    Returns a list of ThreatScore objects.
+    Returns a list of ThreatScore objects. Stage timings go to `timer`
+    (or to a timer of its own that is logged on return).
     """
-    start = time()
-    scenario = Scenario.objects.get(id=scenario_id)
-    da = DefendedAsset.objects.get(id=da_id)
-
-    # Ensure parameters exist
-    params, _ = ModelParams.objects.get_or_create(
-        scenario=scenario,
-        defaults=dict(
-            w_cpa=0.25,
-            w_tcpa=0.25,
-            w_tdb=0.25,
-            w_twrp=0.25,
-            cpa_scale_km=20.0,
-            tcpa_scale_s=120.0,
-            tdb_scale_km=30.0,
-            twrp_scale_s=120.0,
-            clamp_0_1=True,
-        ),
-    )
-
-    out: list[ThreatScore] = []
-    for track in Track.objects.filter(scenario=scenario).iterator():
-        out.append(
-            compute_score_for_track(
+    with nullcontext(timer) if timer is not None else start_timer(
+            "batch_compute_for_scenario", scenario_id=scenario_id, da_id=da_id) as t:
+        with t.stage("load"):
+            scenario = Scenario.objects.get(id=scenario_id)
+            da = DefendedAsset.objects.get(id=da_id)
+
+            # Ensure parameters exist
+            params, _ = ModelParams.objects.get_or_create(
                 scenario=scenario,
-                da=da,
-                track=track,
-                params=cast(ParamsLike, params),
-                weapon_range_km=weapon_range_km,
+                defaults=dict(
+                    w_cpa=0.25,
+                    w_tcpa=0.25,
+                    w_tdb=0.25,
+                    w_twrp=0.25,
+                    cpa_scale_km=20.0,
+                    tcpa_scale_s=120.0,
+                    tdb_scale_km=30.0,
+                    twrp_scale_s=120.0,
+                    clamp_0_1=True,
+                ),
             )
+
+        with t.stage("fetch_tracks"):
+            tracks = list(Track.objects.filter(scenario=scenario))
+
+        # Latest sample per track, only to stamp sample_t (freshness); the
+        # scores still come from the Track rows
+        with t.stage("sample"):
+            states = sampling.sample_track_states_at(tracks, timezone.now())
+
+        out = build_scores(
+            scenario,
+            [(track, da, (states.get(track.pk) or {}).get("sample_t")) for track in tracks],
+            cast(ParamsLike, params), weapon_range_km=weapon_range_km, timer=t,
         )
+        t.count("pairs", len(out))
 
-    duration = round(time() - start, 3)
-    print(f"[TEWA] Computed {len(out)} scores in {duration}s")
+        with t.stage("persist"):
+            out = ThreatScore.objects.bulk_create(out)
+            update_rollups(out)
+        freshness.observe(out)
+        t.count("rows", len(out))
     return out
 
 
@@ -228,84 +321,125 @@ def calculate_scores_for_when(
     das: list[DefendedAsset],
     method: str = "linear",
     weapon_range_km: float = 20.0,
+    top_k: Optional[int] = None,
+    report: Optional[Dict[str, Any]] = None,
 ) -> List[Dict]:
-    """Pure compute (no DB writes), used by analytics or playback."""
+    """
+    Pure compute (no DB writes), used by analytics or playback.
+
+    With `top_k`, only the k best rows per DA are returned: exactly the rows,
+    and in the order, that the full compute would give for them. Pairs are
+    taken in order of a cheap score bound (prefilter.score_bounder: range,
+    speed and heading relative to the DA) and scoring stops once the k-th best score beats every
+    remaining bound. `report` receives pairs / scored / skipped.
+    """
     params_obj = (
         ModelParams.objects.filter(scenario=scenario).first()
         or ModelParams.objects.first()
     )
     if not params_obj:
         return []
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k must be >= 1")
 
     P = _coerce_params(cast(ParamsLike, params_obj))
-
-    tracks = Track.objects.filter(scenario=scenario).only("id", "track_id")
-    results: List[Dict] = []
-
-    for tr in tracks:
-        state = sampling.get_state(tr, when=when, method=method)
-        if not state:
-            continue
-
-        lat, lon, spd, hdg = (
-            state["lat"],
-            state["lon"],
-            state["speed_mps"],
-            state["heading_deg"],
+    precision = params_obj.geodesy_precision
+
+    tracks = list(Track.objects.filter(scenario=scenario).only("id", "track_id"))
+    states = sampling.get_states(tracks, when=when)
+    live = [(i, tr, states[tr.pk]) for i, tr in enumerate(tracks) if states[tr.pk]]
+    da_frames = [frames.frame_for(da) for da in das]
+
+    def score_pair(tr: Track, state: Dict[str, Any], j: int) -> Dict:
+        da = das[j]
+        bundle = frame_kinematics(
+            da_frames[j],
+            trk_lat=state["lat"],
+            trk_lon=state["lon"],
+            speed_mps=state["speed_mps"],
+            heading_deg=state["heading_deg"],
+            weapon_range_km=weapon_range_km or da.radius_km,
+            precision=precision,
         )
 
-        for da in das:
-            bundle = compute_cpa_tcpa_tdb_twrp(
-                da_lat=da.lat,
-                da_lon=da.lon,
-                da_radius_km=da.radius_km,
-                trk_lat=lat,
-                trk_lon=lon,
-                speed_mps=spd,
-                heading_deg=hdg,
-                weapon_range_km=weapon_range_km or da.radius_km,
-            )
-
-            n_cpa = inv1(bundle.cpa_km, P.get("cpa_scale_km", 20.0))
-            n_tcpa = inv1(
-                bundle.tcpa_s if (
-                    bundle.tcpa_s is None or bundle.tcpa_s >= 0) else float("inf"),
-                P.get("tcpa_scale_s", 120.0),
-            )
-            n_tdb = inv1(bundle.tdb_s, P.get("tdb_scale_km", 30.0))
-            n_twrp = inv1(
-                bundle.twrp_s if (
-                    bundle.twrp_s is None or bundle.twrp_s >= 0) else float("inf"),
-                P.get("twrp_scale_s", 120.0),
-            )
+        n_cpa = inv1(bundle.cpa_km, P.get("cpa_scale_km", 20.0))
+        n_tcpa = inv1(
+            bundle.tcpa_s if (
+                bundle.tcpa_s is None or bundle.tcpa_s >= 0) else float("inf"),
+            P.get("tcpa_scale_s", 120.0),
+        )
+        n_tdb = inv1(bundle.tdb_s, P.get("tdb_scale_km", 30.0))
+        n_twrp = inv1(
+            bundle.twrp_s if (
+                bundle.twrp_s is None or bundle.twrp_s >= 0) else float("inf"),
+            P.get("twrp_scale_s", 120.0),
+        )
 
-            score = (
-                P.get("w_cpa", 0.25) * n_cpa
-                + P.get("w_tcpa", 0.25) * n_tcpa
-                + P.get("w_tdb", 0.25) * n_tdb
-                + P.get("w_twrp", 0.25) * n_twrp
-            )
-            if P.get("clamp_0_1", True):
-                score = clamp01(score)
-
-            results.append(
-                dict(
-                    track_id=tr.track_id,
-                    da_name=da.name,
-                    score=round(float(score), 6),
-                    components=dict(
-                        dcpa=bundle.cpa_km,
-                        tcpa=bundle.tcpa_s,
-                        tdb=bundle.tdb_s,
-                        twrp=bundle.twrp_s,
-                        n_dcpa=n_cpa,
-                        n_tcpa=n_tcpa,
-                        n_tdb=n_tdb,
-                        n_twrp=n_twrp,
-                    ),
-                    sampled_at=_iso(state["sampled_at"]),
-                )
-            )
+        score = (
+            P.get("w_cpa", 0.25) * n_cpa
+            + P.get("w_tcpa", 0.25) * n_tcpa
+            + P.get("w_tdb", 0.25) * n_tdb
+            + P.get("w_twrp", 0.25) * n_twrp
+        )
+        if P.get("clamp_0_1", True):
+            score = clamp01(score)
+
+        return dict(
+            track_id=tr.track_id,
+            da_name=da.name,
+            score=round(float(score), 6),
+            components=dict(
+                dcpa=bundle.cpa_km,
+                tcpa=bundle.tcpa_s,
+                tdb=bundle.tdb_s,
+                twrp=bundle.twrp_s,
+                n_dcpa=n_cpa,
+                n_tcpa=n_tcpa,
+                n_tdb=n_tdb,
+                n_twrp=n_twrp,
+            ),
+            sampled_at=_iso(state["sampled_at"]),
+        )
 
-    results.sort(key=lambda r: r["score"], reverse=True)
-    return results
+    pairs = len(live) * len(das)
+    if top_k is None:
+        results = [score_pair(tr, state, j) for _, tr, state in live for j in range(len(das))]
+        if report is not None:
+            report.update(pairs=pairs, scored=pairs, skipped=0)
+        # Stable: ties keep (track, DA) order, which the top-k path reproduces
+        results.sort(key=lambda r: r["score"], reverse=True)
+        return results
+
+    kept: List[tuple] = []
+    scored = 0
+    bound_of = prefilter.score_bounder(P)
+    trk_xyz = {i: prefilter.xyz(state["lat"], state["lon"]) for i, _, state in live}
+    for j, (da, frame) in enumerate(zip(das, da_frames)):
+        da_xyz = prefilter.xyz(frame.lat, frame.lon)
+        wr_m = (weapon_range_km or da.radius_km) * 1000.0
+        cands = sorted(
+            ((bound_of(prefilter.plane_dist_lb(trk_xyz[i], da_xyz), state["speed_mps"], wr_m,
+                       prefilter.heading_offset(state["lat"], state["lon"],
+                                                state["heading_deg"], frame.lat, frame.lon))
+              + _BOUND_SLACK, i, tr, state) for i, tr, state in live),
+            key=lambda c: (-c[0], c[1]))
+        # Min-heap of the k best (score, -track index): its top is the row to evict
+        best: List[tuple] = []
+        for bound, i, tr, state in cands:
+            # Rows are rounded to 6 places: a bound that rounds below the k-th
+            # score cannot tie it, and the remaining bounds are no higher
+            if len(best) == top_k and round(bound, 6) < best[0][0]:
+                break
+            row = score_pair(tr, state, j)
+            scored += 1
+            item = (row["score"], -i, j, row)
+            if len(best) < top_k:
+                heapq.heappush(best, item)
+            elif item[:2] > best[0][:2]:
+                heapq.heapreplace(best, item)
+        kept.extend(best)
+
+    if report is not None:
+        report.update(pairs=pairs, scored=scored, skipped=pairs - scored)
+    kept.sort(key=lambda it: (-it[0], -it[1], it[2]))
+    return [it[3] for it in kept]
@@ -0,0 +1,13 @@
+# tewa/signals.py
+"""Model signal receivers (connected in TewaConfig.ready)."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tewa.models import DefendedAsset
+from tewa.services import frames
+
+
+@receiver(post_save, sender=DefendedAsset)
+@receiver(post_delete, sender=DefendedAsset)
+def _drop_da_frame(sender, instance, **kwargs):
+    frames.invalidate(instance.pk)
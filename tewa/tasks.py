@@ -16,3 +16,48 @@ def compute_threats_task():
         logger.info("Threat scores computation task completed successfully.")
     except Exception as e:
         logger.error(f"Error during compute_threats task: {str(e)}")
+
+
+@shared_task
+def run_compute_job(job_id):
+    """
+    Celery entry point for async compute jobs (TEWA_COMPUTE_JOBS_BACKEND="celery").
+    Status, progress and errors are recorded on the ComputeJob row.
+    """
+    from tewa.services.compute_jobs import run_job
+
+    run_job(job_id)
+
+
+@shared_task
+def periodic_compute_threats(scenario_id=None, lock_policy=None):
+    """
+    Beat entry point: recompute a scenario (or all scenarios) as recorded
+    ComputeJob runs under the per-scenario lock. With the default "skip"
+    policy a run that finds the previous one still going is recorded as
+    skipped instead of writing a second, interleaved batch.
+    """
+    from django.conf import settings
+
+    from tewa.models import ComputeJob, Scenario
+    from tewa.services.compute_jobs import run_inline
+
+    policy = lock_policy or settings.TEWA_SCENARIO_LOCK_POLICY
+    ids = [scenario_id] if scenario_id else list(
+        Scenario.objects.values_list("id", flat=True))
+    for sid in ids:
+        job = run_inline(ComputeJob.KIND_COMPUTE_SCENARIO, sid,
+                         params={"lock_policy": policy, "trigger": "beat"})
+        logger.info("Beat compute scenario=%s status=%s skipped=%s lock_wait_s=%s",
+                    sid, job.status, job.skipped, job.lock_wait_s)
+
+
+@shared_task
+def sweep_stale_compute_jobs():
+    """
+    Beat entry point: fail compute jobs whose worker went away (no heartbeat
+    for TEWA_COMPUTE_JOB_STALE_S), so they do not stay queued/running forever.
+    """
+    from tewa.services.compute_jobs import fail_stale_jobs
+
+    fail_stale_jobs()
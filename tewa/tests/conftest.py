@@ -135,6 +135,34 @@ print("\n[pytest setup] ✅ Patched django.urls.reverse for tests.")
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def _clear_idempotency_store(settings):
+    """
+    Stored compute_now results must not leak between tests (PKs get reused).
+    Tests get an in-memory store so that tests without DB access (and the
+    threaded ones) can use it; the DatabaseCache default has its own test.
+    """
+    from tewa.services import idempotency
+
+    settings.CACHES = {**settings.CACHES, "idempotency": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tewa-idempotency-tests",
+        "TIMEOUT": settings.TEWA_IDEMPOTENCY_TTL_S,
+    }}
+    idempotency.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _empty_frame_cache():
+    """Cached DA frames are keyed by PK, which the test DB reuses."""
+    from tewa.services import frames
+
+    frames.clear_frame_cache()
+    yield
+    frames.clear_frame_cache()
+
+
 @pytest.fixture
 def api_client():
     user = User.objects.create_user(username="tester_api", password="pw")
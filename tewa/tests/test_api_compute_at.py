@@ -121,3 +121,25 @@ class ComputeAtLinearInterpolationTests(TestCase):
         score = cast(float, row.score)  # <-- explicit cast silences Pylance
         self.assertGreaterEqual(score, 0.0)
         self.assertLessEqual(score, 1.0)
+
+    def test_compute_at_returns_only_its_own_batch(self) -> None:
+        # A concurrent caller's fresh row must not leak into this response
+        other = ThreatScore.objects.create(
+            scenario=self.sc, da=self.da, track=self.trk, score=0.99)
+
+        resp = self.client.post(
+            "/api/tewa/compute_at",
+            {
+                "scenario_id": self.sc.pk,
+                "when": self.t_mid.isoformat().replace("+00:00", "Z"),
+                "da_ids": [self.da.pk],
+            },
+            format="json",
+        )
+        self.assertEqual(resp.status_code, 200, resp.content)
+        body = resp.json()
+
+        batch = ThreatScore.objects.filter(batch_id=body["batch_id"])
+        self.assertEqual(body["count"], batch.count())
+        self.assertNotIn(other.pk, batch.values_list("pk", flat=True))
+        self.assertEqual(body["count"], 1)
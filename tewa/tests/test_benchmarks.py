@@ -0,0 +1,57 @@
+# tewa/tests/test_benchmarks.py
+"""
+Benchmark suite vs. the committed baseline. Deselected by default; run with
+
+    pytest -m benchmark [TEWA_BENCH_SIZE=small TEWA_BENCH_TOLERANCE=0.5 TEWA_BENCH_OUTPUT=out.json]
+"""
+import json
+import os
+
+import pytest
+
+from tewa.benchmarks import CASES, DEFAULT_TOLERANCE, SIZES, compare, load_baseline, run_suite
+
+
+def test_compare_flags_only_slowdowns_beyond_tolerance():
+    report = {"meta": {"size": "small"}, "results": {
+        "fast": {"p50_ms": 9.0}, "ok": {"p50_ms": 14.0}, "slow": {"p50_ms": 16.0},
+        "new": {"p50_ms": 1.0}, "png": {"skipped": "matplotlib not installed"},
+    }}
+    baseline = {"small": {k: {"p50_ms": 10.0} for k in ("fast", "ok", "slow", "png")}}
+
+    regressions = compare(report, baseline, tolerance=0.5)
+
+    assert [r["case"] for r in regressions] == ["slow", "new"]
+    assert regressions[0]["ratio"] == 1.6
+    assert regressions[1]["missing"] == "case" and regressions[1]["ratio"] is None
+
+
+def test_compare_reports_a_size_without_baseline():
+    report = {"meta": {"size": "large"}, "results": {
+        "a": {"p50_ms": 1.0}, "png": {"skipped": "matplotlib not installed"}}}
+
+    regressions = compare(report, {"small": {"a": {"p50_ms": 1.0}}})
+
+    assert regressions == [{"case": "a", "p50_ms": 1.0, "baseline_p50_ms": None,
+                            "ratio": None, "missing": "size"}]
+
+
+def test_committed_baseline_covers_every_case_of_its_sizes():
+    baseline = load_baseline()
+    assert "small" in baseline and set(baseline) <= set(SIZES)
+    for size, cases in baseline.items():
+        assert set(cases) == set(CASES), size
+
+
+@pytest.mark.benchmark
+@pytest.mark.django_db
+def test_suite_within_baseline():
+    report = run_suite(os.getenv("TEWA_BENCH_SIZE", "small"))
+    out = os.getenv("TEWA_BENCH_OUTPUT")
+    if out:
+        with open(out, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    tolerance = float(os.getenv("TEWA_BENCH_TOLERANCE", DEFAULT_TOLERANCE))
+    regressions = compare(report, load_baseline(), tolerance)
+    assert not regressions, regressions
@@ -1,4 +1,5 @@
 # tewa/tests/test_charts.py
+import pytest
 from django.urls import reverse
 
 
@@ -47,3 +48,202 @@ def test_score_history_png_not_found_wrong_track(client, db, seeded_scenario_wit
         "track_id": 999999,
     })
     assert resp.status_code in (404, 400)
+
+
+def test_score_history_png_served_from_cache_on_repeat(client, db, seeded_scenario_with_scores):
+    from tewa.services.charting import chart_cache_stats, clear_chart_cache
+
+    clear_chart_cache()
+    s = seeded_scenario_with_scores
+    params = {
+        "scenario_id": s["scenario"].id,
+        "da_id": s["da"].id,
+        "track_id": s["track"].id,
+    }
+    first = client.get(reverse("score_history_png"), params)
+    second = client.get(reverse("score_history_png"), params)
+    assert _body(first) == _body(second)
+
+    stats = chart_cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["renders"] == 1
+    assert stats["render_ms"]["p50"] is not None
+
+    resp = client.get(reverse("tewa_api:chart_stats"))
+    assert resp.status_code == 200
+    assert resp.json()["hit_rate"] == 0.5
+
+
+def test_render_is_thread_safe_in_pool():
+    from concurrent.futures import ThreadPoolExecutor
+    from datetime import datetime, timedelta, timezone
+
+    from tewa.services.charting import render_score_history_png
+
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    jobs = [
+        [(t0 + timedelta(minutes=i), (i * k % 10) / 10.0) for i in range(50)]
+        for k in range(1, 9)
+    ]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        pngs = list(pool.map(
+            lambda ser: render_score_history_png(ser, width=320, height=160, use_cache=False),
+            jobs,
+        ))
+    assert all(p.startswith(b"\x89PNG") for p in pngs)
+    # Each render used its own Figure → distinct series give distinct images
+    assert len(set(pngs)) == len(jobs)
+
+
+def _seed_many_tracks(n_tracks=3, n_points=20):
+    from datetime import datetime, timedelta, timezone
+
+    from tewa.models import ThreatScore
+    from tewa.tests.factories import create_da, create_scenario, create_tracks
+
+    sc = create_scenario("Multi-Chart")
+    da = create_da(sc)
+    tracks = create_tracks(sc, n_tracks)
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        ThreatScore(scenario=sc, da=da, track=trk, score=((i + k) % 10) / 10.0)
+        for k, trk in enumerate(tracks)
+        for i in range(n_points)
+    ]
+    ThreatScore.objects.bulk_create(rows)
+    for j, row in enumerate(ThreatScore.objects.filter(scenario=sc).order_by("id")):
+        ThreatScore.objects.filter(pk=row.pk).update(
+            computed_at=t0 + timedelta(seconds=30 * (j % n_points)))
+    return sc, da, tracks
+
+
+def test_get_score_series_many_single_query(db, django_assert_num_queries):
+    from tewa.services.score_history import get_score_series_many
+
+    sc, da, tracks = _seed_many_tracks()
+    with django_assert_num_queries(1):
+        out = get_score_series_many(sc.id, da.id, None, None, None)
+    assert set(out) == {t.id for t in tracks}
+    assert all(len(series) == 20 for _, series in out.values())
+
+    only = get_score_series_many(sc.id, da.id, [tracks[1].track_id], None, None)
+    assert list(only) == [tracks[1].id]
+
+
+def test_get_score_series_many_limit_fetches_only_the_first_tracks(
+        db, django_assert_num_queries):
+    from tewa.services.score_history import get_score_series_many
+
+    sc, da, tracks = _seed_many_tracks(n_tracks=5)
+    with django_assert_num_queries(2):
+        out = get_score_series_many(sc.id, da.id, None, None, None, limit=2)
+    first = sorted(tracks, key=lambda t: t.track_id)[:2]
+    assert set(out) == {t.id for t in first}
+
+
+def test_score_history_multi_png_caps_tracks_in_the_query(client, db, monkeypatch):
+    from tewa.api import views
+
+    monkeypatch.setattr(views, "MULTI_MAX_TRACKS", 2)
+    sc, da, tracks = _seed_many_tracks(n_tracks=4)
+    resp = client.get(reverse("tewa_api:score_history_multi_png"),
+                      {"scenario_id": sc.id, "da_id": da.id, "layout": "sprite", "manifest": 1})
+    assert resp.status_code == 200
+    assert resp.json()["tracks"] == sorted(t.track_id for t in tracks)[:2]
+
+
+def test_sprite_tiles_offsets():
+    from tewa.services.charting import sprite_tiles
+
+    tiles = sprite_tiles(["A", "B", "C"], tile_width=100, tile_height=50, columns=2)
+    assert [(t["x"], t["y"]) for t in tiles] == [(0, 0), (100, 0), (0, 50)]
+
+
+def test_score_history_multi_png_layouts(client, db):
+    sc, da, tracks = _seed_many_tracks()
+    url = reverse("tewa_api:score_history_multi_png")
+    base = {"scenario_id": sc.id, "da_id": da.id}
+
+    for layout in ("overlay", "grid"):
+        resp = client.get(url, {**base, "layout": layout})
+        assert resp.status_code == 200
+        assert _body(resp).startswith(b"\x89PNG")
+
+    ids = ",".join(t.track_id for t in reversed(tracks))
+    resp = client.get(url, {**base, "layout": "sprite", "track_ids": ids,
+                            "tile_width": 200, "tile_height": 100, "columns": 2})
+    assert resp.status_code == 200
+    import json
+    tiles = json.loads(resp["X-Sprite-Tiles"])
+    assert [t["track_id"] for t in tiles] == [t.track_id for t in reversed(tracks)]
+    assert tiles[2] == {"track_id": tracks[0].track_id, "x": 0, "y": 100, "w": 200, "h": 100}
+
+    resp = client.get(url, {**base, "layout": "sprite", "manifest": 1})
+    assert resp.status_code == 200
+    assert len(resp.json()["tiles"]) == len(tracks)
+
+    assert client.get(url, {**base, "layout": "pie"}).status_code == 400
+
+
+@pytest.mark.parametrize("bad", [
+    {"max_points": -1}, {"width": 0}, {"height": -5}, {"tile_width": -1},
+    {"layout": "grid", "tile_height": 100_000}, {"columns": 0}, {"columns": -2},
+    {"layout": "sprite", "tile_width": 4000, "tile_height": 4000, "columns": 1},
+])
+def test_score_history_multi_png_rejects_bad_sizes(client, db, bad):
+    sc, da, _tracks = _seed_many_tracks()
+    resp = client.get(reverse("tewa_api:score_history_multi_png"),
+                      {"scenario_id": sc.id, "da_id": da.id, **bad})
+    assert resp.status_code == 400
+
+
+def test_score_history_svg_format(client, db, seeded_scenario_with_scores):
+    s = seeded_scenario_with_scores
+    resp = client.get(reverse("score_history_png"), {
+        "scenario_id": s["scenario"].id,
+        "da_id": s["da"].id,
+        "track_id": s["track"].id,
+        "smooth": 3,
+        "format": "svg",
+    })
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "image/svg+xml"
+    svg = _body(resp).decode()
+    assert svg.startswith("<svg") and svg.rstrip().endswith("</svg>")
+    assert svg.count("<polyline") == 2  # score + moving average
+
+
+def test_chart_format_is_checked_only_on_the_image_view(client, db, seeded_scenario_with_scores):
+    s = seeded_scenario_with_scores
+    q = {"scenario_id": s["scenario"].id, "da_id": s["da"].id, "track_id": s["track"].id}
+    assert client.get(reverse("score_history_png"), {**q, "format": "gif"}).status_code == 400
+    # DRF's ?format= renderer override keeps working on the JSON view
+    resp = client.get(reverse("tewa_api:score_history_json"), {**q, "format": "json"})
+    assert resp.status_code == 200 and resp.json()["count"] > 0
+
+
+def test_svg_renderer_no_data_and_single_point():
+    from datetime import datetime, timezone
+
+    from tewa.services.charting_svg import render_score_history_svg
+
+    empty = render_score_history_svg([], width=300, height=150, use_cache=False)
+    assert b"No data" in empty and b"<polyline" not in empty
+
+    one = render_score_history_svg(
+        [(datetime(2025, 1, 1, tzinfo=timezone.utc), 0.5)], use_cache=False)
+    assert one.count(b"<polyline") == 1
+
+
+def test_importing_views_does_not_import_matplotlib():
+    import os
+    import subprocess
+    import sys
+
+    code = (
+        "import django, sys; django.setup(); "
+        "import tewa.views, tewa.api.views; "
+        "sys.exit(1 if 'matplotlib' in sys.modules else 0)"
+    )
+    env = {**os.environ, "DJANGO_SETTINGS_MODULE": "missile_model.settings"}
+    assert subprocess.run([sys.executable, "-c", code], env=env).returncode == 0
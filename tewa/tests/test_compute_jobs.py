@@ -0,0 +1,239 @@
+# tewa/tests/test_compute_jobs.py
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tewa.models import ComputeJob, ThreatScore
+from tewa.services import compute_jobs
+from tewa.tests.factories import create_da, create_scenario, create_tracks
+
+
+@pytest.fixture
+def eager(settings):
+    settings.TEWA_COMPUTE_JOBS_BACKEND = "eager"
+
+
+@pytest.fixture
+def client(db):
+    c = APIClient()
+    c.force_authenticate(get_user_model().objects.create_user("ops", password="x"))
+    return c
+
+
+@pytest.fixture
+def scenario(db):
+    sc = create_scenario("Jobs")
+    create_da(sc, radius_km=10.0)
+    create_tracks(sc, 3)
+    return sc
+
+
+def test_compute_now_async_returns_job_and_status_reports_success(eager, client, scenario):
+    resp = client.post(reverse("tewa_api:compute_now"),
+                       {"scenario_id": scenario.id, "async": True}, format="json")
+    assert resp.status_code == 202
+    job = resp.json()
+    assert job["kind"] == ComputeJob.KIND_COMPUTE_NOW
+    assert job["status_url"] == reverse("tewa_api:compute_job_status", args=[job["id"]])
+
+    status = APIClient().get(job["status_url"]).json()
+    assert status["status"] == "success"
+    assert status["progress_total"] == 3 and status["progress_pct"] == 100.0
+    assert status["rows_written"] == status["result"]["count"] == ThreatScore.objects.count()
+    assert status["result_url"].endswith(f"?scenario_id={scenario.id}")
+
+
+def test_compute_at_async_keeps_request_params(eager, client, scenario):
+    resp = client.post(reverse("tewa_api:compute-at"), {
+        "scenario_id": scenario.id, "when": "2025-01-01T00:00:00Z",
+        "method": "linear", "async": "1",
+    }, format="json")
+    assert resp.status_code == 202
+
+    job = ComputeJob.objects.get(pk=resp.json()["id"])
+    assert job.kind == ComputeJob.KIND_COMPUTE_AT
+    assert job.params["method"] == "linear"
+    assert job.params["when_iso"].startswith("2025-01-01T00:00:00")
+    assert job.status == "success"
+
+
+def test_cancel_queued_job(client, scenario):
+    job = ComputeJob.objects.create(kind=ComputeJob.KIND_COMPUTE_NOW, scenario=scenario,
+                                    status="queued")
+
+    resp = client.post(reverse("tewa_api:compute_job_cancel", args=[job.pk]))
+    assert resp.status_code == 202
+    assert resp.json()["status"] == "canceled"
+
+    compute_jobs.run_job(str(job.pk))  # a late worker must not pick it up
+    job.refresh_from_db()
+    assert job.status == "canceled" and job.started_at is None
+
+
+def test_running_job_stops_at_next_progress_tick(scenario):
+    job = ComputeJob.objects.create(kind=ComputeJob.KIND_COMPUTE_NOW, scenario=scenario,
+                                    status="running")
+    compute_jobs.cancel_job(job)
+    assert job.cancel_requested and job.status == "running"
+
+    with pytest.raises(compute_jobs.JobCanceled):
+        compute_jobs._progress_hook(str(job.pk))(0, 3)
+
+
+def test_failed_job_records_error(eager, scenario, monkeypatch):
+    def boom(**_kw):
+        raise RuntimeError("engine down")
+
+    monkeypatch.setattr(compute_jobs, "compute_scores_at_timestamp", boom)
+    job = compute_jobs.submit_job(ComputeJob.KIND_COMPUTE_NOW, scenario.id)
+
+    assert job.status == "failure"
+    assert job.error == "engine down"
+    assert job.finished_at is not None
+
+
+def test_lock_error_fails_job_instead_of_leaving_it_running(scenario, monkeypatch):
+    from tewa.services import locks
+
+    def db_down(name, timeout_s=None):
+        raise RuntimeError("advisory lock unavailable")
+
+    monkeypatch.setattr(locks, "acquire", db_down)
+    job = compute_jobs.run_inline(ComputeJob.KIND_COMPUTE_SCENARIO, scenario.id)
+
+    assert job.status == "failure" and job.finished_at is not None
+    assert job.error == "advisory lock unavailable"
+
+
+def test_fail_stale_jobs_only_touches_quiet_unfinished_jobs(scenario):
+    from datetime import timedelta
+
+    from django.utils import timezone
+
+    long_ago = timezone.now() - timedelta(hours=2)
+    quiet = ComputeJob.objects.create(kind=ComputeJob.KIND_COMPUTE_NOW, scenario=scenario,
+                                      status="running", heartbeat_at=long_ago)
+    orphaned = ComputeJob.objects.create(kind=ComputeJob.KIND_COMPUTE_NOW, scenario=scenario,
+                                         status="queued")
+    ComputeJob.objects.filter(pk=orphaned.pk).update(created_at=long_ago)
+    alive = ComputeJob.objects.create(kind=ComputeJob.KIND_COMPUTE_NOW, scenario=scenario,
+                                      status="running", heartbeat_at=timezone.now())
+    done = ComputeJob.objects.create(kind=ComputeJob.KIND_COMPUTE_NOW, scenario=scenario,
+                                     status="success", heartbeat_at=long_ago)
+
+    assert compute_jobs.fail_stale_jobs(stale_s=600) == 2
+
+    status = dict(ComputeJob.objects.values_list("pk", "status"))
+    assert status[quiet.pk] == status[orphaned.pk] == "failure"
+    assert status[alive.pk] == "running" and status[done.pk] == "success"
+
+
+def test_unknown_job_is_404(db):
+    url = reverse("tewa_api:compute_job_status",
+                  args=["00000000-0000-0000-0000-000000000000"])
+    assert APIClient().get(url).status_code == 404
+
+
+def test_skip_policy_records_skipped_run_when_scenario_locked(scenario, monkeypatch):
+    from tewa.services import locks
+
+    monkeypatch.setattr(locks, "acquire", lambda name, timeout_s=None: False)
+    job = compute_jobs.run_inline(ComputeJob.KIND_COMPUTE_SCENARIO, scenario.id,
+                                  params={"lock_policy": "skip"})
+
+    assert job.status == "canceled" and job.skipped
+    assert job.lock_wait_s is not None and job.started_at is None
+    assert ThreatScore.objects.count() == 0
+
+
+def test_preempt_policy_cancels_running_job(scenario):
+    running = ComputeJob.objects.create(kind=ComputeJob.KIND_COMPUTE_SCENARIO,
+                                        scenario=scenario, status="running")
+
+    job = compute_jobs.run_inline(ComputeJob.KIND_COMPUTE_SCENARIO, scenario.id,
+                                  params={"lock_policy": "preempt"})
+
+    running.refresh_from_db()
+    assert running.cancel_requested
+    assert job.status == "success" and job.lock_wait_s is not None
+
+
+def test_beat_task_records_scenario_run(scenario):
+    from tewa.tasks import periodic_compute_threats
+
+    periodic_compute_threats(scenario.id)
+
+    job = ComputeJob.objects.get(scenario=scenario)
+    assert job.kind == ComputeJob.KIND_COMPUTE_SCENARIO
+    assert job.params["lock_policy"] == "skip"
+    assert job.status == "success" and job.rows_written == 3
+
+
+def test_sync_computes_take_the_scenario_lock(client, scenario, monkeypatch):
+    from tewa.services import locks
+
+    taken = []
+    monkeypatch.setattr(locks, "acquire", lambda name, timeout_s=None: taken.append(name) or True)
+    resp = client.post(reverse("tewa_api:compute-at"),
+                       {"scenario_id": scenario.id, "when": "2025-01-01T00:00:00Z"},
+                       format="json")
+    assert resp.status_code == 200 and resp.json()["lock_wait_s"] is not None
+    assert taken == [locks.scenario_lock_name(scenario.id)]
+
+    monkeypatch.setattr(locks, "acquire", lambda name, timeout_s=None: False)
+    ThreatScore.objects.all().delete()
+    for url, body in ((reverse("tewa_api:compute_now"), {}),
+                      (reverse("tewa_api:compute-at"), {"when": "2025-01-01T00:01:00Z"})):
+        resp = client.post(url, {"scenario_id": scenario.id, "lock_policy": "skip", **body},
+                           format="json")
+        assert resp.status_code == 409 and resp.json()["skipped"]
+    assert ThreatScore.objects.count() == 0
+    assert client.post(reverse("tewa_api:compute_now"),
+                       {"scenario_id": scenario.id, "lock_policy": "later"},
+                       format="json").status_code == 400
+
+
+def test_compute_threats_command_records_locked_runs(scenario, monkeypatch):
+    from django.core.management import call_command
+
+    from tewa.services import locks
+
+    call_command("compute_threats", scenario_id=scenario.id)
+    job = ComputeJob.objects.get(scenario=scenario)
+    assert job.params["trigger"] == "command" and job.params["lock_policy"] == "queue"
+    assert job.status == "success" and job.rows_written == 3 and job.lock_wait_s is not None
+
+    monkeypatch.setattr(locks, "acquire", lambda name, timeout_s=None: False)
+    ThreatScore.objects.all().delete()
+    call_command("compute_threats", scenario_id=scenario.id, lock_policy="skip")
+    assert ComputeJob.objects.filter(scenario=scenario, skipped=True).count() == 1
+    assert ThreatScore.objects.count() == 0
+
+
+def test_scenario_run_scores_das_without_a_scenario(db):
+    from django.core.management import call_command
+
+    from tewa.models import DefendedAsset
+
+    sc = create_scenario("Unscoped")
+    DefendedAsset.objects.create(name="DA-free", lat=0.0, lon=0.0, radius_km=10.0)
+    create_tracks(sc, 3)
+
+    call_command("compute_threats", scenario_id=sc.id)
+
+    job = ComputeJob.objects.get(scenario=sc)
+    assert job.status == "success" and job.rows_written == 3
+    assert ThreatScore.objects.filter(scenario=sc, da__scenario__isnull=True).count() == 3
+
+
+def test_scenario_run_without_das_fails_loudly(db):
+    from django.core.management import call_command
+    from django.core.management.base import CommandError
+
+    sc = create_scenario("NoDAs")
+    create_tracks(sc, 2)
+
+    with pytest.raises(CommandError, match="No defended assets"):
+        call_command("compute_threats", scenario_id=sc.id)
+    assert ComputeJob.objects.get(scenario=sc).status == "failure"
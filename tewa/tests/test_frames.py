@@ -0,0 +1,72 @@
+# tewa/tests/test_frames.py
+import random
+
+import pytest
+from django.utils import timezone
+
+from tewa.models import DefendedAsset
+from tewa.services import frames
+from tewa.services.engine import compute_scores_at_timestamp
+from tewa.services.kinematics import (
+    PRECISIONS,
+    LocalFrame,
+    compute_cpa_tcpa_tdb_twrp,
+    frame_kinematics,
+)
+from tewa.tests.factories import create_da, create_scenario, create_tracks
+
+
+def test_frame_kernel_matches_raw_kernel():
+    rng = random.Random(5)
+    for _ in range(300):
+        da_lat, da_lon, radius = rng.uniform(-60, 60), rng.uniform(-150, 150), rng.uniform(1, 40)
+        frame = LocalFrame.build(da_lat, da_lon, radius)
+        trk = dict(trk_lat=da_lat + rng.uniform(-2, 2), trk_lon=da_lon + rng.uniform(-2, 2),
+                   speed_mps=rng.choice([0.0, rng.uniform(50, 400)]),
+                   heading_deg=rng.uniform(0, 360))
+        wr = rng.uniform(5, 60)
+        for tier in PRECISIONS:
+            raw = compute_cpa_tcpa_tdb_twrp(da_lat=da_lat, da_lon=da_lon, da_radius_km=radius,
+                                            weapon_range_km=wr, precision=tier, **trk)
+            assert frame_kinematics(frame, weapon_range_km=wr, precision=tier, **trk) == raw
+    assert frame.weapon_range_m == frame.radius_m == radius * 1000.0
+
+
+@pytest.mark.django_db
+def test_frame_cache_follows_saves_updates_and_deletes():
+    da = create_da(create_scenario("Frames"), lat=10.0, lon=20.0, radius_km=5.0)
+
+    first = frames.frame_for(da)
+    assert frames.frame_for(DefendedAsset.objects.get(pk=da.pk)) is first
+    assert first.m_per_deg_east < first.m_per_deg_north
+
+    da.lat = 11.0
+    da.save()  # post_save drops the entry; the new stamp would miss anyway
+    moved = frames.frame_for(da)
+    assert moved is not first and moved.lat == 11.0
+
+    DefendedAsset.objects.filter(pk=da.pk).update(radius_km=9.0)  # no auto_now, no signal
+    assert frames.frame_for(DefendedAsset.objects.get(pk=da.pk)).radius_m == 9000.0
+
+    da.delete()
+    assert len(frames._cache) == 0
+
+
+@pytest.mark.django_db
+def test_engine_builds_each_da_frame_once(monkeypatch):
+    sc = create_scenario("Frames-Engine")
+    das = [create_da(sc, name=f"DA{i}", lat=0.1 * i, lon=0.1 * i) for i in range(3)]
+    create_tracks(sc, n=5)
+    built = []
+    real = LocalFrame.build.__func__
+    monkeypatch.setattr(LocalFrame, "build",
+                        classmethod(lambda cls, *a, **k: built.append(a) or real(cls, *a, **k)))
+
+    when = timezone.now().isoformat()
+    ids = [d.pk for d in das]
+    first = compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=when, da_ids=ids)
+    second = compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=when, da_ids=ids)
+
+    assert len(first) == len(second) == 15
+    assert len(built) == 3  # one per DA, reused by the second run
+    assert [r.score for r in first] == [r.score for r in second]
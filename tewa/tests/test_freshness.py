@@ -0,0 +1,102 @@
+# tewa/tests/test_freshness.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.urls import reverse
+
+from core.utils import metrics
+from tewa.models import ModelParams, ThreatScore, TrackSample
+from tewa.services.engine import compute_scores_at_timestamp
+from tewa.services.freshness import scenario_freshness
+from tewa.tests.factories import create_da, create_scenario, create_tracks
+
+T0 = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _sample(track, t):
+    return TrackSample.objects.create(
+        track=track, t=t, lat=track.lat, lon=track.lon, alt_m=track.alt_m,
+        speed_mps=track.speed_mps, heading_deg=track.heading_deg)
+
+
+@pytest.fixture
+def world():
+    sc = create_scenario("Freshness-Scenario")
+    create_da(sc)
+    fresh, old, bare = create_tracks(sc, 3)
+    _sample(fresh, T0 - timedelta(seconds=2))
+    _sample(fresh, T0 + timedelta(seconds=3))
+    _sample(old, T0 - timedelta(seconds=90))
+    return sc, fresh, old, bare
+
+
+@pytest.mark.django_db
+def test_rows_carry_source_sample_timestamp(world):
+    sc, fresh, old, bare = world
+    when = T0.isoformat()
+
+    latest = {r.track_pk: r.sample_t for r in compute_scores_at_timestamp(
+        scenario_id=sc.pk, when_iso=when, method="latest")}
+    assert latest == {fresh.pk: T0 - timedelta(seconds=2),
+                      old.pk: T0 - timedelta(seconds=90),
+                      bare.pk: None}  # Track snapshot, no sample
+
+    # Interpolated states are as fresh as the newer bracketing sample
+    linear = {r.track_pk: r.sample_t for r in compute_scores_at_timestamp(
+        scenario_id=sc.pk, when_iso=when, method="linear")}
+    assert linear[fresh.pk] == T0 + timedelta(seconds=3)
+    assert ThreatScore.objects.filter(track=fresh, sample_t=T0 + timedelta(seconds=3)).exists()
+
+
+@pytest.mark.django_db
+def test_scenario_runs_stamp_sample_t_and_feed_the_histogram(world, settings):
+    from tewa.services.threat_compute import batch_compute_for_scenario
+
+    sc, fresh, old, bare = world
+    settings.TEWA_METRICS_DIR = ""
+    metrics.REGISTRY.reset()
+
+    rows = batch_compute_for_scenario(sc.pk, sc.defended_assets.get().pk)
+
+    assert {r.track_id: r.sample_t for r in rows} == {
+        fresh.pk: T0 + timedelta(seconds=3),
+        old.pk: T0 - timedelta(seconds=90),
+        bare.pk: None}
+    assert scenario_freshness(sc.pk)["unknown"] == 1
+    assert "tewa_score_freshness_seconds_count 2" in metrics.render()
+    metrics.REGISTRY.reset()
+
+
+@pytest.mark.django_db
+def test_report_uses_latest_row_per_track_and_scenario_threshold(world, settings):
+    sc, fresh, old, bare = world
+    settings.TEWA_METRICS_DIR = ""
+    metrics.REGISTRY.reset()
+    compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=T0.isoformat(), method="latest")
+    ModelParams.objects.filter(scenario=sc).update(freshness_alert_s=60.0)
+
+    report = scenario_freshness(sc.pk, now=T0 + timedelta(seconds=10))
+
+    assert report["alert_threshold_s"] == 60.0
+    assert report["tracks"] == 3 and report["unknown"] == 1
+    assert report["age"]["count"] == 2
+    assert report["age"]["max_s"] == 100.0
+    bucket = {b["le"]: b["count"] for b in report["age"]["buckets"]}
+    assert bucket[10.0] == 0 and bucket[30.0] == 1 and bucket["+Inf"] == 2
+    assert [s["track_id"] for s in report["stale"]] == [old.track_id]
+    assert "tewa_score_freshness_seconds_count 2" in metrics.render()
+    metrics.REGISTRY.reset()
+
+
+@pytest.mark.django_db
+def test_freshness_endpoint(client, world):
+    sc = world[0]
+    compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=T0.isoformat(), method="latest")
+
+    resp = client.get(reverse("tewa_api:scenario_freshness", args=[sc.pk]))
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["alert_threshold_s"] == 30.0
+    assert body["stale_count"] == 2  # both sampled tracks are old relative to now
+
+    assert client.get(reverse("tewa_api:scenario_freshness", args=[sc.pk + 999])).status_code == 404
@@ -0,0 +1,90 @@
+# tewa/tests/test_idempotency.py
+import threading
+import time
+
+import pytest
+
+from tewa.services import idempotency
+
+
+def test_result_is_replayed_within_ttl():
+    calls = []
+    first = idempotency.run_idempotent("k1", lambda: calls.append(1) or {"n": 1})
+    second = idempotency.run_idempotent("k1", lambda: calls.append(1) or {"n": 2})
+    assert first == ({"n": 1}, False)
+    assert second == ({"n": 1}, True)
+    assert len(calls) == 1
+
+
+def test_failure_is_not_stored():
+    def boom():
+        raise RuntimeError("compute failed")
+
+    with pytest.raises(RuntimeError):
+        idempotency.run_idempotent("k2", boom)
+    assert idempotency.run_idempotent("k2", lambda: "ok") == ("ok", False)
+
+
+def test_concurrent_duplicate_waits_for_first_result():
+    calls = []
+    started = threading.Event()
+
+    def slow():
+        calls.append(1)
+        started.set()
+        time.sleep(0.3)
+        return {"count": 7}
+
+    results = []
+    first = threading.Thread(
+        target=lambda: results.append(idempotency.run_idempotent("k3", slow)))
+    first.start()
+    started.wait(1)
+    second = idempotency.run_idempotent("k3", slow, wait_s=5)
+    first.join()
+
+    assert len(calls) == 1
+    assert second == ({"count": 7}, True)
+    assert results == [({"count": 7}, False)]
+
+
+def test_duplicate_gives_up_after_wait():
+    release = threading.Event()
+    started = threading.Event()
+
+    def blocked():
+        started.set()
+        release.wait(5)
+        return 1
+
+    t = threading.Thread(target=lambda: idempotency.run_idempotent("k4", blocked))
+    t.start()
+    started.wait(1)
+    try:
+        with pytest.raises(idempotency.IdempotencyInProgress):
+            idempotency.run_idempotent("k4", blocked, wait_s=0.1)
+    finally:
+        release.set()
+        t.join()
+
+
+@pytest.mark.django_db
+def test_default_store_is_shared_through_the_database(monkeypatch):
+    from django.conf import settings
+    from django.core.cache import CacheHandler
+
+    from missile_model import settings as project
+
+    if project._TEWA_CACHE_URL:
+        pytest.skip("TEWA_CACHE_URL selects Redis")
+    conf = project.CACHES["idempotency"]
+    assert conf["BACKEND"] == "django.core.cache.backends.db.DatabaseCache"
+
+    # Two cache handlers stand in for two gunicorn workers
+    calls = []
+    for _ in range(2):
+        monkeypatch.setattr(idempotency, "caches",
+                            CacheHandler({**settings.CACHES, "idempotency": conf}))
+        result = idempotency.run_idempotent("k5", lambda: calls.append(1) or {"n": 5})
+    assert result == ({"n": 5}, True)
+    assert len(calls) == 1
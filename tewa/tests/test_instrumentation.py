@@ -0,0 +1,85 @@
+# tewa/tests/test_instrumentation.py
+import logging
+
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tewa.models import Scenario
+from tewa.services.instrumentation import NullTimer, start_timer
+from tewa.services.threat_compute import batch_compute_for_scenario
+from tewa.tests.factories import create_da, create_scenario, create_tracks
+
+
+def test_stage_timer_accumulates_stages_queries_and_counters(db):
+    with start_timer("unit", scenario_id=1) as timer:
+        for _ in range(3):
+            with timer.stage("load"):
+                list(Scenario.objects.all())
+        with timer.stage("cpu"):
+            sum(range(1000))
+        timer.count("pairs", 5)
+
+    s = timer.summary()
+    assert s["name"] == "unit" and s["scenario_id"] == 1
+    assert s["stages"]["load"]["calls"] == 3 and s["stages"]["load"]["queries"] == 3
+    assert s["stages"]["cpu"]["queries"] == 0
+    assert s["queries"] == 3 and s["counters"] == {"pairs": 5}
+    assert s["wall_ms"] >= s["stages"]["load"]["wall_ms"]
+
+
+def test_compute_at_returns_stage_timings(db):
+    sc = create_scenario("Timed")
+    da = create_da(sc, radius_km=10.0)
+    create_tracks(sc, 2)
+
+    body = APIClient().post(reverse("tewa_api:compute-at"), {
+        "scenario_id": sc.id, "when": "2025-01-01T00:00:00Z", "da_ids": [da.id],
+    }, format="json").json()
+
+    t = body["timings"]
+    for stage in ("load", "fetch_tracks", "sample", "kinematics", "scoring", "persist"):
+        assert stage in t["stages"]
+    assert t["counters"]["pairs"] == t["counters"]["rows"] == 2
+    assert t["queries"] > 0
+
+
+def test_batch_compute_logs_instead_of_printing(db, caplog, capsys):
+    sc = create_scenario("Logged")
+    da = create_da(sc, radius_km=10.0)
+    create_tracks(sc, 2)
+
+    with caplog.at_level(logging.INFO, logger="tewa.services.instrumentation"):
+        rows = batch_compute_for_scenario(sc.id, da.id)
+
+    assert len(rows) == 2 and all(r.pk for r in rows)
+    assert capsys.readouterr().out == ""
+    rec = next(r for r in caplog.records if r.name == "tewa.services.instrumentation")
+    assert rec.tewa_timings["counters"]["rows"] == 2
+
+
+def test_disabled_by_setting(settings):
+    settings.TEWA_INSTRUMENTATION = False
+    with start_timer("off") as timer:
+        with timer.stage("x"):
+            pass
+    assert isinstance(timer, NullTimer) and timer.summary() is None
+
+
+def test_pair_stages_are_timed_per_batch_not_per_pair(db):
+    from django.utils import timezone
+
+    from tewa.services.engine import compute_scores_at_timestamp
+    from tewa.services.instrumentation import StageTimer
+
+    sc = create_scenario("Timer-Batches")
+    create_da(sc, name="A")
+    create_da(sc, name="B")
+    create_tracks(sc, 5)
+
+    with StageTimer("t") as timer:
+        rows = compute_scores_at_timestamp(
+            scenario_id=sc.id, when_iso=timezone.now().isoformat(), timer=timer)
+
+    s = timer.summary()
+    assert len(rows) == 10 and s["counters"]["pairs"] == 10
+    assert s["stages"]["kinematics"]["calls"] == s["stages"]["scoring"]["calls"] == 1
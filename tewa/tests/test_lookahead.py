@@ -0,0 +1,108 @@
+# tewa/tests/test_lookahead.py
+import math
+import random
+from datetime import datetime, timezone
+
+import pytest
+from django.urls import reverse
+
+from tewa.models import DefendedAsset, Track
+from tewa.services.lookahead import COMPONENTS, lookahead, threat_curves
+from tewa.services.scoring import _coerce_params
+from tewa.tests.factories import create_da, create_scenario
+
+np = pytest.importorskip("numpy")
+
+T0 = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+PARAMS = dict(_coerce_params({}))
+
+
+def _state(lat, lon, speed, hdg):
+    return {"lat": lat, "lon": lon, "alt_m": 1000.0, "speed_mps": speed,
+            "heading_deg": hdg, "t": T0}
+
+
+def test_vectorized_curves_match_scalar_kernels():
+    rng = random.Random(7)
+    das = [DefendedAsset(lat=rng.uniform(-1, 1), lon=rng.uniform(-1, 1),
+                         radius_km=rng.uniform(2, 30)) for _ in range(4)]
+    states = [_state(rng.uniform(-2, 2), rng.uniform(-2, 2), rng.uniform(0, 400),
+                     rng.uniform(0, 360)) for _ in range(25)]
+    states += [_state(0.0, 0.0, 0.0, 90.0),       # stationary
+               _state(das[0].lat, das[0].lon, 250.0, 10.0)]  # inside a DA
+    offsets = [0.0, 30.0, 60.0, 300.0, 900.0]
+
+    fast = threat_curves(states, das, offsets, PARAMS, weapon_range_km=40.0)
+    slow = threat_curves(states, das, offsets, PARAMS, weapon_range_km=40.0, vectorized=False)
+
+    for key in (*COMPONENTS, "score"):
+        np.testing.assert_allclose(fast[key], np.array(slow[key], dtype=float),
+                                   rtol=1e-6, atol=1e-6, err_msg=key)
+
+
+@pytest.mark.django_db
+def test_peak_and_time_to_peak_for_inbound_and_outbound_tracks():
+    sc = create_scenario("Lookahead-Scenario")
+    da = create_da(sc, lat=0.0, lon=0.0, radius_km=5.0)
+    # 60 km north of the DA: one flying at it, one flying away
+    Track.objects.create(scenario=sc, track_id="IN", lat=0.54, lon=0.0, alt_m=1000,
+                         speed_mps=200.0, heading_deg=180.0)
+    Track.objects.create(scenario=sc, track_id="OUT", lat=0.54, lon=0.0, alt_m=1000,
+                         speed_mps=200.0, heading_deg=0.0)
+
+    res = lookahead(scenario_id=sc.pk, when=T0, horizon_s=600, step_s=10, series=True)
+
+    assert res["steps"] == 61
+    by_id = {t["track_id"]: t for t in res["tracks"]}
+    inbound, outbound = by_id["IN"], by_id["OUT"]
+    assert res["tracks"][0]["track_id"] == "IN"  # ordered by peak score
+    assert inbound["peak_da_id"] == da.pk
+    assert 200.0 <= inbound["time_to_peak_s"] <= 300.0  # ~60 km at 200 m/s, minus the ring
+    assert inbound["peak_score"] > inbound["das"][0]["score_now"]
+    # Receding: the curve never rises above where it starts
+    assert outbound["time_to_peak_s"] == 0.0
+    assert outbound["peak_score"] < inbound["peak_score"]
+    assert len(inbound["das"][0]["scores"]) == 61
+    assert inbound["das"][0]["scores"][0] == inbound["das"][0]["score_now"]
+
+
+@pytest.mark.django_db
+def test_lookahead_endpoint(client):
+    sc = create_scenario("Lookahead-API")
+    create_da(sc)
+    Track.objects.create(scenario=sc, track_id="T1", lat=0.3, lon=0.3, alt_m=1000,
+                         speed_mps=250.0, heading_deg=225.0)
+    url = reverse("tewa_api:lookahead")
+
+    resp = client.get(url, {"scenario_id": sc.pk, "horizon_s": 300, "step_s": 30})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["steps"] == 11 and len(body["tracks"]) == 1
+    track = body["tracks"][0]
+    assert set(track["das"][0]["at_peak"]) == set(COMPONENTS)
+    assert not math.isnan(track["peak_score"])
+
+    assert client.get(url, {"scenario_id": sc.pk + 999}).status_code == 404
+    too_many = client.get(url, {"scenario_id": sc.pk, "horizon_s": 3600, "step_s": 0.5})
+    assert too_many.status_code == 400
+
+
+@pytest.mark.django_db
+def test_lookahead_scores_unscoped_das_in_bounded_chunks(monkeypatch):
+    from tewa.services import lookahead as la
+
+    sc = create_scenario("Lookahead-Chunks")
+    DefendedAsset.objects.create(name="DA-free", lat=0.0, lon=0.0, radius_km=5.0)
+    for i in range(7):
+        Track.objects.create(scenario=sc, track_id=f"T{i}", lat=0.1 * i, lon=0.2,
+                             alt_m=1000, speed_mps=220.0, heading_deg=200.0 + 5 * i)
+
+    whole = lookahead(scenario_id=sc.pk, when=T0, horizon_s=300, step_s=30)
+    assert [d["name"] for d in whole["das"]] == ["DA-free"] and len(whole["tracks"]) == 7
+
+    monkeypatch.setattr(la, "CHUNK_CELLS", 11 * 2)  # two tracks per pass
+    assert lookahead(scenario_id=sc.pk, when=T0, horizon_s=300, step_s=30) == whole
+
+    monkeypatch.setattr(la, "MAX_SERIES_VALUES", 7 * 11 - 1)
+    with pytest.raises(ValueError, match="series"):
+        lookahead(scenario_id=sc.pk, when=T0, horizon_s=300, step_s=30, series=True)
@@ -0,0 +1,74 @@
+# tewa/tests/test_lttb.py
+import math
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from django.urls import reverse
+
+from tewa.services import score_history
+from tewa.services.score_history import downsample_lttb
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _series(n, seed=7):
+    rnd = random.Random(seed)
+    return [
+        (T0 + timedelta(seconds=i), 0.5 + 0.3 * math.sin(i / 50.0) + rnd.uniform(-0.05, 0.05))
+        for i in range(n)
+    ]
+
+
+def test_lttb_caps_points_and_keeps_endpoints_and_peak():
+    pts = _series(20_000)
+    # Inject a single-sample spike that naive striding would miss
+    pts[12_345] = (pts[12_345][0], 1.0)
+
+    out = downsample_lttb(pts, 1600)
+    assert len(out) == 1600
+    assert out[0] == pts[0] and out[-1] == pts[-1]
+    assert max(s for _, s in out) == 1.0
+    assert [t for t, _ in out] == sorted(t for t, _ in out)
+
+
+def test_lttb_numpy_and_python_paths_agree():
+    pts = _series(5_000)
+    xs = [t.timestamp() for t, _ in pts]
+    ys = [s for _, s in pts]
+    assert score_history._lttb_indices_np(xs, ys, 300) == \
+        score_history._lttb_indices_py(xs, ys, 300)
+
+
+def test_lttb_short_or_disabled_returns_input():
+    pts = _series(10)
+    assert downsample_lttb(pts, 100) == pts
+    assert downsample_lttb(pts, None) == pts
+    assert downsample_lttb(pts, 0) == pts
+
+
+def test_score_history_json_ok(client, db, seeded_scenario_with_scores):
+    s = seeded_scenario_with_scores
+    resp = client.get(reverse("tewa_api:score_history_json"), {
+        "scenario_id": s["scenario"].id,
+        "da_id": s["da"].id,
+        "track_id": s["track"].id,
+        "max_points": 4,
+    })
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["count"] == 4
+    assert body["points"][0]["score"] == pytest.approx(0.20)
+    assert body["points"][-1]["score"] == pytest.approx(0.70)
+
+
+@pytest.mark.parametrize("max_points", ["lots", "-5"])
+def test_score_history_png_bad_max_points(client, db, seeded_scenario_with_scores, max_points):
+    s = seeded_scenario_with_scores
+    resp = client.get(reverse("score_history_png"), {
+        "scenario_id": s["scenario"].id,
+        "da_id": s["da"].id,
+        "track_id": s["track"].id,
+        "max_points": max_points,
+    })
+    assert resp.status_code == 400
@@ -0,0 +1,92 @@
+# tewa/tests/test_precision.py
+import math
+import random
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from tewa.benchmarks.precision import precision_table
+from tewa.models import ModelParams, ThreatScore, Track
+from tewa.services.engine import compute_scores_at_timestamp
+from tewa.services.kinematics import PRECISIONS, compute_cpa_tcpa_tdb_twrp, local_frame
+from tewa.tests.factories import create_da, create_scenario
+
+np = pytest.importorskip("numpy")
+kinematics_np = pytest.importorskip("tewa.services.kinematics_np")
+
+
+def test_vectorized_tiers_match_scalar_kernels():
+    rng = random.Random(11)
+    rows = []
+    for _ in range(200):
+        da_lat, da_lon = rng.uniform(-60, 60), rng.uniform(-150, 150)
+        rows.append((da_lat, da_lon, da_lat + rng.uniform(-8, 8), da_lon + rng.uniform(-8, 8),
+                     rng.uniform(0, 400), rng.uniform(0, 360), rng.uniform(1, 30)))
+    rows.append((10.0, 20.0, 10.0, 20.0, 250.0, 45.0, 5.0))  # on top of the DA
+    da_lat, da_lon, lat, lon, spd, hdg, radius = (np.array(c) for c in zip(*rows))
+
+    for tier in PRECISIONS:
+        cpa, tcpa, tdb, twrp = kinematics_np.components(
+            lat, lon, spd, hdg, da_lat, da_lon, radius, 40.0, precision=tier)
+        for i, (a, b, c, d, s, h, r) in enumerate(rows):
+            k = compute_cpa_tcpa_tdb_twrp(da_lat=a, da_lon=b, da_radius_km=r, trk_lat=c,
+                                          trk_lon=d, speed_mps=s, heading_deg=h,
+                                          weapon_range_km=40.0, precision=tier)
+            assert cpa[i] == pytest.approx(k.cpa_km, rel=1e-6, abs=1e-9), tier
+            assert tcpa[i] == pytest.approx(k.tcpa_s, rel=1e-6, abs=1e-6), tier
+            assert tdb[i] == pytest.approx(k.tdb_s, rel=1e-6, abs=1e-6), tier
+            assert twrp[i] == pytest.approx(math.inf if k.twrp_s is None else k.twrp_s,
+                                            rel=1e-6, abs=1e-6), tier
+
+
+def test_tiers_agree_up_close_and_diverge_with_range():
+    # 1 km away the tiers differ by a few metres, and the heading barely turns
+    frames = [local_frame(da_lat=45.0, da_lon=7.0, trk_lat=45.009, trk_lon=7.0,
+                          heading_deg=90.0, precision=t) for t in PRECISIONS]
+    for e, n, h in frames:
+        assert (e, n) == pytest.approx(frames[-1][:2], abs=10.0)
+        assert h == pytest.approx(90.0, abs=1e-3)
+    with pytest.raises(ValueError):
+        local_frame(da_lat=0, da_lon=0, trk_lat=0, trk_lon=0, heading_deg=0, precision="exact")
+
+    table = precision_table(n=300, ranges_km=(10.0, 1000.0), repeats=1)
+    tiers = table["tiers"]
+    assert set(tiers) == set(PRECISIONS)
+    assert all(v == 0.0 for band in tiers["ellipsoidal"]["bands"].values() for v in band.values())
+    enu = tiers["enu"]["bands"]
+    assert enu["1000"]["bearing_err_deg_max"] > 10 * enu["10"]["bearing_err_deg_max"]
+    assert tiers["spherical"]["bands"]["1000"]["range_err_m_max"] < 0.01 * 1_000_000
+
+
+@pytest.mark.django_db
+def test_engine_and_api_honour_precision(client):
+    sc = create_scenario("Precision-Scenario")
+    da = create_da(sc, lat=60.0, lon=10.0, radius_km=10.0)
+    # ~700 km south-east of the DA, flying north-west past it
+    Track.objects.create(scenario=sc, track_id="FAR", lat=55.0, lon=18.0, alt_m=9000,
+                         speed_mps=250.0, heading_deg=320.0)
+    when = timezone.now().isoformat()
+
+    enu = compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=when, da_ids=[da.pk])
+    ell = compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=when, da_ids=[da.pk],
+                                      precision="ellipsoidal")
+    assert abs(enu[0].cpa_km - ell[0].cpa_km) > 1.0  # km-level drift at this range
+
+    # Per-scenario setting is the default for calls that do not pass one
+    ModelParams.objects.filter(scenario=sc).update(geodesy_precision="ellipsoidal")
+    again = compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=when, da_ids=[da.pk])
+    assert again[0].cpa_km == pytest.approx(ell[0].cpa_km)
+
+    url = reverse("tewa_api:compute-at")
+    body = {"scenario_id": sc.pk, "when": when, "da_ids": [da.pk]}
+    assert client.post(url, {**body, "precision": "exact"},
+                       content_type="application/json").status_code == 400
+    resp = client.post(url, {**body, "precision": "enu"}, content_type="application/json")
+    assert resp.status_code == 200
+    row = ThreatScore.objects.get(batch_id=resp.json()["batch_id"])
+    assert row.cpa_km == pytest.approx(enu[0].cpa_km)
+
+    la = client.get(reverse("tewa_api:lookahead"),
+                    {"scenario_id": sc.pk, "horizon_s": 60, "precision": "spherical"})
+    assert la.status_code == 200 and la.json()["precision"] == "spherical"
@@ -0,0 +1,107 @@
+# tewa/tests/test_prefilter.py
+import random
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from core.utils.geodesy import LatLon, haversine_distance_m
+from tewa.models import ThreatScore, Track
+from tewa.services import prefilter
+from tewa.services.engine import compute_scores_at_timestamp
+from tewa.services.kinematics import PRECISIONS, LocalFrame, frame_kinematics
+from tewa.services.score_breakdown_service import get_score_breakdown
+from tewa.services.scoring import score_components_to_threat
+from tewa.tests.factories import create_da, create_scenario
+
+
+def test_grid_query_matches_brute_force():
+    rng = random.Random(3)
+    das = [LocalFrame.build(rng.uniform(-80, 80), rng.uniform(-180, 180), 5.0)
+           for _ in range(400)]
+    index = prefilter.DAIndex(das, cell_m=300_000.0)
+    for _ in range(200):
+        lat, lon, arc = rng.uniform(-85, 85), rng.uniform(-180, 180), rng.uniform(1e4, 2e6)
+        got = set(index.query(lat, lon, arc))
+        for i, f in enumerate(das):
+            d = haversine_distance_m(LatLon(lat, lon), LatLon(f.lat, f.lon))
+            if d <= arc * 0.999:
+                assert i in got
+            elif d > arc * 1.001:
+                assert i not in got
+
+
+def test_pruned_pairs_score_within_reported_bound():
+    rng = random.Random(9)
+    params = {"w_cpa": 0.35, "w_tcpa": 0.25, "w_tdb": 0.2, "w_twrp": 0.2}
+    das = [LocalFrame.build(rng.uniform(-50, 50), rng.uniform(-140, 140), rng.uniform(2, 20))
+           for _ in range(60)]
+    tracks = [(k, rng.uniform(-55, 55), rng.uniform(-145, 145), rng.uniform(0, 600),
+               rng.uniform(0, 360)) for k in range(80)]
+
+    plan = prefilter.plan_pairs([t[:4] for t in tracks], das, params,
+                                horizon_s=300.0, weapon_range_km=40.0)
+    report = plan.report()
+    assert report["pairs"] == 80 * 60 and report["pruned"] > 0
+    assert report["scored"] + report["pruned"] == report["pairs"]
+
+    checked = 0
+    for key, lat, lon, spd, hdg in tracks:
+        for j, f in enumerate(das):
+            if plan.kept(key, j):
+                continue
+            for tier in PRECISIONS:
+                k = frame_kinematics(f, trk_lat=lat, trk_lon=lon, speed_mps=spd,
+                                     heading_deg=hdg, weapon_range_km=40.0, precision=tier)
+                assert k.twrp_s is None or k.twrp_s >= 300.0
+                s = score_components_to_threat(cpa_km=k.cpa_km, tcpa_s=k.tcpa_s,
+                                               tdb_km=k.tdb_s, twrp_s=k.twrp_s, params=params)
+                assert plan.floor - 1e-9 <= s <= plan.upper + 1e-9
+                checked += 1
+    assert checked > 1000
+    assert report["error_bound"] == pytest.approx(plan.upper - plan.floor, abs=1e-6)
+
+
+@pytest.mark.django_db
+def test_engine_and_api_prune_out_of_reach_pairs(client):
+    sc = create_scenario("Prefilter")
+    near = create_da(sc, name="NEAR", lat=0.0, lon=0.0, radius_km=5.0)
+    far = create_da(sc, name="FAR", lat=0.0, lon=30.0, radius_km=5.0)  # ~3300 km east
+    for i in range(4):
+        Track.objects.create(scenario=sc, track_id=f"T{i}", lat=0.1 * i, lon=-0.2,
+                             alt_m=3000, speed_mps=200.0, heading_deg=90.0)
+    when = timezone.now().isoformat()
+    ids = [near.pk, far.pk]
+
+    full = compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=when, da_ids=ids)
+    report: dict = {}
+    pruned = compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=when, da_ids=ids,
+                                         horizon_s=600.0, prefilter_report=report)
+
+    assert report["pairs"] == 8 and report["pruned"] == 4 and report["pruning_ratio"] == 0.5
+    by_pair = {(r.track_id, r.da_id): r for r in full}
+    assert len(pruned) == 4 and all(r.da_id == near.pk for r in pruned)
+    for r in pruned:
+        assert r.score == by_pair[(r.track_id, r.da_id)].score
+    for r in full:
+        if r.da_id == far.pk:
+            assert report["floor_score"] <= r.score <= report["upper_bound"]
+    assert "not near zero" in report["note"]
+    with pytest.raises(ValueError):
+        compute_scores_at_timestamp(scenario_id=sc.pk, when_iso=when, horizon_s=-1)
+
+    url = reverse("tewa_api:compute-at")
+    body = {"scenario_id": sc.pk, "when": when, "da_ids": ids}
+    assert client.post(url, {**body, "horizon_s": -5},
+                       content_type="application/json").status_code == 400
+    resp = client.post(url, {**body, "horizon_s": 600}, content_type="application/json")
+    assert resp.status_code == 200
+    assert resp.json()["prefilter"]["pruned"] == 4
+    rows = ThreatScore.objects.filter(batch_id=resp.json()["batch_id"])
+    assert rows.count() == resp.json()["count"] == 4
+    assert not rows.filter(da=far).exists() and not rows.filter(cpa_km__isnull=True).exists()
+
+    ThreatScore.objects.exclude(batch_id=resp.json()["batch_id"]).delete()
+    bd = get_score_breakdown(scenario_id=sc.pk, track_id="T0", da_id=far.pk)
+    assert bd["source"] == "recomputed" and bd["metrics"]["tcpa_s"] > 10_000
+    assert "prefilter" not in client.post(url, body, content_type="application/json").json()
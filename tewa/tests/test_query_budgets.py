@@ -0,0 +1,356 @@
+# tewa/tests/test_query_budgets.py
+"""
+Query-count budgets for every API endpoint.
+
+Each URL name in tewa/api/urls.py and core/api/urls.py has a request spec
+below. The whole set is issued against a small synthetic world, the world is
+grown (a second, larger scenario plus more core rows), and the set is issued
+again against the larger data. An endpoint whose query count grows with the
+data has an N+1 (or an unbounded loop of queries); the failure lists the
+statements that grew. bulk_create / bulk_update batches are not counted.
+
+A new URL without a spec fails test_every_api_url_has_a_budget_spec.
+"""
+from __future__ import annotations
+
+import io
+import re
+from collections import Counter
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core.api import urls as core_api_urls
+from core.models import (
+    CrewDetail,
+    CrewRole,
+    FlightInfo,
+    SiteConfig,
+    TWCCConfiguration,
+)
+from tewa.api import urls as tewa_api_urls
+from tewa.models import ComputeJob, DefendedAsset, Track
+from tewa.services.engine import compute_scores_at_timestamp
+from tewa.services.synthetic import SyntheticSpec, generate_scenario
+
+pytestmark = pytest.mark.django_db
+
+
+@dataclass
+class World:
+    scenario_id: int
+    da_id: int
+    track_pk: int
+    track_id: str
+    job_id: str
+    crew_detail_id: int
+    site_config_key: str
+    unit_no: int
+    when_iso: str
+
+
+Spec = Tuple[str, Callable[[World], str], Optional[Callable[[World], Any]]]
+
+
+def _get(url: Callable[[World], str]) -> Spec:
+    return ("get", url, None)
+
+
+def _post(url: Callable[[World], str], data: Callable[[World], Any]) -> Spec:
+    return ("post", url, data)
+
+
+def _delete(url: Callable[[World], str]) -> Spec:
+    return ("delete", url, None)
+
+
+def _upload(url: Callable[[World], str], csv_text: Callable[[World], str]) -> Spec:
+    def data(w: World) -> Dict[str, Any]:
+        f = io.StringIO(csv_text(w))
+        f.name = "tracks.csv"
+        return {"file": f}
+    return ("multipart", url, data)
+
+
+def _q(name: str, **kwargs: Any) -> Callable[[World], str]:
+    """URL for `name` with query params drawn from the world (callables) or literals."""
+    def build(w: World) -> str:
+        params = {k: (v(w) if callable(v) else v) for k, v in kwargs.items()}
+        qs = "&".join(f"{k}={v}" for k, v in params.items())
+        return reverse(name) + (f"?{qs}" if qs else "")
+    return build
+
+
+def _sid(w: World) -> int:
+    return w.scenario_id
+
+
+def _da(w: World) -> int:
+    return w.da_id
+
+
+def _tid(w: World) -> str:
+    return w.track_id
+
+
+T = "tewa_api:"
+C = "core_api:"
+
+SPECS: Dict[str, Spec] = {
+    # ---- tewa_api ----
+    T + "ping": _get(_q(T + "ping")),
+    T + "root": _get(_q(T + "root")),
+    T + "scenarios": _get(_q(T + "scenarios")),
+    T + "score-list-alias": _get(_q(T + "score-list-alias", scenario_id=_sid)),
+    T + "compute-at": _post(_q(T + "compute-at"), lambda w: {
+        "scenario_id": w.scenario_id, "when": w.when_iso, "da_ids": [w.da_id]}),
+    T + "compute_now": _post(_q(T + "compute_now"), lambda w: {"scenario_id": w.scenario_id}),
+    T + "compute_now_v1": _post(_q(T + "compute_now_v1"), lambda w: {"scenario_id": w.scenario_id}),
+    T + "ranking": _get(_q(T + "ranking", scenario_id=_sid, top_n=3)),
+    T + "calculate_scores": _post(_q(T + "calculate_scores"), lambda w: {
+        "scenario_id": w.scenario_id, "when": w.when_iso, "da_ids": [w.da_id]}),
+    T + "upload_tracks": _upload(_q(T + "upload_tracks"), lambda w: (
+        "track_id,lat,lon,alt_m,speed_mps,heading_deg,timestamp\n"
+        f"UP-{w.scenario_id},26.9,72.0,1000,250,90,2025-01-01T00:00:00Z\n"
+        f"UP-{w.scenario_id},26.9,72.1,1000,250,90,2025-01-01T00:00:05Z\n")),
+    T + "compute_job_status": _get(lambda w: reverse(T + "compute_job_status", args=[w.job_id])),
+    T + "compute_job_cancel": _post(
+        lambda w: reverse(T + "compute_job_cancel", args=[w.job_id]), lambda w: {}),
+    T + "compute_stats": _get(_q(T + "compute_stats")),
+    T + "score-breakdown": _get(_q(T + "score-breakdown", scenario_id=_sid, da_id=_da, track_id=_tid)),
+    T + "score_breakdown_alias": _get(_q(T + "score_breakdown_alias",
+                                         scenario_id=_sid, da_id=_da, track_id=_tid)),
+    T + "score_breakdown": _get(_q(T + "score_breakdown", scenario_id=_sid, da_id=_da)),
+    T + "score_breakdown_batch": _get(_q(T + "score_breakdown_batch",
+                                         scenario_id=_sid, da_id=_da, track_ids="all")),
+    T + "export_threat_board_csv": _get(_q(T + "export_threat_board_csv", scenario_id=_sid)),
+    T + "scenario_params": _get(lambda w: reverse(T + "scenario_params", args=[w.scenario_id])),
+    T + "lookahead": _get(_q(T + "lookahead", scenario_id=_sid, horizon_s="120", series="1")),
+    T + "scenario_freshness": _get(lambda w: reverse(T + "scenario_freshness",
+                                                     args=[w.scenario_id])),
+    T + "score_history_png": _get(_q(T + "score_history_png", scenario_id=_sid, da_id=_da,
+                                     track_id=_tid, format="svg")),
+    T + "score_history_json": _get(_q(T + "score_history_json",
+                                      scenario_id=_sid, da_id=_da, track_id=_tid)),
+    T + "score_history_multi_png": _get(_q(T + "score_history_multi_png",
+                                           scenario_id=_sid, da_id=_da, manifest=1)),
+    T + "chart_stats": _get(_q(T + "chart_stats")),
+    T + "api_threatscores": _get(lambda w: reverse(T + "api_threatscores", args=[w.scenario_id])),
+    T + "tracks-ident-map-compat": _get(_q(T + "tracks-ident-map-compat")),
+    T + "tracks-mavlink-vs-flight-compat": _get(_q(T + "tracks-mavlink-vs-flight-compat")),
+    T + "tracks-insert-bulk-compat": _post(_q(T + "tracks-insert-bulk-compat"), lambda w: {}),
+    T + "api-root": _get(_q(T + "api-root")),
+    T + "defendedasset-list": _get(_q(T + "defendedasset-list", scenario_id=_sid)),
+    T + "defendedasset-detail": _get(lambda w: reverse(T + "defendedasset-detail", args=[w.da_id])),
+    T + "track-list": _get(_q(T + "track-list", scenario_id=_sid)),
+    T + "track-detail": _get(lambda w: reverse(T + "track-detail", args=[w.track_pk])),
+    # ---- core_api ----
+    C + "api-root": _get(_q(C + "api-root")),
+    C + "crew-detail-list": _get(_q(C + "crew-detail-list")),
+    C + "crew-detail-detail": _get(lambda w: reverse(C + "crew-detail-detail",
+                                                     args=[w.crew_detail_id])),
+    C + "siteconfig-list": _get(_q(C + "siteconfig-list")),
+    C + "siteconfig-detail": _get(lambda w: reverse(C + "siteconfig-detail",
+                                                    args=[w.site_config_key])),
+    C + "configuration": _get(_q(C + "configuration")),
+    C + "twcc_config": _get(_q(C + "twcc_config")),
+    C + "crewdetails": _get(_q(C + "crewdetails")),
+    C + "crewrole": _get(_q(C + "crewrole")),
+    C + "flightinfo": _get(_q(C + "flightinfo")),
+    C + "flightinfo_po": _get(_q(C + "flightinfo_po")),
+    C + "flightinfo_i": _get(_q(C + "flightinfo_i")),
+    C + "sagw_types": _get(_q(C + "sagw_types")),
+    C + "unit_sagw_type": _get(_q(C + "unit_sagw_type", unit_no=lambda w: w.unit_no)),
+    # Destructive: keep last (they run after the reads of the same world)
+    C + "crew-detail-replace": _post(_q(C + "crew-detail-replace"), lambda w: [
+        {"unit_no": "1", "flight_no": "FL-R", "crew_role": "pilot", "crew_name": "R",
+         "personal_no": "PR", "cat_state": "A", "current_datetime": w.when_iso}]),
+    C + "crew-detail-clear": _delete(_q(C + "crew-detail-clear")),
+}
+
+# (das, tracks, samples per track, core rows of each kind)
+SIZES = {"small": (2, 4, 4, 3), "large": (6, 15, 4, 12)}
+
+
+# ---------------------------------------------------------------------
+# URL enumeration
+# ---------------------------------------------------------------------
+
+def _url_names(patterns, namespace: str) -> set:
+    names = set()
+    for p in patterns:
+        if isinstance(p, URLResolver):
+            names |= _url_names(p.url_patterns, namespace)
+        elif isinstance(p, URLPattern) and p.name:
+            names.add(f"{namespace}:{p.name}")
+    return names
+
+
+def _all_api_url_names() -> set:
+    return (_url_names(tewa_api_urls.urlpatterns, "tewa_api")
+            | _url_names(core_api_urls.urlpatterns, "core_api"))
+
+
+# ---------------------------------------------------------------------
+# Data
+# ---------------------------------------------------------------------
+
+def _seed_world(label: str, das: int, tracks: int, samples: int, core_rows: int) -> World:
+    start = timezone.now().replace(microsecond=0) - timedelta(minutes=5)
+    seeded = generate_scenario(SyntheticSpec(
+        name=f"budget-{label}", n_das=das, n_tracks=tracks,
+        samples_per_track=samples, seed=7, start=start))
+    sid = int(seeded["scenario_id"])  # type: ignore[arg-type]
+    when = start + timedelta(seconds=5)
+    # Two batches so "latest per track" and history queries see real history
+    compute_scores_at_timestamp(scenario_id=sid, when_iso=when.isoformat())
+    compute_scores_at_timestamp(scenario_id=sid, when_iso=(when + timedelta(seconds=5)).isoformat())
+
+    now = timezone.now()
+    base = CrewRole.objects.count()
+    CrewRole.objects.bulk_create([
+        CrewRole(role_id=base + i + 1, role_name=f"{label}-role-{i}") for i in range(core_rows)])
+    CrewDetail.objects.bulk_create([
+        CrewDetail(unit_no=str(i % 3), flight_no=f"FL-{i}", crew_role="pilot",
+                   crew_name=f"{label}-{i}", personal_no=f"P{i}", cat_state="A",
+                   current_datetime=now)
+        for i in range(core_rows)])
+    FlightInfo.objects.bulk_create([
+        FlightInfo(unitno=i % 3, flightno=f"{label}-FL-{i}", type_of_sagw_weapon=1 + i % 3)
+        for i in range(core_rows)])
+    SiteConfig.objects.bulk_create([
+        SiteConfig(key=f"{label}.key{i}", payload={"i": i}) for i in range(core_rows)])
+    TWCCConfiguration.objects.create(version=label)
+
+    da = DefendedAsset.objects.filter(scenario_id=sid).order_by("id").first()
+    track = Track.objects.filter(scenario_id=sid).order_by("id").first()
+    job = ComputeJob.objects.create(kind=ComputeJob.KIND_COMPUTE_NOW, scenario_id=sid)
+    return World(
+        scenario_id=sid,
+        da_id=da.pk,  # type: ignore[union-attr]
+        track_pk=track.pk,  # type: ignore[union-attr]
+        track_id=track.track_id,  # type: ignore[union-attr]
+        job_id=str(job.pk),
+        crew_detail_id=CrewDetail.objects.order_by("id").first().pk,  # type: ignore[union-attr]
+        site_config_key=f"{label}.key0",
+        unit_no=1,
+        when_iso=when.isoformat(),
+    )
+
+
+# ---------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|-?\b\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.I)
+_ROW = r"\((?:\?|NULL)(?:, (?:\?|NULL))*\)"
+_PARAM_LISTS = re.compile(rf"{_ROW}(?:, {_ROW})*")
+_CASE_ARMS = re.compile(r"(?: WHEN \([^()]* = \?\) THEN \?)+")
+_SAVEPOINTS = re.compile(r'SAVEPOINT "[^"]+"')
+
+
+def _shape(sql: str) -> str:
+    """SQL with literals, IN/VALUES lists and CASE arms blanked, so repeats group together."""
+    sql = _PARAM_LISTS.sub("(...)", _LITERALS.sub("?", sql))
+    return _SAVEPOINTS.sub("SAVEPOINT ?", _CASE_ARMS.sub(" WHEN ... THEN ?", sql))
+
+
+def _is_batched_write(shape: str) -> bool:
+    """
+    bulk_create / bulk_update batches (and the savepoint around several). Their
+    number is rows / the backend's batch limit: the cost of writing the rows,
+    not an N+1, so they are left out of the budget.
+    """
+    return (
+        (shape.startswith("INSERT") and "VALUES (...)" in shape)
+        or (shape.startswith("UPDATE") and " WHEN ... THEN ?" in shape)
+        or "SAVEPOINT" in shape
+    )
+
+
+def _measure(client: APIClient, spec: Spec, world: World) -> Tuple[int, List[str], int]:
+    method, url, data = spec
+    with CaptureQueriesContext(connection) as ctx:
+        if method == "post":
+            resp = client.post(url(world), data(world) if data else {}, format="json")
+        elif method == "multipart":
+            resp = client.post(url(world), data(world) if data else {}, format="multipart")
+        else:
+            resp = getattr(client, method)(url(world))
+        # Streaming responses run their queries while being consumed
+        if getattr(resp, "streaming", False):
+            b"".join(resp.streaming_content)
+    shapes = [_shape(q["sql"]) for q in ctx.captured_queries]
+    counted = [sql for sql in shapes if not _is_batched_write(sql)]
+    return len(counted), counted, resp.status_code
+
+
+def _report(name: str, small: Tuple[int, List[str], int], large: Tuple[int, List[str], int]) -> str:
+    grown = Counter(large[1]) - Counter(small[1])
+    lines = [f"{name}: {small[0]} queries on the small world, {large[0]} on the large one "
+             f"(HTTP {small[2]} / {large[2]}). Statements that grew:"]
+    for sql, n in grown.most_common(5):
+        lines.append(f"  +{n} x {sql[:400]}")
+    return "\n".join(lines)
+
+
+@pytest.fixture
+def client():
+    user = get_user_model().objects.create_user(
+        username="budget", password="pw", is_staff=True)
+    c = APIClient()
+    c.force_authenticate(user=user)
+    return c
+
+
+def test_every_api_url_has_a_budget_spec():
+    missing = _all_api_url_names() - set(SPECS)
+    assert not missing, f"API URLs without a query-budget spec: {sorted(missing)}"
+    stale = set(SPECS) - _all_api_url_names()
+    assert not stale, f"Specs for URLs that no longer exist: {sorted(stale)}"
+
+
+def test_query_count_does_not_grow_with_data(client, settings):
+    settings.TEWA_COMPUTE_JOBS_BACKEND = "eager"
+    settings.TEWA_SINGLEFLIGHT_TTL_S = 0
+
+    runs: Dict[str, Dict[str, Tuple[int, List[str], int]]] = {}
+    for label, size in SIZES.items():
+        world = _seed_world(label, *size)
+        runs[label] = {name: _measure(client, spec, world) for name, spec in SPECS.items()}
+
+    broken = [f"{name}: HTTP {runs[label][name][2]}" for label in runs for name in SPECS
+              if runs[label][name][2] >= 500]
+    assert not broken, "Budget specs must exercise a working endpoint: " + ", ".join(broken)
+
+    over = [
+        _report(name, runs["small"][name], runs["large"][name])
+        for name in SPECS
+        if runs["large"][name][0] > runs["small"][name][0]
+    ]
+    assert not over, "Query count grows with data size:\n\n" + "\n\n".join(over)
+
+
+@pytest.mark.parametrize("method", ["latest", "linear"])
+def test_batched_sampling_matches_per_track(method):
+    from tewa.services.sampling import sample_track_state_at, sample_track_states_at
+
+    start = timezone.now().replace(microsecond=0)
+    sid = generate_scenario(SyntheticSpec(
+        name="sampling-parity", n_das=1, n_tracks=6, samples_per_track=5, start=start))["scenario_id"]
+    Track.objects.create(scenario_id=sid, track_id="NO-SAMPLES", lat=1.0, lon=2.0,
+                         alt_m=0.0, speed_mps=100.0, heading_deg=0.0)
+    tracks = list(Track.objects.filter(scenario_id=sid))
+
+    for when in (start - timedelta(seconds=1), start + timedelta(seconds=7), start + timedelta(minutes=5)):
+        batched = sample_track_states_at(tracks, when, method=method)
+        for t in tracks:
+            assert batched[t.pk] == sample_track_state_at(t, when, method=method)
@@ -0,0 +1,200 @@
+# tewa/tests/test_score_breakdown_read.py
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from tewa.models import ModelParams, ThreatScore
+from tewa.services import score_breakdown_service as svc
+from tewa.tests.factories import create_da, create_scenario, create_tracks
+
+
+@pytest.fixture
+def pair(db):
+    svc.clear_breakdown_memo()
+    sc = create_scenario("Breakdown-Read")
+    da = create_da(sc, radius_km=10.0)
+    trk = create_tracks(sc, 1)[0]
+    return sc, da, trk
+
+
+def _store_row(sc, da, trk, **kw):
+    row = ThreatScore.objects.create(
+        scenario=sc, da=da, track=trk,
+        cpa_km=2.0, tcpa_s=60.0, tdb_km=5.0, twrp_s=30.0, score=0.42, **kw)
+    row.computed_at = timezone.now() + timedelta(seconds=1)
+    row.save(update_fields=["computed_at"])
+    return row
+
+
+def test_read_path_serves_stored_row_without_writing(pair):
+    sc, da, trk = pair
+    _store_row(sc, da, trk)
+
+    data = svc.get_score_breakdown(scenario_id=sc.id, track_id=trk.track_id, da_id=da.id)
+
+    assert data["source"] == "stored"
+    assert data["score"] == data["total_score"] == 0.42
+    assert data["cpa_km"] == 2.0 and data["metrics"]["cpa_m"] == 2000.0
+    # Normalized values come from the current params' inv1 scales (defaults here)
+    assert data["normalized"]["cpa"] == pytest.approx(1.0 / (1.0 + 2.0 / 20.0))
+    for k in ("cpa", "tcpa", "tdb", "twrp"):
+        assert data["contributions"][k] == pytest.approx(
+            data["weights"][k] * data["normalized"][k])
+    assert ThreatScore.objects.count() == 1
+
+
+def test_params_change_rescores_stored_components(pair):
+    sc, da, trk = pair
+    _store_row(sc, da, trk)
+    mp = ModelParams.objects.create(scenario=sc, w_cpa=1.0, w_tcpa=0.0, w_tdb=0.0, w_twrp=0.0)
+    ModelParams.objects.filter(pk=mp.pk).update(
+        updated_at=timezone.now() + timedelta(minutes=1))
+
+    data = svc.get_score_breakdown(scenario_id=sc.id, track_id=str(trk.id), da_id=da.id)
+
+    assert data["source"] == "rescored"
+    assert data["score"] == pytest.approx(1.0 / (1.0 + 2.0 / mp.cpa_scale_km))
+    assert ThreatScore.objects.count() == 1
+
+
+def test_stale_pair_recomputes_once_then_memoizes(pair, monkeypatch):
+    sc, da, trk = pair  # no stored row yet → recompute from track state
+    calls = []
+    real = svc.frame_kinematics
+    monkeypatch.setattr(svc, "frame_kinematics",
+                        lambda frame, **kw: calls.append(kw) or real(frame, **kw))
+
+    first = svc.get_score_breakdown(scenario_id=sc.id, track_id=trk.track_id, da_id=da.id)
+    second = svc.get_score_breakdown(scenario_id=sc.id, track_id=trk.track_id, da_id=da.id)
+
+    assert first["source"] == "recomputed"
+    assert second == first
+    assert len(calls) == 1
+    assert ThreatScore.objects.count() == 0
+
+    # Track moves → version stamp changes → recomputed again
+    trk.lat += 0.1
+    trk.save()
+    svc.get_score_breakdown(scenario_id=sc.id, track_id=trk.track_id, da_id=da.id)
+    assert len(calls) == 2
+
+
+def test_at_before_any_history_is_not_found(pair):
+    sc, da, trk = pair
+    with pytest.raises(svc.ObjectDoesNotExist):
+        svc.get_score_breakdown(scenario_id=sc.id, track_id=trk.track_id, da_id=da.id,
+                                at_iso="2000-01-01T00:00:00Z")
+
+
+def test_post_appends_history_row(pair):
+    sc, da, trk = pair
+    _store_row(sc, da, trk)
+    _store_row(sc, da, trk)  # duplicates used to raise MultipleObjectsReturned
+
+    client = APIClient()
+    client.force_authenticate(get_user_model().objects.create_user("ops", password="x"))
+    url = reverse("tewa_api:score-breakdown")
+    params = f"?scenario_id={sc.id}&da_id={da.id}&track_id={trk.track_id}"
+
+    assert client.get(url + params).status_code == 200
+    assert ThreatScore.objects.count() == 2
+
+    assert client.post(url + params).status_code == 200
+    assert ThreatScore.objects.count() == 3
+
+
+def test_recompute_and_write_keep_fixed_weapon_range(db, monkeypatch):
+    svc.clear_breakdown_memo()
+    sc = create_scenario("Breakdown-Range")
+    da = create_da(sc, radius_km=3.0)  # not the 10 km TWRP has always been scored against
+    trk = create_tracks(sc, 1)[0]
+    seen = []
+    real_kin, real_raw = svc.frame_kinematics, svc.compute_breakdown_raw
+    monkeypatch.setattr(svc, "frame_kinematics",
+                        lambda frame, **kw: seen.append(kw["weapon_range_km"])
+                        or real_kin(frame, **kw))
+    monkeypatch.setattr(svc, "compute_breakdown_raw",
+                        lambda **kw: seen.append(kw["weapon_range_km"]) or real_raw(**kw))
+
+    svc.get_score_breakdown(scenario_id=sc.id, track_id=trk.track_id, da_id=da.id)
+    svc.get_score_breakdown(scenario_id=sc.id, track_id=trk.track_id, da_id=da.id, persist=True)
+    assert seen == [10.0, 10.0]
+
+
+def test_write_uses_the_scenario_geodesy_tier(pair):
+    from tewa.services import frames
+    from tewa.services.kinematics import frame_kinematics
+
+    sc, da, trk = pair
+    ModelParams.objects.update_or_create(scenario=sc, defaults={"geodesy_precision": "ellipsoidal"})
+
+    svc.get_score_breakdown(scenario_id=sc.id, track_id=trk.track_id, da_id=da.id, persist=True)
+
+    row = ThreatScore.objects.get(scenario=sc, da=da, track=trk)
+    expected = frame_kinematics(
+        frames.frame_for(da), trk_lat=trk.lat, trk_lon=trk.lon, speed_mps=trk.speed_mps,
+        heading_deg=trk.heading_deg, weapon_range_km=10.0, precision="ellipsoidal")
+    assert (row.cpa_km, row.tcpa_s) == (expected.cpa_km, expected.tcpa_s)
+
+
+def _seed_board(n_tracks):
+    sc = create_scenario(f"Batch-{n_tracks}")
+    da = create_da(sc, radius_km=10.0)
+    tracks = create_tracks(sc, n_tracks)
+    for i, trk in enumerate(tracks):
+        _store_row(sc, da, trk)  # older duplicate is ignored
+        row = _store_row(sc, da, trk)
+        ThreatScore.objects.filter(pk=row.pk).update(
+            score=i / 100.0, computed_at=row.computed_at + timedelta(seconds=1))
+    return sc, da, tracks
+
+
+@pytest.mark.parametrize("n_tracks", [2, 25])
+def test_batch_breakdown_fixed_query_count(db, django_assert_num_queries, n_tracks):
+    sc, da, tracks = _seed_board(n_tracks)
+
+    with django_assert_num_queries(4):  # scenario, DA, params, rows
+        items = svc.get_score_breakdowns(scenario_id=sc.id, da_id=da.id)
+
+    assert len(items) == n_tracks
+    assert [it["score"] for it in items] == sorted(
+        (i / 100.0 for i in range(n_tracks)), reverse=True)
+
+    single = svc.get_score_breakdown(
+        scenario_id=sc.id, track_id=items[0]["track_id"], da_id=da.id)
+    for key in ("normalized", "weights", "contributions", "metrics"):
+        assert items[0][key] == pytest.approx(single[key])
+
+
+def test_batch_endpoint_subset_of_tracks(db):
+    sc, da, tracks = _seed_board(3)
+    url = reverse("tewa_api:score_breakdown_batch")
+    resp = APIClient().get(url, {
+        "scenario_id": sc.id, "da_id": da.id,
+        "track_ids": f"{tracks[0].track_id},{tracks[2].id}",
+    })
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["count"] == 2
+    assert {it["track_id"] for it in body["items"]} == {tracks[0].track_id, tracks[2].track_id}
+    assert APIClient().get(url, {"scenario_id": sc.id}).status_code == 422
+
+
+def test_export_csv_fallback_has_real_contributions(db):
+    from tewa.services.export_csv import iter_rows_for_threat_board
+
+    sc, da, _ = _seed_board(2)
+    header, *rows = list(iter_rows_for_threat_board(sc.id, da_id=da.id))
+    first = dict(zip(header, rows[0]))
+    assert float(first["norm_cpa"]) > 0.0
+    assert float(first["w_cpa"]) > 0.0
+    assert float(first["contrib_cpa"]) == pytest.approx(
+        float(first["w_cpa"]) * float(first["norm_cpa"]))
+
+    # Without a DA: one row per (DA, track) pair
+    _, *all_rows = list(iter_rows_for_threat_board(sc.id))
+    assert len(all_rows) == 2
@@ -0,0 +1,115 @@
+# tewa/tests/test_score_rollups.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from tewa.models import ThreatScore, ThreatScoreRollup
+from tewa.services import score_rollups
+from tewa.services.score_history import get_score_series
+from tewa.services.score_rollups import (
+    pick_resolution,
+    rebuild_rollups,
+    update_rollups,
+)
+from tewa.tests.factories import create_da, create_scenario, create_tracks
+
+T0 = datetime(2025, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+
+
+def _seed_history(n_minutes: int, step_s: int = 30):
+    sc = create_scenario("Rollup-Scenario")
+    da = create_da(sc)
+    trk = create_tracks(sc, 1)[0]
+    rows = []
+    for i in range(n_minutes * 60 // step_s):
+        ts = ThreatScore.objects.create(
+            scenario=sc, da=da, track=trk, score=(i % 10) / 10.0)
+        ts.computed_at = T0 + timedelta(seconds=i * step_s)
+        ts.save(update_fields=["computed_at"])
+        rows.append(ts)
+    return sc, da, trk, rows
+
+
+@pytest.mark.django_db
+def test_update_rollups_aggregates_and_merges_incrementally():
+    sc, da, trk, rows = _seed_history(n_minutes=2)  # 4 rows @ 30 s
+
+    # Two separate batches must merge into the same buckets
+    update_rollups(rows[:3])
+    update_rollups(rows[3:])
+
+    minute0 = ThreatScoreRollup.objects.get(
+        scenario=sc, da=da, track=trk, resolution_s=60, bucket_start=T0)
+    assert minute0.count == 2
+    assert minute0.score_min == 0.0 and minute0.score_max == 0.1
+    assert minute0.score_last == 0.1
+
+    hour = ThreatScoreRollup.objects.get(
+        scenario=sc, da=da, track=trk, resolution_s=3600)
+    assert hour.count == 4
+    assert hour.score_avg == pytest.approx((0.0 + 0.1 + 0.2 + 0.3) / 4)
+    assert hour.score_last == 0.3
+
+
+@pytest.mark.django_db
+def test_update_rollups_retries_when_a_concurrent_batch_opens_the_bucket(monkeypatch):
+    sc, da, trk, rows = _seed_history(n_minutes=2)
+    update_rollups(rows[2:])  # the other batch, committed just after our read
+
+    real = score_rollups._existing_rollups
+    reads = []
+
+    def stale_first_read(keys):
+        reads.append(len(keys))
+        return {} if len(reads) == 1 else real(keys)
+
+    # First insert hits the unique key; the retry finds and merges the buckets
+    monkeypatch.setattr(score_rollups, "_existing_rollups", stale_first_read)
+    update_rollups(rows[:2])
+    assert len(reads) == 2
+
+    hour = ThreatScoreRollup.objects.get(
+        scenario=sc, da=da, track=trk, resolution_s=3600)
+    assert hour.count == 4 and hour.score_last == 0.3
+
+
+def test_pick_resolution_prefers_coarsest_that_fills_width():
+    week = 7 * 24 * 3600
+    assert pick_resolution(week, 800) == 600
+    assert pick_resolution(week, 100) == 3600
+    assert pick_resolution(3600, 800) is None  # needs raw points
+    assert pick_resolution(week, None) is None
+
+
+@pytest.mark.django_db
+def test_get_score_series_uses_rollups_for_wide_spans():
+    sc, da, trk, rows = _seed_history(n_minutes=180, step_s=60)
+    assert rebuild_rollups(sc.id) == len(rows)
+
+    raw = get_score_series(sc.id, da.id, str(trk.id), None, None)
+    assert len(raw) == 180
+
+    # 3 h span at 100 px → 1 min buckets (10 min would give only 18)
+    series = get_score_series(sc.id, da.id, str(trk.id), None, None, width=100)
+    assert len(series) == 180
+
+    # 3 h span at 10 px → 10 min buckets
+    series = get_score_series(sc.id, da.id, str(trk.id), None, None, width=10)
+    assert len(series) == 18
+    assert series[0][0] == T0
+    assert series[0][1] == pytest.approx(0.45)
+
+
+@pytest.mark.django_db
+def test_single_pair_compute_updates_rollups():
+    from tewa.services.threat_compute import compute_score_for_track
+
+    sc = create_scenario("Rollup-Single")
+    da = create_da(sc)
+    trk = create_tracks(sc, 1)[0]
+
+    row = compute_score_for_track(sc, da, trk, {})
+
+    hour = ThreatScoreRollup.objects.get(
+        scenario=sc, da=da, track=trk, resolution_s=3600)
+    assert hour.count == 1 and hour.score_last == pytest.approx(row.score)
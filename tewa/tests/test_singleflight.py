@@ -0,0 +1,99 @@
+# tewa/tests/test_singleflight.py
+import threading
+import time
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tewa.models import ModelParams, ThreatScore
+from tewa.services import singleflight
+from tewa.tests.factories import create_da, create_scenario, create_tracks
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stats():
+    singleflight.reset_stats()
+
+
+def _run_concurrently(n, key, fn):
+    barrier = threading.Barrier(n)
+    results, errors = [], []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(singleflight.do(key, fn))
+        except Exception as e:  # collected for assertions
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(timeout=5)
+    return results, errors
+
+
+def test_concurrent_identical_calls_share_one_compute():
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"count": 3}
+
+    results, errors = _run_concurrently(5, singleflight.make_key("a", 1), slow)
+
+    assert not errors
+    assert len(calls) == 1
+    assert [r for r, _ in results] == [{"count": 3}] * 5
+    assert sum(shared for _, shared in results) == 4
+    stats = singleflight.stats()
+    assert stats["computed"] == 1 and stats["coalesced"] + stats["cached"] == 4
+    assert stats["inflight"] == 0
+
+
+def test_leader_error_reaches_followers_and_is_not_cached():
+    def boom():
+        time.sleep(0.2)
+        raise RuntimeError("engine down")
+
+    key = singleflight.make_key("b", 1)
+    results, errors = _run_concurrently(3, key, boom)
+    assert not results and len(errors) == 3
+
+    assert singleflight.do(key, lambda: "ok") == ("ok", False)
+
+
+def test_short_ttl_reuse_and_opt_out():
+    key = singleflight.make_key("c", 1)
+    assert singleflight.do(key, lambda: 1) == (1, False)
+    assert singleflight.do(key, lambda: 2) == (1, True)
+    assert singleflight.do(key, lambda: 3, ttl_s=0) == (3, False)
+
+
+def test_compute_at_coalesces_identical_requests(db):
+    sc = create_scenario("SF")
+    da = create_da(sc, radius_km=10.0)
+    create_tracks(sc, 2)
+    mp = ModelParams.objects.create(scenario=sc)
+    client = APIClient()
+    client.force_authenticate(get_user_model().objects.create_user("ops", password="x"))
+    body = {"scenario_id": sc.id, "when": "2025-01-01T00:00:00Z", "da_ids": [da.id]}
+    url = reverse("tewa_api:compute-at")
+
+    first = client.post(url, body, format="json").json()
+    second = client.post(url, body, format="json").json()
+    assert second["batch_id"] == first["batch_id"]
+    assert ThreatScore.objects.count() == first["count"] == 2
+
+    # New params version → not the same request any more
+    mp.w_cpa = 1.0
+    mp.save()
+    third = client.post(url, body, format="json").json()
+    assert third["batch_id"] != first["batch_id"]
+
+    stats = client.get(reverse("tewa_api:compute_stats")).json()["singleflight"]
+    assert stats["computed"] == 2 and stats["cached"] == 1
@@ -0,0 +1,68 @@
+# tewa/tests/test_synthetic.py
+import random
+from datetime import datetime, timezone
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from core.utils.geodesy import LatLon, haversine_distance_m
+from tewa.models import DefendedAsset, Scenario, Track, TrackSample
+from tewa.services.synthetic import SyntheticSpec, generate_scenario, iter_track_states
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _spec(**kw):
+    base = dict(name="Syn", n_das=3, n_tracks=20, samples_per_track=10,
+                seed=7, start=START, batch_size=64)
+    base.update(kw)
+    return SyntheticSpec(**base)
+
+
+def test_generates_requested_rows_in_bulk(db, django_assert_max_num_queries):
+    with django_assert_max_num_queries(20):
+        stats = generate_scenario(_spec())
+
+    sc = Scenario.objects.get(pk=stats["scenario_id"])
+    assert stats["tracks"] == Track.objects.filter(scenario=sc).count() == 20
+    assert stats["samples"] == TrackSample.objects.filter(track__scenario=sc).count() == 200
+    assert DefendedAsset.objects.filter(scenario=sc).count() == 3
+    assert sum(stats["patterns"].values()) == 20
+
+    # Track snapshot is the last sample
+    trk = Track.objects.filter(scenario=sc).first()
+    last = trk.samples.order_by("-t").first()
+    assert (trk.lat, trk.lon) == (last.lat, last.lon)
+
+
+def test_same_seed_same_data(db):
+    a = generate_scenario(_spec(name="A"))
+    b = generate_scenario(_spec(name="B"))
+
+    def rows(sid):
+        return list(TrackSample.objects.filter(track__scenario_id=sid)
+                    .order_by("track__track_id", "t")
+                    .values_list("track__track_id", "t", "lat", "lon", "heading_deg"))
+
+    assert rows(a["scenario_id"]) == rows(b["scenario_id"])
+
+
+def test_inbound_raids_close_on_a_da():
+    spec = _spec(n_tracks=5, samples_per_track=30, dt_s=10.0, mix={"inbound": 1.0})
+    das = [{"lat": 26.9, "lon": 72.0, "radius_km": 10.0}]
+    for pattern, states in iter_track_states(random.Random(1), spec, das):
+        da = LatLon(26.9, 72.0)
+        first = haversine_distance_m(LatLon(states[0].lat, states[0].lon), da)
+        last = haversine_distance_m(LatLon(states[-1].lat, states[-1].lon), da)
+        assert pattern == "inbound"
+        assert first - last == pytest.approx(29 * 10.0 * states[0].speed_mps, rel=0.01)
+
+
+def test_command_refuses_to_overwrite_without_replace(db):
+    call_command("seed_synthetic", "--name", "Cmd", "--das", "1", "--tracks", "2",
+                 "--samples", "3")
+    with pytest.raises(CommandError):
+        call_command("seed_synthetic", "--name", "Cmd")
+    call_command("seed_synthetic", "--name", "Cmd", "--tracks", "4", "--samples", "2",
+                 "--replace")
+    assert Track.objects.filter(scenario__name="Cmd").count() == 4
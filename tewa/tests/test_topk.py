@@ -0,0 +1,95 @@
+# tewa/tests/test_topk.py
+import math
+import random
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from tewa.models import ModelParams, Track, TrackSample
+from tewa.services import prefilter
+from tewa.services.kinematics import PRECISIONS, LocalFrame, frame_kinematics
+from tewa.services.scoring import _coerce_params, score_components_to_threat
+from tewa.services.threat_compute import calculate_scores_for_when
+from tewa.tests.factories import create_da, create_scenario
+
+
+def _world(name, n_tracks=60, seed=4, speeds=(0.0, 150.0, 300.0)):
+    rng = random.Random(seed)
+    sc = create_scenario(name)
+    ModelParams.objects.create(scenario=sc)
+    t0 = timezone.now()
+    das = [create_da(sc, name=f"DA{i}", lat=rng.uniform(-1, 1), lon=rng.uniform(-1, 1),
+                     radius_km=rng.uniform(3, 15)) for i in range(4)]
+    for i in range(n_tracks):
+        lat, lon, hdg = rng.uniform(-6, 6), rng.uniform(-6, 6), rng.uniform(0, 360)
+        if i % 5 == 0:  # a few inbound close in, so the top rows stand out
+            da = das[i % len(das)]
+            lat, lon = da.lat + rng.uniform(-0.3, 0.3), da.lon + rng.uniform(-0.3, 0.3)
+            hdg = math.degrees(math.atan2(da.lon - lon, da.lat - lat)) % 360.0
+        for dup in range(1 + (i % 7 == 0)):  # some identical tracks, to tie exactly
+            state = dict(lat=lat, lon=lon, alt_m=3000.0, heading_deg=hdg,
+                         speed_mps=rng.choice(speeds))
+            trk = Track.objects.create(scenario=sc, track_id=f"T{i}-{dup}", **state)
+            TrackSample.objects.create(track=trk, t=t0, **state)
+    return sc, das, t0
+
+
+def test_score_bound_never_below_exact_score():
+    rng = random.Random(21)
+    p = _coerce_params({"w_cpa": 0.4, "w_tcpa": 0.3, "w_tdb": 0.1, "w_twrp": 0.2})
+    bounders = [prefilter.score_bounder(p, steps) for steps in (1, 2, 8)]
+    for _ in range(2000):
+        f = LocalFrame.build(rng.uniform(-60, 60), rng.uniform(-150, 150), rng.uniform(1, 20))
+        lat, lon = f.lat + rng.uniform(-5, 5), f.lon + rng.uniform(-5, 5)
+        spd, hdg, wr = rng.choice([0.0, rng.uniform(1, 700)]), rng.uniform(0, 360), 25.0
+        d = prefilter.plane_dist_lb(prefilter.xyz(lat, lon), prefilter.xyz(f.lat, f.lon))
+        bound = min(b(d, spd, wr * 1000.0) for b in bounders)
+        bound = min(bound, bounders[0](d, spd, wr * 1000.0,
+                                       prefilter.heading_offset(lat, lon, hdg, f.lat, f.lon)))
+        for tier in PRECISIONS:
+            k = frame_kinematics(f, trk_lat=lat, trk_lon=lon, speed_mps=spd, heading_deg=hdg,
+                                 weapon_range_km=wr, precision=tier)
+            exact = score_components_to_threat(cpa_km=k.cpa_km, tcpa_s=k.tcpa_s, tdb_km=k.tdb_s,
+                                               twrp_s=k.twrp_s, params=p)
+            assert exact <= bound + 1e-12
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("k", [1, 3, 200])
+def test_top_k_matches_full_compute(k):
+    sc, das, when = _world(f"TopK-{k}")
+    full = calculate_scores_for_when(scenario=sc, when=when, das=das)
+
+    report: dict = {}
+    top = calculate_scores_for_when(scenario=sc, when=when, das=das, top_k=k, report=report)
+
+    expected = [r for r in full
+                if sum(1 for o in full[:full.index(r)] if o["da_name"] == r["da_name"]) < k]
+    assert top == expected
+    assert report["pairs"] == len(full) and report["scored"] + report["skipped"] == len(full)
+    if k < 10:
+        assert report["skipped"] > 0.5 * len(full)
+    with pytest.raises(ValueError):
+        calculate_scores_for_when(scenario=sc, when=when, das=das, top_k=0)
+
+
+@pytest.mark.django_db
+def test_calculate_scores_api_top_n(client):
+    sc, das, when = _world("TopK-API", n_tracks=20, speeds=(150.0, 300.0))
+    ModelParams.objects.filter(scenario=sc).update(geodesy_precision="spherical")
+    url = reverse("tewa_api:calculate_scores")
+    body = {"scenario_id": sc.pk, "when": when.isoformat(),
+            "da_ids": [d.pk for d in das], "weapon_range_km": 30}
+
+    full = client.post(url, body, content_type="application/json").json()
+    assert "pairs" not in full
+    resp = client.post(url, {**body, "top_n": 2}, content_type="application/json")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["top_n"] == 2 and len(data["threats"]) == 2 * len(das)
+    for da in das:
+        rows = [r for r in full["threats"] if r["da_name"] == da.name][:2]
+        assert [r for r in data["threats"] if r["da_name"] == da.name] == rows
+    assert client.post(url, {**body, "top_n": 0},
+                       content_type="application/json").status_code == 400
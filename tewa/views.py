@@ -15,15 +15,19 @@ from django.http import (
 )
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_POST
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (
+    api_view,
+    content_negotiation_class,
+    permission_classes,
+)
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
-from tewa.management.commands.compute_threats import (
-    Command,  # adjust import path if different
-)
-from tewa.models import DefendedAsset, Scenario, ThreatScore, Track
+from tewa.api.view_utils import ImageFormatNegotiation
+from tewa.models import ComputeJob, DefendedAsset, Scenario, ThreatScore, Track
+from tewa.services import compute_jobs
 from tewa.services.charting import render_score_history_png
-from tewa.services.score_history import get_score_series
+from tewa.services.charting_svg import render_score_history_svg
+from tewa.services.score_history import downsample_lttb, get_score_series
 
 from .forms import DefendedAssetForm, ScenarioParamsForm
 from .models import ModelParams
@@ -33,6 +37,16 @@ logger = logging.getLogger(__name__)
 
 # ---------- Home & Scenario pages ----------
 
+def _compute_inline(request, scenario: Scenario) -> None:
+    """Synchronous compute, still a recorded run under the scenario lock."""
+    job = compute_jobs.run_inline(ComputeJob.KIND_COMPUTE_SCENARIO, scenario.id,
+                                  params={"trigger": "html"})
+    if job.skipped:
+        messages.warning(request, f"Compute skipped: {job.error}")
+    elif job.status != "success":
+        messages.error(request, f"Compute job {job.pk} {job.status}: {job.error}")
+
+
 def home(request):
     scenarios = Scenario.objects.all().order_by("id")
     return render(request, "home.html", {"scenarios": scenarios})
@@ -48,8 +62,7 @@ def scenario_detail(request, scenario_id: int):
 
     # Handle "Compute Now" button submission
     if request.method == "POST":
-        cmd = Command()
-        cmd.handle(scenario_id=scenario.id)
+        _compute_inline(request, scenario)
         return redirect("tewa:scenario_detail", scenario_id=scenario.id)
 
     # Query all Defended Assets for this scenario
@@ -75,12 +88,13 @@ def scenario_detail(request, scenario_id: int):
 def compute_now_scenario(request, scenario_id: int):
     """HTML button handler that kicks off compute for a scenario."""
     scenario = get_object_or_404(Scenario, pk=scenario_id)
-    cmd = Command()
-
-    # If you want per-DA runs, modify this to filter by scenario_id
-    for da in DefendedAsset.objects.filter(scenario=scenario):
-        cmd.handle(scenario_id=scenario.id, da_id=da.id)
+    if request.POST.get("async"):
+        job = compute_jobs.submit_job(
+            ComputeJob.KIND_COMPUTE_SCENARIO, scenario.id, user=request.user)
+        messages.info(request, f"Compute job {job.pk} {job.status}.")
+        return redirect("tewa:scenario_detail", scenario_id=scenario.id)
 
+    _compute_inline(request, scenario)
     return redirect("tewa:scenario_detail", scenario_id=scenario.id)
 
 
@@ -239,6 +253,7 @@ def scenario_assumptions_view(request: HttpRequest, scenario_id: int) -> HttpRes
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticatedOrReadOnly])
+@content_negotiation_class(ImageFormatNegotiation)
 def score_history_png_view(request):
     try:
         scenario_id = int(request.GET["scenario_id"])
@@ -256,17 +271,28 @@ def score_history_png_view(request):
         height = int(request.GET.get("height", 300))
         smooth_q = request.GET.get("smooth")
         smooth = int(smooth_q) if smooth_q else None
+        max_points_q = request.GET.get("max_points")
+        max_points = int(max_points_q) if max_points_q not in (
+            None, "") else 2 * width
     except ValueError:
-        return HttpResponseBadRequest("width/height/smooth must be integers")
-
-    series = get_score_series(scenario_id, da_id, track_id, dt_from, dt_to)
+        return HttpResponseBadRequest("width/height/smooth/max_points must be integers")
+    if max_points < 0:
+        return HttpResponseBadRequest("max_points must be >= 0 (0 disables downsampling)")
+    fmt = request.GET.get("format", "png")
+    if fmt not in ("png", "svg"):
+        return HttpResponseBadRequest("format must be png or svg")
+
+    series = downsample_lttb(get_score_series(
+        scenario_id, da_id, track_id, dt_from, dt_to, width=width), max_points)
     if not series:
         raise Http404("No score history found")
 
-    png = render_score_history_png(
-        series, width=width, height=height, smooth=smooth)
-
-    resp = HttpResponse(png, content_type="image/png")
+    if fmt == "svg":
+        resp = HttpResponse(render_score_history_svg(
+            series, width=width, height=height, smooth=smooth), content_type="image/svg+xml")
+    else:
+        resp = HttpResponse(render_score_history_png(
+            series, width=width, height=height, smooth=smooth), content_type="image/png")
     last_ts = series[-1][0]
     if last_ts:
         resp["Last-Modified"] = last_ts.strftime("%a, %d %b %Y %H:%M:%S GMT")